@@ -16,7 +16,8 @@ import app.models_platform  # noqa: F401
 
 config = context.config
 
-if config.config_file_name is not None:
+# bootstrap.migrate runs alembic in-process and keeps the app's loggers
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
 database_url = os.getenv("DATABASE_URL")
@@ -0,0 +1,69 @@
+"""Persisted order totals on orders
+
+Revision ID: 002_order_totals
+Revises: 001_platform
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "002_order_totals"
+down_revision: Union[str, None] = "001_platform"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    ("gross_amount", sa.Numeric(15, 2)),
+    ("discount_amount", sa.Numeric(15, 2)),
+    ("net_amount", sa.Numeric(15, 2)),
+    ("selected_amount", sa.Numeric(15, 2)),
+    ("item_count", sa.Integer()),
+)
+
+
+def upgrade() -> None:
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("orders")}
+    for name, type_ in COLUMNS:
+        if name not in existing:
+            op.add_column("orders", sa.Column(name, type_, nullable=True))
+
+    # Backfill; same line value as app.services.order_totals
+    op.execute("""
+        UPDATE orders o SET
+            gross_amount = t.gross,
+            discount_amount = t.discount,
+            net_amount = t.gross - t.discount,
+            selected_amount = t.selected_net,
+            item_count = t.item_count
+        FROM (
+            SELECT order_id,
+                   ROUND(SUM(line_gross), 2) AS gross,
+                   ROUND(SUM(line_gross * COALESCE(discount_percent, 0) / 100), 2) AS discount,
+                   ROUND(SUM(CASE WHEN COALESCE(selected, TRUE)
+                                  THEN line_gross * (1 - COALESCE(discount_percent, 0) / 100) ELSE 0 END), 2)
+                       AS selected_net,
+                   COUNT(*) AS item_count
+            FROM (
+                SELECT order_id, selected, discount_percent,
+                       (CASE WHEN COALESCE(unit_price, 0) <> 0 THEN unit_price ELSE COALESCE(trade_price, 0) END)
+                       * (CASE WHEN COALESCE(total_quantity, 0) <> 0 THEN total_quantity
+                               ELSE quantity + COALESCE(free_goods, 0) END) AS line_gross
+                FROM order_items
+            ) lines
+            GROUP BY order_id
+        ) t
+        WHERE t.order_id = o.id AND o.net_amount IS NULL
+    """)
+    op.execute("""
+        UPDATE orders SET gross_amount = 0, discount_amount = 0, net_amount = 0,
+                          selected_amount = 0, item_count = 0
+        WHERE net_amount IS NULL
+    """)
+
+
+def downgrade() -> None:
+    for name, _ in reversed(COLUMNS):
+        op.drop_column("orders", name)
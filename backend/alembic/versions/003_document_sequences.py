@@ -0,0 +1,30 @@
+"""Document number sequences
+
+Revision ID: 003_document_sequences
+Revises: 002_order_totals
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "003_document_sequences"
+down_revision: Union[str, None] = "002_order_totals"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Counters are seeded from existing document numbers on first use
+    if "document_sequences" not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            "document_sequences",
+            sa.Column("scope", sa.String(100), primary_key=True),
+            sa.Column("last_value", sa.BigInteger(), nullable=False, server_default="0"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("document_sequences")
@@ -0,0 +1,39 @@
+"""Dashboard KPI counters
+
+Revision ID: 004_dashboard_kpis
+Revises: 003_document_sequences
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "004_dashboard_kpis"
+down_revision: Union[str, None] = "003_document_sequences"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = (
+    "orders_today", "pending_validation", "validated", "assigned",
+    "fully_delivered", "partially_delivered", "postponed", "pending_collection",
+)
+
+
+def upgrade() -> None:
+    # Rows are built from orders on the first dashboard read
+    if "dashboard_kpis" not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            "dashboard_kpis",
+            sa.Column("scope", sa.String(50), primary_key=True),
+            sa.Column("orders_date", sa.Date(), nullable=True),
+            *[sa.Column(name, sa.Integer(), nullable=False, server_default="0") for name in COUNTERS],
+            sa.Column("total_stock", sa.Numeric(18, 2), nullable=False, server_default="0"),
+            sa.Column("rebuilt_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("dashboard_kpis")
@@ -0,0 +1,83 @@
+"""Index pack for the order lifecycle query patterns
+
+Revision ID: 005_order_indexes
+Revises: 004_dashboard_kpis
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "005_order_indexes"
+down_revision: Union[str, None] = "004_dashboard_kpis"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, partial predicate); same as the models' __table_args__
+INDEXES = (
+    ("ix_orders_loading_number", "orders", ("loading_number",), "loading_number IS NOT NULL"),
+    ("ix_orders_route_code_loaded", "orders", ("route_code", "loaded"), None),
+    ("ix_orders_depot_code_created_at", "orders", ("depot_code", "created_at"), None),
+    ("ix_orders_delivery_date", "orders", ("delivery_date",), None),
+    ("ix_orders_assigned_to", "orders", ("assigned_to", "assignment_date"), "assigned_to IS NOT NULL"),
+    ("ix_orders_pending_validation", "orders", ("created_at",), "validated = false"),
+    ("ix_orders_pending_print", "orders", ("created_at",), "validated = true AND printed = false"),
+    ("ix_orders_collection_approval", "orders", ("collection_source", "collection_status"),
+     "collection_approved = false"),
+    ("ix_order_items_order_id", "order_items", ("order_id",), None),
+    ("ix_product_item_stock_product_depot", "product_item_stock", ("product_id", "depot_id"), None),
+    ("ix_product_item_stock_details_item_code", "product_item_stock_details", ("item_code",), None),
+    ("ix_stock_details_fefo", "product_item_stock_details", ("item_code", "expiry_date"), "available_quantity > 0"),
+    ("ix_stock_details_expiry", "product_item_stock_details", ("expiry_date",), "available_quantity > 0"),
+    ("ix_order_batch_allocations_order_status", "order_batch_allocations", ("order_id", "allocation_status"), None),
+    ("ix_sync_queue_status_created_at", "sync_queue", ("status", "created_at"), None),
+    ("ix_collection_transactions_order_id", "collection_transactions", ("order_id",), None),
+)
+
+# Single-column indexes the pack covers: boolean flags (one value matches
+# most rows) and leading columns of the new composites. Every write paid for them.
+SUPERSEDED = (
+    ("idx_orders_validated", "orders", ("validated",)),
+    ("idx_orders_printed", "orders", ("printed",)),
+    ("idx_orders_loaded", "orders", ("loaded",)),
+    ("idx_orders_depot_code", "orders", ("depot_code",)),
+    ("idx_orders_assigned_to", "orders", ("assigned_to",)),
+    ("ix_order_batch_allocations_order_id", "order_batch_allocations", ("order_id",)),
+)
+
+
+def _existing(inspector, table):
+    """Index name -> columns, or None when the table does not exist."""
+    if table not in inspector.get_table_names():
+        return None
+    return {ix["name"]: tuple(ix["column_names"]) for ix in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing = {table: _existing(inspector, table) for table in {ix[1] for ix in INDEXES}}
+    # CONCURRENTLY keeps the tables writable while the indexes build
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            indexes = existing[table]
+            if indexes is None or name in indexes:
+                continue
+            if where is None and columns in indexes.values():
+                continue  # an older index under another name already covers it
+            op.create_index(
+                name, table, list(columns), if_not_exists=True, postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+            )
+        for name, table, _ in SUPERSEDED:
+            if existing.get(table) and name in existing[table]:
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in SUPERSEDED:
+            op.create_index(name, table, list(columns), if_not_exists=True, postgresql_concurrently=True)
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
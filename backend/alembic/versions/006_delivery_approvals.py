@@ -0,0 +1,37 @@
+"""Idempotency records for delivery approvals
+
+Revision ID: 006_delivery_approvals
+Revises: 005_order_indexes
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "006_delivery_approvals"
+down_revision: Union[str, None] = "005_order_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if "delivery_approvals" not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            "delivery_approvals",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("idempotency_key", sa.String(100), nullable=False),
+            sa.Column("loading_number", sa.String(50), nullable=False),
+            sa.Column("approved_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("response_json", postgresql.JSONB(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_delivery_approvals_id", "delivery_approvals", ["id"])
+        op.create_index("ix_delivery_approvals_idempotency_key", "delivery_approvals", ["idempotency_key"], unique=True)
+        op.create_index("ix_delivery_approvals_loading_number", "delivery_approvals", ["loading_number"])
+
+
+def downgrade() -> None:
+    op.drop_table("delivery_approvals")
@@ -0,0 +1,51 @@
+"""Barcode scan sessions for assigned order lists
+
+Revision ID: 007_scan_sessions
+Revises: 006_delivery_approvals
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "007_scan_sessions"
+down_revision: Union[str, None] = "006_delivery_approvals"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    if "scan_sessions" not in tables:
+        op.create_table(
+            "scan_sessions",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("employee_id", sa.Integer(), sa.ForeignKey("employees.id"), nullable=False),
+            sa.Column("vehicle_id", sa.Integer(), sa.ForeignKey("vehicles.id"), nullable=False),
+            sa.Column("status", sa.String(20), nullable=False, server_default="OPEN"),
+            sa.Column("loading_number", sa.String(50), nullable=True),
+            sa.Column("created_by", sa.Integer(), sa.ForeignKey("employees.id"), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.Column("committed_at", sa.DateTime(), nullable=True),
+        )
+    if "scan_session_memos" not in tables:
+        op.create_table(
+            "scan_session_memos",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(
+                "session_id", sa.String(36), sa.ForeignKey("scan_sessions.id", ondelete="CASCADE"), nullable=False,
+            ),
+            sa.Column("memo_number", sa.String(50), nullable=False),
+            sa.Column("order_id", sa.Integer(), sa.ForeignKey("orders.id"), nullable=False),
+            sa.Column("scanned_at", sa.DateTime(), nullable=True),
+            sa.UniqueConstraint("session_id", "memo_number", name="uq_scan_session_memo"),
+        )
+        op.create_index("ix_scan_session_memos_id", "scan_session_memos", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("scan_session_memos")
+    op.drop_table("scan_sessions")
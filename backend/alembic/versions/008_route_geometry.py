@@ -0,0 +1,74 @@
+"""Stored route geometry: stop leg and cumulative distances, route totals
+
+Revision ID: 008_route_geometry
+Revises: 007_scan_sessions
+Create Date: 2026-10-17
+
+"""
+import math
+from itertools import groupby
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "008_route_geometry"
+down_revision: Union[str, None] = "007_scan_sessions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    ("routes", "distance_km"),
+    ("route_stops", "leg_km"),
+    ("route_stops", "cumulative_km"),
+)
+
+
+def _haversine_km(a, b) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(h))
+
+
+def _backfill(bind) -> None:
+    """Same legs as app.services.route_geometry, in plain Python."""
+    stops = bind.execute(sa.text(
+        "SELECT id, route_id, latitude, longitude FROM route_stops ORDER BY route_id, stop_sequence, id"
+    )).fetchall()
+    stop_rows, route_rows = [], {}
+    for route_id, route_stops in groupby(stops, key=lambda s: s.route_id):
+        previous, total = None, 0.0
+        for stop in route_stops:
+            point = (float(stop.latitude), float(stop.longitude)) if stop.latitude and stop.longitude else None
+            leg = round(_haversine_km(previous, point), 4) if previous and point else 0.0
+            total = round(total + leg, 4)
+            stop_rows.append({"_id": stop.id, "leg": leg, "cumulative": total})
+            previous = point
+        route_rows[route_id] = total
+    if stop_rows:
+        bind.execute(
+            sa.text("UPDATE route_stops SET leg_km = :leg, cumulative_km = :cumulative WHERE id = :_id"), stop_rows,
+        )
+    bind.execute(sa.text("UPDATE routes SET distance_km = 0"))
+    if route_rows:
+        bind.execute(
+            sa.text("UPDATE routes SET distance_km = :total WHERE id = :_id"),
+            [{"_id": route_id, "total": total} for route_id, total in route_rows.items()],
+        )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+    if "routes" not in tables or "route_stops" not in tables:
+        return
+    for table, name in COLUMNS:
+        if name not in {c["name"] for c in inspector.get_columns(table)}:
+            op.add_column(table, sa.Column(name, sa.Numeric(12, 4), nullable=True))
+    _backfill(bind)
+
+
+def downgrade() -> None:
+    for table, name in COLUMNS:
+        op.drop_column(table, name)
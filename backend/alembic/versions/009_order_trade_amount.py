@@ -0,0 +1,38 @@
+"""Persisted trade value on orders (MIS memo total)
+
+Revision ID: 009_order_trade_amount
+Revises: 008_route_geometry
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "009_order_trade_amount"
+down_revision: Union[str, None] = "008_route_geometry"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("orders")}
+    if "trade_amount" not in existing:
+        op.add_column("orders", sa.Column("trade_amount", sa.Numeric(15, 2), nullable=True))
+
+    # Backfill; same value as app.services.order_totals
+    op.execute("""
+        UPDATE orders o SET trade_amount = t.trade
+        FROM (
+            SELECT order_id, ROUND(SUM(COALESCE(trade_price, 0) * COALESCE(total_quantity, 0)), 2) AS trade
+            FROM order_items
+            GROUP BY order_id
+        ) t
+        WHERE t.order_id = o.id AND o.trade_amount IS NULL
+    """)
+    op.execute("UPDATE orders SET trade_amount = 0 WHERE trade_amount IS NULL")
+
+
+def downgrade() -> None:
+    op.drop_column("orders", "trade_amount")
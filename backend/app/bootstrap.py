@@ -0,0 +1,93 @@
+"""Schema and seed work, run once per deploy instead of in every worker.
+
+``python manage.py migrate`` does the following:
+
+- creates missing tables;
+- upgrades PostgreSQL to the Alembic head (other databases are only
+  created);
+- seeds permissions and default validation rules;
+- backfills missing order totals.
+
+Every step is idempotent. Development servers still run it on startup
+(``STARTUP_MIGRATIONS``, on unless ``ENVIRONMENT`` is production).
+Production workers only check that the database is at the Alembic head, so
+several of them can start at once without racing on DDL.
+"""
+import logging
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.database import Base, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parents[1] / "alembic.ini"
+
+
+def alembic_config(engine: Engine) -> Config:
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    config.set_main_option("sqlalchemy.url", engine.url.render_as_string(hide_password=False).replace("%", "%%"))
+    # Run inside the server: keep its logging setup (alembic.ini would disable uvicorn's loggers)
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def head_revision(engine: Engine) -> Optional[str]:
+    return ScriptDirectory.from_config(alembic_config(engine)).get_current_head()
+
+
+def current_revision(engine: Engine) -> Optional[str]:
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except SQLAlchemyError:
+        return None
+
+
+def seed(db) -> None:
+    from app.core.permissions import PERMISSIONS
+    from app.models_platform import Permission
+    from app.services.order_validation_service import OrderValidationService
+
+    existing = {code for (code,) in db.query(Permission.code)}
+    for code, name, module in PERMISSIONS:
+        if code not in existing:
+            db.add(Permission(code=code, name=name, module=module))
+    OrderValidationService.ensure_default_rules(db)
+    db.commit()
+
+
+def migrate(engine: Engine) -> None:
+    """Bring the schema and seed data up to date."""
+    from app.services.order_totals import OrderTotalsService
+
+    import app.models_platform  # noqa: F401  (register platform tables)
+
+    Base.metadata.create_all(bind=engine)
+    if engine.dialect.name == "postgresql":
+        command.upgrade(alembic_config(engine), "head")
+    db = SessionLocal(bind=engine)
+    try:
+        seed(db)
+        OrderTotalsService.backfill(db, only_missing=True)
+    finally:
+        db.close()
+
+
+def check_schema(engine: Engine) -> bool:
+    """Warn (without writing anything) when the database is behind the code."""
+    if engine.dialect.name != "postgresql":
+        return True
+    current, head = current_revision(engine), head_revision(engine)
+    if current != head:
+        logger.warning("Database is at revision %s but the code expects %s; run `python manage.py migrate`", current, head)
+        return False
+    return True
@@ -1,4 +1,4 @@
-"""HTTP middleware: audit all successful mutating API requests."""
+"""HTTP middleware: audit all successful mutating API requests through the batched audit writer."""
 import logging
 from typing import Optional
 
@@ -8,9 +8,8 @@ from starlette.responses import Response
 
 from app.auth import verify_token
 from app.core.deps import get_client_ip
-from app.database import SessionLocal
-from app.models import Employee
 from app.services.audit_service import AuditService
+from app.services.audit_writer import USER_EMAIL_KEY, audit_writer
 
 logger = logging.getLogger(__name__)
 
@@ -18,20 +17,13 @@ SKIP_EXACT = {"/", "/health", "/api/docs", "/api/openapi.json", "/docs", "/redoc
 SKIP_PREFIXES = ("/api/auth/login", "/api/auth/signup", "/api/auth/refresh")
 
 
-def _parse_user_id(request: Request, db) -> tuple[Optional[Employee], Optional[str]]:
+def _token_subject(request: Request) -> Optional[str]:
+    """Email from the bearer token, for endpoints that never resolved a user."""
     auth = request.headers.get("Authorization", "")
     if not auth.startswith("Bearer "):
-        return None, None
-    token = auth[7:]
-    payload = verify_token(token)
-    if not payload:
-        return None, None
-    email = payload.get("sub")
-    if not email:
-        return None, None
-    user = db.query(Employee).filter(Employee.email == email).first()
-    device_id = request.headers.get("X-Device-Id")
-    return user, device_id
+        return None
+    payload = verify_token(auth[7:])
+    return payload.get("sub") if payload else None
 
 
 def _entity_from_path(path: str) -> tuple[str, str]:
@@ -61,17 +53,15 @@ class AuditWriteMiddleware(BaseHTTPMiddleware):
         if response.status_code < 200 or response.status_code >= 300:
             return response
 
-        db = SessionLocal()
         try:
-            user, device_id = _parse_user_id(request, db)
             entity_type, entity_id = _entity_from_path(path)
-            action = f"HTTP_{request.method}"
-            AuditService.log_action(
-                db,
+            # require_auth leaves the resolved user on the request
+            actor = getattr(request.state, "audit_actor", None)
+            values = AuditService.entry_values(
                 entity_type=entity_type,
                 entity_id=entity_id,
-                action=action,
-                user=user,
+                action=f"HTTP_{request.method}",
+                actor=actor,
                 new_value={
                     "path": path,
                     "method": request.method,
@@ -80,13 +70,12 @@ class AuditWriteMiddleware(BaseHTTPMiddleware):
                 },
                 ip_address=get_client_ip(request),
                 user_agent=request.headers.get("User-Agent"),
-                device_id=device_id,
+                device_id=request.headers.get("X-Device-Id"),
             )
-            db.commit()
+            if actor is None:
+                values[USER_EMAIL_KEY] = _token_subject(request)
+            await audit_writer.submit(values)
         except Exception as exc:
             logger.warning("Audit middleware failed for %s: %s", path, exc)
-            db.rollback()
-        finally:
-            db.close()
 
         return response
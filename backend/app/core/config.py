@@ -18,6 +18,10 @@ class Settings:
         )
         self.require_auth: bool = os.getenv("REQUIRE_AUTH", "true").lower() == "true"
         self.integration_sandbox: bool = os.getenv("INTEGRATION_SANDBOX", "true").lower() == "true"
+        # Schema and seed work in the lifespan; production runs `manage.py migrate` once instead.
+        self.startup_migrations: bool = os.getenv(
+            "STARTUP_MIGRATIONS", "false" if self.is_production else "true"
+        ).lower() == "true"
 
     @property
     def is_production(self) -> bool:
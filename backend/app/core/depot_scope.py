@@ -4,6 +4,7 @@ from typing import Optional, TypeVar
 from sqlalchemy.orm import Query
 from sqlalchemy.sql.elements import ColumnElement
 
+from app.core.principal import principal_cache
 from app.models import Depot, Employee
 
 T = TypeVar("T")
@@ -12,14 +13,20 @@ T = TypeVar("T")
 def user_depot_code(db, user: Employee) -> Optional[str]:
     if not user or not user.depot_id:
         return None
-    depot = db.query(Depot).filter(Depot.id == user.depot_id).first()
-    return depot.code if depot else None
+    return principal_cache.depot_code(db, user.depot_id)
 
 
 def is_admin(user: Employee) -> bool:
     return (user.role or "").lower() == "admin"
 
 
+def depot_cache_scope(user: Employee) -> Optional[int]:
+    """Depot id that scopes a user's cached lists; None for admins and users without a depot."""
+    if is_admin(user) or not user or not user.depot_id:
+        return None
+    return user.depot_id
+
+
 def apply_depot_code_filter(
     query: Query,
     user: Employee,
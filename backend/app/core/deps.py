@@ -1,5 +1,5 @@
 """FastAPI security dependencies: auth, RBAC, depot access."""
-from typing import Callable, Optional
+from typing import Callable, FrozenSet, Optional
 
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
@@ -8,8 +8,10 @@ from sqlalchemy.orm import Session
 from app.auth import verify_token
 from app.core.config import get_settings
 from app.core.permissions import permissions_for_role
+from app.core.principal import principal_cache, principal_for
 from app.database import get_db
 from app.models import Employee
+from app.services.audit_service import actor_fields
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="/api/auth/login",
@@ -29,7 +31,23 @@ def _forbidden_exception(detail: str = "Insufficient permissions") -> HTTPExcept
     return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
 
 
+def _remember(request: Request, user: Optional[Employee]) -> Optional[Employee]:
+    """Keep the resolved principal on the request for permission checks, depot scoping and audit."""
+    if user is not None:
+        principal_for(request, user)
+        request.state.audit_actor = actor_fields(user)
+    return user
+
+
+def _permissions(request: Request, user: Employee) -> FrozenSet[str]:
+    principal = getattr(request.state, "principal", None)
+    if principal is not None and principal.user_id == user.id:
+        return principal.permissions
+    return frozenset(permissions_for_role(user.role or "user"))
+
+
 async def get_current_user_optional(
+    request: Request,
     token: Optional[str] = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ) -> Optional[Employee]:
@@ -41,10 +59,11 @@ async def get_current_user_optional(
     email = payload.get("sub")
     if not email:
         return None
-    return db.query(Employee).filter(Employee.email == email).first()
+    return _remember(request, principal_cache.user(db, email))
 
 
 async def get_current_user(
+    request: Request,
     token: Optional[str] = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ) -> Employee:
@@ -53,7 +72,7 @@ async def get_current_user(
         # Dev bypass: return first admin or any active user
         user = db.query(Employee).filter(Employee.is_active == True).first()
         if user:
-            return user
+            return _remember(request, user)
     if not token:
         raise _credentials_exception("Authentication required")
     payload = verify_token(token)
@@ -62,10 +81,10 @@ async def get_current_user(
     email = payload.get("sub")
     if not email:
         raise _credentials_exception()
-    user = db.query(Employee).filter(Employee.email == email).first()
+    user = principal_cache.user(db, email)
     if user is None:
         raise _credentials_exception("User not found")
-    return user
+    return _remember(request, user)
 
 
 async def require_auth(user: Employee = Depends(get_current_user)) -> Employee:
@@ -90,9 +109,8 @@ def require_role(*roles: str) -> Callable:
 
 
 def require_permission(permission_code: str) -> Callable:
-    async def _checker(user: Employee = Depends(require_auth)) -> Employee:
-        perms = permissions_for_role(user.role or "user")
-        if permission_code not in perms:
+    async def _checker(request: Request, user: Employee = Depends(require_auth)) -> Employee:
+        if permission_code not in _permissions(request, user):
             raise _forbidden_exception(f"Missing permission: {permission_code}")
         return user
 
@@ -102,9 +120,8 @@ def require_permission(permission_code: str) -> Callable:
 def require_any_permission(*permission_codes: str) -> Callable:
     codes = set(permission_codes)
 
-    async def _checker(user: Employee = Depends(require_auth)) -> Employee:
-        perms = permissions_for_role(user.role or "user")
-        if not codes.intersection(perms):
+    async def _checker(request: Request, user: Employee = Depends(require_auth)) -> Employee:
+        if not codes.intersection(_permissions(request, user)):
             raise _forbidden_exception(f"Missing one of permissions: {', '.join(codes)}")
         return user
 
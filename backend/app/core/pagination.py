@@ -0,0 +1,156 @@
+"""Keyset (cursor) pagination and NDJSON streaming for list endpoints.
+
+A cursor encodes the sort-key values of the last row of a page; the next page
+starts strictly after it, so pages stay stable and cheap however deep the
+client scrolls. The last sort key must be unique (normally the primary key).
+"""
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, false, or_
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.elements import ColumnElement
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass(frozen=True)
+class SortKey:
+    column: Any  # mapped attribute, e.g. models.Order.created_at
+    descending: bool = False
+
+    def value(self, row: Any) -> Any:
+        return getattr(row, self.column.key)
+
+    def order_by(self) -> ColumnElement:
+        expr = self.column.desc() if self.descending else self.column.asc()
+        return expr.nullslast()
+
+    def after(self, value: Any) -> ColumnElement:
+        """Rows strictly after ``value`` in this key's order (nulls last)."""
+        if value is None:
+            return false()
+        beyond = self.column < value if self.descending else self.column > value
+        return or_(beyond, self.column.is_(None))
+
+    def equal(self, value: Any) -> ColumnElement:
+        return self.column.is_(None) if value is None else self.column == value
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    if hasattr(value, "value"):  # Enum
+        return value.value
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "n" in value:
+            return Decimal(value["n"])
+    return value
+
+
+def encode_cursor(keys: Sequence[SortKey], row: Any) -> str:
+    payload = json.dumps([_encode_value(k.value(row)) for k in keys], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(keys: Sequence[SortKey], cursor: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = [_decode_value(v) for v in json.loads(base64.urlsafe_b64decode(padded))]
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+def apply_keyset(query: Query, keys: Sequence[SortKey], cursor: Optional[str]) -> Query:
+    """Order ``query`` by ``keys`` and, given a cursor, start after it."""
+    query = query.order_by(None).order_by(*(k.order_by() for k in keys))
+    if not cursor:
+        return query
+    values = decode_cursor(keys, cursor)
+    branches = []
+    for i, key in enumerate(keys):
+        prefix = [keys[j].equal(values[j]) for j in range(i)]
+        branches.append(and_(*prefix, key.after(values[i])))
+    return query.filter(or_(*branches))
+
+
+def paginate(
+    query: Query,
+    keys: Sequence[SortKey],
+    cursor: Optional[str],
+    limit: Optional[int],
+) -> Tuple[List[Any], Optional[str]]:
+    """One page of rows and the cursor for the next page (None on the last page)."""
+    limit = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    rows = apply_keyset(query, keys, cursor).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(keys, rows[-1])
+
+
+def fetch_page(
+    query: Query,
+    keys: Sequence[SortKey],
+    cursor: Optional[str],
+    limit: Optional[int],
+) -> Tuple[List[Any], Optional[str]]:
+    """Like ``paginate``, but without ``limit`` or ``cursor`` returns every row (legacy behaviour)."""
+    if limit or cursor:
+        return paginate(query, keys, cursor, limit)
+    return apply_keyset(query, keys, None).all(), None
+
+
+def cursor_headers(next_cursor: Optional[str]) -> dict:
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+
+
+def iter_rows(query: Query, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Any]:
+    """Iterate a query through a server-side cursor, ``chunk_size`` rows at a time."""
+    return iter(query.yield_per(chunk_size))
+
+
+def ndjson_response(
+    db: Session,
+    rows: Union[Query, Iterable[Any]],
+    serialize: Callable[[Any], Any],
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> StreamingResponse:
+    """Stream ``serialize(row)`` as one JSON document per line.
+
+    A query is fetched lazily from a server-side cursor, so memory does not
+    grow with the result size. The session is closed once the stream ends.
+    """
+    def generate() -> Iterator[bytes]:
+        try:
+            source = iter_rows(rows, chunk_size) if isinstance(rows, Query) else rows
+            for row in source:
+                yield (json.dumps(serialize(row), default=str) + "\n").encode()
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
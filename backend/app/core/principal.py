@@ -0,0 +1,143 @@
+"""Principal resolution: the authenticated user and their permissions, once per request.
+
+``get_current_user`` stores a ``Principal`` on ``request.state``. Users are
+also cached per process by token subject for ``PRINCIPAL_CACHE_TTL_SECONDS``
+as detached copies, merged into the request session without a query, and
+depot codes by depot id for depot scoping. An employee or depot write drops
+the affected entries on commit (session hooks below); other workers see it
+once the TTL expires.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import FrozenSet, Iterable, Optional, Set
+
+from fastapi import Request
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.permissions import permissions_for_role
+from app.models import Depot, Employee
+
+DIRTY_KEY = "principal_dirty_emails"
+ALL_PRINCIPALS = "*"
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    email: Optional[str]
+    role: str
+    depot_id: Optional[int]
+    permissions: FrozenSet[str]
+
+
+def _detached_copy(user: Employee) -> Employee:
+    """Column values of ``user`` on a new detached instance, safe to share between sessions."""
+    copy = Employee(**{attr.key: getattr(user, attr.key) for attr in inspect(Employee).column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+class PrincipalCache:
+    """Users by token subject and depot codes by depot id, both with a short TTL."""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None) -> None:
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries or int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+        self._lock = threading.Lock()
+        self._users: "OrderedDict[str, tuple]" = OrderedDict()
+        self._depot_codes: dict = {}
+
+    def _fresh(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at <= self.ttl_seconds
+
+    def user(self, db: Session, email: str) -> Optional[Employee]:
+        """The employee with ``email``, attached to ``db``; queries only on a miss."""
+        with self._lock:
+            entry = self._users.get(email)
+            if entry is not None and not self._fresh(entry[0]):
+                del self._users[email]
+                entry = None
+            if entry is not None:
+                self._users.move_to_end(email)
+        if entry is not None:
+            return db.merge(entry[1], load=False)
+        user = db.query(Employee).filter(Employee.email == email).first()
+        if user is not None:
+            copy = _detached_copy(user)
+            with self._lock:
+                self._users[email] = (time.monotonic(), copy)
+                self._users.move_to_end(email)
+                while len(self._users) > self.max_entries:
+                    self._users.popitem(last=False)
+        return user
+
+    def depot_code(self, db: Session, depot_id: Optional[int]) -> Optional[str]:
+        if not depot_id:
+            return None
+        with self._lock:
+            entry = self._depot_codes.get(depot_id)
+        if entry is not None and self._fresh(entry[0]):
+            return entry[1]
+        code = db.query(Depot.code).filter(Depot.id == depot_id).scalar()
+        with self._lock:
+            self._depot_codes[depot_id] = (time.monotonic(), code)
+        return code
+
+    def invalidate(self, emails: Optional[Iterable[str]] = None) -> None:
+        """Drop cached users for ``emails`` (everything, depot codes included, when None)."""
+        with self._lock:
+            if emails is None or ALL_PRINCIPALS in emails:
+                self._users.clear()
+                self._depot_codes.clear()
+                return
+            for email in emails:
+                self._users.pop(email, None)
+
+
+principal_cache = PrincipalCache()
+
+
+def principal_for(request: Request, user: Employee) -> Principal:
+    """The request's principal, built on first use."""
+    principal = getattr(request.state, "principal", None)
+    if principal is None or principal.user_id != user.id:
+        principal = Principal(
+            user_id=user.id,
+            email=user.email,
+            role=user.role or "user",
+            depot_id=user.depot_id,
+            permissions=frozenset(permissions_for_role(user.role or "user")),
+        )
+        request.state.principal = principal
+    return principal
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_writes(session: Session, flush_context) -> None:
+    touched: Set[str] = set()
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, Employee):
+            history = inspect(obj).attrs.email.history
+            touched.update(e for e in (*history.added, *history.deleted, *history.unchanged) if e)
+        elif isinstance(obj, Depot) and obj not in session.new:
+            touched.add(ALL_PRINCIPALS)
+    if touched:
+        session.info.setdefault(DIRTY_KEY, set()).update(touched)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    touched = session.info.pop(DIRTY_KEY, None)
+    if touched:
+        principal_cache.invalidate(touched)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_writes(session: Session) -> None:
+    session.info.pop(DIRTY_KEY, None)
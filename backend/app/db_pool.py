@@ -0,0 +1,240 @@
+"""Connection pool sizing, statement timeouts and pool metrics.
+
+Pools are sized from a connection budget: ``DB_MAX_CONNECTIONS`` (default
+90, under PostgreSQL's default ``max_connections`` of 100) is shared by the
+``WEB_CONCURRENCY`` worker processes (gunicorn.conf.py exports its worker
+count; 1 otherwise). A quarter of each worker's share goes to the async
+engine, the rest to the sync engine, capped at the worker threadpool
+(``THREADPOOL_SIZE``, which also sets Starlette's limit for sync handlers).
+The replica engine is sized like the sync engine against the replica's own
+``max_connections``. ``DB_POOL_SIZE``/``DB_MAX_OVERFLOW`` and
+``DB_ASYNC_POOL_SIZE``/``DB_ASYNC_MAX_OVERFLOW`` override the split. Half of
+each share is kept open, the rest opened under load. A thread that finds
+the pool empty waits up to ``DB_POOL_TIMEOUT_SECONDS``. Connections are
+replaced after ``DB_POOL_RECYCLE_SECONDS``.
+
+Statements time out per route class (``STATEMENT_TIMEOUTS``): ``get_db``
+sessions use the default, ``get_read_db`` sessions the longer report limit.
+The default is set once per connection. Other classes use ``SET LOCAL`` at
+the start of each transaction.
+
+``DB_PGBOUNCER=true`` is for PgBouncer in transaction mode:
+
+- PgBouncer pools the connections, so the app does not (``NullPool``);
+- no startup options are sent, since PgBouncer rejects them;
+- every timeout uses ``SET LOCAL``, which lasts one transaction.
+
+The async engine (``get_async_db``, asyncpg) serves handlers on the event
+loop rather than the threadpool and has its own, smaller pool. Its timeout
+is sent as a server setting.
+
+``pool_metrics`` reports per engine the connections checked out, the
+overflow in use, the checkouts that had to wait and how long they waited
+(``/health/db``).
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+def pool_budget(max_connections: int, workers: int, threads: int) -> Dict[str, int]:
+    """Per-worker pool sizes that keep ``workers`` processes within ``max_connections``."""
+    share = max(4, max_connections // max(1, workers))
+    async_total = max(2, share // 4)
+    sync_total = max(2, min(threads, share - async_total))
+    return {
+        "pool_size": sync_total - sync_total // 2,
+        "max_overflow": sync_total // 2,
+        "async_pool_size": async_total - async_total // 2,
+        "async_max_overflow": async_total // 2,
+    }
+
+
+WORKER_THREADS = int(os.getenv("THREADPOOL_SIZE", "40"))
+MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "90"))
+WEB_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+_budget = pool_budget(MAX_CONNECTIONS, WEB_WORKERS, WORKER_THREADS)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(_budget["pool_size"])))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", str(_budget["max_overflow"])))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+# The async engine serves the event loop, not the threadpool.
+ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", str(_budget["async_pool_size"])))
+ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", str(_budget["async_max_overflow"])))
+# Checkouts that waited longer than this count as waits.
+WAIT_THRESHOLD = 0.005
+
+STATEMENT_TIMEOUTS: Dict[str, int] = {
+    "default": int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000")),
+    "report": int(os.getenv("DB_REPORT_STATEMENT_TIMEOUT_MS", "120000")),
+}
+STATEMENT_CLASS_KEY = "statement_class"
+
+
+class PoolMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._engines: Dict[str, Engine] = {}
+        self._counts: Dict[str, Dict[str, float]] = {}
+
+    def register(self, name: str, engine: Engine) -> None:
+        with self._lock:
+            self._engines[name] = engine
+            self._counts[name] = {
+                "checkouts": 0, "waits": 0, "timeouts": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0,
+            }
+        engine.pool._metrics_name = name
+        event.listen(engine, "checkout", lambda *args: self._count(name, "checkouts"))
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._engines.pop(name, None)
+            self._counts.pop(name, None)
+
+    def _count(self, name: str, key: str) -> None:
+        with self._lock:
+            if name in self._counts:
+                self._counts[name][key] += 1
+
+    def record_wait(self, name: Optional[str], waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            counts = self._counts.get(name)
+            if counts is None:
+                return
+            counts["timeouts"] += timed_out
+            if waited >= WAIT_THRESHOLD:
+                counts["waits"] += 1
+                counts["wait_seconds_total"] += waited
+                counts["wait_seconds_max"] = max(counts["wait_seconds_max"], waited)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            engines = dict(self._engines)
+            counts = {name: dict(values) for name, values in self._counts.items()}
+        result = {}
+        for name, engine in engines.items():
+            pool = engine.pool
+            stats = {"pool": type(pool).__name__, **counts[name]}
+            if isinstance(pool, QueuePool):
+                stats.update(
+                    size=pool.size(),
+                    max_overflow=pool._max_overflow,
+                    checked_out=pool.checkedout(),
+                    checked_in=pool.checkedin(),
+                    overflow=max(0, pool.overflow()),
+                    timeout_seconds=pool.timeout(),
+                )
+            stats["wait_seconds_total"] = round(stats["wait_seconds_total"], 4)
+            stats["wait_seconds_max"] = round(stats["wait_seconds_max"], 4)
+            result[name] = stats
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            for counts in self._counts.values():
+                for key in counts:
+                    counts[key] = 0
+
+
+pool_metrics = PoolMetrics()
+
+
+class _Metered:
+    """Pool mixin that reports how long each checkout waited for a connection."""
+
+    _metrics_name: Optional[str] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            pool_metrics.record_wait(self._metrics_name, time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record_wait(self._metrics_name, time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool._metrics_name = self._metrics_name
+        return pool
+
+
+class MeteredQueuePool(_Metered, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_Metered, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, connect_args: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """``create_engine`` keyword arguments for ``url`` from the environment."""
+    connect_args = dict(connect_args or {})
+    if not url.startswith("postgresql"):
+        return {"pool_pre_ping": True, "connect_args": connect_args}
+    if PGBOUNCER:
+        return {"poolclass": NullPool, "connect_args": connect_args}
+    timeout = STATEMENT_TIMEOUTS["default"]
+    if timeout:
+        connect_args["options"] = f"{connect_args.get('options', '')} -c statement_timeout={timeout}".strip()
+    return {
+        "poolclass": MeteredQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": True,
+        "connect_args": connect_args,
+    }
+
+
+def async_url(url: str) -> str:
+    """``url`` with the async driver of its database (asyncpg, aiosqlite)."""
+    for prefix, driver in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(prefix):
+            url = driver + url[len(prefix):]
+            break
+    if PGBOUNCER and url.startswith("postgresql+asyncpg://"):
+        # PgBouncer hands each transaction a different server connection.
+        url += ("&" if "?" in url else "?") + "prepared_statement_cache_size=0"
+    return url
+
+
+def async_engine_options(url: str) -> Dict[str, Any]:
+    """``create_async_engine`` keyword arguments for ``url`` from the environment."""
+    if not url.startswith("postgresql"):
+        return {}
+    if PGBOUNCER:
+        return {"poolclass": NullPool, "connect_args": {"statement_cache_size": 0}}
+    timeout = STATEMENT_TIMEOUTS["default"]
+    return {
+        "poolclass": MeteredAsyncQueuePool,
+        "pool_size": ASYNC_POOL_SIZE,
+        "max_overflow": ASYNC_MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": True,
+        "connect_args": {"server_settings": {"statement_timeout": str(timeout)}} if timeout else {},
+    }
+
+
+@event.listens_for(Session, "after_begin")
+def _set_statement_timeout(session: Session, transaction, connection) -> None:
+    if connection.dialect.name != "postgresql":
+        return
+    statement_class = session.info.get(STATEMENT_CLASS_KEY, "default")
+    if statement_class == "default" and not PGBOUNCER:
+        return  # set when the connection was opened
+    timeout = STATEMENT_TIMEOUTS.get(statement_class, STATEMENT_TIMEOUTS["default"])
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, Numeric, Date, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, Text, Numeric, Date, DateTime, ForeignKey, Enum, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
 from app.database import Base
 
+
+def _partial(clause: str, sqlite_clause: str = None) -> dict:
+    """Partial-index predicate for PostgreSQL and SQLite (booleans are ``0``/``1`` in SQLite)."""
+    return {"postgresql_where": text(clause), "sqlite_where": text(sqlite_clause or clause)}
+
 class RoleTypeEnum(str, enum.Enum):
     NSH = "NSH"  # National Sales Head
     TSM = "TSM"  # Territory Sales Manager
@@ -324,6 +329,7 @@ class Route(Base):
     depot_id = Column(Integer, ForeignKey("depots.id"))
     stops = Column(Integer, default=0)
     distance = Column(String(50))
+    distance_km = Column(Numeric(12, 4))  # Sum of stop legs, kept by app.services.route_geometry
     avg_time = Column(String(50))
     status = Column(String(50), default="Active")
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -356,6 +362,9 @@ class StockLedger(Base):
 class ProductItemStock(Base):
     """Main stock table for products with aggregated stock quantities"""
     __tablename__ = "product_item_stock"
+    __table_args__ = (
+        Index("ix_product_item_stock_product_depot", "product_id", "depot_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
@@ -377,9 +386,14 @@ class ProductItemStock(Base):
 class ProductItemStockDetail(Base):
     """Batch-wise stock details linked to product_item_stock"""
     __tablename__ = "product_item_stock_details"
+    __table_args__ = (
+        # FEFO picks and expiry alerts only look at batches with stock left
+        Index("ix_stock_details_fefo", "item_code", "expiry_date", **_partial("available_quantity > 0")),
+        Index("ix_stock_details_expiry", "expiry_date", **_partial("available_quantity > 0")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    item_code = Column(Integer, ForeignKey("product_item_stock.id", ondelete="CASCADE"), nullable=False)
+    item_code = Column(Integer, ForeignKey("product_item_stock.id", ondelete="CASCADE"), nullable=False, index=True)
     batch_no = Column(String(100), nullable=False)
     expiry_date = Column(Date)
     quantity = Column(Numeric(15, 2), default=0)
@@ -462,6 +476,23 @@ class StockIssuanceItem(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Lifecycle queues and lists (alembic 005_order_indexes)
+        Index("ix_orders_loading_number", "loading_number", **_partial("loading_number IS NOT NULL")),
+        Index("ix_orders_route_code_loaded", "route_code", "loaded"),
+        Index("ix_orders_depot_code_created_at", "depot_code", "created_at"),
+        Index("ix_orders_delivery_date", "delivery_date"),
+        Index("ix_orders_assigned_to", "assigned_to", "assignment_date", **_partial("assigned_to IS NOT NULL")),
+        Index("ix_orders_pending_validation", "created_at", **_partial("validated = false", "validated = 0")),
+        Index(
+            "ix_orders_pending_print", "created_at",
+            **_partial("validated = true AND printed = false", "validated = 1 AND printed = 0"),
+        ),
+        Index(
+            "ix_orders_collection_approval", "collection_source", "collection_status",
+            **_partial("collection_approved = false", "collection_approved = 0"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_number = Column(String(50), nullable=True)
@@ -511,6 +542,13 @@ class Order(Base):
     mobile_accepted = Column(Boolean, default=False)  # Whether memo was accepted by mobile user
     mobile_accepted_by = Column(String(100), nullable=True)  # Mobile app user ID who accepted
     mobile_accepted_at = Column(DateTime, nullable=True)  # Timestamp when accepted
+    # Totals over order_items, kept current by app.services.order_totals
+    gross_amount = Column(Numeric(15, 2), default=0)  # unit price x quantity
+    discount_amount = Column(Numeric(15, 2), default=0)
+    net_amount = Column(Numeric(15, 2), default=0)  # gross - discount
+    selected_amount = Column(Numeric(15, 2), default=0)  # net over selected items only
+    item_count = Column(Integer, default=0)
+    trade_amount = Column(Numeric(15, 2), default=0)  # trade price x total quantity (MIS memo value)
     notes = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -524,7 +562,7 @@ class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"))
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), index=True)
     product_code = Column(String(50), nullable=False)  # Renamed from old_code
     product_name = Column(String(255), nullable=False)
     pack_size = Column(String(100))
@@ -894,7 +932,7 @@ class CollectionTransaction(Base):
     __tablename__ = "collection_transactions"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     collection_person_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
     collection_date = Column(Date, nullable=False)
     collection_type = Column(Enum(CollectionTypeEnum), nullable=False)
@@ -925,6 +963,8 @@ class RouteStop(Base):
     address = Column(Text)
     latitude = Column(Numeric(10, 7))  # Decimal degrees
     longitude = Column(Numeric(10, 7))  # Decimal degrees
+    leg_km = Column(Numeric(12, 4))  # From the previous stop
+    cumulative_km = Column(Numeric(12, 4))  # From the first stop
     city = Column(String(100))
     state = Column(String(100))
     pincode = Column(String(20))
@@ -3,6 +3,7 @@ import enum
 from datetime import datetime
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     Date,
@@ -243,10 +244,13 @@ class OrderValidationMessage(Base):
 
 class OrderBatchAllocation(Base):
     __tablename__ = "order_batch_allocations"
+    __table_args__ = (
+        Index("ix_order_batch_allocations_order_status", "order_id", "allocation_status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     validation_run_id = Column(Integer, ForeignKey("order_validation_runs.id", ondelete="CASCADE"), nullable=True)
-    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
     order_item_id = Column(Integer, ForeignKey("order_items.id", ondelete="CASCADE"), nullable=False)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     batch_no = Column(String(100), nullable=False)
@@ -599,6 +603,9 @@ class SyncEvent(Base):
 
 class SyncQueue(Base):
     __tablename__ = "sync_queue"
+    __table_args__ = (
+        Index("ix_sync_queue_status_created_at", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     sync_event_id = Column(Integer, ForeignKey("sync_events.id"), nullable=False)
@@ -636,3 +643,90 @@ class ExternalOrderRef(Base):
     external_order_id = Column(String(100), nullable=False)
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# --- Document numbering ---
+
+
+class DocumentSequence(Base):
+    """Last number handed out per document scope, e.g. ``loading:20260101``."""
+    __tablename__ = "document_sequences"
+
+    scope = Column(String(100), primary_key=True)
+    last_value = Column(BigInteger, nullable=False, default=0)
+
+
+# --- Dashboard ---
+
+
+class DashboardKpi(Base):
+    """Dashboard order counters for one depot code, kept current by session hooks.
+
+    The ``*`` row holds the global stock total and marks the store as built.
+    """
+    __tablename__ = "dashboard_kpis"
+
+    scope = Column(String(50), primary_key=True)
+    orders_date = Column(Date, nullable=True)
+    orders_today = Column(Integer, nullable=False, default=0)
+    pending_validation = Column(Integer, nullable=False, default=0)
+    validated = Column(Integer, nullable=False, default=0)
+    assigned = Column(Integer, nullable=False, default=0)
+    fully_delivered = Column(Integer, nullable=False, default=0)
+    partially_delivered = Column(Integer, nullable=False, default=0)
+    postponed = Column(Integer, nullable=False, default=0)
+    pending_collection = Column(Integer, nullable=False, default=0)
+    total_stock = Column(Numeric(18, 2), nullable=False, default=0)
+    rebuilt_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# --- Delivery approval ---
+
+
+class DeliveryApproval(Base):
+    """One processed loading-group delivery approval, keyed by the client's idempotency token."""
+    __tablename__ = "delivery_approvals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String(100), unique=True, nullable=False, index=True)
+    loading_number = Column(String(50), nullable=False, index=True)
+    approved_count = Column(Integer, nullable=False, default=0)
+    response_json = Column(JSONType, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# --- Barcode scan sessions ---
+
+
+class ScanSession(Base):
+    """A handheld scanner's open assignment: memos scanned so far for one employee and vehicle."""
+    __tablename__ = "scan_sessions"
+
+    id = Column(String(36), primary_key=True)
+    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=False)
+    status = Column(String(20), nullable=False, default="OPEN")  # OPEN, COMMITTED, CANCELLED
+    loading_number = Column(String(50), nullable=True)
+    created_by = Column(Integer, ForeignKey("employees.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    committed_at = Column(DateTime, nullable=True)
+
+    memos = relationship(
+        "ScanSessionMemo", back_populates="session", cascade="all, delete-orphan",
+        order_by="ScanSessionMemo.id",
+    )
+
+
+class ScanSessionMemo(Base):
+    __tablename__ = "scan_session_memos"
+    __table_args__ = (UniqueConstraint("session_id", "memo_number", name="uq_scan_session_memo"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(String(36), ForeignKey("scan_sessions.id", ondelete="CASCADE"), nullable=False)
+    memo_number = Column(String(50), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    scanned_at = Column(DateTime, default=datetime.utcnow)
+
+    session = relationship("ScanSession", back_populates="memos")
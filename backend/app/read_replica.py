@@ -0,0 +1,213 @@
+"""Read/write routing: report and list endpoints read from a replica.
+
+Handlers that only read take ``Depends(get_read_db)`` instead of ``get_db``.
+Their session sends SELECTs to ``DATABASE_REPLICA_URL`` and everything else
+to the primary. After its first write the session reads from the primary
+too. The replica is used only when:
+
+- it is configured and answered its last lag check, which runs at most
+  every ``REPLICA_CHECK_SECONDS``;
+- its replay lag is within ``REPLICA_MAX_LAG_SECONDS``; and
+- the user has not committed a write in the last ``REPLICA_PIN_SECONDS``,
+  so users read their own writes. Pins live in the shared cache and hold
+  across workers.
+
+When the lag check or a query on the replica fails, reads stay on the
+primary for ``REPLICA_RETRY_SECONDS``.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from sqlalchemy import Select, create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.database import REQUEST_STATE_KEY, engine
+from app.db_pool import STATEMENT_CLASS_KEY, engine_options, pool_metrics
+from app.redis_cache import cache
+
+logger = logging.getLogger(__name__)
+
+REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+MAX_LAG = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+CHECK_SECONDS = float(os.getenv("REPLICA_CHECK_SECONDS", "2"))
+RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+PIN_SECONDS = float(os.getenv("REPLICA_PIN_SECONDS", str(MAX_LAG)))
+WROTE_KEY = "replica_wrote"
+PINNED_KEY = "replica_pinned"
+
+# Seconds the standby is behind; 0 when it has replayed everything it received.
+_PG_LAG = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def create_replica_engine(url: str) -> Engine:
+    connect_args = {"connect_timeout": 2} if url.startswith("postgresql") else {}
+    replica = create_engine(url, **engine_options(url, connect_args))
+    pool_metrics.register("replica", replica)
+    return replica
+
+
+class RoutingSession(Session):
+    """Sends SELECTs to ``replica`` until the session writes; everything else goes to the primary."""
+
+    def __init__(self, primary: Engine, replica: Optional[Engine], **kwargs: Any) -> None:
+        super().__init__(bind=primary, **kwargs)
+        self.replica = replica
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or (clause is not None and not isinstance(clause, Select)):
+            self.info[PINNED_KEY] = True  # read our own writes from here on
+        elif self.replica is not None and clause is not None and not self.info.get(PINNED_KEY):
+            return self.replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        replica: Optional[Engine],
+        max_lag: float = MAX_LAG,
+        check_seconds: float = CHECK_SECONDS,
+        retry_seconds: float = RETRY_SECONDS,
+        pin_seconds: float = PIN_SECONDS,
+    ) -> None:
+        self.replica = replica
+        self.max_lag = max_lag
+        self.check_seconds = check_seconds
+        self.retry_seconds = retry_seconds
+        self.pin_seconds = pin_seconds
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self._healthy = False
+        self._down_until = 0.0
+        self._lag: Optional[float] = None
+        self._pins: Dict[Any, float] = {}
+        if replica is not None:
+            event.listen(replica, "handle_error", self._on_error)
+
+    def _on_error(self, context) -> None:
+        if context.is_disconnect:
+            self.mark_down(context.original_exception)
+
+    def mark_down(self, reason: Any) -> None:
+        with self._lock:
+            self._healthy = False
+            self._down_until = time.monotonic() + self.retry_seconds
+        logger.warning("Read replica unavailable (%s); reading from the primary for %ss", reason, self.retry_seconds)
+
+    def lag(self) -> float:
+        with self.replica.connect() as conn:
+            if conn.dialect.name != "postgresql":
+                return 0.0
+            return float(conn.execute(_PG_LAG).scalar() or 0)
+
+    def usable(self) -> bool:
+        """Whether the replica is up and within the staleness bound, checked at most every ``check_seconds``."""
+        if self.replica is None:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now < self._down_until:
+                return False
+            if now - self._checked_at < self.check_seconds:
+                return self._healthy
+            self._checked_at = now  # one caller checks; the others use the last result
+        try:
+            lag = self.lag()
+        except Exception as exc:
+            self.mark_down(exc)
+            return False
+        with self._lock:
+            self._lag = lag
+            self._healthy = lag <= self.max_lag
+        if lag > self.max_lag:
+            logger.info("Read replica is %.1fs behind (bound %ss); reading from the primary", lag, self.max_lag)
+        return lag <= self.max_lag
+
+    def pin(self, subject: Any) -> None:
+        """Read ``subject``'s requests from the primary until the replica has their write."""
+        if self.replica is None or subject is None:
+            return
+        with self._lock:
+            self._pins[subject] = time.monotonic() + self.pin_seconds
+        cache.set(f"db_pin:{subject}", True, self.pin_seconds)
+
+    def pinned(self, subject: Any) -> bool:
+        if subject is None:
+            return False
+        with self._lock:
+            until = self._pins.get(subject)
+            if until is not None and until <= time.monotonic():
+                del self._pins[subject]
+                until = None
+        return until is not None or bool(cache.get(f"db_pin:{subject}"))
+
+    def replica_for(self, subject: Any) -> Optional[Engine]:
+        """The engine reads of ``subject`` may use, or None for the primary."""
+        if self.replica is None or self.pinned(subject) or not self.usable():
+            return None
+        return self.replica
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "configured": self.replica is not None,
+                "healthy": self._healthy and time.monotonic() >= self._down_until,
+                "lag_seconds": self._lag,
+                "max_lag_seconds": self.max_lag,
+            }
+
+
+read_router = ReplicaRouter(create_replica_engine(REPLICA_URL) if REPLICA_URL else None)
+
+
+def _subject(state: Any) -> Optional[int]:
+    principal = getattr(state, "principal", None)
+    return principal.user_id if principal is not None else None
+
+
+def get_read_db(request: Request):
+    db = RoutingSession(engine, read_router.replica_for(_subject(request.state)), autoflush=False)
+    db.info[REQUEST_STATE_KEY] = request.state
+    db.info[STATEMENT_CLASS_KEY] = "report"
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+WRITE_VERBS = ("INSERT", "UPDATE", "DELETE")
+
+
+@event.listens_for(Session, "after_begin")
+def _watch_writes(session: Session, transaction, connection) -> None:
+    # Watch the statements themselves: Core writes through Session.execute
+    # (bulk UPDATEs, insert().values()) never flush. The connection is the
+    # transaction's own, so the listener goes away with it.
+    if REQUEST_STATE_KEY not in session.info:
+        return
+    info = session.info
+
+    def note_write(conn, cursor, statement, parameters, context, executemany) -> None:
+        if WROTE_KEY not in info and statement.lstrip()[:6].upper() in WRITE_VERBS:
+            info[WROTE_KEY] = True
+
+    event.listen(connection, "after_cursor_execute", note_write)
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer(session: Session) -> None:
+    if session.info.pop(WROTE_KEY, False):
+        read_router.pin(_subject(session.info.get(REQUEST_STATE_KEY)))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_write(session: Session) -> None:
+    session.info.pop(WROTE_KEY, None)
@@ -1,38 +1,512 @@
-import redis.asyncio as redis
-import json
+"""Redis cache for route handlers and service functions.
+
+``cached`` stores a function's result under ``<CACHE_PREFIX><name>:<key>``:
+
+- Tags: every entry joins one Redis set per tag, and ``invalidate_tags``
+  deletes the members of those sets. A write can therefore drop every
+  dependent key without ``KEYS``.
+- Single flight: on a miss one caller takes a short lock and computes.
+  Concurrent callers poll for its result for up to
+  ``CACHE_LOCK_WAIT_SECONDS`` instead of computing the same value again.
+- Stale while revalidate: entries outlive their TTL by ``stale_ttl``. Past
+  the TTL, whoever takes the lock recomputes and everyone else is served the
+  stale value meanwhile.
+- Values are pickled; Redis is trusted like the database. Values above
+  ``CACHE_COMPRESS_MIN_BYTES`` are zlib-compressed. A handler cached with
+  ``response_model`` stores its rendered JSON body and returns it as is,
+  skipping validation and serialization on a hit.
+- Hits, stale hits, misses, coalesced waits and errors are counted per name
+  (``cache.metrics()``, ``/health/cache``).
+
+``CACHE_BACKEND=memory`` keeps entries in process (tests, single-worker
+development) and ``none`` turns caching off. When Redis fails, calls fall
+through to the function and Redis is skipped for ``CACHE_RETRY_SECONDS``.
+"""
+import asyncio
+import fnmatch
+import functools
+import hashlib
+import inspect
+import logging
 import os
+import pickle
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import redis
+from anyio import from_thread
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = os.getenv("CACHE_PREFIX", "cache:")
+DEFAULT_TTL = int(os.getenv("CACHE_DEFAULT_TTL_SECONDS", "300"))
+DEFAULT_STALE_TTL = int(os.getenv("CACHE_STALE_TTL_SECONDS", "60"))
+LOCK_TTL = float(os.getenv("CACHE_LOCK_TTL_SECONDS", "10"))
+LOCK_WAIT = float(os.getenv("CACHE_LOCK_WAIT_SECONDS", "2"))
+LOCK_POLL = 0.02
+COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "16384"))
+RETRY_SECONDS = float(os.getenv("CACHE_RETRY_SECONDS", "5"))
+# Tag sets outlive their members; members that expired on their own are harmless.
+TAG_TTL = 86400
+
+_HEADER = struct.Struct("!dB")  # fresh-until timestamp, flags
+_RAW, _COMPRESSED = 1, 2
+_KEY_TYPES = (str, int, float, bool, type(None), date, datetime, Decimal, Enum)
+
+
+def encode(value: Any, fresh_until: float) -> bytes:
+    """Envelope for ``value``; ``bytes`` are stored as they are, anything else pickled."""
+    flags = 0
+    if isinstance(value, bytes):
+        body, flags = value, _RAW
+    else:
+        body = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(body) >= COMPRESS_MIN_BYTES:
+        body, flags = zlib.compress(body, 1), flags | _COMPRESSED
+    return _HEADER.pack(fresh_until, flags) + body
+
+
+def decode(raw: bytes) -> Tuple[float, Any]:
+    fresh_until, flags = _HEADER.unpack_from(raw)
+    body = raw[_HEADER.size:]
+    if flags & _COMPRESSED:
+        body = zlib.decompress(body)
+    return fresh_until, body if flags & _RAW else pickle.loads(body)
+
+
+def tag_key(tag: str) -> str:
+    return f"{CACHE_PREFIX}tag:{tag}"
+
+
+class MemoryBackend:
+    """In-process backend with the Redis backend's semantics."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._values: Dict[str, Tuple[float, bytes]] = {}
+        self._tags: Dict[str, set] = defaultdict(set)
+        self._locks: Dict[str, Tuple[float, str]] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._values[key]
+                return None
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str]) -> None:
+        with self._lock:
+            self._values[key] = (time.monotonic() + ttl, value)
+            for tag in tags:
+                self._tags[tag].add(key)
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    def set_many(self, values: Dict[str, bytes], ttl: float) -> None:
+        for key, value in values.items():
+            self.set(key, value, ttl, ())
+
+    def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+    def delete_matching(self, pattern: str) -> int:
+        with self._lock:
+            keys = [key for key in self._values if fnmatch.fnmatchcase(key, pattern)]
+            for key in keys:
+                del self._values[key]
+            return len(keys)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        with self._lock:
+            dropped = 0
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    dropped += self._values.pop(key, None) is not None
+            return dropped
+
+    def acquire(self, key: str, ttl: float) -> Optional[str]:
+        with self._lock:
+            now = time.monotonic()
+            held = self._locks.get(key)
+            if held is not None and held[0] > now:
+                return None
+            token = uuid.uuid4().hex
+            self._locks[key] = (now + ttl, token)
+            return token
+
+    def release(self, key: str, token: str) -> None:
+        with self._lock:
+            if self._locks.get(key, (0, None))[1] == token:
+                del self._locks[key]
+
+    def publish(self, channel: str, message: str) -> None:
+        pass  # one process: there is nobody else to tell
+
+    def subscribe(self, channel: str, handler: Callable[[str], None]):
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._tags.clear()
+            self._locks.clear()
+
+    def close(self) -> None:
+        pass
+
+
+# Delete the lock only if it is still ours.
+_RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+# Read and drop a tag set atomically, so a key tagged meanwhile lands in a fresh set.
+_POP_TAG = "local members = redis.call('smembers', KEYS[1]) redis.call('del', KEYS[1]) return members"
+
+
+class RedisBackend:
+    def __init__(self, url: str) -> None:
+        self.client = redis.Redis.from_url(url, socket_connect_timeout=0.25, socket_timeout=0.5)
+        self._release = self.client.register_script(_RELEASE)
+        self._pop_tag = self.client.register_script(_POP_TAG)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(key, value, px=max(1, int(ttl * 1000)))
+        for tag in tags:
+            pipe.sadd(tag, key)
+            pipe.expire(tag, TAG_TTL)
+        pipe.execute()
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self.client.mget(keys) if keys else []
+
+    def set_many(self, values: Dict[str, bytes], ttl: float) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.set(key, value, px=max(1, int(ttl * 1000)))
+        pipe.execute()
+
+    def delete(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if keys:
+            self.client.unlink(*keys)
+
+    def delete_matching(self, pattern: str) -> int:
+        deleted, batch = 0, []
+        for key in self.client.scan_iter(match=pattern, count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                deleted += self.client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += self.client.unlink(*batch)
+        return deleted
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        dropped = 0
+        for tag in tags:
+            members = self._pop_tag(keys=[tag])
+            for start in range(0, len(members), 500):
+                dropped += self.client.unlink(*members[start:start + 500])
+        return dropped
+
+    def acquire(self, key: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        return token if self.client.set(key, token, nx=True, px=int(ttl * 1000)) else None
+
+    def release(self, key: str, token: str) -> None:
+        self._release(keys=[key], args=[token])
+
+    def publish(self, channel: str, message: str) -> None:
+        self.client.publish(channel, message)
+
+    def subscribe(self, channel: str, handler: Callable[[str], None]):
+        """Call ``handler`` with every message on ``channel`` from a daemon thread; returns the thread."""
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{channel: lambda message: handler(message["data"].decode())})
+
+        def failed(exc, pubsub, thread):
+            logger.warning("Cache subscription to %s lost: %s", channel, exc)
+            thread.stop()
 
-redis_client = None
+        return pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=failed)
 
-async def get_redis_client():
-    global redis_client
-    if redis_client is None:
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        redis_client = redis.from_url(redis_url, encoding="utf-8", decode_responses=True)
-    return redis_client
+    def clear(self) -> None:
+        self.delete_matching(f"{CACHE_PREFIX}*")
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class Cache:
+    def __init__(self, backend=None) -> None:
+        self._backend = backend
+        self._configured = backend is not None
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    @property
+    def backend(self):
+        """Backend chosen by ``CACHE_BACKEND`` (redis, memory or none) on first use."""
+        if not self._configured:
+            kind = os.getenv("CACHE_BACKEND", "redis").lower()
+            if kind == "redis":
+                self._backend = RedisBackend(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+            elif kind == "memory":
+                self._backend = MemoryBackend()
+            self._configured = True
+        return self._backend
+
+    def use(self, backend) -> None:
+        """Replace the backend (None disables caching)."""
+        if self._backend is not None:
+            self._backend.close()
+        self._backend, self._configured, self._down_until = backend, True, 0.0
+
+    @property
+    def available(self) -> bool:
+        return self.backend is not None and time.monotonic() >= self._down_until
+
+    def _count(self, name: str, event: str) -> None:
+        with self._lock:
+            self._metrics[name][event] += 1
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Counters per cache name, with the share of calls served from the cache."""
+        with self._lock:
+            snapshot = {name: dict(counts) for name, counts in self._metrics.items()}
+        for counts in snapshot.values():
+            served = counts.get("hits", 0) + counts.get("stale_hits", 0) + counts.get("coalesced", 0)
+            calls = served + counts.get("misses", 0) + counts.get("revalidations", 0)
+            counts["hit_ratio"] = round(served / calls, 4) if calls else None
+        return snapshot
+
+    def reset_metrics(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+    def _call(self, name: str, op: str, *args, default=None):
+        """Run a backend operation; on failure skip the backend for ``RETRY_SECONDS``."""
+        if not self.available:
+            return default
+        try:
+            return getattr(self.backend, op)(*args)
+        except (redis.RedisError, OSError) as exc:
+            self._down_until = time.monotonic() + RETRY_SECONDS
+            self._count(name, "errors")
+            logger.warning("Cache backend unavailable (%s); bypassing it for %ss", exc, RETRY_SECONDS)
+            return default
+
+    def get_or_compute(
+        self,
+        name: str,
+        key: str,
+        compute: Callable[[], Tuple[Any, Iterable[str]]],
+        ttl: float,
+        stale_ttl: float,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """Cached value of ``compute``, which returns ``(value, extra tags)``."""
+        if not self.available:
+            self._count(name, "bypassed")
+            return compute()[0]
+        full_key = f"{CACHE_PREFIX}{name}:{key}"
+        lock_key = f"{full_key}:lock"
+        raw = self._call(name, "get", full_key)
+        if raw is not None:
+            fresh_until, value = decode(raw)
+            if time.time() < fresh_until:
+                self._count(name, "hits")
+                return value
+            token = self._call(name, "acquire", lock_key, LOCK_TTL)
+            if token is None:
+                self._count(name, "stale_hits")
+                return value
+            self._count(name, "revalidations")
+        else:
+            self._count(name, "misses")
+            token = self._call(name, "acquire", lock_key, LOCK_TTL)
+            if token is None and self.available:
+                deadline = time.monotonic() + LOCK_WAIT
+                while time.monotonic() < deadline:
+                    time.sleep(LOCK_POLL)
+                    raw = self._call(name, "get", full_key)
+                    if raw is not None:
+                        self._count(name, "coalesced")
+                        return decode(raw)[1]
+                self._count(name, "lock_timeouts")
+        try:
+            value, extra_tags = compute()
+            envelope = encode(value, time.time() + ttl)
+            self._call(name, "set", full_key, envelope, ttl + stale_ttl, [tag_key(t) for t in (*tags, *extra_tags)])
+            return value
+        finally:
+            if token is not None:
+                self._call(name, "release", lock_key, token)
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """Drop every entry carrying one of ``tags``; returns how many were dropped."""
+        if not tags:
+            return 0
+        return self._call("invalidate", "invalidate_tags", [tag_key(tag) for tag in tags], default=0)
+
+    def get(self, key: str) -> Any:
+        raw = self._call("raw", "get", f"{CACHE_PREFIX}{key}")
+        return None if raw is None else decode(raw)[1]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._call("raw", "set", f"{CACHE_PREFIX}{key}", encode(value, time.time() + ttl), ttl, ())
+
+    def delete(self, *keys: str) -> None:
+        self._call("raw", "delete", [f"{CACHE_PREFIX}{key}" for key in keys])
+
+    def delete_matching(self, pattern: str) -> int:
+        """Delete keys matching a glob ``pattern`` with ``SCAN``, never ``KEYS``."""
+        return self._call("raw", "delete_matching", f"{CACHE_PREFIX}{pattern}", default=0)
+
+    def get_many(self, keys: List[str]) -> List[Any]:
+        """Values for ``keys`` in one round trip; None where missing (or when the backend is down)."""
+        raws = self._call("raw", "get_many", [f"{CACHE_PREFIX}{key}" for key in keys])
+        if raws is None:
+            return [None] * len(keys)
+        return [None if raw is None else decode(raw)[1] for raw in raws]
+
+    def set_many(self, values: Dict[str, Any], ttl: float) -> None:
+        fresh_until = time.time() + ttl
+        self._call("raw", "set_many", {f"{CACHE_PREFIX}{k}": encode(v, fresh_until) for k, v in values.items()}, ttl)
+
+    def publish(self, channel: str, message: str) -> None:
+        self._call("pubsub", "publish", f"{CACHE_PREFIX}{channel}", message)
+
+    def subscribe(self, channel: str, handler: Callable[[str], None]):
+        """Deliver messages on ``channel`` to ``handler`` (Redis only); returns the listener thread or None."""
+        return self._call("pubsub", "subscribe", f"{CACHE_PREFIX}{channel}", handler)
+
+    def clear(self) -> None:
+        self._call("raw", "clear")
+
+    def close(self) -> None:
+        if self._backend is not None:
+            self._backend.close()
+
+
+cache = Cache()
+
+
+def _default_key(arguments: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    parts = []
+    for name, value in arguments.items():
+        if isinstance(value, (Session, AsyncSession)):
+            continue
+        if not isinstance(value, _KEY_TYPES):
+            raise TypeError(f"cached: argument {name!r} ({type(value).__name__}) cannot be part of a key; pass key=")
+        parts.append((name, value))
+    return parts
+
+
+def cached(
+    name: str,
+    *,
+    ttl: Optional[float] = None,
+    stale_ttl: Optional[float] = None,
+    tags: Iterable[str] = (),
+    key: Optional[Callable[..., Any]] = None,
+    result_tags: Optional[Callable[[Any], Iterable[str]]] = None,
+    response_model: Any = None,
+):
+    """Cache a sync or async function (or route handler) in ``cache``.
+
+    ``key`` gets the call's arguments by name and returns what identifies the
+    entry; by default every argument except the ``Session`` is used, and any
+    other object argument (a user, a query) must go through ``key``.
+    ``result_tags`` adds tags taken from the result. With ``response_model``
+    the result is validated and rendered once, and the handler returns the
+    cached JSON body as a ``Response``.
+    """
+    ttl = DEFAULT_TTL if ttl is None else ttl
+    stale_ttl = DEFAULT_STALE_TTL if stale_ttl is None else stale_ttl
+    tags = tuple(tags)
+    adapter = TypeAdapter(response_model) if response_model is not None else None
+
+    def decorate(fn):
+        signature = inspect.signature(fn)
+
+        def entry_key(args, kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            parts = key(**bound.arguments) if key is not None else _default_key(bound.arguments)
+            return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+        def produce(result) -> Tuple[Any, Iterable[str]]:
+            extra = tuple(result_tags(result)) if result_tags else ()
+            if adapter is not None:
+                result = adapter.dump_json(adapter.validate_python(result, from_attributes=True), by_alias=True)
+            return result, extra
+
+        def finish(value):
+            return Response(content=value, media_type="application/json") if adapter is not None else value
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                def compute():
+                    return produce(from_thread.run(lambda: fn(*args, **kwargs)))
+
+                value = await run_in_threadpool(
+                    cache.get_or_compute, name, entry_key(args, kwargs), compute, ttl, stale_ttl, tags,
+                )
+                return finish(value)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            value = cache.get_or_compute(
+                name, entry_key(args, kwargs), lambda: produce(fn(*args, **kwargs)), ttl, stale_ttl, tags,
+            )
+            return finish(value)
+
+        return wrapper
+
+    return decorate
+
+
+async def cache_set(key: str, value: Any, expire: int = 3600):
+    """Cache a value under ``key``"""
+    await run_in_threadpool(cache.set, key, value, expire)
 
-async def cache_set(key: str, value: any, expire: int = 3600):
-    """Cache a value in Redis"""
-    client = await get_redis_client()
-    await client.setex(key, expire, json.dumps(value))
 
 async def cache_get(key: str):
-    """Get a value from Redis cache"""
-    client = await get_redis_client()
-    value = await client.get(key)
-    if value:
-        return json.loads(value)
-    return None
+    """Cached value under ``key``, or None"""
+    return await run_in_threadpool(cache.get, key)
+
 
 async def cache_delete(key: str):
-    """Delete a value from Redis cache"""
-    client = await get_redis_client()
-    await client.delete(key)
+    """Delete a cached value"""
+    await run_in_threadpool(cache.delete, key)
 
-async def cache_delete_pattern(pattern: str):
-    """Delete all keys matching a pattern"""
-    client = await get_redis_client()
-    keys = await client.keys(pattern)
-    if keys:
-        await client.delete(*keys)
 
+async def cache_delete_pattern(pattern: str):
+    """Delete all keys matching a glob pattern (incremental SCAN, not KEYS)"""
+    await run_in_threadpool(cache.delete_matching, pattern)
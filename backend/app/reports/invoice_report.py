@@ -4,17 +4,19 @@ Generates customer copy invoice reports matching RENATA PLC format
 """
 
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
+from reportlab.platypus import TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.platypus.flowables import Flowable
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from reportlab.graphics.barcode import code128
 from datetime import datetime
 from decimal import Decimal
-from typing import Any, Optional
-import io
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+
+from app.reports import kit
+
+logger = logging.getLogger(__name__)
 
 
 def number_to_words(num: Decimal) -> str:
@@ -58,9 +60,74 @@ def number_to_words(num: Decimal) -> str:
     return result
 
 
-def generate_invoice_report(
+class BarcodeFlowable(Flowable):
+    def __init__(self, barcode_value, width, height):
+        Flowable.__init__(self)
+        self.barcode_value = barcode_value
+        self.width = width
+        self.height = height
+
+    def draw(self):
+        try:
+            # Create and draw barcode directly on canvas
+            # Code128 barcode with memo number (no human-readable text below)
+            barcode = code128.Code128(
+                self.barcode_value,
+                barHeight=12*mm,
+                barWidth=0.8,
+                humanReadable=False
+            )
+            # Position barcode to align right
+            x_pos = self.width - barcode.width
+            y_pos = (self.height - barcode.height) / 2
+            barcode.drawOn(self.canv, x_pos, y_pos)
+        except Exception as e:
+            logger.warning(f"Error drawing barcode: {e}")
+            # Draw text as fallback
+            self.canv.setFont("Helvetica", 8)
+            self.canv.drawRightString(self.width, self.height / 2, f"Memo: {self.barcode_value}")
+
+
+def prefetch_invoice_refs(db: Any, orders: Iterable[Any]) -> Dict[str, dict]:
+    """Customers, product MC counts and active trade prices for many orders.
+
+    Rows come from the master data cache, with at most one query per table
+    for whatever it does not hold.
+
+    The result is plain data, so invoices can be built without a session
+    (and rendered in another process).
+    """
+    from app.services.master_data import master_data
+
+    orders = list(orders)
+    customer_codes = {
+        getattr(o, 'customer_code', None) or getattr(o, 'customer_id', None) for o in orders
+    } - {None}
+    product_codes = {
+        getattr(item, 'product_code', None) for o in orders for item in o.items
+    } - {None}
+    refs: Dict[str, dict] = {"customers": {}, "products": {}, "trade_prices": {}}
+    for code, customer in master_data.rows(db, "customer", customer_codes).items():
+        refs["customers"][code] = {
+            "name": customer["name"], "phone": customer["phone"], "address": customer["address"],
+        }
+    codes_by_id = {}
+    for code, product in master_data.rows(db, "product", product_codes).items():
+        codes_by_id[product["id"]] = code
+        mc_count = product["mc_result"] or product["mc_value1"]
+        refs["products"][code] = {"mc_count": Decimal(str(mc_count)) if mc_count else Decimal('1')}
+    # Price rows per product come back in id order; the first active one with a trade price wins.
+    for product_id, prices in master_data.rows(db, "price_setup", codes_by_id, field="product_id").items():
+        for price in prices:
+            if price["is_active"] and price["trade_price"]:
+                refs["trade_prices"][codes_by_id[product_id]] = Decimal(str(price["trade_price"]))
+                break
+    return refs
+
+
+def build_invoice_payload(
     order: Any,
-    db: Optional[Any] = None,
+    refs: Optional[Dict[str, dict]] = None,
     company_name: str = "RENATA LIMITED",
     company_address: str = "BLOCK-C, ROAD-6, HOUSE-39, DHOUR, TURAG, DHAKA-1230",
     company_phone: str = "8981868, 8981813",
@@ -68,41 +135,10 @@ def generate_invoice_report(
     customer_address: str = "",
     customer_phone: str = "",
     tin_number: str = "000000354-0005"
-) -> bytes:
-    """
-    Generate an invoice report PDF for a single order/memo
-    
-    Args:
-        order: Order object with items
-        db: Database session (optional, for fetching product/customer data)
-        company_name: Company name
-        company_address: Company address
-        company_phone: Company phone
-        depot_name: Depot name
-        customer_address: Customer address
-        customer_phone: Customer phone
-        tin_number: TIN number
-    
-    Returns:
-        PDF bytes
-    """
-    buffer = io.BytesIO()
-    # Margins to prevent cutting
-    doc = SimpleDocTemplate(
-        buffer, 
-        pagesize=A4, 
-        topMargin=10*mm, 
-        bottomMargin=10*mm,
-        leftMargin=10*mm,  # Reduced margins for more space
-        rightMargin=10*mm  # Reduced margins for more space
-    )
-    story = []
-    styles = getSampleStyleSheet()
-    
-    # Import models if db is provided
-    if db:
-        from app import models
-    
+) -> dict:
+    """Everything one invoice prints, resolved from the order and prefetched ``refs``."""
+    refs = refs or {"customers": {}, "products": {}, "trade_prices": {}}
+
     # Ensure all string parameters are not None and convert to strings safely
     company_name = (str(company_name) if company_name is not None else "RENATA LIMITED").strip()
     company_address = (str(company_address) if company_address is not None else "BLOCK-C, ROAD-6, HOUSE-39, DHOUR, TURAG, DHAKA-1230").strip()
@@ -129,164 +165,17 @@ def generate_invoice_report(
     memo_no = getattr(order, 'memo_number', None) or f"TEMP-{getattr(order, 'id', 'UNK')}"
     pso_code = getattr(order, 'pso_code', None) or "—"
     
-    # Get customer data from database
+    # Get customer data from prefetched customers
     customer_code = getattr(order, 'customer_code', None) or getattr(order, 'customer_id', None)
     customer_name = getattr(order, 'customer_name', 'Unknown Customer')
-    customer_phone_number = customer_phone  # Use passed phone or fetch from DB
-    
-    if db and customer_code:
-        customer = db.query(models.Customer).filter(models.Customer.code == customer_code).first()
-        if customer:
-            customer_name = (customer.name or customer_name).strip() if customer.name else customer_name
-            if customer.phone:
-                customer_phone = str(customer.phone).strip()
-            if customer.address:
-                customer_address = str(customer.address).strip()
     
-    # Ensure customer_phone_number is set and all strings are safe
-    customer_phone_number = customer_phone.strip() if customer_phone else ""
-    customer_name = customer_name.strip() if customer_name else "Unknown Customer"
-    customer_address = customer_address.strip() if customer_address else ""
-    
-    # Create barcode flowable class (needed for top header)
-    class BarcodeFlowable(Flowable):
-        def __init__(self, barcode_value, width, height):
-            Flowable.__init__(self)
-            self.barcode_value = barcode_value
-            self.width = width
-            self.height = height
-        
-        def draw(self):
-            try:
-                # Create and draw barcode directly on canvas
-                # Code128 barcode with memo number (no human-readable text below)
-                barcode = code128.Code128(
-                    self.barcode_value,
-                    barHeight=12*mm,
-                    barWidth=0.8,
-                    humanReadable=False
-                )
-                # Position barcode to align right
-                x_pos = self.width - barcode.width
-                y_pos = (self.height - barcode.height) / 2
-                barcode.drawOn(self.canv, x_pos, y_pos)
-            except Exception as e:
-                print(f"Error drawing barcode: {e}")
-                import traceback
-                traceback.print_exc()
-                # Draw text as fallback
-                self.canv.setFont("Helvetica", 8)
-                self.canv.drawRightString(self.width, self.height / 2, f"Memo: {self.barcode_value}")
-    
-    # Header with Company Name (left) and Barcode (right)
-    story.append(Spacer(1, 2*mm))
-    
-    # Create barcode if memo number exists
-    barcode_flowable = None
-    barcode_value = str(memo_no).strip()
-    if barcode_value:
-        try:
-            # Create barcode flowable - smaller size for top header
-            barcode_flowable = BarcodeFlowable(barcode_value, 50*mm, 18*mm)
-        except Exception as e:
-            print(f"Error creating barcode flowable: {e}")
-    
-    # Header table: Company name on left, Barcode on right
-    header_table_data = []
-    if barcode_flowable:
-        header_table_data = [
-            [
-                Paragraph(company_name, ParagraphStyle(
-                    'CompanyTitle',
-                    parent=styles['Normal'],
-                    fontSize=14,
-                    textColor=colors.HexColor('#000000'),
-                    fontName='Helvetica-Bold',
-                    alignment=TA_LEFT
-                )),
-                barcode_flowable
-            ]
-        ]
-    else:
-        # If no barcode, just show company name centered
-        header_table_data = [
-            [
-                Paragraph(company_name, ParagraphStyle(
-                    'CompanyTitle',
-                    parent=styles['Normal'],
-                    fontSize=14,
-                    textColor=colors.HexColor('#000000'),
-                    fontName='Helvetica-Bold',
-                    alignment=TA_CENTER
-                )),
-                ''
-            ]
-        ]
-    
-    header_table = Table(header_table_data, colWidths=[140*mm, 50*mm] if barcode_flowable else [190*mm, 0])
-    header_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, 0), 'LEFT' if barcode_flowable else 'CENTER'),
-        ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-        ('TOPPADDING', (0, 0), (-1, -1), 2),
-    ]))
-    story.append(header_table)
-    story.append(Spacer(1, 3*mm))  # Added spacer between title and address
-    story.append(Paragraph(company_address, ParagraphStyle(
-        'CompanyAddress',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.HexColor('#000000'),
-        spaceAfter=2,
-        alignment=TA_CENTER,
-        fontName='Helvetica'
-    )))
-    story.append(Paragraph(f"Phone: {company_phone}", ParagraphStyle(
-        'CompanyPhone',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.HexColor('#000000'),
-        spaceAfter=4,
-        alignment=TA_CENTER,
-        fontName='Helvetica'
-    )))
-    story.append(Spacer(1, 2*mm))
-    
-    # Payment type
-    payment_type = "COD (PHARMA)"
-    story.append(Paragraph(payment_type, ParagraphStyle(
-        'PaymentType',
-        parent=styles['Normal'],
-        fontSize=10,
-        fontName='Helvetica-Bold',
-        alignment=TA_CENTER
-    )))
-    story.append(Spacer(1, 3*mm))
-    
-    # Customer info (left) and Memo details (right)
-    invoice_details_data = [
-        ['Customer:', customer_phone_number or customer_code or '—', 'Memo No.:', memo_no],
-        [customer_name, '', 'Date:', order_date],
-        [customer_address or '—', '', 'PSO Code:', pso_code]
-    ]
-    
-    invoice_table = Table(invoice_details_data, colWidths=[30*mm, 60*mm, 30*mm, 60*mm])
-    invoice_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('ALIGN', (2, 0), (2, -1), 'LEFT'),
-        ('ALIGN', (3, 0), (3, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-    ]))
-    story.append(invoice_table)
-    story.append(Spacer(1, 4*mm))
-    
-    # Trade Items table
-    trade_items_data = [['Code', 'Product Name', 'Unit', 'Batch No.', 'Trade Price', 'Quantity', 'Amount', 'VAT Amount', 'Total Amount']]
+    customer = refs["customers"].get(customer_code) if customer_code else None
+    if customer:
+        customer_name = (customer["name"] or customer_name).strip() if customer["name"] else customer_name
+        if customer["phone"]:
+            customer_phone = str(customer["phone"]).strip()
+        if customer["address"]:
+            customer_address = str(customer["address"]).strip()
     
     total_trade_amount = Decimal('0')
     total_vat_amount = Decimal('0')
@@ -316,17 +205,7 @@ def generate_invoice_report(
         free_goods = Decimal(str(getattr(item, 'free_goods', 0) or 0))
         
         # Get trade price from PriceSetup or use item's trade_price
-        trade_price = Decimal('0')
-        if db:
-            # Try to get product and price setup
-            product = db.query(models.Product).filter(models.Product.code == product_code).first()
-            if product:
-                price_setup = db.query(models.PriceSetup).filter(
-                    models.PriceSetup.product_id == product.id,
-                    models.PriceSetup.is_active == True
-                ).first()
-                if price_setup and price_setup.trade_price:
-                    trade_price = Decimal(str(price_setup.trade_price))
+        trade_price = refs["trade_prices"].get(product_code, Decimal('0'))
         
         # Fallback to item's trade_price
         if trade_price == 0:
@@ -338,13 +217,8 @@ def generate_invoice_report(
         
         # Calculate unit: packsize * MC count
         # Get MC count from product or use demo
-        mc_count = Decimal('1')
-        if db:
-            product = db.query(models.Product).filter(models.Product.code == product_code).first()
-            if product and product.mc_result:
-                mc_count = Decimal(str(product.mc_result))
-            elif product and product.mc_value1:
-                mc_count = Decimal(str(product.mc_value1))
+        product = refs["products"].get(product_code)
+        mc_count = product["mc_count"] if product else Decimal('1')
         
         # Parse pack_size to get multiplier (e.g., "3*3" or "3")
         pack_multiplier = Decimal('1')
@@ -400,203 +274,300 @@ def generate_invoice_report(
                 'vat_amount': (trade_price * free_goods) * Decimal('0.15'),
                 'total': (trade_price * free_goods) * Decimal('1.15')
             })
+
+    return {
+        'company_name': company_name,
+        'company_address': company_address,
+        'company_phone': company_phone,
+        'depot_name': depot_name,
+        'tin_number': tin_number,
+        'memo_no': memo_no,
+        'order_date': order_date,
+        'pso_code': pso_code,
+        'customer_code': customer_code,
+        'customer_name': customer_name.strip() if customer_name else "Unknown Customer",
+        'customer_address': customer_address.strip() if customer_address else "",
+        'customer_phone': customer_phone.strip() if customer_phone else "",
+        'trade_items': trade_items,
+        'free_goods_items': free_goods_items,
+        'total_amount': total_amount,
+    }
+
+
+def generate_invoice_report(
+    order: Any,
+    db: Optional[Any] = None,
+    company_name: str = "RENATA LIMITED",
+    company_address: str = "BLOCK-C, ROAD-6, HOUSE-39, DHOUR, TURAG, DHAKA-1230",
+    company_phone: str = "8981868, 8981813",
+    depot_name: str = "",
+    customer_address: str = "",
+    customer_phone: str = "",
+    tin_number: str = "000000354-0005"
+) -> bytes:
+    """
+    Generate an invoice report PDF for a single order/memo
     
-    # Add trade items to table with increased column widths
-    for item in trade_items:
-        trade_items_data.append([
-            item['code'],
-            item['name'][:35] if len(item['name']) > 35 else item['name'],
-            item['unit'],
-            item['batch'][:15] if len(item['batch']) > 15 else item['batch'],
-            f"{float(item['trade_price']):,.2f}",
-            str(int(item['qty'])),
-            f"{float(item['trade_amount']):,.2f}",
-            f"{float(item['vat_amount']):,.2f}",
-            f"{float(item['total']):,.2f}"
-        ])
+    Args:
+        order: Order object with items
+        db: Database session (optional, for fetching product/customer data)
+        company_name: Company name
+        company_address: Company address
+        company_phone: Company phone
+        depot_name: Depot name
+        customer_address: Customer address
+        customer_phone: Customer phone
+        tin_number: TIN number
     
-    # Trade items table - increased column widths to prevent overlapping
-    # Total: 15+40+20+18+18+18+20+20+20 = 189mm (fits in 190mm available)
-    trade_table = Table(trade_items_data, colWidths=[15*mm, 40*mm, 20*mm, 18*mm, 18*mm, 18*mm, 20*mm, 20*mm, 20*mm])
-    trade_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E0E0E0')),
+    Returns:
+        PDF bytes
+    """
+    refs = prefetch_invoice_refs(db, [order]) if db else None
+    payload = build_invoice_payload(
+        order, refs, company_name, company_address, company_phone,
+        depot_name, customer_address, customer_phone, tin_number,
+    )
+    pdf_bytes, errors = render_invoices([payload])
+    if errors:
+        raise ValueError(errors[0][1])
+    return pdf_bytes
+
+
+def render_invoices(payloads: List[dict]) -> Tuple[bytes, List[Tuple[str, str]]]:
+    """Render invoice payloads into one PDF, each invoice starting on a new page.
+
+    Returns the PDF and ``(memo_no, error)`` for invoices that failed to
+    render and were left out. Runs without a database, so it can be handed
+    to a process pool.
+    """
+    stories, errors = [], []
+    for payload in payloads:
+        try:
+            stories.append((payload['memo_no'], _invoice_story(payload)))
+        except Exception as e:
+            errors.append((payload.get('memo_no'), str(e)))
+    try:
+        return _build(story for _, story in stories), errors
+    except Exception:
+        if len(stories) <= 1:
+            raise
+    # One invoice breaks the layout: find it rather than failing the batch.
+    good = []
+    for memo_no, story in stories:
+        try:
+            _build([story])
+            good.append(story)
+        except Exception as e:
+            errors.append((memo_no, str(e)))
+    return (_build(good) if good else b""), errors
+
+
+# Template: everything below is built once per process; an invoice only binds its data.
+
+MARGINS = (10*mm, 10*mm, 10*mm, 10*mm)  # top, bottom, left, right - reduced for more space
+
+COMPANY_TITLE_LEFT = kit.paragraph_style(
+    'CompanyTitle', fontSize=14, textColor=kit.BLACK, fontName='Helvetica-Bold', alignment=TA_LEFT
+)
+COMPANY_TITLE_CENTER = kit.paragraph_style(
+    'CompanyTitle', fontSize=14, textColor=kit.BLACK, fontName='Helvetica-Bold', alignment=TA_CENTER
+)
+COMPANY_ADDRESS = kit.paragraph_style(
+    'CompanyAddress', fontSize=9, textColor=kit.BLACK, spaceAfter=2, alignment=TA_CENTER, fontName='Helvetica'
+)
+COMPANY_PHONE = kit.paragraph_style(
+    'CompanyPhone', fontSize=9, textColor=kit.BLACK, spaceAfter=4, alignment=TA_CENTER, fontName='Helvetica'
+)
+PAYMENT_TYPE = kit.paragraph_style('PaymentType', fontSize=10, fontName='Helvetica-Bold', alignment=TA_CENTER)
+INWORD = kit.paragraph_style('Inword', fontSize=9, fontName='Helvetica', alignment=TA_LEFT)
+SECTION_TITLE = kit.paragraph_style('SectionTitle', fontSize=10, fontName='Helvetica-Bold', alignment=TA_LEFT)
+
+
+def _header_style(barcode: bool) -> TableStyle:
+    return TableStyle([
+        ('ALIGN', (0, 0), (0, 0), 'LEFT' if barcode else 'CENTER'),
+        ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ])
+
+
+HEADER_STYLE = {True: _header_style(True), False: _header_style(False)}
+DETAILS_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+    ('ALIGN', (2, 0), (2, -1), 'LEFT'),
+    ('ALIGN', (3, 0), (3, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+])
+
+
+def _items_style(numeric_from: int, numeric_to: int, padding: int = 4, side_padding: bool = True) -> TableStyle:
+    commands = [
+        ('BACKGROUND', (0, 0), (-1, 0), kit.HEADER_GREY),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
         ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (4, 1), (8, -1), 'RIGHT'),  # Right align numeric columns
+        ('ALIGN', (numeric_from, 1), (numeric_to, -1), 'RIGHT'),  # Right align numeric columns
         ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
         ('FONTSIZE', (0, 0), (-1, 0), 8),
         ('FONTSIZE', (0, 1), (-1, -1), 7),
         ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
         ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('LEFTPADDING', (0, 0), (-1, -1), 3),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-    ]))
-    story.append(trade_table)
-    story.append(Spacer(1, 4*mm))
-    
-    # Summary section - Total Amount
-    summary_data = [
-        ['Total Amount :', f"{float(total_amount):,.2f}"]
+        ('BOTTOMPADDING', (0, 0), (-1, -1), padding),
+        ('TOPPADDING', (0, 0), (-1, -1), padding),
     ]
-    
-    summary_table = Table(summary_data, colWidths=[140*mm, 50*mm])
-    summary_table.setStyle(TableStyle([
+    if side_padding:
+        commands += [('LEFTPADDING', (0, 0), (-1, -1), 3), ('RIGHTPADDING', (0, 0), (-1, -1), 3)]
+    return TableStyle(commands)
+
+
+TRADE_STYLE = _items_style(4, 8)
+FREE_GOODS_STYLE = _items_style(4, 6)
+DUES_STYLE = _items_style(2, 2, padding=3, side_padding=False)
+
+
+def _amount_row_style(font: str) -> TableStyle:
+    return TableStyle([
         ('ALIGN', (0, 0), (0, -1), 'LEFT'),
         ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTNAME', (0, 0), (-1, -1), font),
         ('FONTSIZE', (0, 0), (-1, -1), 9),
         ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
         ('TOPPADDING', (0, 0), (-1, -1), 4),
-    ]))
-    story.append(summary_table)
+    ])
+
+
+AMOUNT_ROW_STYLE = _amount_row_style('Helvetica')
+NET_PAYABLE_STYLE = _amount_row_style('Helvetica-Bold')
+
+TRADE_HEADER = ['Code', 'Product Name', 'Unit', 'Batch No.', 'Trade Price', 'Quantity', 'Amount', 'VAT Amount', 'Total Amount']
+TRADE_WIDTHS = [15*mm, 40*mm, 20*mm, 18*mm, 18*mm, 18*mm, 20*mm, 20*mm, 20*mm]
+FREE_GOODS_HEADER = ['Code', 'Product Name', 'Batch No.', 'Ratio Quantity', 'Trade Amount', 'VAT Amount', 'Total Amount']
+FREE_GOODS_WIDTHS = [15*mm, 40*mm, 20*mm, 25*mm, 20*mm, 20*mm, 20*mm]
+AMOUNT_ROW_WIDTHS = [140*mm, 50*mm]
+# Dues are not tracked yet: one empty row
+DUES_DATA = [['Memo No.', 'Date', 'Payable Amount'], ['—', '—', '—']]
+
+PAYMENT_TYPE_TEXT = "COD (PHARMA)"
+TRADE_DISCOUNT_PERCENT = Decimal('2.00')  # Less: Trade Discount (always 2%)
+
+
+def _build(stories: Iterable[list]) -> bytes:
+    flowables = []
+    for story in stories:
+        if flowables:
+            flowables.append(PageBreak())
+        flowables.extend(story)
+    return kit.build_pdf(flowables, MARGINS)
+
+
+def _truncate(text: str, length: int) -> str:
+    return text[:length] if len(text) > length else text
+
+
+def _invoice_story(invoice: dict) -> list:
+    memo_no = invoice['memo_no']
+    total_amount = invoice['total_amount']
+    story = [Spacer(1, 2*mm)]
+
+    # Header with Company Name (left) and Barcode (right); company name centered if no barcode
+    barcode_flowable = None
+    barcode_value = str(memo_no).strip()
+    if barcode_value:
+        try:
+            # Create barcode flowable - smaller size for top header
+            barcode_flowable = BarcodeFlowable(barcode_value, 50*mm, 18*mm)
+        except Exception as e:
+            logger.warning(f"Error creating barcode flowable: {e}")
+    has_barcode = barcode_flowable is not None
+    company_style = COMPANY_TITLE_LEFT if has_barcode else COMPANY_TITLE_CENTER
+    story.append(kit.table(
+        [[kit.static_paragraph(invoice['company_name'], company_style), barcode_flowable or '']],
+        [140*mm, 50*mm] if has_barcode else [190*mm, 0],
+        HEADER_STYLE[has_barcode],
+    ))
+    story.append(Spacer(1, 3*mm))  # Added spacer between title and address
+    story.append(kit.static_paragraph(invoice['company_address'], COMPANY_ADDRESS))
+    story.append(kit.static_paragraph(f"Phone: {invoice['company_phone']}", COMPANY_PHONE))
     story.append(Spacer(1, 2*mm))
-    
-    # Less: Trade Discount (always 2%)
-    trade_discount_percent = Decimal('2.00')
-    trade_discount_amount = total_amount * (trade_discount_percent / 100)
-    
-    discount_data = [
-        [f'Less : Trade Discount On {float(total_amount):,.2f} @ {float(trade_discount_percent):.2f}%', f"{float(trade_discount_amount):,.2f}"]
+    story.append(kit.static_paragraph(PAYMENT_TYPE_TEXT, PAYMENT_TYPE))
+    story.append(Spacer(1, 3*mm))
+
+    # Customer info (left) and Memo details (right)
+    story.append(kit.table(
+        [
+            ['Customer:', invoice['customer_phone'] or invoice['customer_code'] or '—', 'Memo No.:', memo_no],
+            [invoice['customer_name'], '', 'Date:', invoice['order_date']],
+            [invoice['customer_address'] or '—', '', 'PSO Code:', invoice['pso_code']],
+        ],
+        [30*mm, 60*mm, 30*mm, 60*mm],
+        DETAILS_STYLE,
+    ))
+    story.append(Spacer(1, 4*mm))
+
+    # Trade Items table
+    trade_rows = [TRADE_HEADER] + [
+        [
+            item['code'],
+            _truncate(item['name'], 35),
+            item['unit'],
+            _truncate(item['batch'], 15),
+            f"{float(item['trade_price']):,.2f}",
+            str(int(item['qty'])),
+            f"{float(item['trade_amount']):,.2f}",
+            f"{float(item['vat_amount']):,.2f}",
+            f"{float(item['total']):,.2f}"
+        ]
+        for item in invoice['trade_items']
     ]
-    
-    discount_table = Table(discount_data, colWidths=[140*mm, 50*mm])
-    discount_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-    ]))
-    story.append(discount_table)
-    story.append(Spacer(1, 2*mm))
-    
-    # Less: Adjusted CN Amount (initially 0)
+    story.append(kit.table(trade_rows, TRADE_WIDTHS, TRADE_STYLE))
+    story.append(Spacer(1, 4*mm))
+
+    # Summary: total, trade discount, adjusted CN (initially 0), net payable
+    trade_discount_amount = total_amount * (TRADE_DISCOUNT_PERCENT / 100)
     adjusted_cn_amount = Decimal('0')
-    cn_data = [
-        ['Less : Adjusted CN Amount', f"{float(adjusted_cn_amount):,.2f}"]
-    ]
-    
-    cn_table = Table(cn_data, colWidths=[140*mm, 50*mm])
-    cn_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-    ]))
-    story.append(cn_table)
-    story.append(Spacer(1, 2*mm))
-    
-    # Net Payable Amount
     net_payable = total_amount - trade_discount_amount - adjusted_cn_amount
-    
-    net_payable_data = [
-        ['Net Payable Amount :', f"{float(net_payable):,.2f}"]
-    ]
-    
-    net_payable_table = Table(net_payable_data, colWidths=[140*mm, 50*mm])
-    net_payable_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-    ]))
-    story.append(net_payable_table)
-    story.append(Spacer(1, 2*mm))
-    
+    for row, style in (
+        (['Total Amount :', f"{float(total_amount):,.2f}"], AMOUNT_ROW_STYLE),
+        ([f'Less : Trade Discount On {float(total_amount):,.2f} @ {float(TRADE_DISCOUNT_PERCENT):.2f}%',
+          f"{float(trade_discount_amount):,.2f}"], AMOUNT_ROW_STYLE),
+        (['Less : Adjusted CN Amount', f"{float(adjusted_cn_amount):,.2f}"], AMOUNT_ROW_STYLE),
+        (['Net Payable Amount :', f"{float(net_payable):,.2f}"], NET_PAYABLE_STYLE),
+    ):
+        story.append(kit.table([row], AMOUNT_ROW_WIDTHS, style))
+        story.append(Spacer(1, 2*mm))
+
     # Amount in words
-    inword_text = f"In word: Taka {number_to_words(net_payable)}."
-    story.append(Paragraph(inword_text, ParagraphStyle(
-        'Inword',
-        parent=styles['Normal'],
-        fontSize=9,
-        fontName='Helvetica',
-        alignment=TA_LEFT
-    )))
+    story.append(Paragraph(f"In word: Taka {number_to_words(net_payable)}.", INWORD))
     story.append(Spacer(1, 4*mm))
-    
+
     # Free Goods section
+    free_goods_items = invoice['free_goods_items']
     if free_goods_items:
-        story.append(Paragraph("Free Goods", ParagraphStyle(
-            'FreeGoodsTitle',
-            parent=styles['Normal'],
-            fontSize=10,
-            fontName='Helvetica-Bold',
-            alignment=TA_LEFT
-        )))
+        story.append(kit.static_paragraph("Free Goods", SECTION_TITLE))
         story.append(Spacer(1, 2*mm))
-        
-        free_goods_data = [['Code', 'Product Name', 'Batch No.', 'Ratio Quantity', 'Trade Amount', 'VAT Amount', 'Total Amount']]
-        
-        for item in free_goods_items:
-            free_goods_data.append([
+        free_goods_rows = [FREE_GOODS_HEADER] + [
+            [
                 item['code'],
-                item['name'][:35] if len(item['name']) > 35 else item['name'],
-                item['batch'][:15] if len(item['batch']) > 15 else item['batch'],
+                _truncate(item['name'], 35),
+                _truncate(item['batch'], 15),
                 f"{item['ratio']} ({int(item['qty'])})",
                 f"{float(item['trade_amount']):,.2f}",
                 f"{float(item['vat_amount']):,.2f}",
                 f"{float(item['total']):,.2f}"
-            ])
-        
-        # Free goods table - increased widths
-        free_goods_table = Table(free_goods_data, colWidths=[15*mm, 40*mm, 20*mm, 25*mm, 20*mm, 20*mm, 20*mm])
-        free_goods_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E0E0E0')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (4, 1), (6, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 8),
-            ('FONTSIZE', (0, 1), (-1, -1), 7),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-            ('LEFTPADDING', (0, 0), (-1, -1), 3),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-        ]))
-        story.append(free_goods_table)
+            ]
+            for item in free_goods_items
+        ]
+        story.append(kit.table(free_goods_rows, FREE_GOODS_WIDTHS, FREE_GOODS_STYLE))
         story.append(Spacer(1, 3*mm))
-    
+
     # Dues section
-    story.append(Paragraph("Dues", ParagraphStyle(
-        'DuesTitle',
-        parent=styles['Normal'],
-        fontSize=10,
-        fontName='Helvetica-Bold',
-        alignment=TA_LEFT
-    )))
+    story.append(kit.static_paragraph("Dues", SECTION_TITLE))
     story.append(Spacer(1, 2*mm))
-    
-    dues_data = [['Memo No.', 'Date', 'Payable Amount']]
-    # Add empty row
-    dues_data.append(['—', '—', '—'])
-    
-    dues_table = Table(dues_data, colWidths=[60*mm, 60*mm, 60*mm])
-    dues_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E0E0E0')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 8),
-        ('FONTSIZE', (0, 1), (-1, -1), 7),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ('TOPPADDING', (0, 0), (-1, -1), 3),
-    ]))
-    story.append(dues_table)
+    story.append(kit.table(DUES_DATA, [60*mm, 60*mm, 60*mm], DUES_STYLE))
     story.append(Spacer(1, 4*mm))
-    
-    # Build PDF
-    doc.build(story)
-    buffer.seek(0)
-    return buffer.getvalue()
+    return story
@@ -0,0 +1,60 @@
+"""
+Report rendering kit
+Shared ReportLab styles, table styles and static flowables, built once per process
+"""
+
+import copy
+import io
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+BLACK = colors.HexColor('#000000')
+HEADER_GREY = colors.HexColor('#E0E0E0')
+
+SAMPLE_STYLES = getSampleStyleSheet()
+
+
+def paragraph_style(name: str, parent: str = 'Normal', **kwargs) -> ParagraphStyle:
+    """A named style derived from the sample sheet. Build these at import time, not per document."""
+    return ParagraphStyle(name, parent=SAMPLE_STYLES[parent], **kwargs)
+
+
+@lru_cache(maxsize=512)
+def _parsed_paragraph(text: str, style: ParagraphStyle) -> Paragraph:
+    return Paragraph(text, style)
+
+
+def static_paragraph(text: str, style: ParagraphStyle) -> Paragraph:
+    """A paragraph whose markup is parsed once per process.
+
+    Platypus keeps layout state on the flowable, so each document gets a
+    shallow copy that shares the parsed fragments.
+    """
+    return copy.copy(_parsed_paragraph(text, style))
+
+
+def table(data, col_widths, style: TableStyle) -> Table:
+    t = Table(data, colWidths=col_widths)
+    t.setStyle(style)
+    return t
+
+
+def build_pdf(story: Iterable, margins: tuple, pagesize=A4, buffer: Optional[io.BytesIO] = None) -> bytes:
+    """Build ``story`` into PDF bytes. ``margins`` is (top, bottom, left, right)."""
+    buffer = buffer or io.BytesIO()
+    top, bottom, left, right = margins
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=pagesize,
+        topMargin=top,
+        bottomMargin=bottom,
+        leftMargin=left,
+        rightMargin=right,
+    )
+    doc.build(list(story))
+    return buffer.getvalue()
@@ -0,0 +1,279 @@
+"""
+Loading Report and Money Receipt Generators
+PDFs printed per loading number: the van loading sheet and, after collection
+approval, the money receipt
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.units import inch
+from reportlab.platypus import Spacer, TableStyle
+
+from app.reports import kit
+
+
+# Template: built once per process; a report only binds its orders.
+
+MARGINS = (0.5*inch, 0.5*inch, 0.5*inch, 0.5*inch)  # top, bottom, left, right
+
+DEPOT_TITLE = kit.paragraph_style(
+    'CustomTitle', parent='Heading1', fontSize=18, textColor=kit.BLACK, spaceAfter=6,
+    alignment=TA_CENTER, fontName='Helvetica-Bold'
+)
+REPORT_TITLE = kit.paragraph_style(
+    'ReportTitle', parent='Heading2', fontSize=14, textColor=kit.BLACK, spaceAfter=12,
+    alignment=TA_CENTER, fontName='Helvetica-Bold', leading=16
+)
+TABLE_TITLE = kit.paragraph_style(
+    'TableTitle', parent='Heading3', fontSize=12, textColor=kit.BLACK, spaceAfter=8,
+    alignment=TA_LEFT, fontName='Helvetica-Bold'
+)
+PAGE_NUMBER = kit.paragraph_style(
+    'PageNumber', fontSize=8, textColor=colors.HexColor('#666666'), alignment=TA_CENTER, fontName='Helvetica'
+)
+
+# Calculate header table width to fit A4 (8.27 inches, with 0.5 inch margins = 7.27 inches usable)
+HEADER_WIDTHS = [0.9*inch, 2.4*inch, 1.1*inch, 2.37*inch]
+HEADER_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),  # Label columns bold
+    ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+    ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (3, 0), (3, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('WORDWRAP', (0, 0), (-1, -1), True),  # Enable word wrapping for header
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+    ('TOPPADDING', (0, 0), (-1, -1), 5),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+# Loading report: COD/INVOICE sales
+SALES_HEADER = ['Memo No.', 'Value', 'Status', 'PSO', 'Remarks', 'Cash', 'Dues', 'Amend', 'Return']
+# Wide first column for the "Business-wise Total" label
+# Total: 1.1 + 0.8 + 0.4 + 0.6 + 0.7 + 0.8 + 0.6 + 0.6 + 0.57 = 6.57 inches
+SALES_WIDTHS = [1.1*inch, 0.8*inch, 0.4*inch, 0.6*inch, 0.7*inch, 0.8*inch, 0.6*inch, 0.6*inch, 0.57*inch]
+SALES_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), kit.HEADER_GREY),
+    ('TEXTCOLOR', (0, 0), (-1, 0), kit.BLACK),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),  # Memo No. / summary labels
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),  # Value
+    ('ALIGN', (2, 0), (3, -1), 'CENTER'),  # Status, PSO
+    ('ALIGN', (4, 0), (4, -1), 'LEFT'),  # Remarks
+    ('ALIGN', (5, 0), (8, -1), 'RIGHT'),  # Cash, Dues, Amend, Return
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+    ('TOPPADDING', (0, 0), (-1, 0), 6),
+    ('FONTNAME', (0, 1), (-1, -3), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -3), 7),
+    ('WORDWRAP', (0, 0), (-1, -1), True),
+    ('LEFTPADDING', (0, 0), (-1, -1), 3),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+    ('GRID', (0, 0), (-1, -3), 0.5, colors.HexColor('#CCCCCC')),
+    ('BACKGROUND', (0, -2), (-1, -2), colors.HexColor('#F5F5F5')),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#E8E8E8')),
+    ('FONTNAME', (0, -2), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, -2), (-1, -1), 8),
+    ('LINEBELOW', (0, -2), (-1, -2), 1, kit.BLACK),
+    ('LINEBELOW', (0, -1), (-1, -1), 2, kit.BLACK),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+    ('TOPPADDING', (0, 0), (-1, -1), 3),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -3), [colors.white, colors.HexColor('#FAFAFA')]),  # Alternating row colors
+])
+
+LOADING_FOOTER_DATA = [
+    ['Received:', ''],
+    ['Packages on:', ''],
+    ['with relevant C. O. D. as stated above', ''],
+    ['', ''],
+    ['Van Driver/ Delivery In-charge', ''],
+    ['Signature:', ''],
+    ['Date:', ''],
+    ['', ''],
+    ['C. O. D. CASH & INVENTORY RECONCILATION', ''],
+    ['CASH', ''],
+    ['Received Tk.', ''],
+    ['UNDELIVERED C. O. D.', ''],
+    ['(Details on back of form)', ''],
+    ['', ''],
+    ['Cashier', ''],
+    ['Signature:', ''],
+    ['Date:', ''],
+]
+LOADING_FOOTER_WIDTHS = [4.2*inch, 2.57*inch]
+LOADING_FOOTER_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('WORDWRAP', (0, 0), (-1, -1), True),
+    ('LINEBELOW', (0, 4), (-1, 4), 0.5, kit.BLACK),
+    ('LINEBELOW', (0, 8), (-1, 8), 0.5, kit.BLACK),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+    ('TOPPADDING', (0, 0), (-1, -1), 3),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+# Money receipt: collection details
+COLLECTION_HEADER = ['Memo No.', 'Total Amount', 'Collected', 'Pending', 'Status']
+COLLECTION_WIDTHS = [1.5*inch, 1.2*inch, 1.2*inch, 1.2*inch, 1.37*inch]
+COLLECTION_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), kit.HEADER_GREY),
+    ('TEXTCOLOR', (0, 0), (-1, 0), kit.BLACK),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (3, -1), 'RIGHT'),
+    ('ALIGN', (4, 0), (4, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+    ('TOPPADDING', (0, 0), (-1, 0), 6),
+    ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -2), 7),
+    ('WORDWRAP', (0, 0), (-1, -1), True),
+    ('LEFTPADDING', (0, 0), (-1, -1), 3),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+    ('GRID', (0, 0), (-1, -2), 0.5, colors.HexColor('#CCCCCC')),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#E8E8E8')),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, -1), (-1, -1), 8),
+    ('LINEBELOW', (0, -1), (-1, -1), 2, kit.BLACK),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+    ('TOPPADDING', (0, 0), (-1, -1), 3),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#FAFAFA')]),
+])
+
+RECEIPT_FOOTER_WIDTHS = [3*inch, 4.27*inch]
+RECEIPT_FOOTER_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('FONTNAME', (1, 0), (1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (1, 0), (1, 0), 10),
+    ('LINEBELOW', (0, 2), (-1, 2), 0.5, kit.BLACK),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+    ('TOPPADDING', (0, 0), (-1, -1), 3),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+
+def _money(value) -> str:
+    return f"{float(value):.2f}"
+
+
+def _heading(story: list, first_order: Any, loading_number: str, title: str) -> None:
+    """Depot title, report title and the depot / van / loading header shared by both reports."""
+    employee = first_order.assigned_employee
+    vehicle = first_order.assigned_vehicle_rel
+    depot_name = first_order.depot_name or "CENTRAL STORE"
+
+    story.append(kit.static_paragraph(depot_name.upper(), DEPOT_TITLE))
+    story.append(Spacer(1, 0.15*inch))
+    story.append(kit.static_paragraph(title, REPORT_TITLE))
+    story.append(Spacer(1, 0.25*inch))
+
+    employee_name = f"{employee.first_name} {employee.last_name or ''}".strip() if employee else "N/A"
+    employee_code = employee.employee_id if employee else "N/A"
+    vehicle_reg = vehicle.registration_number if vehicle else "N/A"
+    loading_date = (first_order.loading_date or datetime.utcnow()).strftime('%d/%m/%Y')
+    area = first_order.area or "N/A"
+
+    # Truncate long text to prevent overlap in header
+    header_data = [
+        ['Depot:', depot_name[:25], 'Delivery By:', f"{employee_name} ({employee_code})"[:30]],
+        ['Van No.:', vehicle_reg[:15], 'Loading No.:', loading_number[:15]],
+        ['Date:', loading_date, 'Area:', area[:20]],
+    ]
+    story.append(kit.table(header_data, HEADER_WIDTHS, HEADER_STYLE))
+    story.append(Spacer(1, 0.3*inch))
+
+
+def _memo_no(order: Any) -> str:
+    return (order.memo_number or order.order_number or str(order.id))[:15]
+
+
+def generate_loading_report(orders: List[Any], loading_number: str) -> bytes:
+    """
+    Generate the loading report PDF for the orders of one loading number
+
+    Args:
+        orders: Orders sharing the loading number, in print order
+        loading_number: Loading number
+
+    Returns:
+        PDF bytes
+    """
+    story = []
+    _heading(story, orders[0], loading_number, "LOADING REPORT")
+
+    story.append(kit.static_paragraph("COD/INVOICE Sales", TABLE_TITLE))
+    table_data = [SALES_HEADER]
+    total_value = Decimal("0")
+    for order in orders:
+        order_value = order.net_amount or Decimal("0")
+        pso = str(order.pso_code or order.pso_id or "N/A")[:10]
+        # C for COD/Cash; full payment assumed, so nothing due, amended or returned
+        table_data.append([_memo_no(order), _money(order_value), "C", pso, "", _money(order_value), "0.00", "0.00", "0.00"])
+        total_value += order_value
+
+    totals = [_money(total_value), '', '', '', _money(total_value), "0.00", "0.00", "0.00"]
+    table_data.append(['Business-wise Total', *totals])
+    table_data.append(['Grand Total:', *totals])
+    story.append(kit.table(table_data, SALES_WIDTHS, SALES_STYLE))
+    story.append(Spacer(1, 0.4*inch))
+
+    story.append(kit.table(LOADING_FOOTER_DATA, LOADING_FOOTER_WIDTHS, LOADING_FOOTER_STYLE))
+    story.append(Spacer(1, 0.2*inch))
+    story.append(kit.static_paragraph("Page 1 of 1", PAGE_NUMBER))
+
+    return kit.build_pdf(story, MARGINS)
+
+
+def generate_money_receipt(orders: List[Any], loading_number: str) -> bytes:
+    """
+    Generate the money receipt PDF for the collection-approved orders of one loading number
+
+    Args:
+        orders: Collection-approved orders sharing the loading number
+        loading_number: Loading number
+
+    Returns:
+        PDF bytes
+    """
+    story = []
+    _heading(story, orders[0], loading_number, "MONEY RECEIPT")
+
+    story.append(kit.static_paragraph("Collection Details", TABLE_TITLE))
+    table_data = [COLLECTION_HEADER]
+    total_amount = Decimal("0")
+    total_collected = Decimal("0")
+    total_pending = Decimal("0")
+    for order in orders:
+        order_total = order.net_amount or Decimal("0")
+        collected = order.collected_amount or Decimal("0")
+        pending = order.pending_amount or Decimal("0")
+        status_val = order.collection_status or "Pending"
+        table_data.append([_memo_no(order), _money(order_total), _money(collected), _money(pending), status_val[:20]])
+        total_amount += order_total
+        total_collected += collected
+        total_pending += pending
+
+    table_data.append(['Total:', _money(total_amount), _money(total_collected), _money(total_pending), ''])
+    story.append(kit.table(table_data, COLLECTION_WIDTHS, COLLECTION_STYLE))
+    story.append(Spacer(1, 0.4*inch))
+
+    footer_data = [
+        ['Received Amount:', f"৳{_money(total_collected)}"],
+        ['', ''],
+        ['Cashier', ''],
+        ['Signature:', ''],
+        ['Date:', datetime.utcnow().strftime('%d/%m/%Y')],
+    ]
+    story.append(kit.table(footer_data, RECEIPT_FOOTER_WIDTHS, RECEIPT_FOOTER_STYLE))
+
+    return kit.build_pdf(story, MARGINS)
@@ -4,15 +4,113 @@ Generates PDF packing reports similar to the RENATA LIMITED format
 """
 
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.platypus import TableStyle, Spacer
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from datetime import datetime
 from decimal import Decimal
 from typing import List, Dict, Any
-import io
+
+from app.reports import kit
+
+
+# Template: built once per process; a report only binds its orders.
+
+# Reduced left/right margins give the tables more space without cutting
+MARGINS = (15*mm, 15*mm, 10*mm, 10*mm)  # top, bottom, left, right
+
+COMPANY_TITLE = kit.paragraph_style(
+    'CompanyTitle', fontSize=16, textColor=kit.BLACK, spaceAfter=8, alignment=TA_CENTER, fontName='Helvetica-Bold'
+)
+DEPOT_NAME = kit.paragraph_style(
+    'DepotName', fontSize=12, textColor=kit.BLACK, spaceAfter=8, alignment=TA_CENTER,
+    fontName='Helvetica'  # Regular, not bold
+)
+REPORT_TITLE = kit.paragraph_style(
+    'ReportTitle', fontSize=16, textColor=kit.BLACK, spaceAfter=10, alignment=TA_CENTER, fontName='Helvetica-Bold'
+)
+SECTION_TITLE = kit.paragraph_style('SectionTitle', fontSize=11, fontName='Helvetica-Bold', alignment=TA_LEFT)
+COLUMN_HEADER = kit.paragraph_style('Header', fontSize=7, fontName='Helvetica-Bold', alignment=TA_CENTER)
+
+HEADER_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),  # Packing No. label left
+    ('ALIGN', (1, 0), (1, -1), 'LEFT'),  # Packing No. value left
+    ('ALIGN', (2, 0), (2, 0), 'RIGHT'),  # Date label right (top row)
+    ('ALIGN', (3, 0), (3, 0), 'LEFT'),  # Date value left (top row)
+    ('ALIGN', (2, 1), (2, 1), 'RIGHT'),  # Area label right (bottom row)
+    ('ALIGN', (3, 1), (3, 1), 'LEFT'),  # Area value left (bottom row)
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('LINEBELOW', (0, 1), (-1, 1), 1, colors.black),  # Horizontal line below bottom row
+])
+PRODUCT_STYLE = TableStyle([
+    # Header row
+    ('BACKGROUND', (0, 0), (-1, 0), kit.HEADER_GREY),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('ALIGN', (2, 0), (8, -1), 'CENTER'),  # Center numeric columns
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),  # Center header text
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 7),
+    ('FONTSIZE', (0, 1), (-1, -1), 7),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 6),  # Increased padding for wrapped headers
+    ('TOPPADDING', (0, 0), (-1, 0), 6),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
+    ('TOPPADDING', (0, 1), (-1, -1), 4),
+    ('LEFTPADDING', (0, 0), (-1, -1), 3),  # Add left padding
+    ('RIGHTPADDING', (0, 0), (-1, -1), 3),  # Add right padding
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+MEMO_STYLE = TableStyle([
+    # Header row
+    ('BACKGROUND', (0, 0), (-1, 0), kit.HEADER_GREY),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('ALIGN', (3, 1), (3, -1), 'RIGHT'),  # Right align amounts
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 7),
+    ('FONTSIZE', (0, 1), (-1, -2), 7),
+    ('FONTSIZE', (0, -1), (-1, -1), 8),  # Total row
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),  # Total row bold
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),  # Center header text
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+    ('TOPPADDING', (0, 0), (-1, 0), 6),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
+    ('TOPPADDING', (0, 1), (-1, -1), 4),
+    ('LEFTPADDING', (0, 0), (-1, -1), 3),  # Add left padding
+    ('RIGHTPADDING', (0, 0), (-1, -1), 3),  # Add right padding
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+# Column widths fit A4 less margins (190mm)
+# Total: 17+52+17+17+17+17+19+14+17 = 187mm (fits within 190mm with 3mm buffer)
+PRODUCT_WIDTHS = [
+    17*mm,  # Code
+    52*mm,  # Product Name (increased for full names)
+    17*mm,  # No. of Total
+    17*mm,  # No. of Carton
+    17*mm,  # No. of Loose
+    17*mm,  # Carton Size
+    19*mm,  # Carton Quantity
+    14*mm,  # Free Goods
+    17*mm   # Batch No.
+]
+# Total: 50+35+35+50 = 170mm (leaving 20mm buffer)
+MEMO_WIDTHS = [50*mm, 35*mm, 35*mm, 50*mm]
+
+PRODUCT_HEADER_TEXT = [
+    'Code', 'Product<br/>Name', 'No. of<br/>Total', 'No. of<br/>Carton', 'No. of<br/>Loose',
+    'Carton<br/>Size', 'Carton<br/>Quantity', 'Free<br/>Goods', 'Batch<br/>No.',
+]
+MEMO_HEADER_TEXT = ['Memo<br/>No', 'Date', 'PSO<br/>Code', 'Amount']
+
+
+def _header_row(texts: List[str]) -> list:
+    return [kit.static_paragraph(text, COLUMN_HEADER) for text in texts]
 
 
 def generate_packing_number() -> str:
@@ -41,38 +139,7 @@ def generate_packing_report(
     Returns:
         PDF bytes
     """
-    buffer = io.BytesIO()
-    # Increased margins to prevent cutting on left and right sides
-    doc = SimpleDocTemplate(
-        buffer, 
-        pagesize=A4, 
-        topMargin=15*mm, 
-        bottomMargin=15*mm,
-        leftMargin=10*mm,  # Reduced to give more space for table
-        rightMargin=10*mm  # Reduced to give more space for table
-    )
     story = []
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#000000'),
-        spaceAfter=6,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    header_style = ParagraphStyle(
-        'CustomHeader',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor('#000000'),
-        alignment=TA_LEFT,
-        fontName='Helvetica'
-    )
     
     # Generate packing number
     packing_no = generate_packing_number()
@@ -82,44 +149,12 @@ def generate_packing_report(
     display_area = area or route_name or "N/A"
     
     # Header - Title format: RENATA LIMITED, then Depot, then PACKING REPORT (ALL CENTERED)
-    # First line: Company name (bold, largest, CENTERED) - Always use RENATA LIMITED
-    company_title_style = ParagraphStyle(
-        'CompanyTitle',
-        parent=styles['Normal'],
-        fontSize=16,
-        textColor=colors.HexColor('#000000'),
-        spaceAfter=8,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    story.append(Paragraph("RENATA LIMITED", company_title_style))
+    story.append(kit.static_paragraph("RENATA LIMITED", COMPANY_TITLE))
     story.append(Spacer(1, 3*mm))  # Space after company name
-    
-    # Second line: Depot name (less bold, smaller, CENTERED)
-    depot_style = ParagraphStyle(
-        'DepotName',
-        parent=styles['Normal'],
-        fontSize=12,
-        textColor=colors.HexColor('#000000'),
-        spaceAfter=8,
-        alignment=TA_CENTER,
-        fontName='Helvetica'  # Regular, not bold
-    )
     depot_display = depot_name.upper() if depot_name else "CENTRAL STORE"
-    story.append(Paragraph(depot_display, depot_style))
+    story.append(kit.static_paragraph(depot_display, DEPOT_NAME))
     story.append(Spacer(1, 3*mm))  # Space after depot name
-    
-    # Third line: Report name (bold, similar to first line, CENTERED)
-    report_title_style = ParagraphStyle(
-        'ReportTitle',
-        parent=styles['Normal'],
-        fontSize=16,
-        textColor=colors.HexColor('#000000'),
-        spaceAfter=10,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    story.append(Paragraph("PACKING REPORT", report_title_style))
+    story.append(kit.static_paragraph("PACKING REPORT", REPORT_TITLE))
     story.append(Spacer(1, 8*mm))  # Increased space under title
     
     # Header info table: Packing No., Area (route), Date
@@ -130,20 +165,7 @@ def generate_packing_report(
         ['Packing No. :', packing_no, 'AREA :', display_area]  # Bottom row: Packing No. left, Area right
     ]
     # Adjust header table widths to fit page (A4 width - margins = 210mm - 20mm = 190mm)
-    header_table = Table(header_data, colWidths=[40*mm, 50*mm, 35*mm, 65*mm])
-    header_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),  # Packing No. label left
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),  # Packing No. value left
-        ('ALIGN', (2, 0), (2, 0), 'RIGHT'),  # Date label right (top row)
-        ('ALIGN', (3, 0), (3, 0), 'LEFT'),  # Date value left (top row)
-        ('ALIGN', (2, 1), (2, 1), 'RIGHT'),  # Area label right (bottom row)
-        ('ALIGN', (3, 1), (3, 1), 'LEFT'),  # Area value left (bottom row)
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('LINEBELOW', (0, 1), (-1, 1), 1, colors.black),  # Horizontal line below bottom row
-    ]))
+    header_table = kit.table(header_data, [40*mm, 50*mm, 35*mm, 65*mm], HEADER_STYLE)
     story.append(header_table)
     story.append(Spacer(1, 8*mm))
     
@@ -247,27 +269,11 @@ def generate_packing_report(
         total_amount += memo_amount
     
     # Product table
-    story.append(Paragraph("A Group - Phamar, Purnava & Suture Products", ParagraphStyle(
-        'GroupTitle',
-        parent=styles['Normal'],
-        fontSize=11,
-        fontName='Helvetica-Bold',
-        alignment=TA_LEFT
-    )))
+    story.append(kit.static_paragraph("A Group - Phamar, Purnava & Suture Products", SECTION_TITLE))
     story.append(Spacer(1, 3*mm))
     
     # Product table data with wrapped headers
-    product_table_data = [[
-        Paragraph('Code', ParagraphStyle('Header', parent=styles['Normal'], fontSize=7, fontName='Helvetica-Bold', alignment=TA_CENTER)),
-        Paragraph('Product<br/>Name', ParagraphStyle('Header', parent=styles['Normal'], fontSize=7, fontName='Helvetica-Bold', alignment=TA_CENTER)),
-        Paragraph('No. of<br/>Total', ParagraphStyle('Header', parent=styles['Normal'], fontSize=7, fontName='Helvetica-Bold', alignment=TA_CENTER)),
-        Paragraph('No. of<br/>Carton', ParagraphStyle('Header', parent=styles['Normal'], fontSize=7, fontName='Helvetica-Bold', alignment=TA_CENTER)),
-        Paragraph('No. of<br/>Loose', ParagraphStyle('Header', parent=styles['Normal'], fontSize=7, fontName='Helvetica-Bold', alignment=TA_CENTER)),
-        Paragraph('Carton<br/>Size', ParagraphStyle('Header', parent=styles['Normal'], fontSize=7, fontName='Helvetica-Bold', alignment=TA_CENTER)),
-        Paragraph('Carton<br/>Quantity', ParagraphStyle('Header', parent=styles['Normal'], fontSize=7, fontName='Helvetica-Bold', alignment=TA_CENTER)),
-        Paragraph('Free<br/>Goods', ParagraphStyle('Header', parent=styles['Normal'], fontSize=7, fontName='Helvetica-Bold', alignment=TA_CENTER)),
-        Paragraph('Batch<br/>No.', ParagraphStyle('Header', parent=styles['Normal'], fontSize=7, fontName='Helvetica-Bold', alignment=TA_CENTER))
-    ]]
+    product_table_data = [_header_row(PRODUCT_HEADER_TEXT)]
     
     # Check if we have any products
     if not product_groups:
@@ -291,61 +297,17 @@ def generate_packing_report(
                 (data.get('batch_no', 'N/A')[:20] if len(data.get('batch_no', '')) > 20 else data.get('batch_no', 'N/A'))  # Truncate long batch numbers
             ])
     
-    # Calculate column widths to fit page (A4 width - margins = 210mm - 20mm = 190mm)
-    # Total: 17+52+17+17+17+17+19+14+17 = 187mm (fits within 190mm with 3mm buffer)
-    available_width = 190*mm
-    product_table = Table(product_table_data, colWidths=[
-        17*mm,  # Code
-        52*mm,  # Product Name (increased for full names)
-        17*mm,  # No. of Total
-        17*mm,  # No. of Carton
-        17*mm,  # No. of Loose
-        17*mm,  # Carton Size
-        19*mm,  # Carton Quantity
-        14*mm,  # Free Goods
-        17*mm   # Batch No.
-    ])
-    
-    product_table.setStyle(TableStyle([
-        # Header row
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E0E0E0')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (2, 0), (8, -1), 'CENTER'),  # Center numeric columns
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),  # Center header text
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 7),
-        ('FONTSIZE', (0, 1), (-1, -1), 7),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),  # Increased padding for wrapped headers
-        ('TOPPADDING', (0, 0), (-1, 0), 6),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-        ('TOPPADDING', (0, 1), (-1, -1), 4),
-        ('LEFTPADDING', (0, 0), (-1, -1), 3),  # Add left padding
-        ('RIGHTPADDING', (0, 0), (-1, -1), 3),  # Add right padding
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
+    product_table = kit.table(product_table_data, PRODUCT_WIDTHS, PRODUCT_STYLE)
     
     story.append(product_table)
     story.append(Spacer(1, 8*mm))  # Space after product table
     
     # Memo list table
-    story.append(Paragraph("Memo List According To Packing Report", ParagraphStyle(
-        'MemoTitle',
-        parent=styles['Normal'],
-        fontSize=11,
-        fontName='Helvetica-Bold',
-        alignment=TA_LEFT
-    )))
+    story.append(kit.static_paragraph("Memo List According To Packing Report", SECTION_TITLE))
     story.append(Spacer(1, 3*mm))
     
     # Memo table with wrapped headers
-    memo_table_data = [[
-        Paragraph('Memo<br/>No', ParagraphStyle('Header', parent=styles['Normal'], fontSize=7, fontName='Helvetica-Bold', alignment=TA_CENTER)),
-        Paragraph('Date', ParagraphStyle('Header', parent=styles['Normal'], fontSize=7, fontName='Helvetica-Bold', alignment=TA_CENTER)),
-        Paragraph('PSO<br/>Code', ParagraphStyle('Header', parent=styles['Normal'], fontSize=7, fontName='Helvetica-Bold', alignment=TA_CENTER)),
-        Paragraph('Amount', ParagraphStyle('Header', parent=styles['Normal'], fontSize=7, fontName='Helvetica-Bold', alignment=TA_CENTER))
-    ]]
+    memo_table_data = [_header_row(MEMO_HEADER_TEXT)]
     
     for memo in sorted(memo_list, key=lambda x: x['memo_no']):
         memo_table_data.append([
@@ -363,37 +325,10 @@ def generate_packing_report(
         f"{float(total_amount):,.2f}"
     ])
     
-    # Calculate column widths to fit page (A4 width - margins = 210mm - 30mm = 180mm)
-    # Memo table - fit within 190mm (A4 width - 20mm margins)
-    # Total: 50+35+35+50 = 170mm (leaving 20mm buffer)
-    memo_table = Table(memo_table_data, colWidths=[50*mm, 35*mm, 35*mm, 50*mm])
-    memo_table.setStyle(TableStyle([
-        # Header row
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E0E0E0')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (3, 1), (3, -1), 'RIGHT'),  # Right align amounts
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 7),
-        ('FONTSIZE', (0, 1), (-1, -2), 7),
-        ('FONTSIZE', (0, -1), (-1, -1), 8),  # Total row
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),  # Total row bold
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),  # Center header text
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-        ('TOPPADDING', (0, 0), (-1, 0), 6),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-        ('TOPPADDING', (0, 1), (-1, -1), 4),
-        ('LEFTPADDING', (0, 0), (-1, -1), 3),  # Add left padding
-        ('RIGHTPADDING', (0, 0), (-1, -1), 3),  # Add right padding
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
+    memo_table = kit.table(memo_table_data, MEMO_WIDTHS, MEMO_STYLE)
     
     story.append(memo_table)
     story.append(Spacer(1, 10*mm))
     
     # Build PDF (footer removed as requested)
-    doc.build(story)
-    buffer.seek(0)
-    return buffer.getvalue()
-
+    return kit.build_pdf(story, MARGINS)
@@ -0,0 +1,235 @@
+"""
+Route-wise print pipeline: packing report plus one invoice per memo in a single PDF.
+
+Database reads happen up front (orders, then customers, products and trade
+prices in bulk); rendering works on plain data, so invoices are rendered in
+chunks on a process pool and only one PDF per chunk is merged. Large jobs
+can run in the background and be downloaded once ready by the user who
+started them; their files are removed after ``REPORT_JOB_TTL_HOURS``.
+"""
+import io
+import json
+import logging
+import math
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Tuple
+
+from PyPDF2 import PdfReader, PdfWriter
+
+from app.reports.invoice_report import build_invoice_payload, prefetch_invoice_refs, render_invoices
+from app.reports.packing_report import generate_packing_report
+
+logger = logging.getLogger(__name__)
+
+RENDER_WORKERS = int(os.getenv("REPORT_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Below this many memos the pool costs more than it saves.
+PARALLEL_MIN_MEMOS = int(os.getenv("REPORT_PARALLEL_MIN_MEMOS", "20"))
+JOB_DIR = os.getenv("REPORT_JOB_DIR", os.path.join(tempfile.gettempdir(), "dms_print_jobs"))
+JOB_TTL_HOURS = float(os.getenv("REPORT_JOB_TTL_HOURS", "24"))
+
+_ORDER_FIELDS = ("id", "memo_number", "delivery_date", "pso_code", "customer_code", "customer_id", "customer_name")
+_ITEM_FIELDS = (
+    "selected", "product_code", "product_name", "pack_size", "batch_number", "quantity", "free_goods",
+    "total_quantity", "unit_price", "trade_price", "discount_percent",
+)
+
+_pool: Optional[Executor] = None
+
+
+def _get_pool() -> Executor:
+    global _pool
+    if _pool is None:
+        # spawn: workers must not inherit the parent's DB connections or threads
+        _pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def snapshot_orders(orders: Sequence[Any]) -> List[SimpleNamespace]:
+    """Detached, picklable copies of orders and their items with the fields the reports print."""
+    return [
+        SimpleNamespace(
+            **{field: getattr(order, field, None) for field in _ORDER_FIELDS},
+            items=[SimpleNamespace(**{field: getattr(item, field, None) for field in _ITEM_FIELDS}) for item in order.items],
+        )
+        for order in orders
+    ]
+
+
+class PrintBatch:
+    """Plain data for one print run, built while the session is open."""
+
+    def __init__(self, db, orders: Sequence[Any], company: Dict[str, str], depot_name: str, route_name: str):
+        self.order_ids = [order.id for order in orders]
+        self.depot_name = depot_name
+        self.route_name = route_name
+        self.packing_orders = snapshot_orders(orders)
+        self.errors: List[str] = []
+        refs = prefetch_invoice_refs(db, orders)
+        self.invoices: List[dict] = []
+        for order, snapshot in zip(orders, self.packing_orders):
+            if not snapshot.items:
+                logger.warning(f"Order {order.id} has no items, skipping invoice generation")
+                self.errors.append(f"Order {order.id} (memo: {order.memo_number}): No items found")
+                continue
+            try:
+                self.invoices.append(build_invoice_payload(
+                    snapshot, refs,
+                    company_name=company["name"],
+                    company_address=company["address"],
+                    company_phone=company["phone"],
+                    depot_name=depot_name,
+                ))
+            except Exception as e:
+                logger.error(f"Error preparing invoice for order {order.id}: {str(e)}", exc_info=True)
+                self.errors.append(f"Order {order.id} (memo: {order.memo_number}): Generation failed - {str(e)}")
+
+    def render(self, out: BinaryIO, workers: Optional[int] = None) -> int:
+        """Write the merged PDF to ``out``. Returns the number of invoices included."""
+        workers = RENDER_WORKERS if workers is None else workers
+        parallel = workers > 1 and len(self.invoices) >= PARALLEL_MIN_MEMOS
+        # A couple of chunks per worker keeps the pool busy while limiting
+        # how many documents have to be merged.
+        chunk_count = min(len(self.invoices), workers * 2) if parallel else 1
+        chunk_size = max(1, math.ceil(len(self.invoices) / max(chunk_count, 1)))
+        chunks = [self.invoices[i:i + chunk_size] for i in range(0, len(self.invoices), chunk_size)]
+
+        pool = _get_pool() if parallel else None
+        futures = [pool.submit(render_invoices, chunk) for chunk in chunks] if pool else []
+        packing = generate_packing_report(
+            orders=self.packing_orders,
+            depot_name=self.depot_name,
+            route_name=self.route_name,
+            area=self.route_name,
+        )
+        if not packing:
+            raise ValueError("Failed to generate packing report: empty result")
+        rendered: List[Tuple[bytes, List[Tuple[str, str]]]] = (
+            [future.result() for future in futures] if pool else [render_invoices(chunk) for chunk in chunks]
+        )
+
+        invoice_count = 0
+        writer = PdfWriter()
+        writer.append(PdfReader(io.BytesIO(packing)))
+        for (pdf_bytes, errors), chunk in zip(rendered, chunks):
+            for memo_no, error in errors:
+                self.errors.append(f"Memo {memo_no}: Generation failed - {error}")
+            if pdf_bytes:
+                writer.append(PdfReader(io.BytesIO(pdf_bytes)))
+                invoice_count += len(chunk) - len(errors)
+        writer.write(out)
+        logger.info(f"Rendered {invoice_count} invoices out of {len(self.order_ids)} orders in {len(chunks)} chunk(s)")
+        if self.errors:
+            logger.warning(f"Invoice generation errors: {', '.join(self.errors)}")
+        return invoice_count
+
+
+def render_to_tempfile(batch: PrintBatch) -> str:
+    """Render ``batch`` into a temporary PDF file and return its path."""
+    fd, path = tempfile.mkstemp(suffix=".pdf", prefix="route_print_")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            batch.render(out)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
+
+# Background jobs. State lives on disk so any worker on the host can report it.
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _job_path(job_id: str, suffix: str) -> str:
+    if not _JOB_ID.match(job_id or ""):
+        raise KeyError(job_id)
+    return os.path.join(JOB_DIR, f"{job_id}{suffix}")
+
+
+def _write_status(status: Dict[str, Any]) -> None:
+    os.makedirs(JOB_DIR, exist_ok=True)
+    path = _job_path(status["job_id"], ".json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(status, f, default=str)
+    os.replace(tmp, path)
+
+
+def sweep_jobs(max_age_hours: Optional[float] = None) -> int:
+    """Delete job files older than ``max_age_hours`` (``JOB_TTL_HOURS``). Returns how many."""
+    cutoff = time.time() - 3600 * (JOB_TTL_HOURS if max_age_hours is None else max_age_hours)
+    removed = 0
+    try:
+        names = os.listdir(JOB_DIR)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        path = os.path.join(JOB_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+                removed += 1
+        except OSError:
+            continue  # removed by another worker meanwhile
+    return removed
+
+
+def create_job(order_ids: List[int], owner_id: Optional[int]) -> str:
+    sweep_jobs()
+    job_id = uuid.uuid4().hex
+    _write_status({
+        "job_id": job_id, "status": "queued", "order_ids": order_ids, "owner_id": owner_id,
+        "created_at": datetime.utcnow(),
+    })
+    return job_id
+
+
+def job_status(job_id: str, owner_id: Optional[int] = None) -> Optional[dict]:
+    """The job's status; None if it does not exist or, with ``owner_id``, belongs to someone else."""
+    try:
+        with open(_job_path(job_id, ".json")) as f:
+            status = json.load(f)
+    except (KeyError, FileNotFoundError):
+        return None
+    if owner_id is not None and status.get("owner_id") != owner_id:
+        return None
+    return status
+
+
+def job_file(job_id: str) -> Optional[str]:
+    status = job_status(job_id)
+    if not status or status.get("status") != "completed":
+        return None
+    return _job_path(job_id, ".pdf")
+
+
+def run_job(job_id: str, batch: PrintBatch, on_success=None) -> None:
+    """Render ``batch`` for a background job, then call ``on_success(batch)``."""
+    status = job_status(job_id) or {"job_id": job_id}
+    _write_status({**status, "status": "running", "started_at": datetime.utcnow()})
+    try:
+        path = render_to_tempfile(batch)
+        shutil.move(path, _job_path(job_id, ".pdf"))
+        if on_success:
+            on_success(batch)
+    except Exception as e:
+        logger.error(f"Print job {job_id} failed: {str(e)}", exc_info=True)
+        _write_status({**status, "status": "failed", "error": str(e), "finished_at": datetime.utcnow()})
+        return
+    _write_status({**status, "status": "completed", "errors": batch.errors, "finished_at": datetime.utcnow()})
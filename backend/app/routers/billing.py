@@ -7,9 +7,11 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 
 from app.database import get_db
+from app.read_replica import get_read_db
 from app import models, schemas
 from app.core.deps import require_auth
 from app.core.depot_scope import apply_depot_id_filter, apply_depot_code_filter
+from app.services.sequence_service import SequenceService, max_suffix
 
 router = APIRouter()
 
@@ -18,21 +20,9 @@ def generate_deposit_number(db: Session) -> str:
     """Generate a unique deposit number"""
     today = datetime.utcnow().strftime('%Y%m%d')
     prefix = f"DEP-{today}-"
-    
-    # Find the last deposit number for today
-    last_deposit = db.query(models.CollectionDeposit).filter(
-        models.CollectionDeposit.deposit_number.like(f"{prefix}%")
-    ).order_by(models.CollectionDeposit.deposit_number.desc()).first()
-    
-    if last_deposit:
-        try:
-            # Extract the sequence number
-            seq = int(last_deposit.deposit_number.split('-')[-1]) + 1
-        except:
-            seq = 1
-    else:
-        seq = 1
-    
+    seq = SequenceService.next_value(
+        db, f"deposit:{today}", seed=max_suffix(models.CollectionDeposit.deposit_number, prefix),
+    )
     return f"{prefix}{seq:04d}"
 
 
@@ -390,7 +380,7 @@ def get_collection_person_report(
     collection_person_id: int,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get collection report for a specific collection person"""
     collection_person = db.query(models.Employee).filter(
@@ -490,7 +480,7 @@ def get_collection_person_report(
 def get_all_collection_reports(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get collection reports for all collection persons"""
     # Get all unique collection person IDs from transactions
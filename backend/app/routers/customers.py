@@ -4,48 +4,18 @@ from typing import List
 from app.database import get_db
 from app.models import Customer
 from app.schemas import CustomerCreate, Customer as CustomerSchema
+from app.redis_cache import cached
+from app.services.sequence_service import SequenceService, max_suffix
 
 router = APIRouter()
 
 def generate_customer_code(db: Session) -> str:
     """Generate a unique customer code in format CUST-XXXX"""
-    # Get all existing customers with codes that match the pattern
-    existing_customers = db.query(Customer).filter(
-        Customer.code.like("CUST-%")
-    ).all()
-    
-    if existing_customers:
-        # Extract all numbers from existing codes
-        code_numbers = []
-        for customer in existing_customers:
-            if customer.code:
-                try:
-                    # Extract number from code like CUST-0001
-                    num = int(customer.code.split("-")[1])
-                    code_numbers.append(num)
-                except (ValueError, IndexError):
-                    continue
-        
-        # Find the highest number
-        if code_numbers:
-            new_num = max(code_numbers) + 1
-        else:
-            new_num = 1
-    else:
-        # No customers exist or no codes match format, start from 1
-        new_num = 1
-    
-    # Format as CUST-0001, CUST-0002, etc.
-    code = f"CUST-{new_num:04d}"
-    
-    # Double-check if code already exists (safety check)
-    while db.query(Customer).filter(Customer.code == code).first():
-        new_num += 1
-        code = f"CUST-{new_num:04d}"
-    
-    return code
+    num = SequenceService.next_value(db, "customer_code", seed=max_suffix(Customer.code, "CUST-"))
+    return f"CUST-{num:04d}"
 
 @router.get("/", response_model=List[CustomerSchema])
+@cached("customers", tags=("customers",), response_model=List[CustomerSchema])
 def get_customers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     customers = db.query(Customer).offset(skip).limit(limit).all()
     return customers
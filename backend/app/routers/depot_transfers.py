@@ -12,6 +12,7 @@ from app.models import (
 )
 from app.core.deps import require_auth
 from app.core.depot_scope import apply_depot_transfer_filter, coerce_depot_id_param
+from app.services.master_data import master_data
 from pydantic import BaseModel
 from typing import Optional as Opt
 
@@ -110,12 +111,11 @@ def generate_transfer_number(db: Session) -> str:
 def create_depot_transfer(transfer: DepotTransferCreate, db: Session = Depends(get_db)):
     """Create a new depot transfer request"""
     # Validate depots
-    from_depot = db.query(Depot).filter(Depot.id == transfer.from_depot_id).first()
-    if not from_depot:
+    depots = master_data.rows(db, "depot", [transfer.from_depot_id, transfer.to_depot_id], field="id")
+    if transfer.from_depot_id not in depots:
         raise HTTPException(status_code=404, detail="Source depot not found")
     
-    to_depot = db.query(Depot).filter(Depot.id == transfer.to_depot_id).first()
-    if not to_depot:
+    if transfer.to_depot_id not in depots:
         raise HTTPException(status_code=404, detail="Destination depot not found")
     
     if transfer.from_depot_id == transfer.to_depot_id:
@@ -220,7 +220,10 @@ def get_depot_transfers(
     
     transfers = query.order_by(DepotTransfer.created_at.desc()).offset(skip).limit(limit).all()
     
-    return [build_transfer_response(transfer, db) for transfer in transfers]
+    depots = master_data.rows(
+        db, "depot", {t.from_depot_id for t in transfers} | {t.to_depot_id for t in transfers}, field="id"
+    )
+    return [build_transfer_response(transfer, db, depots) for transfer in transfers]
 
 
 @router.get("/{transfer_id}", response_model=DepotTransferDetailResponse)
@@ -395,10 +398,14 @@ def receive_depot_transfer(
     return build_transfer_detail_response(transfer, db)
 
 
-def build_transfer_response(transfer: DepotTransfer, db: Session) -> DepotTransferResponse:
-    """Build transfer response with aggregated data"""
-    from_depot = db.query(Depot).filter(Depot.id == transfer.from_depot_id).first()
-    to_depot = db.query(Depot).filter(Depot.id == transfer.to_depot_id).first()
+def build_transfer_response(
+    transfer: DepotTransfer, db: Session, depots: Optional[dict] = None
+) -> DepotTransferResponse:
+    """Build transfer response with aggregated data; ``depots`` are prefetched depot rows by id."""
+    if depots is None:
+        depots = master_data.rows(db, "depot", [transfer.from_depot_id, transfer.to_depot_id], field="id")
+    from_depot = depots.get(transfer.from_depot_id)
+    to_depot = depots.get(transfer.to_depot_id)
     
     # Calculate totals
     total_items = len(transfer.items)
@@ -417,9 +424,9 @@ def build_transfer_response(transfer: DepotTransfer, db: Session) -> DepotTransf
         transfer_number=transfer.transfer_number,
         transfer_date=transfer.transfer_date,
         from_depot_id=transfer.from_depot_id,
-        from_depot_name=from_depot.name if from_depot else None,
+        from_depot_name=from_depot["name"] if from_depot else None,
         to_depot_id=transfer.to_depot_id,
-        to_depot_name=to_depot.name if to_depot else None,
+        to_depot_name=to_depot["name"] if to_depot else None,
         vehicle_id=transfer.vehicle_id,
         vehicle_registration=vehicle_registration,
         driver_name=transfer.driver_name,
@@ -5,11 +5,18 @@ from app.database import get_db
 from app.models import Depot, Employee
 from app.schemas import DepotCreate, Depot as DepotSchema
 from app.core.deps import require_auth
-from app.core.depot_scope import apply_depot_self_filter
+from app.core.depot_scope import apply_depot_self_filter, depot_cache_scope
+from app.redis_cache import cached
 
 router = APIRouter()
 
 @router.get("/", response_model=List[DepotSchema])
+@cached(
+    "depots",
+    tags=("depots",),
+    key=lambda skip, limit, user, **_: (depot_cache_scope(user), skip, limit),
+    response_model=List[DepotSchema],
+)
 def get_depots(
     skip: int = 0,
     limit: int = 100,
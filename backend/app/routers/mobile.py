@@ -3,23 +3,30 @@ Mobile App API Endpoints
 Handles memo assignment, acceptance, and status tracking for mobile users
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 
-from app.database import get_db
+from app.database import get_async_db
 from app import models, schemas
 
 router = APIRouter(tags=["Mobile"])
 
+# Memo cards show the assignee and vehicle; load both up front (no lazy loads on the async session).
+MEMO_RELATIONS = (
+    selectinload(models.Order.assigned_employee),
+    selectinload(models.Order.assigned_vehicle_rel),
+)
+
 
 @router.get("/assigned-memos", response_model=List[schemas.MobileAssignedMemo])
-def get_assigned_memos(
+async def get_assigned_memos(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all assigned memos available for mobile app users to accept.
@@ -32,8 +39,9 @@ def get_assigned_memos(
     try:
         # Get all assigned orders with loading numbers
         # These are orders that appear in "Assigned Order List"
-        orders = (
-            db.query(models.Order)
+        orders = (await db.scalars(
+            select(models.Order)
+            .options(*MEMO_RELATIONS)
             .filter(
                 models.Order.loading_number.isnot(None),
                 models.Order.assigned_to.isnot(None),
@@ -49,22 +57,14 @@ def get_assigned_memos(
             )
             .offset(skip)
             .limit(limit)
-            .all()
-        )
+        )).all()
         
         result = []
         for order in orders:
             employee = order.assigned_employee
             vehicle = order.assigned_vehicle_rel
             
-            # Calculate total value
-            total_value = Decimal("0")
-            for item in order.items:
-                unit_price = item.unit_price or item.trade_price or Decimal("0")
-                discount = item.discount_percent or Decimal("0")
-                price_after_discount = unit_price * (1 - discount / 100)
-                total_price = price_after_discount * (item.total_quantity or (item.quantity + (item.free_goods or 0)))
-                total_value += total_price
+            total_value = order.net_amount or Decimal("0")
             
             memo_data = {
                 "id": order.id,
@@ -82,7 +82,7 @@ def get_assigned_memos(
                 "assigned_vehicle_id": vehicle.id if vehicle else None,
                 "assigned_vehicle_registration": vehicle.registration_number if vehicle else None,
                 "assignment_date": order.assignment_date.isoformat() if order.assignment_date else None,
-                "items_count": len(order.items),
+                "items_count": order.item_count or 0,
                 "total_value": float(total_value),
                 "mobile_accepted": order.mobile_accepted or False,
                 "mobile_accepted_by": order.mobile_accepted_by,
@@ -106,9 +106,9 @@ def get_assigned_memos(
 
 
 @router.post("/accept-memo", response_model=schemas.MobileAcceptMemoResponse)
-def accept_memo(
+async def accept_memo(
     payload: schemas.MobileAcceptMemoRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Accept a memo from mobile app.
@@ -123,13 +123,11 @@ def accept_memo(
         # Find the order by memo_number or order_id
         order = None
         if payload.memo_number:
-            order = db.query(models.Order).filter(
+            order = (await db.scalars(select(models.Order).filter(
                 models.Order.memo_number == payload.memo_number
-            ).first()
+            ).limit(1))).first()
         elif payload.order_id:
-            order = db.query(models.Order).filter(
-                models.Order.id == payload.order_id
-            ).first()
+            order = await db.get(models.Order, payload.order_id)
         
         if not order:
             raise HTTPException(
@@ -154,8 +152,7 @@ def accept_memo(
         order.mobile_accepted_at = datetime.utcnow()
         order.updated_at = datetime.utcnow()
         
-        db.commit()
-        db.refresh(order)
+        await db.commit()
         
         return schemas.MobileAcceptMemoResponse(
             success=True,
@@ -169,7 +166,7 @@ def accept_memo(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         import traceback
         error_msg = f"Error accepting memo: {str(e)}"
         print(error_msg)
@@ -181,9 +178,9 @@ def accept_memo(
 
 
 @router.get("/loading-number/{loading_number}/status", response_model=schemas.MobileLoadingNumberStatus)
-def get_loading_number_status(
+async def get_loading_number_status(
     loading_number: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get acceptance status for all memos in a loading number.
@@ -196,13 +193,12 @@ def get_loading_number_status(
     """
     try:
         # Get all orders with this loading number
-        orders = (
-            db.query(models.Order)
+        orders = (await db.scalars(
+            select(models.Order)
             .filter(
                 models.Order.loading_number == loading_number
             )
-            .all()
-        )
+        )).all()
         
         if not orders:
             raise HTTPException(
@@ -249,18 +245,19 @@ def get_loading_number_status(
 
 
 @router.get("/my-accepted-memos", response_model=List[schemas.MobileAssignedMemo])
-def get_my_accepted_memos(
+async def get_my_accepted_memos(
     user_id: str,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all memos accepted by a specific mobile user.
     """
     try:
-        orders = (
-            db.query(models.Order)
+        orders = (await db.scalars(
+            select(models.Order)
+            .options(*MEMO_RELATIONS)
             .filter(
                 models.Order.mobile_accepted == True,
                 models.Order.mobile_accepted_by == user_id
@@ -270,22 +267,14 @@ def get_my_accepted_memos(
             )
             .offset(skip)
             .limit(limit)
-            .all()
-        )
+        )).all()
         
         result = []
         for order in orders:
             employee = order.assigned_employee
             vehicle = order.assigned_vehicle_rel
             
-            # Calculate total value
-            total_value = Decimal("0")
-            for item in order.items:
-                unit_price = item.unit_price or item.trade_price or Decimal("0")
-                discount = item.discount_percent or Decimal("0")
-                price_after_discount = unit_price * (1 - discount / 100)
-                total_price = price_after_discount * (item.total_quantity or (item.quantity + (item.free_goods or 0)))
-                total_value += total_price
+            total_value = order.net_amount or Decimal("0")
             
             memo_data = {
                 "id": order.id,
@@ -303,7 +292,7 @@ def get_my_accepted_memos(
                 "assigned_vehicle_id": vehicle.id if vehicle else None,
                 "assigned_vehicle_registration": vehicle.registration_number if vehicle else None,
                 "assignment_date": order.assignment_date.isoformat() if order.assignment_date else None,
-                "items_count": len(order.items),
+                "items_count": order.item_count or 0,
                 "total_value": float(total_value),
                 "mobile_accepted": True,
                 "mobile_accepted_by": order.mobile_accepted_by,
@@ -3,13 +3,15 @@ from decimal import Decimal, ROUND_FLOOR
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import asc
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app import models, schemas
 from app.core.deps import require_auth
 from app.core.depot_scope import apply_depot_code_filter
+from app.services.master_data import master_data
 from app.services.order_lifecycle_service import build_order_lifecycle_steps
 
 router = APIRouter()
@@ -240,7 +242,7 @@ def create_from_order(identifier: str, delivery_date: Optional[date] = None, db:
     delivery_number = generate_delivery_number()
     customer = None
     if order.customer_code:
-        customer = db.query(models.Customer).filter(models.Customer.code == order.customer_code).first()
+        customer = master_data.get(db, "customer", order.customer_code)
 
     delivery = models.OrderDelivery(
         order_id=order.id,
@@ -387,7 +389,11 @@ def advance_delivery_status(delivery_id: int, db: Session = Depends(get_db)) ->
 
 
 @router.get("/tracking/{identifier}", response_model=schemas.DeliveryTrackingResponse)
-def track_order(identifier: str, db: Session = Depends(get_db)) -> schemas.DeliveryTrackingResponse:
+async def track_order(identifier: str, db: AsyncSession = Depends(get_async_db)) -> schemas.DeliveryTrackingResponse:
+    return await db.run_sync(build_tracking, identifier)
+
+
+def build_tracking(db: Session, identifier: str) -> schemas.DeliveryTrackingResponse:
     order: Optional[models.Order] = None
     delivery: Optional[models.OrderDelivery] = None
 
@@ -1,24 +1,48 @@
-from typing import List, Optional
+import os
+from typing import List, Optional, Tuple
 from datetime import datetime, date
 from decimal import Decimal
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Response
 from fastapi.responses import JSONResponse
 import json
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import or_
 
 from app.database import get_db
+from app.read_replica import get_read_db
 from app import models, schemas
 from app.core.deps import require_auth, require_permission
-from app.core.depot_scope import apply_depot_code_filter, apply_depot_id_filter
+from app.core.depot_scope import apply_depot_code_filter, apply_depot_id_filter, depot_cache_scope
+from app.core.pagination import (
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    SortKey,
+    apply_keyset,
+    cursor_headers,
+    fetch_page,
+    ndjson_response,
+)
 from app.models import Employee
+from app.redis_cache import cache, cached
 from app.services.audit_service import AuditService
+from app.services.delivery_approval import DeliveryApprovalService
+from app.services.master_data import master_data
 from app.services.order_validation_service import OrderValidationService
+from app.services.route_geometry import RouteGeometryService
+from app.services.route_wise_service import (
+    ROUTE_WISE_CACHE_TTL, ROUTE_WISE_TAG, RouteWiseService, route_wise_tags,
+)
+from app.services.scan_session import ScanSessionService, session_state
+from app.services.sequence_service import SequenceService, max_suffix
 from app.services.stock_reservation_service import StockReservationService
 
 router = APIRouter()
 
+# Memo numbers are 8 digits. They used to be random values in this range, so
+# the counter starts at the bottom and skips numbers already taken.
+MEMO_FIRST, MEMO_LAST = 10000000, 99999999
+
 
 def generate_order_number(prefix: str = "ORD") -> str:
     stamp = datetime.utcnow()
@@ -27,21 +51,118 @@ def generate_order_number(prefix: str = "ORD") -> str:
 
 def generate_memo_number(db: Session) -> str:
     """Generate a unique 8-digit numeric memo/invoice number"""
-    import random
-    max_attempts = 100
-    
-    for _ in range(max_attempts):
-        # Generate 8-digit number (10000000 to 99999999)
-        memo_num = str(random.randint(10000000, 99999999))
-        
-        # Check if it already exists
-        existing = db.query(models.Order).filter(models.Order.memo_number == memo_num).first()
-        if not existing:
-            return memo_num
-    
-    # Fallback: use timestamp-based number if random fails
-    timestamp = int(datetime.utcnow().timestamp())
-    return str(timestamp % 100000000).zfill(8)
+    return generate_memo_numbers(db, 1)[0]
+
+
+def generate_memo_numbers(db: Session, count: int) -> List[str]:
+    """``count`` unused memo numbers, usually from one sequence allocation.
+
+    Drawn in a short transaction of their own (``detached``), so memo-issuing
+    requests do not queue on the counter row until they commit.
+    """
+    memos: List[str] = []
+    while len(memos) < count:
+        values = SequenceService.next_values(
+            db, "memo_number", count - len(memos), seed=lambda conn: MEMO_FIRST - 1, detached=True,
+        )
+        if values[-1] > MEMO_LAST:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Memo numbers exhausted")
+        candidates = [str(value) for value in values]
+        taken = {
+            memo for (memo,) in db.query(models.Order.memo_number).filter(models.Order.memo_number.in_(candidates))
+        }
+        memos.extend(memo for memo in candidates if memo not in taken)
+    return memos
+
+
+def next_loading_number(db: Session, loading_date: date) -> str:
+    """Next loading number for ``loading_date``: YYYYMMDD-XXXX"""
+    date_prefix = loading_date.strftime("%Y%m%d")
+    seq = SequenceService.next_value(
+        db, f"loading:{date_prefix}", seed=max_suffix(models.Order.loading_number, f"{date_prefix}-"),
+    )
+    return f"{date_prefix}-{seq:04d}"
+
+
+def _create_loading_trip(
+    db: Session,
+    *,
+    route_code: Optional[str],
+    delivery_id: int,
+    employee_id: int,
+    vehicle: models.Vehicle,
+    loading_number: str,
+    trip_date: date,
+    source: str,
+) -> Optional[models.Trip]:
+    """Auto-create the trip of a new loading, with its estimated fuel expense.
+
+    Flushed in a savepoint and committed by the caller: without a route or a
+    driver, or on any error, the loading is kept and no trip is created.
+    """
+    from app.models import Driver, Route, TransportExpense, Trip
+    from app.routers.transport import generate_trip_number
+
+    route = db.query(Route).filter(Route.route_id == route_code).first() if route_code else None
+    if not route:
+        print(f"Warning: Route not found for route_code: {route_code}")
+        return None
+
+    # Employees and drivers are separate: match by name, else any available or active driver
+    driver = None
+    employee = db.get(models.Employee, employee_id)
+    if employee:
+        driver = db.query(Driver).filter(
+            Driver.first_name == employee.first_name,
+            Driver.last_name == employee.last_name
+        ).first()
+    if not driver:
+        driver = db.query(Driver).filter(Driver.status == "Available", Driver.is_active == True).first()
+    if not driver:
+        driver = db.query(Driver).filter(Driver.is_active == True).first()
+    if not driver:
+        print(f"Warning: No driver found for employee_id: {employee_id}")
+        return None
+
+    try:
+        with db.begin_nested():
+            distance_km = RouteGeometryService.distance(db, route.id)
+
+            estimated_fuel_cost = 0.0
+            if getattr(vehicle, "fuel_rate", None) and distance_km > 0:
+                estimated_fuel_cost = float(vehicle.fuel_rate) * distance_km
+
+            trip = Trip(
+                trip_number=generate_trip_number(db),
+                delivery_id=delivery_id,
+                vehicle_id=vehicle.id,
+                driver_id=driver.id,
+                route_id=route.id,
+                trip_date=trip_date,
+                distance_km=distance_km,
+                estimated_fuel_cost=estimated_fuel_cost,
+                status="Scheduled",
+                notes=f"Auto-created from {source}. Loading Number: {loading_number}",
+            )
+            db.add(trip)
+            db.flush()
+            if estimated_fuel_cost > 0:
+                db.add(TransportExpense(
+                    trip_id=trip.id,
+                    expense_type="fuel",
+                    amount=estimated_fuel_cost,
+                    description=f"Auto-calculated fuel cost for {distance_km} km (Loading: {loading_number})",
+                    expense_date=trip_date,
+                    is_auto_calculated=True
+                ))
+                db.flush()
+        return trip
+    except Exception as e:
+        # Log error but don't fail the order assignment
+        import traceback
+        print(f"Error creating trip assignment: {str(e)}")
+        traceback.print_exc()
+        return None
 
 
 def map_item_to_model(item_data: schemas.OrderItemCreate, order: models.Order) -> models.OrderItem:
@@ -67,8 +188,15 @@ def map_item_to_model(item_data: schemas.OrderItemCreate, order: models.Order) -
     )
 
 
+ORDER_LIST_KEYS = (SortKey(models.Order.created_at, descending=True), SortKey(models.Order.id, descending=True))
+
+
 @router.get("", response_model=List[schemas.Order])
 def list_orders(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables keyset pagination"),
+    cursor: Optional[str] = Query(None, description=f"Value of the {NEXT_CURSOR_HEADER} header from the previous page"),
+    stream: bool = Query(False, description="Stream every row as NDJSON"),
     db: Session = Depends(get_db),
     user: Employee = Depends(require_auth),
 ) -> List[schemas.Order]:
@@ -76,23 +204,82 @@ def list_orders(
     from sqlalchemy import exists
     query = (
         db.query(models.Order)
+        .options(selectinload(models.Order.items))
         .filter(models.Order.validated == False)
         .filter(models.Order.route_code.isnot(None))
         .filter(models.Order.route_code != "")
         .filter(exists().where(models.OrderItem.order_id == models.Order.id))
-        .order_by(models.Order.created_at.desc())
     )
     query = apply_depot_code_filter(query, user, models.Order.depot_code, db)
-    orders = query.all()
+    if stream:
+        return ndjson_response(
+            db, apply_keyset(query, ORDER_LIST_KEYS, cursor),
+            lambda order: schemas.Order.model_validate(order).model_dump(mode="json"),
+        )
+    orders, next_cursor = fetch_page(query, ORDER_LIST_KEYS, cursor, limit)
+    response.headers.update(cursor_headers(next_cursor))
     return [order for order in orders if order.items and len(order.items) > 0 and order.route_code]
 
 
+CASH_LIST_KEYS = (
+    SortKey(models.Order.loading_number, descending=True),
+    SortKey(models.Order.loading_date, descending=True),
+    SortKey(models.Order.created_at, descending=True),
+    SortKey(models.Order.id, descending=True),
+)
+
+
+def _cash_list_row(order: models.Order) -> dict:
+    employee = order.assigned_employee
+    vehicle = order.assigned_vehicle_rel
+    
+    total_amount = order.net_amount or Decimal('0')
+    
+    collected = order.collected_amount or Decimal('0')
+    pending = total_amount - collected
+    
+    return {
+        "id": order.id,
+        "order_number": order.order_number,
+        "memo_number": order.memo_number,
+        "customer_id": order.customer_id,
+        "customer_name": order.customer_name,
+        "customer_code": order.customer_code,
+        "pso_id": order.pso_id,
+        "pso_name": order.pso_name,
+        "pso_code": order.pso_code,
+        "delivery_date": order.delivery_date.isoformat() if order.delivery_date else None,
+        "status": order.status.value if hasattr(order.status, 'value') else str(order.status),
+        "collection_status": order.collection_status or "Pending",
+        "collection_type": order.collection_type,
+        "collected_amount": float(collected),
+        "pending_amount": float(pending),
+        "total_amount": float(total_amount),
+        "collection_source": order.collection_source or "Web",
+        "collection_approved": order.collection_approved or False,
+        "loading_number": order.loading_number,
+        "loading_date": order.loading_date.isoformat() if order.loading_date else None,
+        "area": order.area,
+        "assigned_employee_id": order.assigned_to,
+        "assigned_employee_name": f"{employee.first_name} {employee.last_name or ''}".strip() if employee else None,
+        "assigned_employee_code": employee.employee_id if employee else None,
+        "assigned_vehicle_id": order.assigned_vehicle,
+        "assigned_vehicle_registration": vehicle.registration_number if vehicle else None,
+        "assigned_vehicle_model": vehicle.vehicle_type if vehicle else None,
+        "created_at": order.created_at.isoformat() if order.created_at else None,
+        "updated_at": order.updated_at.isoformat() if order.updated_at else None,
+    }
+
+
 # IMPORTANT: /collection-approval route MUST be defined BEFORE /{order_id} route
 # FastAPI matches routes in order, so specific routes must come before parameterized routes
 @router.get("/collection-approval")
 @router.get("/remaining-cash-list")
 def get_remaining_cash_list(
     status_filter: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables keyset pagination"),
+    cursor: Optional[str] = Query(None, description=f"Value of the {NEXT_CURSOR_HEADER} header from the previous page"),
+    stream: bool = Query(False, description="Stream every row as NDJSON"),
     db: Session = Depends(get_db),
     user: Employee = Depends(require_auth),
 ):
@@ -102,7 +289,10 @@ def get_remaining_cash_list(
     These orders should appear grouped by loading number.
     """
     try:
-        query = db.query(models.Order).filter(
+        query = db.query(models.Order).options(
+            selectinload(models.Order.assigned_employee),
+            selectinload(models.Order.assigned_vehicle_rel),
+        ).filter(
             models.Order.loading_number.isnot(None),
             or_(
                 models.Order.collection_status == "Pending",
@@ -117,63 +307,14 @@ def get_remaining_cash_list(
         if status_filter and status_filter != "all":
             query = query.filter(models.Order.collection_status == status_filter)
         
-        orders = query.order_by(
-            models.Order.loading_number.desc().nullslast(),
-            models.Order.loading_date.desc().nullslast(),
-            models.Order.created_at.desc()
-        ).all()
-        
-        result = []
-        for order in orders:
-            employee = order.assigned_employee
-            vehicle = order.assigned_vehicle_rel
-            
-            total_amount = Decimal('0')
-            for item in order.items:
-                unit_price = item.unit_price or item.trade_price or Decimal('0')
-                discount = item.discount_percent or Decimal('0')
-                price_after_discount = unit_price * (1 - discount / 100)
-                item_qty = item.total_quantity or (item.quantity + (item.free_goods or Decimal('0')))
-                total_price = price_after_discount * item_qty
-                total_amount += total_price
-            
-            collected = order.collected_amount or Decimal('0')
-            pending = total_amount - collected
-            
-            order_dict = {
-                "id": order.id,
-                "order_number": order.order_number,
-                "memo_number": order.memo_number,
-                "customer_id": order.customer_id,
-                "customer_name": order.customer_name,
-                "customer_code": order.customer_code,
-                "pso_id": order.pso_id,
-                "pso_name": order.pso_name,
-                "pso_code": order.pso_code,
-                "delivery_date": order.delivery_date.isoformat() if order.delivery_date else None,
-                "status": order.status.value if hasattr(order.status, 'value') else str(order.status),
-                "collection_status": order.collection_status or "Pending",
-                "collection_type": order.collection_type,
-                "collected_amount": float(collected),
-                "pending_amount": float(pending),
-                "total_amount": float(total_amount),
-                "collection_source": order.collection_source or "Web",
-                "collection_approved": order.collection_approved or False,
-                "loading_number": order.loading_number,
-                "loading_date": order.loading_date.isoformat() if order.loading_date else None,
-                "area": order.area,
-                "assigned_employee_id": order.assigned_to,
-                "assigned_employee_name": f"{employee.first_name} {employee.last_name or ''}".strip() if employee else None,
-                "assigned_employee_code": employee.employee_id if employee else None,
-                "assigned_vehicle_id": order.assigned_vehicle,
-                "assigned_vehicle_registration": vehicle.registration_number if vehicle else None,
-                "assigned_vehicle_model": vehicle.vehicle_type if vehicle else None,
-                "created_at": order.created_at.isoformat() if order.created_at else None,
-                "updated_at": order.updated_at.isoformat() if order.updated_at else None,
-            }
-            result.append(order_dict)
+        if stream:
+            return ndjson_response(db, apply_keyset(query, CASH_LIST_KEYS, cursor), _cash_list_row)
+        orders, next_cursor = fetch_page(query, CASH_LIST_KEYS, cursor, limit)
+        result = [_cash_list_row(order) for order in orders]
         
-        return JSONResponse(content=result)
+        return JSONResponse(content=result, headers=cursor_headers(next_cursor))
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         error_msg = f"Error in get_remaining_cash_list: {str(e)}\n{traceback.format_exc()}"
@@ -275,10 +416,64 @@ def get_collection_approval_list(
         )
 
 
+ASSIGNED_LIST_KEYS = (
+    SortKey(models.Order.assignment_date, descending=True),
+    SortKey(models.Order.loaded_at, descending=True),
+    SortKey(models.Order.created_at, descending=True),
+    SortKey(models.Order.id, descending=True),
+)
+
+
+def _assigned_order_row(order: models.Order) -> dict:
+    employee = order.assigned_employee
+    vehicle = order.assigned_vehicle_rel
+
+    total_value = order.net_amount or Decimal("0")
+
+    # Determine status
+    order_status = "Pending"
+    if order.loaded:
+        order_status = "Out for Delivery"
+    # In a real system, you'd check delivery status from a separate table
+
+    # Ensure assignment_date is a datetime object
+    assignment_dt = order.assignment_date or order.loaded_at or (order.created_at if order.created_at else datetime.utcnow())
+    if assignment_dt is None:
+        assignment_dt = datetime.utcnow()
+
+    return {
+        "id": order.id,
+        "order_id": order.id,
+        "order_number": order.order_number,
+        "memo_number": order.memo_number,
+        "customer_name": order.customer_name or "Unknown Customer",
+        "customer_code": order.customer_code,
+        "route_code": order.route_code,
+        "route_name": order.route_name,
+        "assigned_employee_id": employee.id if employee else 0,
+        "assigned_employee_name": f"{employee.first_name} {employee.last_name or ''}".strip() if employee else "Unknown",
+        "assigned_employee_code": employee.employee_id if employee else None,
+        "assigned_vehicle_id": vehicle.id if vehicle else 0,
+        "assigned_vehicle_registration": vehicle.registration_number if vehicle else "Unknown",
+        "assigned_vehicle_model": vehicle.vehicle_type if vehicle else None,
+        "assignment_date": assignment_dt.isoformat() if assignment_dt else datetime.utcnow().isoformat(),
+        "loading_number": order.loading_number,
+        "loading_date": order.loading_date.isoformat() if order.loading_date else None,
+        "area": order.area,
+        "status": order_status,
+        "items_count": order.item_count or 0,
+        "total_value": float(total_value),
+    }
+
+
 @router.get("/assigned")
 def get_assigned_orders(
+    response: Response,
     status_filter: Optional[str] = Query(None, alias="status_filter"),
     route_code: Optional[str] = Query(None, alias="route_code"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables keyset pagination"),
+    cursor: Optional[str] = Query(None, description=f"Value of the {NEXT_CURSOR_HEADER} header from the previous page"),
+    stream: bool = Query(False, description="Stream every row as NDJSON"),
     db: Session = Depends(get_db),
     user: Employee = Depends(require_auth),
 ):
@@ -289,6 +484,10 @@ def get_assigned_orders(
     try:
         query = (
             db.query(models.Order)
+            .options(
+                selectinload(models.Order.assigned_employee),
+                selectinload(models.Order.assigned_vehicle_rel),
+            )
             .filter(
                 models.Order.assigned_to.isnot(None),
                 models.Order.assigned_vehicle.isnot(None),
@@ -310,63 +509,14 @@ def get_assigned_orders(
             query = query.filter(models.Order.route_code == route_code)
         
         # Order by most recent first (by assignment_date or created_at)
-        orders = query.order_by(
-            models.Order.assignment_date.desc().nullslast(),
-            models.Order.loaded_at.desc().nullslast(),
-            models.Order.created_at.desc()
-        ).all()
-        
-        result = []
-        for order in orders:
-            employee = order.assigned_employee
-            vehicle = order.assigned_vehicle_rel
-            
-            # Calculate total value
-            total_value = Decimal("0")
-            for item in order.items:
-                unit_price = item.unit_price or item.trade_price
-                discount = item.discount_percent or Decimal("0")
-                price_after_discount = unit_price * (1 - discount / 100)
-                total_price = price_after_discount * (item.total_quantity or (item.quantity + (item.free_goods or 0)))
-                total_value += total_price
-            
-            # Determine status
-            order_status = "Pending"
-            if order.loaded:
-                order_status = "Out for Delivery"
-            # In a real system, you'd check delivery status from a separate table
-            
-            # Ensure assignment_date is a datetime object
-            assignment_dt = order.assignment_date or order.loaded_at or (order.created_at if order.created_at else datetime.utcnow())
-            if assignment_dt is None:
-                assignment_dt = datetime.utcnow()
-            
-            order_response = {
-                "id": order.id,
-                "order_id": order.id,
-                "order_number": order.order_number,
-                "memo_number": order.memo_number,
-                "customer_name": order.customer_name or "Unknown Customer",
-                "customer_code": order.customer_code,
-                "route_code": order.route_code,
-                "route_name": order.route_name,
-                "assigned_employee_id": employee.id if employee else 0,
-                "assigned_employee_name": f"{employee.first_name} {employee.last_name or ''}".strip() if employee else "Unknown",
-                "assigned_employee_code": employee.employee_id if employee else None,
-                "assigned_vehicle_id": vehicle.id if vehicle else 0,
-                "assigned_vehicle_registration": vehicle.registration_number if vehicle else "Unknown",
-                "assigned_vehicle_model": vehicle.vehicle_type if vehicle else None,
-                "assignment_date": assignment_dt.isoformat() if assignment_dt else datetime.utcnow().isoformat(),
-                "loading_number": order.loading_number,
-                "loading_date": order.loading_date.isoformat() if order.loading_date else None,
-                "area": order.area,
-                "status": order_status,
-                "items_count": len(order.items),
-                "total_value": float(total_value),
-            }
-            result.append(order_response)
+        if stream:
+            return ndjson_response(db, apply_keyset(query, ASSIGNED_LIST_KEYS, cursor), _assigned_order_row)
+        orders, next_cursor = fetch_page(query, ASSIGNED_LIST_KEYS, cursor, limit)
+        response.headers.update(cursor_headers(next_cursor))
         
-        return result
+        return [_assigned_order_row(order) for order in orders]
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         error_msg = f"Error in get_assigned_orders: {str(e)}"
@@ -375,14 +525,67 @@ def get_assigned_orders(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_msg)
 
 
+MIS_LIST_KEYS = (
+    SortKey(models.Order.delivery_date, descending=True),
+    SortKey(models.Order.created_at, descending=True),
+    SortKey(models.Order.id, descending=True),
+)
+
+
+def _mis_memo_row(order: models.Order) -> schemas.MISReportMemo:
+    total_amount = order.trade_amount or Decimal('0')
+
+    # Get validation timestamp (use updated_at when validated is True)
+    validated_at = None
+    if order.validated:
+        validated_at = order.updated_at
+
+    return schemas.MISReportMemo(
+        id=order.id,
+        order_id=order.id,
+        order_number=order.order_number,
+        memo_number=order.memo_number,
+        customer_name=order.customer_name,
+        customer_code=order.customer_code,
+        route_code=order.route_code,
+        route_name=order.route_name,
+        delivery_date=order.delivery_date,
+        validated=order.validated or False,
+        validated_at=validated_at,
+        printed=order.printed or False,
+        printed_at=order.printed_at,
+        postponed=order.postponed or False,
+        assigned=(order.assigned_to is not None and order.assigned_vehicle is not None),
+        assigned_at=order.assignment_date,
+        assigned_employee_name=order.assigned_employee.first_name + " " + (order.assigned_employee.last_name or "") if order.assigned_employee else None,
+        assigned_vehicle_registration=order.assigned_vehicle_rel.registration_number if order.assigned_vehicle_rel else None,
+        loaded=order.loaded or False,
+        loaded_at=order.loaded_at,
+        loading_number=order.loading_number,
+        collection_status=order.collection_status,
+        collection_type=order.collection_type,
+        collected_amount=order.collected_amount,
+        pending_amount=order.pending_amount,
+        collection_approved=order.collection_approved or False,
+        collection_approved_at=order.collection_approved_at,
+        total_amount=total_amount,
+        status=order.status.value if order.status else "DRAFT",
+        created_at=order.created_at
+    )
+
+
 # MIS Report endpoints - MUST be before /{order_id} route to avoid route conflicts
 @router.get("/mis-report", response_model=List[schemas.MISReportMemo])
 def get_mis_report_memos(
+    response: Response,
     start_date: Optional[str] = Query(None, description="Filter by start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="Filter by end date (YYYY-MM-DD)"),
     status: Optional[str] = Query(None, description="Filter by status (validated, printed, assigned, loaded, collected, postponed)"),
     route_code: Optional[str] = Query(None, description="Filter by route code"),
-    db: Session = Depends(get_db)
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables keyset pagination"),
+    cursor: Optional[str] = Query(None, description=f"Value of the {NEXT_CURSOR_HEADER} header from the previous page"),
+    stream: bool = Query(False, description="Stream every row as NDJSON"),
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all memos for MIS report with date and status filters.
@@ -392,7 +595,6 @@ def get_mis_report_memos(
     from sqlalchemy.orm import joinedload
     
     query = db.query(models.Order).options(
-        joinedload(models.Order.items),
         joinedload(models.Order.assigned_employee),
         joinedload(models.Order.assigned_vehicle_rel)
     )
@@ -441,55 +643,14 @@ def get_mis_report_memos(
                 )
             )
     
-    orders = query.order_by(models.Order.delivery_date.desc(), models.Order.created_at.desc()).all()
-    
-    result = []
-    for order in orders:
-        # Calculate total amount
-        total_amount = Decimal('0')
-        for item in order.items:
-            item_total = (item.trade_price or Decimal('0')) * (item.total_quantity or Decimal('0'))
-            total_amount += item_total
-        
-        # Get validation timestamp (use updated_at when validated is True)
-        validated_at = None
-        if order.validated:
-            validated_at = order.updated_at
-        
-        result.append(schemas.MISReportMemo(
-            id=order.id,
-            order_id=order.id,
-            order_number=order.order_number,
-            memo_number=order.memo_number,
-            customer_name=order.customer_name,
-            customer_code=order.customer_code,
-            route_code=order.route_code,
-            route_name=order.route_name,
-            delivery_date=order.delivery_date,
-            validated=order.validated or False,
-            validated_at=validated_at,
-            printed=order.printed or False,
-            printed_at=order.printed_at,
-            postponed=order.postponed or False,
-            assigned=(order.assigned_to is not None and order.assigned_vehicle is not None),
-            assigned_at=order.assignment_date,
-            assigned_employee_name=order.assigned_employee.first_name + " " + (order.assigned_employee.last_name or "") if order.assigned_employee else None,
-            assigned_vehicle_registration=order.assigned_vehicle_rel.registration_number if order.assigned_vehicle_rel else None,
-            loaded=order.loaded or False,
-            loaded_at=order.loaded_at,
-            loading_number=order.loading_number,
-            collection_status=order.collection_status,
-            collection_type=order.collection_type,
-            collected_amount=order.collected_amount,
-            pending_amount=order.pending_amount,
-            collection_approved=order.collection_approved or False,
-            collection_approved_at=order.collection_approved_at,
-            total_amount=total_amount,
-            status=order.status.value if order.status else "DRAFT",
-            created_at=order.created_at
-        ))
+    if stream:
+        return ndjson_response(
+            db, apply_keyset(query, MIS_LIST_KEYS, cursor), lambda o: _mis_memo_row(o).model_dump(mode="json"),
+        )
+    orders, next_cursor = fetch_page(query, MIS_LIST_KEYS, cursor, limit)
+    response.headers.update(cursor_headers(next_cursor))
     
-    return result
+    return [_mis_memo_row(order) for order in orders]
 
 
 @router.get("/mis-report/{memo_id}", response_model=schemas.MISReportMemoDetail)
@@ -632,6 +793,7 @@ def create_order(
         from sqlalchemy import func
         from sqlalchemy.sql import func as sql_func
         
+        products = master_data.get_many(db, "product", {i.product_code for i in order_data.items}, ("code", "sku"))
         for item in order_data.items:
             if not item.batch_number:
                 raise HTTPException(
@@ -639,11 +801,9 @@ def create_order(
                     detail=f"Batch number is required for product {item.product_code}. Products without batch numbers have no stock."
                 )
             
-            # Find product by code
-            product = db.query(Product).filter(
-                (Product.code == item.product_code) | 
-                (Product.old_code == item.product_code) |
-                (Product.sku == item.product_code)
+            # Find product by code, SKU or (not cached, as it is not unique) old code
+            product = products.get(item.product_code) or db.query(Product).filter(
+                Product.old_code == item.product_code
             ).first()
             
             if not product:
@@ -834,6 +994,7 @@ def update_order(
                 key = f"{existing_item.product_code}_{existing_item.batch_number}"
                 existing_items_by_batch[key] = existing_items_by_batch.get(key, 0) + float(existing_item.quantity or 0)
         
+        products = master_data.get_many(db, "product", {i.product_code for i in order_update.items}, ("code", "sku"))
         for item in order_update.items:
             # Check if this is an existing item and if we're only updating non-stock fields
             is_existing_item = item.id and item.id in existing_items_map
@@ -876,11 +1037,9 @@ def update_order(
                         detail=f"Batch number is required for product {item.product_code}. Products without batch numbers have no stock."
                     )
                 
-                # Find product by code
-                product = db.query(Product).filter(
-                    (Product.code == item.product_code) | 
-                    (Product.old_code == item.product_code) |
-                    (Product.sku == item.product_code)
+                # Find product by code, SKU or (not cached, as it is not unique) old code
+                product = products.get(item.product_code) or db.query(Product).filter(
+                    Product.old_code == item.product_code
                 ).first()
                 
                 if not product:
@@ -1127,7 +1286,7 @@ def validate_orders(
     if not payload.order_ids:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No orders selected for validation")
 
-    from sqlalchemy.orm import joinedload
+    from sqlalchemy.orm import joinedload, selectinload
     orders = (
         db.query(models.Order)
         .options(joinedload(models.Order.items))
@@ -1149,12 +1308,15 @@ def validate_orders(
             )
         if not order.order_number:
             order.order_number = generated_number
-        if not order.memo_number:
-            order.memo_number = generate_memo_number(db)
-        OrderValidationService.validate_order(db, order, user)
+    missing_memo = [order for order in orders if not order.memo_number]
+    for order, memo_number in zip(missing_memo, generate_memo_numbers(db, len(missing_memo))):
+        order.memo_number = memo_number
+
+    OrderValidationService.validate_orders_batch(db, orders, user)
 
     refreshed = (
         db.query(models.Order)
+        .options(selectinload(models.Order.items))
         .filter(models.Order.id.in_(payload.order_ids))
         .order_by(models.Order.created_at.desc())
         .all()
@@ -1163,125 +1325,101 @@ def validate_orders(
     return schemas.OrderValidationResponse(order_number=generated_number, orders=refreshed)
 
 
+ROUTE_LIST_KEYS = (SortKey(models.Route.route_id), SortKey(models.Route.id))
+
+
+def _assign_missing_memo_numbers(db: Session, routes: List[models.Route]) -> None:
+    """Give validated, unloaded orders on these routes a memo number before they are listed."""
+    from app.services.route_wise_service import PENDING_LOAD, ROUTE_WISE_STATUSES
+
+    orders = (
+        db.query(models.Order)
+        .filter(
+            models.Order.route_code.in_([route.route_id for route in routes]),
+            models.Order.status.in_(ROUTE_WISE_STATUSES),
+            PENDING_LOAD,
+            or_(models.Order.memo_number.is_(None), models.Order.memo_number == ""),
+        )
+        .all()
+    )
+    for order, memo_number in zip(orders, generate_memo_numbers(db, len(orders))):
+        order.memo_number = memo_number
+    if orders:
+        db.commit()
+
+
+def _route_wise_summaries(db: Session, routes: List[models.Route], include_items: bool) -> List[schemas.RouteWiseOrderResponse]:
+    if include_items:
+        _assign_missing_memo_numbers(db, routes)
+    return RouteWiseService.summaries(db, routes, include_items=include_items)
+
+
+@cached(
+    "route_wise",
+    ttl=ROUTE_WISE_CACHE_TTL,
+    tags=(ROUTE_WISE_TAG,),
+    key=lambda depot_scope, include_items, cursor, limit, **_: (depot_scope, include_items, cursor, limit),
+    result_tags=lambda page: route_wise_tags(summary.route_code for summary in page[0]),
+)
+def _route_wise_page(
+    db: Session, routes_query, depot_scope: Optional[int], include_items: bool, cursor: Optional[str], limit: Optional[int],
+) -> Tuple[List[schemas.RouteWiseOrderResponse], Optional[str]]:
+    routes, next_cursor = fetch_page(routes_query, ROUTE_LIST_KEYS, cursor, limit)
+    return _route_wise_summaries(db, routes, include_items), next_cursor
+
+
 @router.get("/route-wise/all", response_model=List[schemas.RouteWiseOrderResponse])
 def get_all_route_wise_orders(
+    response: Response,
+    include_items: bool = Query(True, description="Include item rows; pass false and load them per route via /route-wise/{route_code}/items"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Routes per page; enables keyset pagination"),
+    cursor: Optional[str] = Query(None, description=f"Value of the {NEXT_CURSOR_HEADER} header from the previous page"),
+    stream: bool = Query(False, description="Stream one route per line as NDJSON"),
     db: Session = Depends(get_db),
     user: Employee = Depends(require_auth),
 ) -> List[schemas.RouteWiseOrderResponse]:
-    """Get all route-wise orders grouped by route"""
-    from sqlalchemy import func
-    from decimal import Decimal
-    from app.models import Route
-    from sqlalchemy.orm import joinedload
-    
+    """Get all route-wise orders grouped by route.
+
+    Stats for every route come from one grouped query and items from one more,
+    however many routes the depot has. Responses are cached per depot until an
+    order on one of its routes is validated, printed or assigned.
+    """
     # Get all active routes
     routes_query = db.query(models.Route).filter(models.Route.status == "Active")
     routes_query = apply_depot_id_filter(routes_query, user, models.Route.depot_id)
-    routes = routes_query.order_by(models.Route.route_id).all()
-    
-    result = []
-    for route in routes:
-        # Get approved orders for this route (including loaded ones for stats, but exclude from items)
-        # Order by most recent first
-        # IMPORTANT: Use joinedload to ensure items are loaded correctly
-        all_orders = (
-            db.query(models.Order)
-            .options(joinedload(models.Order.items))
-            .filter(
-                models.Order.route_code == route.route_id,
-                models.Order.status.in_([models.OrderStatusEnum.APPROVED, models.OrderStatusEnum.PARTIALLY_APPROVED])
-            )
-            .order_by(models.Order.created_at.desc())
-            .all()
-        )
-        
-        # Only show validated and unloaded orders for the items list
-        # validated=True means all items were selected during validation (fully validated)
-        validated_unloaded_orders = [o for o in all_orders if o.validated == True and (o.loaded == False or o.loaded is None)]
-        
-        # Generate memo numbers for orders that don't have them
-        for order in validated_unloaded_orders:
-            if not order.memo_number:
-                order.memo_number = generate_memo_number(db)
-        
-        # Commit memo numbers
-        if any(not o.memo_number for o in validated_unloaded_orders):
-            db.commit()
-        
-        # Build route-wise items (only from validated and unloaded orders)
-        items = []
-        for order in validated_unloaded_orders:
-            for item in order.items:
-                if not item.selected:
-                    continue
-                    
-                unit_price = item.unit_price or item.trade_price
-                discount = item.discount_percent or Decimal("0")
-                price_after_discount = unit_price * (1 - discount / 100)
-                total_price = price_after_discount * (item.total_quantity or (item.quantity + (item.free_goods or 0)))
-                
-                items.append(schemas.RouteWiseOrderItemResponse(
-                    id=item.id,
-                    order_id=order.id,
-                    order_number=order.order_number,
-                    memo_number=order.memo_number,
-                    product_code=item.product_code,
-                    size=item.pack_size,
-                    free_goods=item.free_goods or 0,
-                    total_quantity=item.total_quantity or (item.quantity + (item.free_goods or 0)),
-                    unit_price=unit_price,
-                    discount_percent=item.discount_percent or 0,
-                    total_price=total_price,
-                    customer_name=order.customer_name,
-                    customer_code=order.customer_code,
-                    route_code=route.route_id,
-                    route_name=route.name,
-                    validated=order.validated,
-                    printed=order.printed,
-                    printed_at=order.printed_at.isoformat() if order.printed_at else None,
-                    postponed=order.postponed or False,
-                    assigned_to=order.assigned_to,
-                    assigned_vehicle=order.assigned_vehicle,
-                    loaded=order.loaded,
-                    loaded_at=order.loaded_at.isoformat() if order.loaded_at else None,
-                    pso_name=order.pso_name,
-                    pso_code=order.pso_code,
-                ))
-        
-        # Calculate statistics - items list shows unloaded orders, but stats count all orders
-        # Items list: only validated and unloaded orders (for display)
-        total_order = len(validated_unloaded_orders)
-        validated = len([o for o in validated_unloaded_orders if o.validated == True])
-        printed = len([o for o in validated_unloaded_orders if o.printed == True])
-        pending_print = validated - printed  # Only validated orders can be printed
-        
-        # Loaded/assigned count: count from ALL orders (including loaded ones) for accurate stats
-        # This ensures the "Assigned" tile count increases when orders are assigned
-        loaded = len([o for o in all_orders if o.loaded == True and o.validated == True])
-        
-        postponed = len([o for o in validated_unloaded_orders if getattr(o, 'postponed', False) == True])
-        
-        stats = schemas.RouteWiseOrderStats(
-            total_order=total_order,
-            validated=validated,
-            printed=printed,
-            pending_print=max(0, pending_print),
-            loaded=loaded,
-            postponed=postponed,
+    if stream:
+        # Memo numbers may be committed first, which would close a server-side
+        # cursor, so the (short) route list is read up front.
+        routes = apply_keyset(routes_query, ROUTE_LIST_KEYS, cursor).all()
+        return ndjson_response(
+            db, _route_wise_summaries(db, routes, include_items),
+            lambda summary: summary.model_dump(mode="json"),
         )
-        
-        result.append(schemas.RouteWiseOrderResponse(
-            route_code=route.route_id,
-            route_name=route.name,
-            items=items,
-            stats=stats
-        ))
-    
-    return result
 
+    summaries, next_cursor = _route_wise_page(
+        db, routes_query, depot_cache_scope(user), include_items, cursor, limit,
+    )
+    response.headers.update(cursor_headers(next_cursor))
+    return summaries
 
-@router.get("/route-wise/{route_code}", response_model=schemas.RouteWiseOrderResponse)
-def get_route_wise_orders(
+
+@router.get("/route-wise/{route_code}/items", response_model=List[schemas.RouteWiseOrderItemResponse])
+def get_route_wise_items(
+    route_code: str,
+    db: Session = Depends(get_db),
+    user: Employee = Depends(require_auth),
+) -> List[schemas.RouteWiseOrderItemResponse]:
+    """Item rows of one route card, loaded when the route is expanded."""
+    route_query = db.query(models.Route).filter(models.Route.route_id == route_code)
+    route = apply_depot_id_filter(route_query, user, models.Route.depot_id).first()
+    if not route:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Route not found")
+    _assign_missing_memo_numbers(db, [route])
+    return RouteWiseService.items_by_route(db, [route])[route.route_id]
+
+
+@router.get("/route-wise/{route_code}", response_model=schemas.RouteWiseOrderResponse)
+def get_route_wise_orders(
     route_code: str,
     db: Session = Depends(get_db),
     user: Employee = Depends(require_auth),
@@ -1365,20 +1503,39 @@ def get_route_wise_orders(
     return schemas.RouteWiseOrderResponse(items=items, stats=stats)
 
 
+def _mark_printed(db: Session, order_ids: List[int], user: Employee) -> None:
+    now = datetime.utcnow()
+    db.query(models.Order).filter(models.Order.id.in_(order_ids)).update(
+        {models.Order.printed: True, models.Order.printed_at: now}, synchronize_session=False
+    )
+    AuditService.log_action(
+        db,
+        entity_type="order",
+        entity_id=",".join(str(order_id) for order_id in order_ids),
+        action="PRINT",
+        user=user,
+        new_value={"order_ids": order_ids, "count": len(order_ids)},
+    )
+    db.commit()
+    # Bulk UPDATE skips the session hooks that normally drop the route-wise cache.
+    cache.invalidate_tags(ROUTE_WISE_TAG)
+
+
 @router.post("/route-wise/print", status_code=status.HTTP_200_OK)
 def print_route_wise_orders(
     payload: schemas.RouteWisePrintRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     user: Employee = Depends(require_auth),
 ):
-    """Generate and return combined PDF: packing report + individual invoice reports for selected orders"""
-    from datetime import datetime
-    from fastapi.responses import Response
-    from app.reports.packing_report import generate_packing_report
-    from app.reports.invoice_report import generate_invoice_report
-    from app.models import Company, Depot, Customer
-    from PyPDF2 import PdfWriter, PdfReader
-    import io
+    """Generate and return combined PDF: packing report + individual invoice reports for selected orders.
+
+    With ``background`` set, returns 202 with a job id instead; poll
+    ``/route-wise/print/jobs/{job_id}`` and download the PDF when it completes.
+    """
+    from fastapi.responses import FileResponse
+    from starlette.background import BackgroundTask
+    from app.reports import print_pipeline
     import logging
     
     logger = logging.getLogger(__name__)
@@ -1387,6 +1544,7 @@ def print_route_wise_orders(
         # Filter to only pending print orders (not already printed)
         orders = (
             db.query(models.Order)
+            .options(selectinload(models.Order.items))
             .filter(
                 models.Order.id.in_(payload.order_ids),
                 models.Order.printed == False  # Only pending print orders
@@ -1401,192 +1559,75 @@ def print_route_wise_orders(
             )
         
         # Generate memo numbers for orders that don't have them
-        memo_generated = False
-        for order in orders:
-            if not order.memo_number:
-                order.memo_number = generate_memo_number(db)
-                memo_generated = True
-        
-        # Commit memo numbers if any were generated
-        if memo_generated:
-            db.commit()
-        
-        # Eager load items to avoid lazy loading issues
-        for order in orders:
-            _ = order.items  # Trigger lazy load
+        missing_memo = [order for order in orders if not order.memo_number]
+        for order, memo_number in zip(missing_memo, generate_memo_numbers(db, len(missing_memo))):
+            order.memo_number = memo_number
+        memo_generated = bool(missing_memo)
         
         # Get company info (no depot filtering - use central store)
         company = db.query(models.Company).first()  # Get first company if available
         
         # Always use RENATA LIMITED for invoice reports
-        company_name = "RENATA LIMITED"
-        company_address = company.address if company else "BLOCK-C, ROAD-6, HOUSE-39, DHOUR, TURAG, DHAKA-1230"
-        company_phone = company.phone if company else "8981868, 8981813"
+        company_info = {
+            "name": "RENATA LIMITED",
+            "address": company.address if company else "BLOCK-C, ROAD-6, HOUSE-39, DHOUR, TURAG, DHAKA-1230",
+            "phone": company.phone if company else "8981868, 8981813",
+        }
         depot_name = orders[0].depot_name if orders and orders[0].depot_name else "CENTRAL STORE"
         route_name = orders[0].route_name if orders else ""
-        area = route_name  # Use route name as area
         
         logger.info(f"Generating reports for {len(orders)} orders, route: {route_name}")
         
-        # Create PDF writer to merge all PDFs
-        pdf_writer = PdfWriter()
+        # Read everything the reports need while the session is open; rendering
+        # then runs on plain data (and in worker processes for large batches).
+        batch = print_pipeline.PrintBatch(db, orders, company_info, depot_name, route_name)
         
-        # 1. Generate packing summary report
-        try:
-            packing_pdf_bytes = generate_packing_report(
-                orders=orders,
-                company_name=company_name,
-                depot_name=depot_name,
-                route_name=route_name,
-                area=area
-            )
-            
-            if not packing_pdf_bytes or len(packing_pdf_bytes) == 0:
-                logger.error("Generated packing PDF is empty")
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Failed to generate packing report: empty result"
-                )
-            
-            # Add packing report to merged PDF
-            packing_pdf_reader = PdfReader(io.BytesIO(packing_pdf_bytes))
-            for page in packing_pdf_reader.pages:
-                pdf_writer.add_page(page)
+        # Commit memo numbers if any were generated
+        if memo_generated:
+            db.commit()
+        
+        if payload.background:
+            job_id = print_pipeline.create_job(batch.order_ids, user.id)
+            user_id, bind = user.id, db.get_bind()
             
-            logger.info(f"Packing report generated successfully, size: {len(packing_pdf_bytes)} bytes")
+            def mark_printed(done_batch):
+                # The request session is closed by the time the job finishes
+                job_db = Session(bind=bind)
+                try:
+                    _mark_printed(job_db, done_batch.order_ids, job_db.get(Employee, user_id))
+                finally:
+                    job_db.close()
             
-        except Exception as e:
-            logger.error(f"Error generating packing report: {str(e)}", exc_info=True)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to generate packing report: {str(e)}"
+            background_tasks.add_task(print_pipeline.run_job, job_id, batch, mark_printed)
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={
+                    "job_id": job_id,
+                    "status": "queued",
+                    "order_count": len(batch.order_ids),
+                    "status_url": f"/api/orders/route-wise/print/jobs/{job_id}",
+                    "download_url": f"/api/orders/route-wise/print/jobs/{job_id}/download",
+                },
             )
         
-        # 2. Generate individual invoice reports for each selected order
-        invoice_count = 0
-        invoice_errors = []
-        for order in orders:
-            try:
-                # Ensure order has items loaded
-                if not hasattr(order, 'items') or not order.items:
-                    logger.warning(f"Order {order.id} has no items, skipping invoice generation")
-                    invoice_errors.append(f"Order {order.id} (memo: {order.memo_number}): No items found")
-                    continue
-                
-                # Get customer details
-                customer = None
-                customer_code = getattr(order, 'customer_code', None) or getattr(order, 'customer_id', None)
-                if customer_code:
-                    customer = db.query(models.Customer).filter(models.Customer.code == customer_code).first()
-                
-                customer_address = customer.address if customer else getattr(order, 'customer_address', '') or ''
-                customer_phone = customer.phone if customer else ''
-                
-                logger.info(f"Generating invoice report for order {order.id} (memo: {order.memo_number}), items: {len(order.items)}")
-                
-                # Generate invoice report for this order
-                try:
-                    invoice_pdf_bytes = generate_invoice_report(
-                        order=order,
-                        db=db,  # Pass database session
-                        company_name=company_name,
-                        company_address=company_address,
-                        company_phone=company_phone,
-                        depot_name=depot_name,
-                        customer_address=customer_address,
-                        customer_phone=customer_phone
-                    )
-                except Exception as gen_error:
-                    logger.error(f"Error in generate_invoice_report for order {order.id}: {str(gen_error)}", exc_info=True)
-                    invoice_errors.append(f"Order {order.id} (memo: {order.memo_number}): Generation failed - {str(gen_error)}")
-                    continue
-                
-                if not invoice_pdf_bytes:
-                    logger.warning(f"generate_invoice_report returned None for order {order.id}")
-                    invoice_errors.append(f"Order {order.id} (memo: {order.memo_number}): Empty PDF returned")
-                    continue
-                
-                if len(invoice_pdf_bytes) == 0:
-                    logger.warning(f"Empty invoice PDF bytes for order {order.id}")
-                    invoice_errors.append(f"Order {order.id} (memo: {order.memo_number}): Empty PDF bytes")
-                    continue
-                
-                # Add invoice report to merged PDF
-                try:
-                    invoice_pdf_reader = PdfReader(io.BytesIO(invoice_pdf_bytes))
-                    page_count = len(invoice_pdf_reader.pages)
-                    
-                    if page_count == 0:
-                        logger.warning(f"Invoice PDF has no pages for order {order.id}")
-                        invoice_errors.append(f"Order {order.id} (memo: {order.memo_number}): PDF has no pages")
-                        continue
-                    
-                    for page in invoice_pdf_reader.pages:
-                        pdf_writer.add_page(page)
-                    
-                    invoice_count += 1
-                    logger.info(f"Invoice report generated successfully for order {order.id} (memo: {order.memo_number}), {page_count} pages added")
-                except Exception as read_error:
-                    logger.error(f"Error reading/adding invoice PDF for order {order.id}: {str(read_error)}", exc_info=True)
-                    invoice_errors.append(f"Order {order.id} (memo: {order.memo_number}): PDF read failed - {str(read_error)}")
-                    continue
-                    
-            except Exception as e:
-                logger.error(f"Unexpected error generating invoice report for order {order.id}: {str(e)}", exc_info=True)
-                invoice_errors.append(f"Order {order.id} (memo: {order.memo_number}): Unexpected error - {str(e)}")
-                continue
-        
-        logger.info(f"Generated {invoice_count} invoice reports out of {len(orders)} orders")
-        if invoice_errors:
-            logger.warning(f"Invoice generation errors: {', '.join(invoice_errors)}")
-        
-        # 3. Merge all PDFs into one
         try:
-            merged_pdf_buffer = io.BytesIO()
-            pdf_writer.write(merged_pdf_buffer)
-            merged_pdf_buffer.seek(0)
-            merged_pdf_bytes = merged_pdf_buffer.getvalue()
-            
-            if not merged_pdf_bytes or len(merged_pdf_bytes) == 0:
-                logger.error("Merged PDF is empty")
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Failed to merge PDFs: empty result"
-                )
-            
-            logger.info(f"Merged PDF generated successfully, size: {len(merged_pdf_bytes)} bytes, pages: {len(pdf_writer.pages)}")
-            
+            pdf_path = print_pipeline.render_to_tempfile(batch)
         except Exception as e:
-            logger.error(f"Error merging PDFs: {str(e)}", exc_info=True)
+            logger.error(f"Error generating route-wise print: {str(e)}", exc_info=True)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to merge PDFs: {str(e)}"
+                detail=f"Failed to generate reports: {str(e)}"
             )
         
         # Mark orders as printed
-        for order in orders:
-            order.printed = True
-            order.printed_at = datetime.utcnow()
+        _mark_printed(db, batch.order_ids, user)
         
-        db.commit()
-
-        AuditService.log_action(
-            db,
-            entity_type="order",
-            entity_id=",".join(str(o.id) for o in orders),
-            action="PRINT",
-            user=user,
-            new_value={"order_ids": [o.id for o in orders], "count": len(orders)},
-        )
-        db.commit()
-        
-        # Return merged PDF as response
-        return Response(
-            content=merged_pdf_bytes,
+        # Stream the merged PDF from disk and remove it afterwards
+        return FileResponse(
+            pdf_path,
             media_type="application/pdf",
-            headers={
-                "Content-Disposition": f'attachment; filename="packing_report_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.pdf"'
-            }
+            filename=f"packing_report_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.pdf",
+            background=BackgroundTask(os.unlink, pdf_path),
         )
     except HTTPException:
         raise
@@ -1598,6 +1639,32 @@ def print_route_wise_orders(
         )
 
 
+@router.get("/route-wise/print/jobs/{job_id}")
+def get_route_wise_print_job(job_id: str, user: Employee = Depends(require_auth)):
+    """Status of a background route-wise print job started by the caller"""
+    from app.reports import print_pipeline
+
+    job = print_pipeline.job_status(job_id, user.id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Print job not found")
+    return job
+
+
+@router.get("/route-wise/print/jobs/{job_id}/download")
+def download_route_wise_print_job(job_id: str, user: Employee = Depends(require_auth)):
+    """Download the PDF of a completed background print job"""
+    from fastapi.responses import FileResponse
+    from app.reports import print_pipeline
+
+    job = print_pipeline.job_status(job_id, user.id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Print job not found")
+    path = print_pipeline.job_file(job_id)
+    if not path:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Print job is {job['status']}")
+    return FileResponse(path, media_type="application/pdf", filename=f"packing_report_{job_id}.pdf")
+
+
 @router.post("/route-wise/assign", status_code=status.HTTP_200_OK)
 def assign_route_wise_orders(
     payload: schemas.RouteWiseAssignRequest,
@@ -1606,7 +1673,6 @@ def assign_route_wise_orders(
 ):
     """Assign orders to employee and vehicle"""
     from datetime import datetime, date
-    from sqlalchemy import func, count
     
     # Verify employee and vehicle exist
     employee = db.query(models.Employee).filter(models.Employee.id == payload.employee_id).first()
@@ -1629,22 +1695,7 @@ def assign_route_wise_orders(
     # Generate unique loading number
     # Format: YYYYMMDD-XXXX (e.g., 20251125-0001)
     today = date.today()
-    date_prefix = today.strftime("%Y%m%d")
-    
-    # Get the highest loading number for today
-    max_loading = db.query(func.max(models.Order.loading_number)).filter(
-        models.Order.loading_number.like(f"{date_prefix}-%")
-    ).scalar()
-    
-    if max_loading:
-        # Extract the sequence number and increment
-        try:
-            sequence = int(max_loading.split("-")[1])
-            next_sequence = sequence + 1
-        except (ValueError, IndexError):
-            next_sequence = 1
-    else:
-        next_sequence = 1
+    loading_number = next_loading_number(db, today)
     
     # Get unique route codes from orders
     route_codes_in_orders = list(set([o.route_code for o in orders if o.route_code]))
@@ -1653,9 +1704,7 @@ def assign_route_wise_orders(
     # Append route codes to loading number if multiple routes
     if len(route_codes) > 1:
         route_suffix = "-" + "-".join(sorted(route_codes))[:20]  # Limit length
-        loading_number = f"{date_prefix}-{next_sequence:04d}{route_suffix}"
-    else:
-        loading_number = f"{date_prefix}-{next_sequence:04d}"
+        loading_number = f"{loading_number}{route_suffix}"
     
     # Get route code and area from first order
     route_code = orders[0].route_code if orders else None
@@ -1675,132 +1724,14 @@ def assign_route_wise_orders(
             order.area = ", ".join(sorted(route_codes))
         else:
             order.area = route_name or route_code or "N/A"
-    
-    db.commit()
 
-    for order in orders:
-        StockReservationService.commit_for_order(db, order.id, user)
-    db.commit()
-    
+    StockReservationService.commit_for_orders(db, [order.id for order in orders], user)
+
     # Create trip assignment automatically
-    try:
-        from app.models import Route, Driver, Trip, TransportExpense, RouteStop
-        from haversine import haversine, Unit
-        
-        # Helper function to calculate route distance
-        def calc_route_distance(route_id: int) -> float:
-            stops = db.query(RouteStop).filter(
-                RouteStop.route_id == route_id
-            ).order_by(RouteStop.stop_sequence).all()
-            
-            if len(stops) < 2:
-                return 0.0
-            
-            total_distance = 0.0
-            for i in range(len(stops) - 1):
-                stop1 = stops[i]
-                stop2 = stops[i + 1]
-                
-                if stop1.latitude and stop1.longitude and stop2.latitude and stop2.longitude:
-                    point1 = (float(stop1.latitude), float(stop1.longitude))
-                    point2 = (float(stop2.latitude), float(stop2.longitude))
-                    distance_km = haversine(point1, point2, unit=Unit.KILOMETERS)
-                    total_distance += distance_km
-            
-            return round(total_distance, 2)
-        
-        # Helper function to generate trip number
-        def gen_trip_number() -> str:
-            year = today.strftime("%Y")
-            month = today.strftime("%m")
-            from sqlalchemy import func
-            count = db.query(func.count(Trip.id)).filter(
-                func.date(Trip.created_at) == today
-            ).scalar() or 0
-            return f"TRP-{year}{month}-{str(count + 1).zfill(4)}"
-        
-        # Find route by route_code
-        route = None
-        if route_code:
-            route = db.query(Route).filter(Route.route_id == route_code).first()
-        
-        # Find driver - employees and drivers are separate, so just get any available driver
-        # Or try to match by name if employee name matches driver name
-        driver = None
-        employee = db.query(models.Employee).filter(models.Employee.id == payload.employee_id).first()
-        
-        if employee:
-            # Try to find driver by matching first name and last name
-            driver = db.query(Driver).filter(
-                Driver.first_name == employee.first_name,
-                Driver.last_name == employee.last_name
-            ).first()
-        
-        # If no match, get any available driver
-        if not driver:
-            driver = db.query(Driver).filter(Driver.status == "Available", Driver.is_active == True).first()
-        
-        # If still no driver, get any active driver
-        if not driver:
-            driver = db.query(Driver).filter(Driver.is_active == True).first()
-        
-        # Create trip even if route or driver is missing (with defaults)
-        if not route:
-            print(f"Warning: Route not found for route_code: {route_code}")
-        if not driver:
-            print(f"Warning: No driver found for employee_id: {payload.employee_id}")
-        
-        # Only create trip if we have both route and driver
-        if route and driver:
-            # Calculate distance
-            distance_km = calc_route_distance(route.id)
-            
-            # Calculate estimated fuel cost
-            estimated_fuel_cost = 0.0
-            if hasattr(vehicle, 'fuel_rate') and vehicle.fuel_rate and distance_km > 0:
-                estimated_fuel_cost = float(vehicle.fuel_rate) * distance_km
-            
-            # Generate trip number
-            trip_number = gen_trip_number()
-            
-            # Create trip for the first order
-            trip_data = {
-                "trip_number": trip_number,
-                "delivery_id": orders[0].id,  # Link to first order
-                "vehicle_id": payload.vehicle_id,
-                "driver_id": driver.id,
-                "route_id": route.id,
-                "trip_date": today,
-                "distance_km": distance_km,
-                "estimated_fuel_cost": estimated_fuel_cost,
-                "status": "Scheduled",
-                "notes": f"Auto-created from order assignment. Loading Number: {loading_number}"
-            }
-            
-            db_trip = Trip(**trip_data)
-            db.add(db_trip)
-            db.flush()  # Flush to get trip.id
-            
-            # Create auto-calculated fuel expense
-            if estimated_fuel_cost > 0:
-                fuel_expense = TransportExpense(
-                    trip_id=db_trip.id,
-                    expense_type="fuel",
-                    amount=estimated_fuel_cost,
-                    description=f"Auto-calculated fuel cost for {distance_km} km (Loading: {loading_number})",
-                    expense_date=today,
-                    is_auto_calculated=True
-                )
-                db.add(fuel_expense)
-            
-            db.commit()
-    except Exception as e:
-        # Log error but don't fail the order assignment
-        import traceback
-        print(f"Error creating trip assignment: {str(e)}")
-        traceback.print_exc()
-        # Don't rollback - keep the order assignment
-        pass
+    _create_loading_trip(
+        db, route_code=route_code, delivery_id=orders[0].id, employee_id=payload.employee_id, vehicle=vehicle,
+        loading_number=loading_number, trip_date=today, source="order assignment",
+    )
     
     AuditService.log_action(
         db,
@@ -1835,7 +1766,6 @@ def create_assigned_order_list_from_barcodes(
 ):
     """Create assigned order list by scanning memo barcodes"""
     from datetime import datetime, date
-    from sqlalchemy import func
     
     # Verify employee and vehicle exist
     employee = db.query(models.Employee).filter(models.Employee.id == payload.employee_id).first()
@@ -1879,23 +1809,7 @@ def create_assigned_order_list_from_barcodes(
     
     # Generate unique loading number (same format as route-wise assignment)
     today = date.today()
-    date_prefix = today.strftime("%Y%m%d")
-    
-    # Get the highest loading number for today
-    max_loading = db.query(func.max(models.Order.loading_number)).filter(
-        models.Order.loading_number.like(f"{date_prefix}-%")
-    ).scalar()
-    
-    if max_loading:
-        try:
-            sequence = int(max_loading.split("-")[1])
-            next_sequence = sequence + 1
-        except (ValueError, IndexError):
-            next_sequence = 1
-    else:
-        next_sequence = 1
-    
-    loading_number = f"{date_prefix}-{next_sequence:04d}"
+    loading_number = next_loading_number(db, today)
     
     # Get route code and area from first order (if available)
     route_code = orders[0].route_code if orders else None
@@ -1913,131 +1827,15 @@ def create_assigned_order_list_from_barcodes(
         order.loading_date = today
         order.area = route_name or route_code or "N/A"
         assigned_order_ids.append(order.id)
-    
-    db.commit()
 
-    for order in orders:
-        StockReservationService.commit_for_order(db, order.id, user)
-    db.commit()
-    
+    StockReservationService.commit_for_orders(db, [order.id for order in orders], user)
+
     # Create trip assignment automatically
-    try:
-        from app.models import Route, Driver, Trip, TransportExpense, RouteStop
-        from haversine import haversine, Unit
-        
-        # Helper function to calculate route distance
-        def calc_route_distance(route_id: int) -> float:
-            stops = db.query(RouteStop).filter(
-                RouteStop.route_id == route_id
-            ).order_by(RouteStop.stop_sequence).all()
-            
-            if len(stops) < 2:
-                return 0.0
-            
-            total_distance = 0.0
-            for i in range(len(stops) - 1):
-                stop1 = stops[i]
-                stop2 = stops[i + 1]
-                
-                if stop1.latitude and stop1.longitude and stop2.latitude and stop2.longitude:
-                    point1 = (float(stop1.latitude), float(stop1.longitude))
-                    point2 = (float(stop2.latitude), float(stop2.longitude))
-                    distance_km = haversine(point1, point2, unit=Unit.KILOMETERS)
-                    total_distance += distance_km
-            
-            return round(total_distance, 2)
-        
-        # Helper function to generate trip number
-        def gen_trip_number() -> str:
-            year = today.strftime("%Y")
-            month = today.strftime("%m")
-            from sqlalchemy import func
-            count = db.query(func.count(Trip.id)).filter(
-                func.date(Trip.created_at) == today
-            ).scalar() or 0
-            return f"TRP-{year}{month}-{str(count + 1).zfill(4)}"
-        
-        # Find route by route_code from first order
-        route = None
-        if orders and orders[0].route_code:
-            route = db.query(Route).filter(Route.route_id == orders[0].route_code).first()
-        
-        # Find driver - employees and drivers are separate, so match by name or get any available
-        driver = None
-        employee = db.query(models.Employee).filter(models.Employee.id == payload.employee_id).first()
-        
-        if employee:
-            # Try to find driver by matching first name and last name
-            driver = db.query(Driver).filter(
-                Driver.first_name == employee.first_name,
-                Driver.last_name == employee.last_name
-            ).first()
-        
-        # If no match, get any available driver
-        if not driver:
-            driver = db.query(Driver).filter(Driver.status == "Available", Driver.is_active == True).first()
-        
-        # If still no driver, get any active driver
-        if not driver:
-            driver = db.query(Driver).filter(Driver.is_active == True).first()
-        
-        # Create trip even if route or driver is missing (with defaults)
-        if not route:
-            print(f"Warning: Route not found for route_code: {route_code}")
-        if not driver:
-            print(f"Warning: No driver found for employee_id: {payload.employee_id}")
-        
-        # Only create trip if we have both route and driver
-        if route and driver:
-            # Calculate distance
-            distance_km = calc_route_distance(route.id)
-            
-            # Calculate estimated fuel cost
-            estimated_fuel_cost = 0.0
-            if hasattr(vehicle, 'fuel_rate') and vehicle.fuel_rate and distance_km > 0:
-                estimated_fuel_cost = float(vehicle.fuel_rate) * distance_km
-            
-            # Generate trip number
-            trip_number = gen_trip_number()
-            
-            # Create trip
-            trip_data = {
-                "trip_number": trip_number,
-                "delivery_id": orders[0].id if orders else None,
-                "vehicle_id": payload.vehicle_id,
-                "driver_id": driver.id,
-                "route_id": route.id,
-                "trip_date": today,
-                "distance_km": distance_km,
-                "estimated_fuel_cost": estimated_fuel_cost,
-                "status": "Scheduled",
-                "notes": f"Auto-created from barcode assignment. Loading Number: {loading_number}"
-            }
-            
-            db_trip = Trip(**trip_data)
-            db.add(db_trip)
-            db.flush()  # Flush to get trip.id
-            
-            # Create auto-calculated fuel expense
-            if estimated_fuel_cost > 0:
-                fuel_expense = TransportExpense(
-                    trip_id=db_trip.id,
-                    expense_type="fuel",
-                    amount=estimated_fuel_cost,
-                    description=f"Auto-calculated fuel cost for {distance_km} km (Loading: {loading_number})",
-                    expense_date=today,
-                    is_auto_calculated=True
-                )
-                db.add(fuel_expense)
-            
-            db.commit()
-    except Exception as e:
-        # Log error but don't fail the order assignment
-        import traceback
-        print(f"Error creating trip assignment: {str(e)}")
-        traceback.print_exc()
-        # Don't rollback - keep the order assignment
-        pass
+    _create_loading_trip(
+        db, route_code=route_code, delivery_id=orders[0].id, employee_id=payload.employee_id, vehicle=vehicle,
+        loading_number=loading_number, trip_date=today, source="barcode assignment",
+    )
+    db.commit()
     
     return {
         "message": f"Successfully created assigned order list with {len(orders)} order(s)",
@@ -2053,16 +1851,8 @@ def create_assigned_order_list_from_barcodes(
 @router.get("/loading-report/{loading_number}")
 def get_loading_report(loading_number: str, db: Session = Depends(get_db)):
     """Generate loading report PDF for a specific loading number"""
-    from datetime import datetime
-    from decimal import Decimal
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-    from io import BytesIO
     from fastapi.responses import Response
+    from app.reports.loading_report import generate_loading_report
     
     # Get all orders with this loading number
     orders = (
@@ -2075,259 +1865,8 @@ def get_loading_report(loading_number: str, db: Session = Depends(get_db)):
     if not orders:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No orders found for loading number {loading_number}")
     
-    # Get employee and vehicle info from first order
-    first_order = orders[0]
-    employee = first_order.assigned_employee
-    vehicle = first_order.assigned_vehicle_rel
-    
-    # Create PDF buffer with proper margins to prevent overlap
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch, leftMargin=0.5*inch, rightMargin=0.5*inch)
-    story = []
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#000000'),
-        spaceAfter=6,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    # Company Header - Center aligned
-    company_name = first_order.depot_name if first_order.depot_name else "CENTRAL STORE"
-    story.append(Paragraph(company_name.upper(), title_style))
-    story.append(Spacer(1, 0.15*inch))
-    
-    # Report Title - Center aligned
-    report_title_style = ParagraphStyle(
-        'ReportTitle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor('#000000'),
-        spaceAfter=12,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold',
-        leading=16
-    )
-    story.append(Paragraph("LOADING REPORT", report_title_style))
-    story.append(Spacer(1, 0.25*inch))
-    
-    # Header Information Table
-    employee_name = f"{employee.first_name} {employee.last_name or ''}".strip() if employee else "N/A"
-    employee_code = employee.employee_id if employee else "N/A"
-    vehicle_reg = vehicle.registration_number if vehicle else "N/A"
-    loading_date = first_order.loading_date.strftime('%d/%m/%Y') if first_order.loading_date else datetime.utcnow().strftime('%d/%m/%Y')
-    area = first_order.area or "N/A"
-    
-    # Truncate long text to prevent overlap in header
-    depot_name = (first_order.depot_name[:25] if len(first_order.depot_name) > 25 else first_order.depot_name) if first_order.depot_name else "CENTRAL STORE"
-    delivery_by = f"{employee_name} ({employee_code})"[:30] if len(f"{employee_name} ({employee_code})") > 30 else f"{employee_name} ({employee_code})"
-    vehicle_reg_short = vehicle_reg[:15] if len(vehicle_reg) > 15 else vehicle_reg
-    loading_number_short = loading_number[:15] if len(loading_number) > 15 else loading_number
-    area_short = area[:20] if len(area) > 20 else area
-    
-    header_data = [
-        ['Depot:', depot_name, 'Delivery By:', delivery_by],
-        ['Van No.:', vehicle_reg_short, 'Loading No.:', loading_number_short],
-        ['Date:', loading_date, 'Area:', area_short],
-    ]
-    
-    # Calculate header table width to fit A4 (8.27 inches, with 0.5 inch margins = 7.27 inches usable)
-    header_table = Table(header_data, colWidths=[0.9*inch, 2.4*inch, 1.1*inch, 2.37*inch])
-    header_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),  # Label columns left-aligned
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),  # Value columns left-aligned
-        ('ALIGN', (2, 0), (2, -1), 'LEFT'),  # Label columns left-aligned
-        ('ALIGN', (3, 0), (3, -1), 'LEFT'),  # Value columns left-aligned
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (3, 0), (3, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('WORDWRAP', (0, 0), (-1, -1), True),  # Enable word wrapping for header
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-    ]))
-    story.append(header_table)
-    story.append(Spacer(1, 0.3*inch))
-    
-    # COD/INVOICE Sales Table
-    story.append(Paragraph("COD/INVOICE Sales", ParagraphStyle(
-        'TableTitle',
-        parent=styles['Heading3'],
-        fontSize=12,
-        textColor=colors.HexColor('#000000'),
-        spaceAfter=8,
-        alignment=TA_LEFT,
-        fontName='Helvetica-Bold'
-    )))
-    
-    # Table headers
-    table_data = [['Memo No.', 'Value', 'Status', 'PSO', 'Remarks', 'Cash', 'Dues', 'Amend', 'Return']]
-    
-    # Calculate totals
-    total_value = Decimal("0")
-    total_cash = Decimal("0")
-    total_dues = Decimal("0")
-    total_amend = Decimal("0")
-    total_return = Decimal("0")
-    
-    # Add order rows
-    for order in orders:
-        # Calculate order value
-        order_value = Decimal("0")
-        for item in order.items:
-            unit_price = item.unit_price or item.trade_price or Decimal("0")
-            discount = item.discount_percent or Decimal("0")
-            price_after_discount = unit_price * (1 - discount / 100)
-            total_price = price_after_discount * (item.total_quantity or (item.quantity + (item.free_goods or 0)))
-            order_value += total_price
-        
-        memo_no = (order.memo_number or order.order_number or str(order.id))[:15]  # Use memo_number, fallback to order_number
-        value = float(order_value)
-        status_val = "C"  # C for COD/Cash
-        pso = str(order.pso_code or order.pso_id or "N/A")[:10]  # Limit PSO length
-        remarks = ""
-        cash = float(order_value)  # Assuming full payment for COD
-        dues = 0.00
-        amend = 0.00
-        return_val = 0.00
-        
-        table_data.append([
-            memo_no,
-            f"{value:.2f}",
-            status_val,
-            pso,
-            remarks,
-            f"{cash:.2f}",
-            f"{dues:.2f}",
-            f"{amend:.2f}",
-            f"{return_val:.2f}"
-        ])
-        
-        total_value += order_value
-        total_cash += Decimal(str(cash))
-        total_dues += Decimal(str(dues))
-        total_amend += Decimal(str(amend))
-        total_return += Decimal(str(return_val))
-    
-    # Add summary rows - use shorter label to prevent overlap
-    business_label = 'Business-wise Total'
-    table_data.append([business_label, f"{float(total_value):.2f}", '', '', '', f"{float(total_cash):.2f}", f"{float(total_dues):.2f}", f"{float(total_amend):.2f}", f"{float(total_return):.2f}"])
-    table_data.append(['Grand Total:', f"{float(total_value):.2f}", '', '', '', f"{float(total_cash):.2f}", f"{float(total_dues):.2f}", f"{float(total_amend):.2f}", f"{float(total_return):.2f}"])
-    
-    # Create table - adjust column widths to fit A4 (8.27 inches total, with 0.5 inch margins = 7.27 inches usable)
-    # Increased first column width for "Business-wise Total" label to prevent overlap
-    # Total: 1.1 + 0.8 + 0.4 + 0.6 + 0.7 + 0.8 + 0.6 + 0.6 + 0.57 = 6.57 inches (fits with margin, prevents overlap)
-    table = Table(table_data, colWidths=[1.1*inch, 0.8*inch, 0.4*inch, 0.6*inch, 0.7*inch, 0.8*inch, 0.6*inch, 0.6*inch, 0.57*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E0E0E0')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#000000')),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),  # Memo No. left-aligned
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),  # Value right-aligned
-        ('ALIGN', (2, 0), (2, -1), 'CENTER'),  # Status center-aligned
-        ('ALIGN', (3, 0), (3, -1), 'CENTER'),  # PSO center-aligned
-        ('ALIGN', (4, 0), (4, -1), 'LEFT'),  # Remarks left-aligned
-        ('ALIGN', (5, 0), (5, -1), 'RIGHT'),  # Cash right-aligned
-        ('ALIGN', (6, 0), (6, -1), 'RIGHT'),  # Dues right-aligned
-        ('ALIGN', (7, 0), (7, -1), 'RIGHT'),  # Amend right-aligned
-        ('ALIGN', (8, 0), (8, -1), 'RIGHT'),  # Return right-aligned
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-        ('TOPPADDING', (0, 0), (-1, 0), 6),
-        ('FONTNAME', (0, 1), (-1, -3), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -3), 7),
-        ('WORDWRAP', (0, 0), (-1, -1), True),  # Enable word wrapping
-        ('LEFTPADDING', (0, 0), (-1, -1), 3),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-        ('ALIGN', (0, 1), (0, -1), 'LEFT'),  # Memo No. left-aligned
-        ('ALIGN', (1, 1), (1, -1), 'RIGHT'),  # Value right-aligned
-        ('ALIGN', (2, 1), (2, -1), 'CENTER'),  # Status center-aligned
-        ('ALIGN', (3, 1), (3, -1), 'CENTER'),  # PSO center-aligned
-        ('ALIGN', (4, 1), (4, -1), 'LEFT'),  # Remarks left-aligned
-        ('ALIGN', (5, 1), (5, -1), 'RIGHT'),  # Cash right-aligned
-        ('ALIGN', (6, 1), (6, -1), 'RIGHT'),  # Dues right-aligned
-        ('ALIGN', (7, 1), (7, -1), 'RIGHT'),  # Amend right-aligned
-        ('ALIGN', (8, 1), (8, -1), 'RIGHT'),  # Return right-aligned
-        ('GRID', (0, 0), (-1, -3), 0.5, colors.HexColor('#CCCCCC')),
-        ('BACKGROUND', (0, -2), (-1, -2), colors.HexColor('#F5F5F5')),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#E8E8E8')),
-        ('FONTNAME', (0, -2), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, -2), (-1, -1), 8),
-        ('ALIGN', (0, -2), (0, -1), 'LEFT'),  # Summary labels left-aligned
-        ('ALIGN', (1, -2), (1, -1), 'RIGHT'),  # Summary values right-aligned
-        ('ALIGN', (5, -2), (5, -1), 'RIGHT'),  # Summary cash right-aligned
-        ('ALIGN', (6, -2), (6, -1), 'RIGHT'),  # Summary dues right-aligned
-        ('ALIGN', (7, -2), (7, -1), 'RIGHT'),  # Summary amend right-aligned
-        ('ALIGN', (8, -2), (8, -1), 'RIGHT'),  # Summary return right-aligned
-        ('LINEBELOW', (0, -2), (-1, -2), 1, colors.HexColor('#000000')),
-        ('LINEBELOW', (0, -1), (-1, -1), 2, colors.HexColor('#000000')),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ('TOPPADDING', (0, 0), (-1, -1), 3),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -3), [colors.white, colors.HexColor('#FAFAFA')]),  # Alternating row colors
-        ('ROWBACKGROUNDS', (0, 1), (-1, -3), [colors.white, colors.HexColor('#FAFAFA')]),  # Alternating row colors
-    ]))
-    
-    story.append(table)
-    story.append(Spacer(1, 0.4*inch))
-    
-    # Footer Section
-    footer_data = [
-        ['Received:', ''],
-        ['Packages on:', ''],
-        ['with relevant C. O. D. as stated above', ''],
-        ['', ''],
-        ['Van Driver/ Delivery In-charge', ''],
-        ['Signature:', ''],
-        ['Date:', ''],
-        ['', ''],
-        ['C. O. D. CASH & INVENTORY RECONCILATION', ''],
-        ['CASH', ''],
-        ['Received Tk.', ''],
-        ['UNDELIVERED C. O. D.', ''],
-        ['(Details on back of form)', ''],
-        ['', ''],
-        ['Cashier', ''],
-        ['Signature:', ''],
-        ['Date:', ''],
-    ]
-    
-    footer_table = Table(footer_data, colWidths=[4.2*inch, 2.57*inch])
-    footer_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('WORDWRAP', (0, 0), (-1, -1), True),  # Enable word wrapping for footer
-        ('LINEBELOW', (0, 4), (-1, 4), 0.5, colors.HexColor('#000000')),
-        ('LINEBELOW', (0, 8), (-1, 8), 0.5, colors.HexColor('#000000')),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ('TOPPADDING', (0, 0), (-1, -1), 3),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-    ]))
-    story.append(footer_table)
-    story.append(Spacer(1, 0.2*inch))
-    story.append(Paragraph("Page 1 of 1", ParagraphStyle(
-        'PageNumber',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.HexColor('#666666'),
-        alignment=TA_CENTER,
-        fontName='Helvetica'
-    )))
-    
-    # Build PDF
-    doc.build(story)
-    buffer.seek(0)
-    
     return Response(
-        content=buffer.getvalue(),
+        content=generate_loading_report(orders, loading_number),
         media_type="application/pdf",
         headers={
             "Content-Disposition": f"attachment; filename=Loading_Report_{loading_number}.pdf"
@@ -2338,16 +1877,8 @@ def get_loading_report(loading_number: str, db: Session = Depends(get_db)):
 @router.get("/money-receipt/{loading_number}")
 def get_money_receipt_report(loading_number: str, db: Session = Depends(get_db)):
     """Generate money receipt PDF for a specific loading number after collection approval"""
-    from datetime import datetime
-    from decimal import Decimal
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-    from io import BytesIO
     from fastapi.responses import Response
+    from app.reports.loading_report import generate_money_receipt
     
     # Get all orders with this loading number that are collection approved
     orders = (
@@ -2363,192 +1894,8 @@ def get_money_receipt_report(loading_number: str, db: Session = Depends(get_db))
     if not orders:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No approved orders found for loading number {loading_number}")
     
-    # Get employee and vehicle info from first order
-    first_order = orders[0]
-    employee = first_order.assigned_employee
-    vehicle = first_order.assigned_vehicle_rel
-    
-    # Create PDF buffer
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch, leftMargin=0.5*inch, rightMargin=0.5*inch)
-    story = []
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#000000'),
-        spaceAfter=6,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    # Company Header
-    company_name = first_order.depot_name if first_order.depot_name else "CENTRAL STORE"
-    story.append(Paragraph(company_name.upper(), title_style))
-    story.append(Spacer(1, 0.15*inch))
-    
-    # Report Title
-    report_title_style = ParagraphStyle(
-        'ReportTitle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor('#000000'),
-        spaceAfter=12,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold',
-        leading=16
-    )
-    story.append(Paragraph("MONEY RECEIPT", report_title_style))
-    story.append(Spacer(1, 0.25*inch))
-    
-    # Header Information
-    employee_name = f"{employee.first_name} {employee.last_name or ''}".strip() if employee else "N/A"
-    employee_code = employee.employee_id if employee else "N/A"
-    vehicle_reg = vehicle.registration_number if vehicle else "N/A"
-    loading_date = first_order.loading_date.strftime('%d/%m/%Y') if first_order.loading_date else datetime.utcnow().strftime('%d/%m/%Y')
-    area = first_order.area or "N/A"
-    
-    header_data = [
-        ['Depot:', company_name[:25], 'Delivery By:', f"{employee_name} ({employee_code})"[:30]],
-        ['Van No.:', vehicle_reg[:15], 'Loading No.:', loading_number[:15]],
-        ['Date:', loading_date, 'Area:', area[:20]],
-    ]
-    
-    header_table = Table(header_data, colWidths=[0.9*inch, 2.4*inch, 1.1*inch, 2.37*inch])
-    header_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('ALIGN', (2, 0), (2, -1), 'LEFT'),
-        ('ALIGN', (3, 0), (3, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (3, 0), (3, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('WORDWRAP', (0, 0), (-1, -1), True),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-    ]))
-    story.append(header_table)
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Money Receipt Table
-    story.append(Paragraph("Collection Details", ParagraphStyle(
-        'TableTitle',
-        parent=styles['Heading3'],
-        fontSize=12,
-        textColor=colors.HexColor('#000000'),
-        spaceAfter=8,
-        alignment=TA_LEFT,
-        fontName='Helvetica-Bold'
-    )))
-    
-    # Table headers
-    table_data = [['Memo No.', 'Total Amount', 'Collected', 'Pending', 'Status']]
-    
-    # Calculate totals
-    total_amount = Decimal("0")
-    total_collected = Decimal("0")
-    total_pending = Decimal("0")
-    
-    # Add order rows
-    for order in orders:
-        # Calculate order total amount
-        order_total = Decimal("0")
-        for item in order.items:
-            unit_price = item.unit_price or item.trade_price or Decimal("0")
-            discount = item.discount_percent or Decimal("0")
-            price_after_discount = unit_price * (1 - discount / 100)
-            total_price = price_after_discount * (item.total_quantity or (item.quantity + (item.free_goods or 0)))
-            order_total += total_price
-        
-        memo_no = (order.memo_number or order.order_number or str(order.id))[:15]
-        collected = order.collected_amount or Decimal("0")
-        pending = order.pending_amount or Decimal("0")
-        status_val = order.collection_status or "Pending"
-        
-        table_data.append([
-            memo_no,
-            f"{float(order_total):.2f}",
-            f"{float(collected):.2f}",
-            f"{float(pending):.2f}",
-            status_val[:20]
-        ])
-        
-        total_amount += order_total
-        total_collected += collected
-        total_pending += pending
-    
-    # Add summary rows
-    table_data.append(['Total:', f"{float(total_amount):.2f}", f"{float(total_collected):.2f}", f"{float(total_pending):.2f}", ''])
-    
-    # Create table
-    table = Table(table_data, colWidths=[1.5*inch, 1.2*inch, 1.2*inch, 1.2*inch, 1.37*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E0E0E0')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#000000')),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
-        ('ALIGN', (3, 0), (3, -1), 'RIGHT'),
-        ('ALIGN', (4, 0), (4, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-        ('TOPPADDING', (0, 0), (-1, 0), 6),
-        ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -2), 7),
-        ('WORDWRAP', (0, 0), (-1, -1), True),
-        ('LEFTPADDING', (0, 0), (-1, -1), 3),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-        ('GRID', (0, 0), (-1, -2), 0.5, colors.HexColor('#CCCCCC')),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#E8E8E8')),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, -1), (-1, -1), 8),
-        ('LINEBELOW', (0, -1), (-1, -1), 2, colors.HexColor('#000000')),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ('TOPPADDING', (0, 0), (-1, -1), 3),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.HexColor('#FAFAFA')]),
-    ]))
-    
-    story.append(table)
-    story.append(Spacer(1, 0.4*inch))
-    
-    # Footer Section
-    footer_data = [
-        ['Received Amount:', f"৳{float(total_collected):.2f}"],
-        ['', ''],
-        ['Cashier', ''],
-        ['Signature:', ''],
-        ['Date:', datetime.utcnow().strftime('%d/%m/%Y')],
-    ]
-    
-    footer_table = Table(footer_data, colWidths=[3*inch, 4.27*inch])
-    footer_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('FONTNAME', (1, 0), (1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (1, 0), (1, 0), 10),
-        ('LINEBELOW', (0, 2), (-1, 2), 0.5, colors.HexColor('#000000')),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ('TOPPADDING', (0, 0), (-1, -1), 3),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-    ]))
-    story.append(footer_table)
-    
-    # Build PDF
-    doc.build(story)
-    buffer.seek(0)
-    
     return Response(
-        content=buffer.getvalue(),
+        content=generate_money_receipt(orders, loading_number),
         media_type="application/pdf",
         headers={
             "Content-Disposition": f"attachment; filename=Money_Receipt_{loading_number}.pdf"
@@ -2556,6 +1903,67 @@ def get_money_receipt_report(loading_number: str, db: Session = Depends(get_db))
     )
 
 
+@router.post("/assigned/scan-sessions", status_code=status.HTTP_201_CREATED, response_model=schemas.ScanSessionResponse)
+def open_scan_session(
+    payload: schemas.ScanSessionCreate,
+    db: Session = Depends(get_db),
+    user: Employee = Depends(require_auth),
+):
+    """Open a barcode scan session for an employee and vehicle"""
+    if not db.get(models.Employee, payload.employee_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found")
+    if not db.get(models.Vehicle, payload.vehicle_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vehicle not found")
+    return session_state(ScanSessionService.open(db, payload, user))
+
+
+@router.get("/assigned/scan-sessions/{session_id}", response_model=schemas.ScanSessionResponse)
+def get_scan_session(session_id: str, db: Session = Depends(get_db), user: Employee = Depends(require_auth)):
+    return session_state(ScanSessionService.get(db, session_id, open_only=False))
+
+
+@router.post("/assigned/scan-sessions/{session_id}/scans", response_model=schemas.ScanSessionResponse)
+def scan_memos(
+    session_id: str,
+    payload: schemas.ScanRequest,
+    db: Session = Depends(get_db),
+    user: Employee = Depends(require_auth),
+):
+    """Add scanned memo barcodes to the session, with a result per memo"""
+    return ScanSessionService.scan(db, session_id, payload.memo_numbers, user)
+
+
+@router.delete("/assigned/scan-sessions/{session_id}/scans/{memo_number}", response_model=schemas.ScanSessionResponse)
+def unscan_memo(
+    session_id: str,
+    memo_number: str,
+    db: Session = Depends(get_db),
+    user: Employee = Depends(require_auth),
+):
+    return ScanSessionService.remove(db, session_id, memo_number)
+
+
+@router.delete("/assigned/scan-sessions/{session_id}", response_model=schemas.ScanSessionResponse)
+def cancel_scan_session(session_id: str, db: Session = Depends(get_db), user: Employee = Depends(require_auth)):
+    return ScanSessionService.cancel(db, session_id)
+
+
+@router.post("/assigned/scan-sessions/{session_id}/commit", response_model=schemas.ScanSessionResponse)
+def commit_scan_session(session_id: str, db: Session = Depends(get_db), user: Employee = Depends(require_auth)):
+    """Assign every scanned memo to one new loading number, in one transaction"""
+    session = ScanSessionService.get(db, session_id, lock=True)
+    today = date.today()
+    loading_number = next_loading_number(db, today)
+    orders = ScanSessionService.assign(db, session, loading_number, today, user)
+    _create_loading_trip(
+        db, route_code=orders[0]["route_code"], delivery_id=orders[0]["id"], employee_id=session.employee_id,
+        vehicle=db.get(models.Vehicle, session.vehicle_id), loading_number=loading_number, trip_date=today,
+        source="barcode scan session",
+    )
+    db.commit()
+    return session_state(session)
+
+
 @router.put("/assigned/{order_id}/status", status_code=status.HTTP_200_OK)
 def update_assigned_order_status(
     order_id: int,
@@ -2597,99 +2005,9 @@ def approve_delivery(
     db: Session = Depends(get_db)
 ):
     """Approve delivery for a loading group, update quantities, and move orders to collection approval"""
-    from datetime import datetime
-    from decimal import Decimal
-    
-    # Get all orders with this loading number
-    orders = (
-        db.query(models.Order)
-        .filter(models.Order.loading_number == payload.loading_number)
-        .all()
+    return DeliveryApprovalService.approve(
+        db, payload.loading_number, payload.memos, idempotency_key=payload.idempotency_key,
     )
-    
-    if not orders:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"No orders found for loading number {payload.loading_number}"
-        )
-    
-    # Create a map of memo_number to approval data
-    memo_map = {memo.memo_number: memo for memo in payload.memos}
-    
-    approved_count = 0
-    orders_moved_to_collection = []
-    
-    # Update each order based on memo data
-    for order in orders:
-        memo_number = order.memo_number or order.order_number
-        if not memo_number:
-            continue
-            
-        # Try to find matching memo in approval data
-        approval_memo = None
-        for memo_key, memo_data in memo_map.items():
-            if memo_key == memo_number or memo_key == str(order.id):
-                approval_memo = memo_data
-                break
-        
-        if not approval_memo:
-            # If no specific approval data, check if fully delivered
-            continue
-        
-        # Calculate total order amount (original loading quantity)
-        total_amount = Decimal('0')
-        for item in order.items:
-            unit_price = item.unit_price or item.trade_price or Decimal('0')
-            discount = item.discount_percent or Decimal('0')
-            price_after_discount = unit_price * (1 - discount / 100)
-            # Use original loading quantity (total_quantity)
-            loading_qty_item = item.total_quantity or (item.quantity + (item.free_goods or Decimal('0')))
-            total_price = price_after_discount * loading_qty_item
-            total_amount += total_price
-        
-        # Determine collection status based on delivered and returned quantities
-        loading_qty = approval_memo.delivered_quantity + approval_memo.returned_quantity
-        
-        if approval_memo.returned_quantity == 0 and approval_memo.delivered_quantity > 0:
-            # Fully delivered (returned = 0, delivered = full)
-            # Set to "Pending" so it appears in Approval for Collection (will be marked as Fully Collected after approval)
-            order.collection_status = "Pending"
-            order.collected_amount = total_amount
-            order.pending_amount = Decimal('0')
-        elif approval_memo.delivered_quantity == 0:
-            # Postponed (delivered = 0, all returned)
-            order.collection_status = "Postponed"
-            order.collection_type = "Postponed"
-            order.collected_amount = Decimal('0')
-            order.pending_amount = total_amount
-        else:
-            # Partial delivered (some delivered, some returned)
-            order.collection_status = "Partially Collected"
-            order.collection_type = "Partial"
-            # Calculate collected amount based on delivered quantity ratio
-            if loading_qty > 0:
-                delivered_ratio = Decimal(str(approval_memo.delivered_quantity)) / Decimal(str(loading_qty))
-                order.collected_amount = total_amount * delivered_ratio
-                order.pending_amount = total_amount - order.collected_amount
-            else:
-                order.collected_amount = Decimal('0')
-                order.pending_amount = total_amount
-        
-        # Mark as pending collection approval (will go to Remaining Cash Deposit list)
-        order.collection_approved = False
-        order.collection_source = "Web"  # Mark as Web source to distinguish from mobile app
-        
-        approved_count += 1
-        orders_moved_to_collection.append(memo_number)
-    
-    db.commit()
-    
-    return {
-        "message": f"Delivery approved for loading {payload.loading_number}. {approved_count} order(s) moved to collection approval.",
-        "loading_number": payload.loading_number,
-        "approved_count": approved_count,
-        "orders_moved_to_collection": orders_moved_to_collection
-    }
 
 
 @router.post("/route-wise/validate", status_code=status.HTTP_200_OK)
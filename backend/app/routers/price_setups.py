@@ -4,6 +4,7 @@ from typing import List
 from app.database import get_db
 from app.models import PriceSetup, Product
 from app.schemas import PriceSetupCreate, PriceSetupUpdate, PriceSetup as PriceSetupSchema
+from app.redis_cache import cached
 
 router = APIRouter()
 
@@ -39,6 +40,7 @@ def generate_price_setup_code(db: Session) -> str:
     return code
 
 @router.get("/", response_model=List[PriceSetupSchema])
+@cached("price_setups", tags=("price_setups",), response_model=List[PriceSetupSchema])
 def get_price_setups(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     setups = db.query(PriceSetup).filter(PriceSetup.is_active == True).offset(skip).limit(limit).all()
     return setups
@@ -4,41 +4,18 @@ from typing import List
 from app.database import get_db
 from app.models import Product
 from app.schemas import ProductCreate, ProductUpdate, Product as ProductSchema
+from app.redis_cache import cached
+from app.services.sequence_service import SequenceService, max_suffix
 
 router = APIRouter()
 
 def generate_product_sku(db: Session) -> str:
     """Generate a unique product SKU in format PRD-XXXX"""
-    existing_products = db.query(Product).filter(
-        Product.sku.like("PRD-%")
-    ).all()
-    
-    if existing_products:
-        code_numbers = []
-        for product in existing_products:
-            if product.sku:
-                try:
-                    num = int(product.sku.split("-")[1])
-                    code_numbers.append(num)
-                except (ValueError, IndexError):
-                    continue
-        
-        if code_numbers:
-            new_num = max(code_numbers) + 1
-        else:
-            new_num = 1
-    else:
-        new_num = 1
-    
-    sku = f"PRD-{new_num:04d}"
-    
-    while db.query(Product).filter(Product.sku == sku).first():
-        new_num += 1
-        sku = f"PRD-{new_num:04d}"
-    
-    return sku
+    num = SequenceService.next_value(db, "product_sku", seed=max_suffix(Product.sku, "PRD-"))
+    return f"PRD-{num:04d}"
 
 @router.get("/", response_model=List[ProductSchema])
+@cached("products", tags=("products",), response_model=List[ProductSchema])
 def get_products(skip: int = 0, limit: int = 10000, db: Session = Depends(get_db)):
     # Get all active products, use high limit to ensure we get all products
     # Order by name for consistent ordering
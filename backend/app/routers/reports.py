@@ -8,7 +8,7 @@ from fastapi.responses import Response
 from sqlalchemy.orm import Session
 
 from app.core.deps import require_permission
-from app.database import get_db
+from app.read_replica import get_read_db
 from app.models import Employee
 from app.services.report_registry import REPORT_REGISTRY, run_report
 
@@ -30,7 +30,7 @@ def get_report(
     order_id: Optional[int] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: Employee = Depends(require_permission("reports.read")),
 ):
     params: Dict[str, Any] = {"depot_code": depot_code, "order_id": order_id, "date_from": date_from, "date_to": date_to}
@@ -48,7 +48,7 @@ def get_report(
 @router.get("/{report_id}/export")
 def export_report_csv(
     report_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: Employee = Depends(require_permission("reports.export")),
 ):
     data = run_report(db, report_id, {})
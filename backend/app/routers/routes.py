@@ -5,7 +5,8 @@ from app.database import get_db
 from app.models import Route, Employee
 from pydantic import BaseModel
 from app.core.deps import require_auth
-from app.core.depot_scope import apply_depot_id_filter
+from app.core.depot_scope import apply_depot_id_filter, depot_cache_scope
+from app.redis_cache import cached
 
 router = APIRouter()
 
@@ -23,6 +24,12 @@ class RouteResponse(BaseModel):
         from_attributes = True
 
 @router.get("/", response_model=List[RouteResponse])
+@cached(
+    "routes",
+    tags=("routes",),
+    key=lambda skip, limit, user, **_: (depot_cache_scope(user), skip, limit),
+    response_model=List[RouteResponse],
+)
 def get_routes(
     skip: int = 0,
     limit: int = 100,
@@ -1,5 +1,5 @@
 """Order status transition API."""
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
@@ -23,6 +23,33 @@ class StatusTransitionRequest(BaseModel):
     source_system: str = "DMS_WEB"
 
 
+class BulkStatusTransitionRequest(StatusTransitionRequest):
+    order_ids: List[int]
+
+
+@router.post("/transition-status")
+def transition_orders_status(
+    payload: BulkStatusTransitionRequest,
+    db: Session = Depends(get_db),
+    user: Employee = Depends(require_permission("orders.status")),
+):
+    """Move many orders through one event; orders that cannot move are listed, not fatal."""
+    orders = db.query(Order).filter(Order.id.in_(payload.order_ids)).all()
+    found = {o.id for o in orders}
+    result = StatusTransitionService.transition_many(
+        db, orders, payload.event_code, user,
+        reason=payload.reason, remarks=payload.remarks,
+        geo_latitude=payload.geo_latitude, geo_longitude=payload.geo_longitude,
+        source_system=payload.source_system,
+    )
+    result["rejected"] += [
+        {"order_id": order_id, "delivery_status": None, "detail": "Order not found"}
+        for order_id in dict.fromkeys(payload.order_ids) if order_id not in found
+    ]
+    db.commit()
+    return result
+
+
 @router.post("/{order_id}/transition-status")
 def transition_order_status(
     order_id: int,
@@ -7,34 +7,18 @@ from app.models import StockAdjustment, StockAdjustmentItem, Employee
 from app.schemas import StockAdjustmentCreate, StockAdjustment as StockAdjustmentSchema
 from app.core.deps import require_auth
 from app.core.depot_scope import apply_depot_id_filter
+from app.services.sequence_service import SequenceService, max_suffix
 
 router = APIRouter()
 
 def generate_adjustment_number(db: Session) -> str:
-    """Generate a unique adjustment number in format ADJ-YYYYMMDD-XXXX"""
+    """Generate a unique adjustment number in format ADJYYYYMMDD-XXXX"""
     today = date.today()
     prefix = f"ADJ{today.strftime('%Y%m%d')}"
-    
-    # Find existing adjustments with same prefix
-    existing = db.query(StockAdjustment).filter(
-        StockAdjustment.adjustment_number.like(f"{prefix}%")
-    ).all()
-    
-    if existing:
-        # Extract sequence numbers
-        seq_numbers = []
-        for adj in existing:
-            try:
-                seq = int(adj.adjustment_number.split("-")[-1])
-                seq_numbers.append(seq)
-            except (ValueError, IndexError):
-                continue
-        
-        next_seq = max(seq_numbers) + 1 if seq_numbers else 1
-    else:
-        next_seq = 1
-    
-    return f"{prefix}-{next_seq:04d}"
+    seq = SequenceService.next_value(
+        db, f"adjustment:{today:%Y%m%d}", seed=max_suffix(StockAdjustment.adjustment_number, f"{prefix}-"),
+    )
+    return f"{prefix}-{seq:04d}"
 
 @router.get("/", response_model=List[StockAdjustmentSchema])
 def get_stock_adjustments(
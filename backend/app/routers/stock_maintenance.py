@@ -5,6 +5,7 @@ from typing import List, Optional
 from datetime import date
 from decimal import Decimal
 from app.database import get_db
+from app.read_replica import get_read_db
 from app.models import StockLedger, Product, ProductItemStock, ProductItemStockDetail, Depot, Employee
 from app.core.deps import require_auth
 from app.core.depot_scope import apply_depot_id_filter, coerce_depot_id_param
@@ -15,7 +16,7 @@ router = APIRouter()
 def get_stock_ledger(
     skip: int = 0,
     limit: int = 10000,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: Employee = Depends(require_auth),
 ):
     """
@@ -249,3 +250,31 @@ def get_product_current_stock(
         "unit": unit
     }
 
+
+
+@router.post("/fefo-index/rebuild")
+def rebuild_fefo_index(
+    db: Session = Depends(get_db),
+    user: Employee = Depends(require_auth),
+):
+    """
+    Reload the in-memory FEFO allocation index from product_item_stock_details.
+    """
+    from app.services.fefo_index import fefo_index
+
+    batches = fefo_index.rebuild(db)
+    return {"batches_indexed": batches}
+
+
+@router.get("/fefo-index/check")
+def check_fefo_index(
+    db: Session = Depends(get_db),
+    user: Employee = Depends(require_auth),
+):
+    """
+    Compare the FEFO allocation index with the database without changing either.
+    """
+    from app.services.fefo_index import fefo_index
+
+    mismatches = fefo_index.check_consistency(db)
+    return {"consistent": not mismatches, "mismatches": mismatches}
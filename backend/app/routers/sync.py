@@ -4,10 +4,11 @@ from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.deps import require_permission
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models import Employee
 from app.models_platform import SyncEvent, SyncQueue
 from app.services.sync_service import SyncService
@@ -44,13 +45,13 @@ def sync_push(
 
 
 @router.get("/pull")
-def sync_pull(
+async def sync_pull(
     source_system: str,
     since: Optional[datetime] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: Employee = Depends(require_permission("sync.read")),
 ):
-    events = SyncService.pull_events(db, user, source_system, since=since)
+    events = await db.run_sync(lambda session: SyncService.pull_events(session, user, source_system, since=since))
     return {"items": events}
 
 
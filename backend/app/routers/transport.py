@@ -1,20 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, joinedload
 from sqlalchemy import func, and_, or_
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 import io
-from haversine import haversine, Unit
 
 from app.database import get_db
+from app.read_replica import get_read_db
 from app.models import (
     Vehicle, Driver, Route, RouteStop, Trip, TransportExpense, Order, Employee
 )
 import app.models as models
 from app.core.deps import require_auth
 from app.core.depot_scope import apply_depot_id_filter, coerce_depot_id_param
+from app.services.master_data import master_data
+from app.services.route_geometry import RouteGeometryService
+from app.services.sequence_service import SequenceService, max_suffix
 from app.schemas import (
     VehicleCreate, VehicleUpdate, Vehicle as VehicleSchema,
     DriverCreate, DriverUpdate, Driver as DriverSchema,
@@ -199,6 +202,8 @@ def create_route_stop(route_id: int, stop: RouteStopCreate, db: Session = Depend
     stop_data["route_id"] = route_id
     db_stop = RouteStop(**stop_data)
     db.add(db_stop)
+    db.flush()
+    RouteGeometryService.stop_added(db, db_stop)
     db.commit()
     db.refresh(db_stop)
     return db_stop
@@ -210,6 +215,7 @@ def delete_route_stop(stop_id: int, db: Session = Depends(get_db)):
     if not db_stop:
         raise HTTPException(status_code=404, detail="Route stop not found")
     
+    RouteGeometryService.stop_removed(db, db_stop)
     db.delete(db_stop)
     db.commit()
     return {"message": "Route stop deleted successfully"}
@@ -218,26 +224,8 @@ def delete_route_stop(stop_id: int, db: Session = Depends(get_db)):
 # ============ Distance Calculation ============
 
 def calculate_route_distance(route_id: int, db: Session) -> float:
-    """Calculate total distance of a route using Haversine formula"""
-    stops = db.query(RouteStop).filter(
-        RouteStop.route_id == route_id
-    ).order_by(RouteStop.stop_sequence).all()
-    
-    if len(stops) < 2:
-        return 0.0
-    
-    total_distance = 0.0
-    for i in range(len(stops) - 1):
-        stop1 = stops[i]
-        stop2 = stops[i + 1]
-        
-        if stop1.latitude and stop1.longitude and stop2.latitude and stop2.longitude:
-            point1 = (float(stop1.latitude), float(stop1.longitude))
-            point2 = (float(stop2.latitude), float(stop2.longitude))
-            distance_km = haversine(point1, point2, unit=Unit.KILOMETERS)
-            total_distance += distance_km
-    
-    return round(total_distance, 2)
+    """Total distance of a route, from the stored stop legs"""
+    return RouteGeometryService.distance(db, route_id)
 
 
 @router.get("/routes/{route_id}/distance")
@@ -248,24 +236,26 @@ def get_route_distance(route_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Route not found")
     
     distance = calculate_route_distance(route_id, db)
-    return {"route_id": route_id, "route_name": route.name, "distance_km": distance}
+    cumulative = RouteGeometryService.cumulative(db, route_id)
+    db.commit()
+    return {"route_id": route_id, "route_name": route.name, "distance_km": distance, "cumulative_km": cumulative}
+
+
+@router.post("/routes/recompute-distances")
+def recompute_route_distances(db: Session = Depends(get_db)):
+    """Rebuild the stored stop legs and distances of every route"""
+    totals = RouteGeometryService.recompute(db)
+    db.commit()
+    return {"routes": len(totals), "distance_km": {route_id: round(km, 2) for route_id, km in totals.items()}}
 
 
 # ============ Trip Management ============
 
 def generate_trip_number(db: Session) -> str:
-    """Generate unique trip number"""
-    today = date.today()
-    year = today.strftime("%Y")
-    month = today.strftime("%m")
-    
-    # Get count of trips today
-    count = db.query(func.count(Trip.id)).filter(
-        func.date(Trip.created_at) == today
-    ).scalar() or 0
-    
-    trip_number = f"TRP-{year}{month}-{str(count + 1).zfill(4)}"
-    return trip_number
+    """Generate unique trip number, TRP-YYYYMM-XXXX numbered per month"""
+    month = date.today().strftime("%Y%m")
+    seq = SequenceService.next_value(db, f"trip:{month}", seed=max_suffix(Trip.trip_number, f"TRP-{month}-"))
+    return f"TRP-{month}-{seq:04d}"
 
 @router.post("/trips/backfill-from-orders")
 def backfill_trips_from_orders(db: Session = Depends(get_db)):
@@ -301,7 +291,7 @@ def backfill_trips_from_orders(db: Session = Depends(get_db)):
             # Find route by route_code
             route = None
             if order.route_code:
-                route = db.query(Route).filter(Route.route_id == order.route_code).first()
+                route = master_data.get(db, "route", order.route_code)
             
             # Find driver - try to match by employee name
             driver = None
@@ -385,7 +375,90 @@ def backfill_trips_from_orders(db: Session = Depends(get_db)):
         "errors": error_count
     }
 
-@router.get("/trips", response_model=List[TripWithDetails])
+# Nested objects and aggregates a trip listing can include (``fields=``)
+TRIP_DETAILS = ("vehicle", "driver", "route", "order", "total_expenses")
+
+
+def _trip_details(fields: Optional[str]) -> Set[str]:
+    if fields is None:
+        return set(TRIP_DETAILS)
+    details = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = details - set(TRIP_DETAILS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return details
+
+
+def _trip_loaders(details: Set[str], vehicle_joined: bool = False) -> list:
+    """Eager loads for the requested details: one joined query, whatever the page size."""
+    options = []
+    if "vehicle" in details:
+        options.append(contains_eager(Trip.vehicle) if vehicle_joined else joinedload(Trip.vehicle))
+    if "driver" in details:
+        options.append(joinedload(Trip.driver))
+    if "route" in details:
+        options.append(joinedload(Trip.route).load_only(Route.id, Route.name, Route.route_id))
+    if "order" in details:
+        options.append(joinedload(Trip.order).load_only(
+            Order.id, Order.memo_number, Order.loading_number, Order.customer_name, Order.route_code, Order.route_name,
+        ))
+    return options
+
+
+def _expense_totals(db: Session, trip_ids: List[int]) -> Dict[int, Decimal]:
+    if not trip_ids:
+        return {}
+    return dict(
+        db.query(TransportExpense.trip_id, func.sum(TransportExpense.amount))
+        .filter(TransportExpense.trip_id.in_(trip_ids))
+        .group_by(TransportExpense.trip_id)
+        .all()
+    )
+
+
+def _trip_with_details(trip: Trip, details: Set[str], totals: Dict[int, Decimal]) -> dict:
+    trip_dict = {
+        "id": trip.id,
+        "trip_number": trip.trip_number,
+        "delivery_id": trip.delivery_id,
+        "vehicle_id": trip.vehicle_id,
+        "driver_id": trip.driver_id,
+        "route_id": trip.route_id,
+        "trip_date": trip.trip_date,
+        "distance_km": float(trip.distance_km) if trip.distance_km else None,
+        "estimated_fuel_cost": float(trip.estimated_fuel_cost) if trip.estimated_fuel_cost else None,
+        "actual_fuel_cost": float(trip.actual_fuel_cost) if trip.actual_fuel_cost else None,
+        "status": trip.status,
+        "start_time": trip.start_time,
+        "end_time": trip.end_time,
+        "notes": trip.notes,
+        "created_at": trip.created_at,
+        "updated_at": trip.updated_at,
+    }
+    if "vehicle" in details:
+        trip_dict["vehicle"] = VehicleSchema.model_validate(trip.vehicle) if trip.vehicle else None
+    if "driver" in details:
+        trip_dict["driver"] = DriverSchema.model_validate(trip.driver) if trip.driver else None
+    if "route" in details:
+        route = trip.route
+        trip_dict["route"] = {"id": route.id, "name": route.name, "route_id": route.route_id} if route else None
+        trip_dict["route_name"] = route.name if route else None
+    if "order" in details:
+        order = trip.order
+        trip_dict["order"] = {
+            "id": order.id,
+            "memo_number": order.memo_number,
+            "loading_number": order.loading_number,
+            "customer_name": order.customer_name,
+            "route_code": order.route_code,
+            "route_name": order.route_name,
+        } if order else None
+    if "total_expenses" in details:
+        trip_dict["total_expenses"] = float(totals.get(trip.id) or 0)
+    return trip_dict
+
+
+@router.get("/trips", response_model=List[TripWithDetails], response_model_exclude_unset=True)
 def get_trips(
     skip: int = 0,
     limit: int = 100,
@@ -395,10 +468,12 @@ def get_trips(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     status: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of: " + ", ".join(TRIP_DETAILS)),
     db: Session = Depends(get_db),
     user: Employee = Depends(require_auth),
 ):
     """Get all trips with optional filters"""
+    details = _trip_details(fields)
     query = db.query(Trip).join(Vehicle, Trip.vehicle_id == Vehicle.id)
     query = apply_depot_id_filter(query, user, Vehicle.depot_id)
     
@@ -415,123 +490,25 @@ def get_trips(
     if status:
         query = query.filter(Trip.status == status)
     
-    trips = query.order_by(Trip.trip_date.desc()).offset(skip).limit(limit).all()
-    
-    result = []
-    for trip in trips:
-        vehicle = db.query(Vehicle).filter(Vehicle.id == trip.vehicle_id).first()
-        driver = db.query(Driver).filter(Driver.id == trip.driver_id).first()
-        
-        # Calculate total expenses
-        total_expenses = db.query(func.sum(TransportExpense.amount)).filter(
-            TransportExpense.trip_id == trip.id
-        ).scalar() or 0
-        
-        # Get route
-        route = db.query(Route).filter(Route.id == trip.route_id).first()
-        
-        # Get order details if delivery_id exists
-        order = None
-        if trip.delivery_id:
-            order = db.query(Order).filter(Order.id == trip.delivery_id).first()
-        
-        trip_dict = {
-            "id": trip.id,
-            "trip_number": trip.trip_number,
-            "delivery_id": trip.delivery_id,
-            "vehicle_id": trip.vehicle_id,
-            "driver_id": trip.driver_id,
-            "route_id": trip.route_id,
-            "trip_date": trip.trip_date,
-            "distance_km": float(trip.distance_km) if trip.distance_km else None,
-            "estimated_fuel_cost": float(trip.estimated_fuel_cost) if trip.estimated_fuel_cost else None,
-            "actual_fuel_cost": float(trip.actual_fuel_cost) if trip.actual_fuel_cost else None,
-            "status": trip.status,
-            "start_time": trip.start_time,
-            "end_time": trip.end_time,
-            "notes": trip.notes,
-            "created_at": trip.created_at,
-            "updated_at": trip.updated_at,
-            "vehicle": VehicleSchema.model_validate(vehicle) if vehicle else None,
-            "driver": DriverSchema.model_validate(driver) if driver else None,
-            "route": {
-                "id": route.id,
-                "name": route.name,
-                "route_id": route.route_id
-            } if route else None,
-            "route_name": route.name if route else None,
-            "order": {
-                "id": order.id,
-                "memo_number": order.memo_number,
-                "loading_number": order.loading_number,
-                "customer_name": order.customer_name,
-                "route_code": order.route_code,
-                "route_name": order.route_name,
-            } if order else None,
-            "total_expenses": float(total_expenses),
-        }
-        
-        result.append(TripWithDetails(**trip_dict))
-    
-    return result
+    trips = (
+        query.options(*_trip_loaders(details, vehicle_joined=True))
+        .order_by(Trip.trip_date.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    totals = _expense_totals(db, [trip.id for trip in trips]) if "total_expenses" in details else {}
+    return [_trip_with_details(trip, details, totals) for trip in trips]
 
-@router.get("/trips/{trip_id}", response_model=TripWithDetails)
-def get_trip(trip_id: int, db: Session = Depends(get_db)):
+@router.get("/trips/{trip_id}", response_model=TripWithDetails, response_model_exclude_unset=True)
+def get_trip(trip_id: int, fields: Optional[str] = None, db: Session = Depends(get_db)):
     """Get a specific trip with details"""
-    trip = db.query(Trip).filter(Trip.id == trip_id).first()
+    details = _trip_details(fields)
+    trip = db.query(Trip).options(*_trip_loaders(details)).filter(Trip.id == trip_id).first()
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
-    
-    vehicle = db.query(Vehicle).filter(Vehicle.id == trip.vehicle_id).first()
-    driver = db.query(Driver).filter(Driver.id == trip.driver_id).first()
-    route = db.query(Route).filter(Route.id == trip.route_id).first()
-    
-    # Get order details if delivery_id exists
-    order = None
-    if trip.delivery_id:
-        order = db.query(Order).filter(Order.id == trip.delivery_id).first()
-    
-    total_expenses = db.query(func.sum(TransportExpense.amount)).filter(
-        TransportExpense.trip_id == trip.id
-    ).scalar() or 0
-    
-    trip_dict = {
-        "id": trip.id,
-        "trip_number": trip.trip_number,
-        "delivery_id": trip.delivery_id,
-        "vehicle_id": trip.vehicle_id,
-        "driver_id": trip.driver_id,
-        "route_id": trip.route_id,
-        "trip_date": trip.trip_date,
-        "distance_km": float(trip.distance_km) if trip.distance_km else None,
-        "estimated_fuel_cost": float(trip.estimated_fuel_cost) if trip.estimated_fuel_cost else None,
-        "actual_fuel_cost": float(trip.actual_fuel_cost) if trip.actual_fuel_cost else None,
-        "status": trip.status,
-        "start_time": trip.start_time,
-        "end_time": trip.end_time,
-        "notes": trip.notes,
-        "created_at": trip.created_at,
-        "updated_at": trip.updated_at,
-        "vehicle": VehicleSchema.model_validate(vehicle) if vehicle else None,
-        "driver": DriverSchema.model_validate(driver) if driver else None,
-        "route": {
-            "id": route.id,
-            "name": route.name,
-            "route_id": route.route_id
-        } if route else None,
-        "route_name": route.name if route else None,
-        "order": {
-            "id": order.id,
-            "memo_number": order.memo_number,
-            "loading_number": order.loading_number,
-            "customer_name": order.customer_name,
-            "route_code": order.route_code,
-            "route_name": order.route_name,
-        } if order else None,
-        "total_expenses": float(total_expenses),
-    }
-    
-    return TripWithDetails(**trip_dict)
+    totals = _expense_totals(db, [trip.id]) if "total_expenses" in details else {}
+    return _trip_with_details(trip, details, totals)
 
 @router.post("/trips/assign", response_model=TripAssignmentResponse)
 def assign_trip(assignment: TripAssignmentRequest, db: Session = Depends(get_db)):
@@ -744,7 +721,7 @@ def get_transport_report(
     vehicle_id: Optional[int] = None,
     driver_id: Optional[int] = None,
     route_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get transport report with analytics"""
     query = db.query(Trip)
@@ -897,34 +874,26 @@ def get_transport_report(
 
 # ============ PDF Report Generation ============
 
+def _trip_filters(start_date: Optional[date], end_date: Optional[date]) -> list:
+    filters = []
+    if start_date:
+        filters.append(Trip.trip_date >= start_date)
+    if end_date:
+        filters.append(Trip.trip_date <= end_date)
+    return filters
+
+
 @router.get("/reports/vehicle-expenses")
 def get_vehicle_expense_report(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     vehicle_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get expense report grouped by vehicle"""
-    from sqlalchemy import func
-    
-    # Get trips with filters
-    query = db.query(Trip)
-    if start_date:
-        query = query.filter(Trip.trip_date >= start_date)
-    if end_date:
-        query = query.filter(Trip.trip_date <= end_date)
+    filters = _trip_filters(start_date, end_date)
     if vehicle_id:
-        query = query.filter(Trip.vehicle_id == vehicle_id)
-    
-    trips = query.all()
-    trip_numbers = [trip.trip_number for trip in trips if trip.trip_number]
-    
-    if not trip_numbers:
-        return {
-            "vehicles": [],
-            "total_expenses": 0,
-            "summary": {}
-        }
+        filters.append(Trip.vehicle_id == vehicle_id)
     
     # Get expenses by vehicle
     expenses_by_vehicle = db.query(
@@ -938,9 +907,7 @@ def get_vehicle_expense_report(
         func.count(func.distinct(TransportExpense.trip_number)).label("trip_count")
     ).join(Trip, Vehicle.id == Trip.vehicle_id).join(
         TransportExpense, TransportExpense.trip_number == Trip.trip_number
-    ).filter(
-        TransportExpense.trip_number.in_(trip_numbers)
-    ).group_by(
+    ).filter(*filters).group_by(
         Vehicle.id, Vehicle.vehicle_id, Vehicle.registration_number, Vehicle.model, Vehicle.vehicle_type
     ).all()
     
@@ -957,6 +924,13 @@ def get_vehicle_expense_report(
         for v in expenses_by_vehicle
     ]
     
+    if not vehicles_list:
+        return {
+            "vehicles": [],
+            "total_expenses": 0,
+            "summary": {}
+        }
+    
     total_expenses = sum(v["total_expenses"] for v in vehicles_list)
     
     return {
@@ -974,29 +948,12 @@ def get_driver_expense_report(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     driver_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get expense report grouped by driver"""
-    from sqlalchemy import func
-    
-    # Get trips with filters
-    query = db.query(Trip)
-    if start_date:
-        query = query.filter(Trip.trip_date >= start_date)
-    if end_date:
-        query = query.filter(Trip.trip_date <= end_date)
+    filters = _trip_filters(start_date, end_date)
     if driver_id:
-        query = query.filter(Trip.driver_id == driver_id)
-    
-    trips = query.all()
-    trip_numbers = [trip.trip_number for trip in trips if trip.trip_number]
-    
-    if not trip_numbers:
-        return {
-            "drivers": [],
-            "total_expenses": 0,
-            "summary": {}
-        }
+        filters.append(Trip.driver_id == driver_id)
     
     # Get expenses by driver
     expenses_by_driver = db.query(
@@ -1010,9 +967,7 @@ def get_driver_expense_report(
         func.count(func.distinct(TransportExpense.trip_number)).label("trip_count")
     ).join(Trip, Driver.id == Trip.driver_id).join(
         TransportExpense, TransportExpense.trip_number == Trip.trip_number
-    ).filter(
-        TransportExpense.trip_number.in_(trip_numbers)
-    ).group_by(
+    ).filter(*filters).group_by(
         Driver.id, Driver.driver_id, Driver.first_name, Driver.last_name, Driver.license_number
     ).all()
     
@@ -1028,6 +983,13 @@ def get_driver_expense_report(
         for d in expenses_by_driver
     ]
     
+    if not drivers_list:
+        return {
+            "drivers": [],
+            "total_expenses": 0,
+            "summary": {}
+        }
+    
     total_expenses = sum(d["total_expenses"] for d in drivers_list)
     
     return {
@@ -1048,7 +1010,7 @@ def generate_pdf_report(
     driver_id: Optional[int] = None,
     route_id: Optional[int] = None,
     report_type: Optional[str] = None,  # general, vehicle, driver
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Generate PDF report for transport expenses"""
     if not report_type:
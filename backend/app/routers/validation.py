@@ -3,7 +3,7 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from app.core.deps import require_auth, require_permission, require_role
 from app.database import get_db
@@ -52,13 +52,21 @@ def batch_validate(
     db: Session = Depends(get_db),
     user: Employee = Depends(require_permission("orders.validate")),
 ):
+    orders = (
+        db.query(Order)
+        .options(selectinload(Order.items))
+        .filter(Order.id.in_(payload.order_ids))
+        .all()
+    )
+    by_id = {o.id: o for o in orders}
+    found = [by_id[oid] for oid in dict.fromkeys(payload.order_ids) if oid in by_id]
+    runs = {run.order_id: run for run in OrderValidationService.validate_orders_batch(db, found, user)}
     results = []
     for oid in payload.order_ids:
-        order = db.query(Order).options(joinedload(Order.items)).filter(Order.id == oid).first()
-        if not order:
+        run = runs.get(oid)
+        if not run:
             results.append({"order_id": oid, "error": "not found"})
             continue
-        run = OrderValidationService.validate_order(db, order, user)
         results.append({"order_id": oid, "validation_run_id": run.id, "status": run.validation_status.value})
     return {"results": results}
 
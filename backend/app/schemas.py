@@ -692,6 +692,7 @@ class RouteWiseOrderResponse(BaseModel):
 class RouteWisePrintRequest(BaseModel):
     order_ids: List[int]
     route_code: Optional[str] = None
+    background: bool = False  # Render as a background job and return its id
 
 
 class RouteWiseValidateRequest(BaseModel):
@@ -711,6 +712,34 @@ class BarcodeAssignRequest(BaseModel):
     vehicle_id: int
 
 
+class ScanSessionCreate(BaseModel):
+    employee_id: int
+    vehicle_id: int
+
+
+class ScanRequest(BaseModel):
+    memo_numbers: List[str]  # one scan, or a burst buffered by the scanner
+
+
+class ScanResult(BaseModel):
+    memo_number: str
+    result: str  # accepted, duplicate, not_found, assigned, removed
+    order_id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class ScanSessionResponse(BaseModel):
+    session_id: str
+    status: str
+    employee_id: int
+    vehicle_id: int
+    memo_numbers: List[str]
+    scanned_count: int
+    expires_at: datetime
+    loading_number: Optional[str] = None
+    results: List[ScanResult] = []  # feedback for the memos of this request
+
+
 class AssignedOrderResponse(BaseModel):
     id: int
     order_id: int
@@ -1278,6 +1307,7 @@ class DeliveryApprovalMemo(BaseModel):
 class DeliveryApprovalRequest(BaseModel):
     loading_number: str
     memos: List[DeliveryApprovalMemo]
+    idempotency_key: Optional[str] = None  # same key on retry returns the first result
 
 
 class DeliveryApprovalResponse(BaseModel):
@@ -1285,6 +1315,7 @@ class DeliveryApprovalResponse(BaseModel):
     loading_number: str
     approved_count: int
     orders_moved_to_collection: List[str]  # List of memo numbers
+    replayed: bool = False  # answered from an earlier request with the same idempotency key
 
 
 class CollectionMemoUpdate(BaseModel):
@@ -1505,6 +1536,8 @@ class TripWithDetails(Trip):
     vehicle: Optional[Vehicle] = None
     driver: Optional[Driver] = None
     route: Optional[dict] = None
+    route_name: Optional[str] = None
+    order: Optional[dict] = None  # the delivery: memo, loading number, customer, route
     total_expenses: Optional[float] = None
     
     class Config:
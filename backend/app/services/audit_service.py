@@ -2,7 +2,7 @@
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 
 from sqlalchemy.orm import Session
 
@@ -28,7 +28,50 @@ def _serialize(value: Any) -> Any:
     return value
 
 
+def actor_fields(user: Optional[Employee]) -> Dict[str, Any]:
+    """The user columns of an audit row, captured while ``user`` is still loaded."""
+    if user is None:
+        return {}
+    return {
+        "user_id": user.id,
+        "user_name": f"{user.first_name} {user.last_name or ''}".strip(),
+        "role_id": user.role,
+        "role_name": user.role,
+        "depot_id": user.depot_id,
+    }
+
+
 class AuditService:
+    @staticmethod
+    def entry_values(
+        *,
+        entity_type: str,
+        entity_id: str,
+        action: str,
+        actor: Optional[Dict[str, Any]] = None,
+        old_value: Any = None,
+        new_value: Any = None,
+        depot_id: Optional[int] = None,
+        transaction_id: Optional[str] = None,
+        **columns: Any,
+    ) -> Dict[str, Any]:
+        """Column values of one ``AuditLog`` row; ``actor`` comes from ``actor_fields``."""
+        actor = actor or {}
+        return {
+            **columns,
+            "transaction_id": transaction_id or str(uuid.uuid4()),
+            "entity_type": entity_type,
+            "entity_id": str(entity_id),
+            "action": action,
+            "old_value": _serialize(old_value),
+            "new_value": _serialize(new_value),
+            "user_id": actor.get("user_id"),
+            "user_name": actor.get("user_name"),
+            "role_id": actor.get("role_id"),
+            "role_name": actor.get("role_name"),
+            "depot_id": depot_id or actor.get("depot_id"),
+        }
+
     @staticmethod
     def log_action(
         db: Session,
@@ -51,18 +94,14 @@ class AuditService:
         attachment_url: Optional[str] = None,
         transaction_id: Optional[str] = None,
     ) -> AuditLog:
-        entry = AuditLog(
-            transaction_id=transaction_id or str(uuid.uuid4()),
+        entry = AuditLog(**AuditService.entry_values(
             entity_type=entity_type,
-            entity_id=str(entity_id),
+            entity_id=entity_id,
             action=action,
-            old_value=_serialize(old_value),
-            new_value=_serialize(new_value),
-            user_id=user.id if user else None,
-            user_name=f"{user.first_name} {user.last_name or ''}".strip() if user else None,
-            role_id=user.role if user else None,
-            role_name=user.role if user else None,
-            depot_id=depot_id or (user.depot_id if user else None),
+            actor=actor_fields(user),
+            old_value=old_value,
+            new_value=new_value,
+            depot_id=depot_id,
             depot_code=depot_code,
             device_id=device_id,
             ip_address=ip_address,
@@ -72,7 +111,8 @@ class AuditService:
             reason=reason,
             remarks=remarks,
             attachment_url=attachment_url,
-        )
+            transaction_id=transaction_id,
+        ))
         db.add(entry)
         return entry
 
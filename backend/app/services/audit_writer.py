@@ -0,0 +1,165 @@
+"""Batched audit writer for the HTTP audit middleware.
+
+Requests put their audit row on a bounded in-process queue and return; one
+task drains the queue and inserts up to ``AUDIT_BATCH_SIZE`` rows per
+statement, at least every ``AUDIT_FLUSH_INTERVAL_SECONDS``. When the queue
+is full a request waits up to ``AUDIT_ENQUEUE_TIMEOUT_SECONDS`` for room and
+then writes its own row, so memory stays bounded and no row is dropped.
+Rows still queued at shutdown are flushed by ``stop()`` from the lifespan.
+
+Audit rows that must commit with business data keep using
+``AuditService.log_action`` on the request session.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.models import Employee
+from app.models_platform import AuditLog
+from app.services.audit_service import actor_fields
+
+logger = logging.getLogger(__name__)
+
+# Set on rows whose user is known only by token subject; resolved per batch.
+USER_EMAIL_KEY = "_user_email"
+
+
+class AuditWriter:
+    def __init__(
+        self,
+        session_factory: Callable = SessionLocal,
+        max_queue: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        enqueue_timeout: Optional[float] = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.max_queue = max_queue or int(os.getenv("AUDIT_QUEUE_MAX", "10000"))
+        self.batch_size = batch_size or int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1"))
+        )
+        self.enqueue_timeout = (
+            enqueue_timeout if enqueue_timeout is not None else float(os.getenv("AUDIT_ENQUEUE_TIMEOUT_SECONDS", "0.5"))
+        )
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.overflow_writes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the flush task on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything queued, then stop. Later rows are written directly."""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    async def submit(self, values: Dict[str, Any]) -> None:
+        """Queue one row of ``AuditService.entry_values``; waits briefly when the queue is full."""
+        values.setdefault("created_at", datetime.utcnow())
+        if self.running:
+            try:
+                await asyncio.wait_for(self._queue.put(values), self.enqueue_timeout)
+                return
+            except asyncio.TimeoutError:
+                self.overflow_writes += 1
+                logger.warning("Audit queue full (%s rows); writing inline", self._queue.qsize())
+        await run_in_threadpool(self.write_batch, [values])
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            batch: List[Dict[str, Any]] = []
+            if first is None:
+                stopping = True
+            else:
+                batch.append(first)
+                deadline = loop.time() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        if self._queue.empty():
+                            row = await asyncio.wait_for(self._queue.get(), max(0.0, deadline - loop.time()))
+                        else:
+                            row = self._queue.get_nowait()
+                    except asyncio.TimeoutError:
+                        break
+                    if row is None:
+                        stopping = True
+                        break
+                    batch.append(row)
+            if stopping:
+                while not self._queue.empty():
+                    row = self._queue.get_nowait()
+                    if row is not None:
+                        batch.append(row)
+            for start in range(0, len(batch), self.batch_size):
+                await run_in_threadpool(self.write_batch, batch[start:start + self.batch_size])
+
+    def write_batch(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert ``rows`` in one multi-row INSERT. Failures are logged, not raised.
+
+        If the INSERT fails, the rows are retried one by one so that only the
+        failing rows are lost.
+        """
+        if not rows:
+            return
+        db = self.session_factory()
+        try:
+            emails = {row[USER_EMAIL_KEY] for row in rows if row.get(USER_EMAIL_KEY)}
+            users = {}
+            if emails:
+                users = {
+                    user.email: user
+                    for user in db.query(
+                        Employee.email, Employee.id, Employee.first_name, Employee.last_name,
+                        Employee.role, Employee.depot_id,
+                    ).filter(Employee.email.in_(emails))
+                }
+            # One statement needs the same columns on every row
+            columns = set().union(*rows) - {USER_EMAIL_KEY}
+            values = []
+            for row in rows:
+                value = {column: row.get(column) for column in columns}
+                user = users.get(row.get(USER_EMAIL_KEY))
+                if user is not None:
+                    value.update(actor_fields(user))
+                    value["depot_id"] = row.get("depot_id") or user.depot_id
+                values.append(value)
+            db.execute(insert(AuditLog), values)
+            db.commit()
+            self.written += len(values)
+            return
+        except Exception as exc:
+            db.rollback()
+            if len(rows) == 1:
+                logger.warning("Audit row failed: %s (%s)", exc, rows[0])
+                return
+            logger.warning("Audit batch of %s rows failed, retrying row by row: %s", len(rows), exc)
+        finally:
+            db.close()
+        for row in rows:
+            self.write_batch([row])
+
+
+audit_writer = AuditWriter()
@@ -0,0 +1,46 @@
+"""Cache tags for catalogue lists, dropped when rows behind them commit.
+
+Catalogue handlers are cached with ``cached(..., tags=(<tag>,))``; the
+session hooks below invalidate the tag of every catalogue model written in
+a transaction once it commits.
+"""
+from typing import Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import Customer, Depot, PriceSetup, Product, Route
+from app.redis_cache import cache
+
+DIRTY_KEY = "catalog_dirty_tags"
+
+CATALOG_TAGS = {
+    Product: "products",
+    Customer: "customers",
+    Route: "routes",
+    Depot: "depots",
+    PriceSetup: "price_setups",
+}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_catalog_writes(session: Session, flush_context) -> None:
+    touched: Set[str] = set()
+    for obj in session.new | session.dirty | session.deleted:
+        tag = CATALOG_TAGS.get(type(obj))
+        if tag:
+            touched.add(tag)
+    if touched:
+        session.info.setdefault(DIRTY_KEY, set()).update(touched)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    touched = session.info.pop(DIRTY_KEY, None)
+    if touched:
+        cache.invalidate_tags(*sorted(touched))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_writes(session: Session) -> None:
+    session.info.pop(DIRTY_KEY, None)
@@ -0,0 +1,382 @@
+"""Dashboard KPIs materialized per depot in ``dashboard_kpis``.
+
+Each depot code has one counters row (``""`` for orders without a depot) and
+the all-depots view is their sum; the ``*`` row holds the stock total and
+marks the store as built. Order and stock ledger writes become deltas when
+flushed; once the transaction commits they are applied with one upsert in a
+short transaction of their own (session hooks below), so the counter rows
+are never locked for the length of a business transaction and a rollback
+leaves them untouched. Orders whose previous values were never loaded get
+their depot recounted, also after the commit. A crash between the two
+commits loses the deltas until the reconciler runs.
+
+``rebuild`` recounts with one ``COUNT(*) FILTER (WHERE ...)`` query grouped
+by depot; the first read runs it when the ``*`` row is missing. Writes that
+bypass the ORM (bulk ``UPDATE``, manual SQL) are invisible to the hooks, so
+``kpi_reconciler`` recounts every ``DASHBOARD_KPI_RECONCILE_SECONDS``, logs
+any drift and corrects it.
+"""
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from contextlib import suppress
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, delete, event, func, inspect, or_, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import NO_VALUE
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal, dialect_insert
+from app.models import Order, StockLedger
+from app.models_platform import DashboardKpi
+
+logger = logging.getLogger(__name__)
+
+DELTA_KEY = "dashboard_kpi_deltas"
+RECOUNT_KEY = "dashboard_kpi_recount"
+CONNECTION_KEY = "dashboard_kpi_connection"
+ALL_DEPOTS = "*"
+NO_DEPOT = ""
+
+# Shared per depot scope by the dashboard router; counters are live, so this only absorbs bursts.
+KPI_CACHE_SECONDS = int(os.getenv("DASHBOARD_KPI_CACHE_SECONDS", "30"))
+
+# Counter -> condition on orders. ``_order_counters`` applies the same tests to one order.
+KPI_CONDITIONS = {
+    "pending_validation": and_(Order.validated.is_(False), Order.route_code.isnot(None), Order.route_code != ""),
+    "validated": and_(Order.validated.is_(True), or_(Order.loaded.is_(False), Order.loaded.is_(None))),
+    "assigned": and_(Order.loaded.is_(True), Order.loading_number.isnot(None)),
+    "fully_delivered": Order.collection_status == "Fully Collected",
+    "partially_delivered": Order.collection_status == "Partially Collected",
+    "postponed": Order.collection_status == "Postponed",
+    "pending_collection": and_(Order.collection_status == "Pending", Order.collection_approved.is_(False)),
+}
+COUNTERS = (*KPI_CONDITIONS, "orders_today")
+ORDER_FIELDS = (
+    "depot_code", "created_at", "validated", "loaded", "loading_number",
+    "route_code", "collection_status", "collection_approved",
+)
+STOCK_FIELDS = ("quantity",)
+
+Scopes = Dict[str, Dict[str, int]]
+
+
+def _order_counters(values: dict, today: date) -> Dict[str, int]:
+    validated, loaded = values["validated"], values["loaded"]
+    status, approved = values["collection_status"], values["collection_approved"]
+    created = values["created_at"]
+    return {
+        "pending_validation": int(validated is not None and not validated and bool(values["route_code"])),
+        "validated": int(bool(validated) and not loaded),
+        "assigned": int(bool(loaded) and values["loading_number"] is not None),
+        "fully_delivered": int(status == "Fully Collected"),
+        "partially_delivered": int(status == "Partially Collected"),
+        "postponed": int(status == "Postponed"),
+        "pending_collection": int(status == "Pending" and approved is not None and not approved),
+        "orders_today": int(created is not None and created.date() == today),
+    }
+
+
+def _changed(session: Session, obj, fields: Iterable[str]) -> bool:
+    if obj in session.new or obj in session.deleted:
+        return True
+    committed = inspect(obj).committed_state
+    return any(field in committed for field in fields)
+
+
+def _values(obj, fields: Iterable[str], before: bool, new: bool = False) -> Optional[dict]:
+    """Column values of a flushed ``obj`` before or after the flush; None if one was never loaded.
+
+    Columns left unset on a new object were inserted as NULL (none of these has a server default).
+    """
+    state = inspect(obj)
+    values = {}
+    for field in fields:
+        if before and field in state.committed_state:
+            value = state.committed_state[field]
+        else:
+            value = state.dict.get(field, None if new else NO_VALUE)
+        if value is NO_VALUE:
+            return None
+        values[field] = value
+    return values
+
+
+def _before_after(session: Session, obj, fields: Iterable[str]) -> Tuple[Optional[dict], Optional[dict], bool]:
+    """(values before, values after, known) for a flushed object; new objects have no before."""
+    before = None if obj in session.new else _values(obj, fields, before=True)
+    after = None if obj in session.deleted else _values(obj, fields, before=False, new=obj in session.new)
+    known = (before is not None or obj in session.new) and (after is not None or obj in session.deleted)
+    return before, after, known
+
+
+def _quantity(values: Optional[dict]) -> Decimal:
+    value = values and values["quantity"]
+    return Decimal(str(value)) if value is not None else Decimal(0)
+
+
+def recount_on_commit(session: Session, depot_codes: Iterable[Optional[str]]) -> None:
+    """Recount these depots when ``session`` commits, after writes the hooks cannot see."""
+    session.info.setdefault(RECOUNT_KEY, set()).update(code or NO_DEPOT for code in depot_codes)
+    session.info.setdefault(CONNECTION_KEY, session.connection())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_kpi_deltas(session: Session, flush_context) -> None:
+    today = date.today()
+    deltas: Scopes = defaultdict(lambda: defaultdict(int))
+    recount: Set[str] = set()
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, Order) and _changed(session, obj, ORDER_FIELDS):
+            before, after, known = _before_after(session, obj, ORDER_FIELDS)
+            if not known:
+                depot_code = inspect(obj).dict.get("depot_code", NO_VALUE)
+                changed = "depot_code" in inspect(obj).committed_state
+                recount.add(ALL_DEPOTS if depot_code is NO_VALUE or changed else depot_code or NO_DEPOT)
+                continue
+            for values, sign in ((before, -1), (after, 1)):
+                if values is not None:
+                    scope = deltas[values["depot_code"] or NO_DEPOT]
+                    for name, value in _order_counters(values, today).items():
+                        scope[name] += sign * value
+        elif isinstance(obj, StockLedger) and _changed(session, obj, STOCK_FIELDS):
+            before, after, known = _before_after(session, obj, STOCK_FIELDS)
+            if not known:
+                recount.add(ALL_DEPOTS)
+                continue
+            deltas[ALL_DEPOTS]["total_stock"] += _quantity(after) - _quantity(before)
+    if deltas:
+        pending = session.info.setdefault(DELTA_KEY, defaultdict(lambda: defaultdict(int)))
+        for scope, counters in deltas.items():
+            for name, value in counters.items():
+                pending[scope][name] += value
+    if recount:
+        session.info.setdefault(RECOUNT_KEY, set()).update(recount)
+    if deltas or recount:
+        session.info.setdefault(CONNECTION_KEY, session.connection())
+
+
+def _apply_after_commit(session: Session) -> None:
+    connection = session.info.pop(CONNECTION_KEY, None)
+    deltas = session.info.pop(DELTA_KEY, None)
+    recount = session.info.pop(RECOUNT_KEY, None)
+    if connection is None or not (deltas or recount):
+        return
+    # The session still holds the connection it committed on; reusing it
+    # keeps a request to one pooled connection.
+    try:
+        with Session(bind=connection) as db, db.begin():
+            if recount:
+                # Recounts read the committed rows, so they already include this transaction's deltas
+                if ALL_DEPOTS in recount:
+                    DashboardKpiService.rebuild(db)
+                    return
+                DashboardKpiService.rebuild(db, recount)
+                deltas = {scope: counters for scope, counters in (deltas or {}).items() if scope not in recount}
+            if deltas:
+                DashboardKpiService.apply(db, deltas)
+    except Exception as exc:
+        logger.warning("Dashboard KPI update failed; the reconciler will correct it: %s", exc)
+
+
+# First in line, so the counter writes land before other after_commit hooks
+# (the replica pin) read the session's state.
+event.listen(Session, "after_commit", _apply_after_commit, insert=True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_kpi_deltas(session: Session) -> None:
+    session.info.pop(DELTA_KEY, None)
+    session.info.pop(RECOUNT_KEY, None)
+    session.info.pop(CONNECTION_KEY, None)
+
+
+def _upsert(db: Session, rows: list, set_: Callable) -> None:
+    insert = dialect_insert(db.get_bind().dialect.name)
+    stmt = insert(DashboardKpi.__table__).values(rows)
+    db.execute(stmt.on_conflict_do_update(index_elements=["scope"], set_=set_(stmt.excluded)))
+
+
+def _total_stock(db: Session) -> Decimal:
+    return Decimal(db.execute(select(func.coalesce(func.sum(StockLedger.quantity), 0))).scalar() or 0)
+
+
+def _store(db: Session, counts: Scopes, total_stock: Optional[Decimal] = None) -> None:
+    """Overwrite the rows for ``counts``; with ``total_stock`` also the ``*`` row, dropping depots no longer counted."""
+    now, today = datetime.utcnow(), date.today()
+    rows = [
+        {"scope": scope, "orders_date": today, "total_stock": 0, "rebuilt_at": now, "updated_at": now, **values}
+        for scope, values in counts.items()
+    ]
+    if total_stock is not None:
+        table = DashboardKpi.__table__
+        db.execute(delete(table).where(table.c.scope.notin_([*counts, ALL_DEPOTS])))
+        rows.append({
+            "scope": ALL_DEPOTS, "orders_date": today, "total_stock": total_stock, "rebuilt_at": now, "updated_at": now,
+            **dict.fromkeys(COUNTERS, 0),
+        })
+    if rows:
+        columns = [column for column in rows[0] if column != "scope"]
+        _upsert(db, rows, lambda excluded: {column: excluded[column] for column in columns})
+
+
+def _stored(row, name: str, today: date):
+    if row is None:
+        return 0
+    if name == "orders_today" and row.orders_date != today:
+        return 0
+    return getattr(row, name)
+
+
+class DashboardKpiService:
+    @staticmethod
+    def count(db: Session, scopes: Optional[Iterable[str]] = None) -> Scopes:
+        """Counters per depot scope from ``orders`` in one conditional-aggregate query."""
+        depot = func.coalesce(Order.depot_code, NO_DEPOT)
+        counters = [func.count().filter(condition).label(name) for name, condition in KPI_CONDITIONS.items()]
+        counters.append(func.count().filter(func.date(Order.created_at) == date.today()).label("orders_today"))
+        stmt = select(depot.label("scope"), *counters).group_by(depot)
+        counts: Scopes = {}
+        if scopes is not None:
+            scopes = list(scopes)
+            stmt = stmt.where(depot.in_(scopes))
+            counts = {scope: dict.fromkeys(COUNTERS, 0) for scope in scopes}
+        for row in db.execute(stmt).mappings():
+            counts[row["scope"]] = {name: row[name] for name in COUNTERS}
+        return counts
+
+    @staticmethod
+    def rebuild(db: Session, scopes: Optional[Iterable[str]] = None) -> Scopes:
+        """Recount ``scopes`` (every depot and the stock total when None) in the caller's transaction."""
+        counts = DashboardKpiService.count(db, scopes)
+        _store(db, counts, _total_stock(db) if scopes is None else None)
+        return counts
+
+    @staticmethod
+    def apply(db: Session, deltas: Scopes) -> None:
+        """Add ``deltas`` (scope -> counter -> change) to the stored counters in one upsert."""
+        now, today = datetime.utcnow(), date.today()
+        table = DashboardKpi.__table__
+        stock = deltas.get(ALL_DEPOTS, {}).get("total_stock")
+        if stock:
+            # Updated, never inserted: the ``*`` row only appears with a full rebuild
+            db.execute(
+                update(table).where(table.c.scope == ALL_DEPOTS)
+                .values(total_stock=table.c.total_stock + stock, updated_at=now)
+            )
+        rows = [
+            {
+                "scope": scope, "orders_date": today, "updated_at": now, "total_stock": 0,
+                **{name: counters.get(name, 0) for name in COUNTERS},
+            }
+            for scope, counters in sorted(deltas.items())
+            if scope != ALL_DEPOTS and any(counters.values())
+        ]
+        if not rows:
+            return
+
+        def added(excluded) -> dict:
+            values = {name: table.c[name] + excluded[name] for name in KPI_CONDITIONS}
+            # Today's count restarts on the first write of a new day
+            values["orders_today"] = case(
+                (table.c.orders_date == excluded.orders_date, table.c.orders_today + excluded.orders_today),
+                else_=excluded.orders_today,
+            )
+            values["orders_date"] = excluded.orders_date
+            values["updated_at"] = excluded.updated_at
+            return values
+
+        _upsert(db, rows, added)
+
+    @staticmethod
+    def kpis(db: Session, depot_code: Optional[str] = None) -> dict:
+        """Dashboard figures for ``depot_code`` (every depot when None); builds and commits the store on first use."""
+        table = DashboardKpi.__table__
+        stmt = select(table)
+        if depot_code is not None:
+            stmt = stmt.where(table.c.scope.in_([depot_code, ALL_DEPOTS]))
+        rows = {row.scope: row for row in db.execute(stmt)}
+        if ALL_DEPOTS not in rows:
+            DashboardKpiService.rebuild(db)
+            db.commit()
+            rows = {row.scope: row for row in db.execute(stmt)}
+        marker = rows.pop(ALL_DEPOTS)
+        today = date.today()
+        totals = {name: sum(_stored(row, name, today) for row in rows.values()) for name in COUNTERS}
+        return {
+            "total_stock": int(marker.total_stock or 0),
+            "orders_today": totals["orders_today"],
+            "validated_today": totals["validated"],
+            "assigned_today": totals["assigned"],
+            "order_management": {name: totals[name] for name in KPI_CONDITIONS},
+        }
+
+    @staticmethod
+    def reconcile(db: Session) -> Dict[str, Dict[str, tuple]]:
+        """Recount everything and correct the store; returns drift as scope -> counter -> (stored, actual)."""
+        stored = {row.scope: row for row in db.execute(select(DashboardKpi.__table__))}
+        counts = DashboardKpiService.count(db)
+        total_stock = _total_stock(db)
+        drift: Dict[str, Dict[str, tuple]] = {}
+        if ALL_DEPOTS in stored:
+            today = date.today()
+            expected = {**counts, ALL_DEPOTS: {**dict.fromkeys(COUNTERS, 0), "total_stock": total_stock}}
+            for scope in set(stored) | set(expected):
+                for name, actual in expected.get(scope, dict.fromkeys(COUNTERS, 0)).items():
+                    kept = _stored(stored.get(scope), name, today)
+                    if kept != actual:
+                        drift.setdefault(scope, {})[name] = (kept, actual)
+            if drift:
+                logger.warning("Dashboard KPI drift corrected: %s", drift)
+        _store(db, counts, total_stock)
+        return drift
+
+
+class KpiReconciler:
+    """Runs ``DashboardKpiService.reconcile`` every ``interval`` seconds from the lifespan; 0 disables it."""
+
+    def __init__(self, session_factory: Callable = SessionLocal, interval: Optional[float] = None) -> None:
+        self.session_factory = session_factory
+        self.interval = interval if interval is not None else float(os.getenv("DASHBOARD_KPI_RECONCILE_SECONDS", "900"))
+        self._task: Optional[asyncio.Task] = None
+        self.last_drift: Optional[dict] = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await run_in_threadpool(self.run_once)
+
+    def run_once(self) -> dict:
+        """One reconciliation in its own session. Failures are logged, not raised."""
+        db = self.session_factory()
+        try:
+            drift = DashboardKpiService.reconcile(db)
+            db.commit()
+            self.last_drift = drift
+            return drift
+        except Exception as exc:
+            db.rollback()
+            logger.warning("Dashboard KPI reconciliation failed: %s", exc)
+            return {}
+        finally:
+            db.close()
+
+
+kpi_reconciler = KpiReconciler()
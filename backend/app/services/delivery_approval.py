@@ -0,0 +1,121 @@
+"""Loading-group delivery approval (``POST /api/orders/assigned/approve-delivery``).
+
+Memos are matched to the orders of the loading by dictionary lookup. Amounts
+come from the stored order totals (``app.services.order_totals``), so no items
+are loaded, and all orders are written by one ``update_rows`` statement.
+
+A client ``idempotency_key`` is recorded in ``delivery_approvals`` in the same
+transaction. A retry with the same key gets the stored response back instead
+of approving the loading again; a concurrent duplicate waits on the unique key
+and then does the same.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.database import update_rows
+from app.models import Order
+from app.models_platform import DeliveryApproval
+from app.services.dashboard_kpis import recount_on_commit
+
+CENT = Decimal("0.01")
+
+
+def settle(total: Decimal, memo: schemas.DeliveryApprovalMemo, collection_type: Optional[str]) -> Dict[str, Any]:
+    """Collection columns of an order after delivering and returning the memo's quantities."""
+    if memo.returned_quantity == 0 and memo.delivered_quantity > 0:
+        # Fully delivered: waits in Approval for Collection
+        return {"collection_status": "Pending", "collection_type": collection_type,
+                "collected_amount": total, "pending_amount": Decimal("0")}
+    if memo.delivered_quantity == 0:
+        return {"collection_status": "Postponed", "collection_type": "Postponed",
+                "collected_amount": Decimal("0"), "pending_amount": total}
+    loading_qty = memo.delivered_quantity + memo.returned_quantity
+    collected = Decimal("0")
+    if loading_qty > 0:
+        # Collected in proportion to the delivered quantity
+        collected = (total * Decimal(memo.delivered_quantity) / Decimal(loading_qty)).quantize(CENT, ROUND_HALF_UP)
+    return {"collection_status": "Partially Collected", "collection_type": "Partial",
+            "collected_amount": collected, "pending_amount": total - collected}
+
+
+class DeliveryApprovalService:
+    @staticmethod
+    def _replay(record: DeliveryApproval, loading_number: str) -> Dict[str, Any]:
+        if record.loading_number != loading_number:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Idempotency key was already used for loading {record.loading_number}",
+            )
+        return {**record.response_json, "replayed": True}
+
+    @staticmethod
+    def approve(
+        db: Session,
+        loading_number: str,
+        memos: List[schemas.DeliveryApprovalMemo],
+        idempotency_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        record = None
+        if idempotency_key:
+            existing = db.query(DeliveryApproval).filter(DeliveryApproval.idempotency_key == idempotency_key).first()
+            if existing:
+                return DeliveryApprovalService._replay(existing, loading_number)
+            record = DeliveryApproval(idempotency_key=idempotency_key, loading_number=loading_number)
+            db.add(record)
+            try:
+                db.flush()
+            except IntegrityError:
+                db.rollback()
+                existing = db.query(DeliveryApproval).filter(
+                    DeliveryApproval.idempotency_key == idempotency_key
+                ).one()
+                return DeliveryApprovalService._replay(existing, loading_number)
+
+        orders = db.query(
+            Order.id, Order.memo_number, Order.order_number, Order.net_amount, Order.collection_type,
+            Order.depot_code,
+        ).filter(Order.loading_number == loading_number).order_by(Order.id).all()
+        if not orders:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No orders found for loading number {loading_number}"
+            )
+
+        # Memos are keyed by memo number, or by order id for orders without one
+        memo_map = {memo.memo_number: memo for memo in memos}
+        rows, moved, depots = [], [], set()
+        for order in orders:
+            memo_number = order.memo_number or order.order_number
+            if not memo_number:
+                continue
+            memo = memo_map.get(memo_number) or memo_map.get(str(order.id))
+            if memo is None:
+                continue
+            rows.append({
+                "id": order.id,
+                **settle(order.net_amount or Decimal("0"), memo, order.collection_type),
+                # Goes to the Remaining Cash Deposit list, as a web (not mobile) collection
+                "collection_approved": False,
+                "collection_source": "Web",
+            })
+            moved.append(memo_number)
+            depots.add(order.depot_code)
+
+        update_rows(db, Order.__table__, rows)
+        recount_on_commit(db, depots)
+        response = {
+            "message": f"Delivery approved for loading {loading_number}. {len(moved)} order(s) moved to collection approval.",
+            "loading_number": loading_number,
+            "approved_count": len(moved),
+            "orders_moved_to_collection": moved,
+        }
+        if record is not None:
+            record.approved_count = len(moved)
+            record.response_json = response
+        db.commit()
+        return response
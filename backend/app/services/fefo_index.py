@@ -0,0 +1,407 @@
+"""In-process FEFO index of sellable batches per (depot, product).
+
+Batches are kept sorted by expiry (nulls last), then batch_no, so allocation is
+an in-memory walk instead of a sorted query per order line. The index is
+advisory: callers lock the candidate rows with ``SELECT ... FOR UPDATE`` (as
+StockReservationService does) and allocate from the locked quantities, then
+feed those back through ``refresh_rows``. Committed ORM writes to
+``product_item_stock_details`` are picked up through session events, so
+receipts, transfer receives, adjustments and reservations keep it current
+without touching the index themselves. Writes from other workers are caught
+before each allocation: one aggregate query compares every demanded
+product's sellable batches (count and id sum) with the index and reloads the
+products that differ. Other drift, such as an edited expiry date, is bounded
+by ``FEFO_INDEX_TTL_SECONDS``.
+"""
+import bisect
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, or_
+from sqlalchemy.orm import Session
+
+from app.models import ProductItemStock, ProductItemStockDetail
+
+SELLABLE_STATUSES = ("Unrestricted", "Sellable")
+PENDING_KEY = "fefo_index_pending"
+
+# Detail rows the index holds
+INDEXED_ROWS = (
+    ProductItemStockDetail.available_quantity > 0,
+    or_(ProductItemStockDetail.status.in_(SELLABLE_STATUSES), ProductItemStockDetail.status.is_(None)),
+)
+
+
+def is_sellable(status: Optional[str]) -> bool:
+    return status is None or status in SELLABLE_STATUSES
+
+
+@dataclass
+class FefoEntry:
+    detail_id: int
+    item_code: int
+    batch_no: str
+    expiry_date: Optional[date]
+    available: Decimal
+
+    @property
+    def sort_key(self) -> Tuple:
+        return (self.expiry_date is None, self.expiry_date or date.max, self.batch_no or "", self.detail_id)
+
+
+class FefoIndex:
+    def __init__(self, ttl_seconds: Optional[float] = None) -> None:
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("FEFO_INDEX_TTL_SECONDS", "300"))
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        # (depot_id, product_id) -> entries in FEFO order
+        self._batches: Dict[Tuple[Optional[int], int], List[FefoEntry]] = {}
+        self._entries: Dict[int, FefoEntry] = {}
+        # product_item_stock.id -> (product_id, depot_id)
+        self._headers: Dict[int, Tuple[int, Optional[int]]] = {}
+        self._loaded_at: Dict[int, float] = {}
+
+    # --- loading ---
+
+    def clear(self) -> None:
+        with self._lock:
+            self._batches.clear()
+            self._entries.clear()
+            self._headers.clear()
+            self._loaded_at.clear()
+
+    def rebuild(self, db: Session, product_ids: Optional[Iterable[int]] = None) -> int:
+        """Reload from the database. All products when ``product_ids`` is None."""
+        if product_ids is None:
+            self.clear()
+            return self._load(db, None)
+        return self._load(db, set(product_ids))
+
+    def ensure_loaded(self, db: Session, product_ids: Iterable[int]) -> set:
+        """Load products that are missing or older than the TTL, in one query. Returns them."""
+        now = time.monotonic()
+        with self._lock:
+            stale = {
+                pid for pid in product_ids
+                if pid not in self._loaded_at or now - self._loaded_at[pid] > self.ttl_seconds
+            }
+        if stale:
+            self._load(db, stale)
+        return stale
+
+    def reload_changed(self, db: Session, product_ids: Iterable[int]) -> set:
+        """Reload products whose sellable batches differ from the database. Returns them.
+
+        Compares the count and id sum of each product's batches, which moves
+        when another worker receives a batch, empties one or changes a status.
+        """
+        product_ids = set(product_ids)
+        if not product_ids:
+            return set()
+        rows = (
+            db.query(
+                ProductItemStock.product_id,
+                func.count(ProductItemStockDetail.id),
+                func.sum(ProductItemStockDetail.id),
+            )
+            .join(ProductItemStock, ProductItemStock.id == ProductItemStockDetail.item_code)
+            .filter(ProductItemStock.product_id.in_(product_ids), *INDEXED_ROWS)
+            .group_by(ProductItemStock.product_id)
+            .all()
+        )
+        actual = {pid: (count, int(total or 0)) for pid, count, total in rows}
+        indexed: Dict[int, Tuple[int, int]] = {}
+        with self._lock:
+            for (_, pid), batches in self._batches.items():
+                if pid in product_ids and batches:
+                    count, total = indexed.get(pid, (0, 0))
+                    indexed[pid] = (count + len(batches), total + sum(e.detail_id for e in batches))
+        changed = {pid for pid in product_ids if actual.get(pid, (0, 0)) != indexed.get(pid, (0, 0))}
+        if changed:
+            self._load(db, changed)
+        return changed
+
+    def _load(self, db: Session, product_ids: Optional[set]) -> int:
+        headers = db.query(ProductItemStock.id, ProductItemStock.product_id, ProductItemStock.depot_id)
+        rows = (
+            db.query(ProductItemStockDetail, ProductItemStock.product_id, ProductItemStock.depot_id)
+            .join(ProductItemStock, ProductItemStock.id == ProductItemStockDetail.item_code)
+            .filter(*INDEXED_ROWS)
+        )
+        if product_ids is not None:
+            headers = headers.filter(ProductItemStock.product_id.in_(product_ids))
+            rows = rows.filter(ProductItemStock.product_id.in_(product_ids))
+        header_rows = headers.all()
+        detail_rows = rows.all()
+
+        now = time.monotonic()
+        with self._lock:
+            loaded = product_ids if product_ids is not None else {pid for _, pid, _ in header_rows}
+            for key in [k for k in self._batches if k[1] in loaded]:
+                for entry in self._batches.pop(key):
+                    self._entries.pop(entry.detail_id, None)
+            for header_id, product_id, depot_id in header_rows:
+                self._headers[header_id] = (product_id, depot_id)
+            for detail, product_id, depot_id in detail_rows:
+                self._put(FefoEntry(
+                    detail_id=detail.id,
+                    item_code=detail.item_code,
+                    batch_no=detail.batch_no,
+                    expiry_date=detail.expiry_date,
+                    available=Decimal(str(detail.available_quantity or 0)),
+                ), product_id, depot_id)
+            for pid in loaded:
+                self._loaded_at[pid] = now
+        return len(detail_rows)
+
+    # --- incremental maintenance ---
+
+    def _put(self, entry: FefoEntry, product_id: int, depot_id: Optional[int]) -> None:
+        batches = self._batches.setdefault((depot_id, product_id), [])
+        keys = [e.sort_key for e in batches]
+        batches.insert(bisect.bisect_left(keys, entry.sort_key), entry)
+        self._entries[entry.detail_id] = entry
+
+    def _drop(self, detail_id: int) -> None:
+        entry = self._entries.pop(detail_id, None)
+        if entry is None:
+            return
+        header = self._headers.get(entry.item_code)
+        if header is None:
+            return
+        product_id, depot_id = header
+        batches = self._batches.get((depot_id, product_id), [])
+        self._batches[(depot_id, product_id)] = [e for e in batches if e.detail_id != detail_id]
+
+    def upsert(
+        self,
+        detail_id: int,
+        item_code: int,
+        batch_no: str,
+        expiry_date: Optional[date],
+        available: Decimal,
+        status: Optional[str],
+    ) -> None:
+        with self._lock:
+            header = self._headers.get(item_code)
+            if header is None or header[0] not in self._loaded_at:
+                # Product not indexed yet; it is read fresh on first use.
+                return
+            existing = self._entries.get(detail_id)
+            if (
+                existing is not None
+                and existing.batch_no == batch_no
+                and existing.expiry_date == expiry_date
+                and available > 0
+                and is_sellable(status)
+            ):
+                existing.available = available
+                return
+            self._drop(detail_id)
+            if available > 0 and is_sellable(status):
+                self._put(FefoEntry(detail_id, item_code, batch_no, expiry_date, available), *header)
+
+    def remove(self, detail_id: int) -> None:
+        with self._lock:
+            self._drop(detail_id)
+
+    def register_header(self, header_id: int, product_id: int, depot_id: Optional[int]) -> None:
+        with self._lock:
+            self._headers[header_id] = (product_id, depot_id)
+
+    def refresh_rows(self, rows: Iterable[ProductItemStockDetail]) -> None:
+        """Correct entries from rows just read (typically under a row lock)."""
+        for row in rows:
+            self.upsert(
+                row.id, row.item_code, row.batch_no, row.expiry_date,
+                Decimal(str(row.available_quantity or 0)), row.status,
+            )
+
+    # --- reads ---
+
+    def candidate_ids(self, product_id: int, depot_id: Optional[int]) -> List[int]:
+        """Detail ids in FEFO order. ``depot_id=None`` spans every depot."""
+        with self._lock:
+            if depot_id:
+                return [e.detail_id for e in self._batches.get((depot_id, product_id), [])]
+            merged = [
+                e for (d_id, p_id), batches in self._batches.items() if p_id == product_id for e in batches
+            ]
+            merged.sort(key=lambda e: e.sort_key)
+            return [e.detail_id for e in merged]
+
+    def available(self, detail_id: int) -> Decimal:
+        with self._lock:
+            entry = self._entries.get(detail_id)
+            return entry.available if entry else Decimal("0")
+
+    def lock_for_demand(
+        self,
+        db: Session,
+        demand: Dict[Tuple[int, Optional[int]], Decimal],
+    ) -> List[Tuple[ProductItemStockDetail, int, Optional[int]]]:
+        """Lock just enough FEFO-first batches to cover ``demand``.
+
+        ``demand`` maps (product_id, depot_id) to quantity; ``depot_id=None``
+        spans every depot. Candidates come from the index, checked against
+        the database first (``reload_changed``); each round locks its rows
+        ``FOR UPDATE`` in primary-key order and the locked quantities are
+        written back to the index. If a locked row holds less than indexed,
+        the next candidates are locked in a further round until the index has
+        no more candidates. Rows changed earlier in this transaction (e.g.
+        just released) are always included. Later rounds are not ordered
+        against earlier ones, so callers must be ready to retry a deadlock.
+        """
+        product_ids = {product_id for product_id, _ in demand}
+        loaded = self.ensure_loaded(db, product_ids)
+        self.reload_changed(db, product_ids - loaded)
+        ordered = {key: self.candidate_ids(*key) for key in demand}
+        cursor = {key: 0 for key in demand}
+        covered = {key: Decimal("0") for key in demand}
+        wanted = set(pending_detail_ids(db))
+        locked: Dict[int, Tuple[ProductItemStockDetail, int, Optional[int]]] = {}
+
+        while True:
+            for key, qty in demand.items():
+                ids = ordered[key]
+                while covered[key] < qty and cursor[key] < len(ids):
+                    detail_id = ids[cursor[key]]
+                    cursor[key] += 1
+                    if detail_id not in locked:
+                        wanted.add(detail_id)
+                        covered[key] += self.available(detail_id)
+            new_ids = wanted - locked.keys()
+            if not new_ids:
+                break
+            rows = (
+                db.query(ProductItemStockDetail, ProductItemStock.product_id, ProductItemStock.depot_id)
+                .join(ProductItemStock, ProductItemStock.id == ProductItemStockDetail.item_code)
+                .filter(ProductItemStockDetail.id.in_(new_ids))
+                .order_by(ProductItemStockDetail.id)
+                .with_for_update(of=ProductItemStockDetail)
+                .all()
+            )
+            for detail, product_id, depot_id in rows:
+                self.register_header(detail.item_code, product_id, depot_id)
+                locked[detail.id] = (detail, product_id, depot_id)
+            self.refresh_rows(detail for detail, _, _ in rows)
+            for missing in new_ids - {detail.id for detail, _, _ in rows}:
+                self.remove(missing)
+            # Recount coverage from locked quantities
+            for key in demand:
+                product_id, depot_id = key
+                covered[key] = sum(
+                    (Decimal(str(d.available_quantity or 0))
+                     for d, p_id, d_depot in locked.values()
+                     if p_id == product_id and (not depot_id or d_depot == depot_id)
+                     and is_sellable(d.status)),
+                    Decimal("0"),
+                )
+            wanted = set(locked)
+
+        return [
+            row for row in locked.values()
+            if row[1] in product_ids
+            and is_sellable(row[0].status)
+            and Decimal(str(row[0].available_quantity or 0)) > 0
+        ]
+
+    def check_consistency(self, db: Session) -> List[dict]:
+        """Compare indexed products against the database; returns one row per mismatch."""
+        with self._lock:
+            product_ids = set(self._loaded_at)
+            snapshot = {
+                detail_id: (entry.batch_no, entry.expiry_date, entry.available)
+                for detail_id, entry in self._entries.items()
+            }
+        if not product_ids:
+            return []
+        rows = (
+            db.query(ProductItemStockDetail)
+            .join(ProductItemStock, ProductItemStock.id == ProductItemStockDetail.item_code)
+            .filter(ProductItemStock.product_id.in_(product_ids), *INDEXED_ROWS)
+            .all()
+        )
+        mismatches = []
+        seen = set()
+        for row in rows:
+            seen.add(row.id)
+            actual = (row.batch_no, row.expiry_date, Decimal(str(row.available_quantity or 0)))
+            indexed = snapshot.get(row.id)
+            if indexed is None:
+                mismatches.append({"detail_id": row.id, "issue": "missing", "db_available": float(actual[2])})
+            elif indexed != actual:
+                mismatches.append({
+                    "detail_id": row.id, "issue": "stale",
+                    "index_available": float(indexed[2]), "db_available": float(actual[2]),
+                })
+        for detail_id in snapshot.keys() - seen:
+            mismatches.append({
+                "detail_id": detail_id, "issue": "extra",
+                "index_available": float(snapshot[detail_id][2]),
+            })
+        return mismatches
+
+
+fefo_index = FefoIndex()
+
+
+# --- session hooks: apply committed detail writes to the index ---
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_detail_writes(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(PENDING_KEY, {})
+    for obj in session.new | session.dirty:
+        if isinstance(obj, ProductItemStock) and obj.id is not None:
+            pending[("header", obj.id)] = (obj.product_id, obj.depot_id)
+        elif isinstance(obj, ProductItemStockDetail) and obj.id is not None:
+            pending[obj.id] = (
+                obj.item_code, obj.batch_no, obj.expiry_date,
+                Decimal(str(obj.available_quantity or 0)), obj.status,
+            )
+    for obj in session.deleted:
+        if isinstance(obj, ProductItemStockDetail) and obj.id is not None:
+            pending[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_detail_writes(session: Session) -> None:
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending:
+        return
+    for key, value in pending.items():
+        if isinstance(key, tuple):
+            fefo_index.register_header(key[1], *value)
+    for key, value in pending.items():
+        if isinstance(key, tuple):
+            continue
+        if value is None:
+            fefo_index.remove(key)
+        else:
+            fefo_index.upsert(key, *value)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_detail_writes(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
+
+
+def pending_detail_ids(session: Session) -> List[int]:
+    """Detail ids written in the session's open transaction."""
+    return [
+        key for key, value in session.info.get(PENDING_KEY, {}).items()
+        if not isinstance(key, tuple) and value is not None
+    ]
+
+
+def stage_detail_change(session: Session, detail_id: int, item_code: int, batch_no: str,
+                        expiry_date: Optional[date], available: Decimal, status: Optional[str]) -> None:
+    """Record a detail change made outside the ORM unit of work (bulk SQL)."""
+    session.info.setdefault(PENDING_KEY, {})[detail_id] = (item_code, batch_no, expiry_date, available, status)
@@ -0,0 +1,310 @@
+"""Two-tier cache for master rows: products, customers, depots, routes and prices.
+
+Lookups go through a per-process LRU first, then Redis, then the database,
+and fill the tiers they missed. Rows are cached as column dicts under
+``md:<kind>:<version>:<field>:<value>``; the version hashes the table's
+columns, so a deploy that changes them never reads rows cached by the old
+code. ``get_many`` resolves a whole batch of codes with at most one Redis
+round trip and one query.
+
+A commit that writes a master row drops its entries from both tiers and
+publishes them on ``md:invalidate``; every other worker evicts them from its
+LRU when the message arrives. Without Redis (or while the subscription is
+down) the LRU falls back to ``MASTER_DATA_LOCAL_TTL_SECONDS``. Sessions with
+uncommitted master writes read the database directly and cache nothing.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.base import NO_VALUE
+
+from app.models import Customer, Depot, PriceSetup, Product, Route
+from app.redis_cache import cache
+
+logger = logging.getLogger(__name__)
+
+REDIS_TTL = float(os.getenv("MASTER_DATA_TTL_SECONDS", "600"))
+LOCAL_TTL = float(os.getenv("MASTER_DATA_LOCAL_TTL_SECONDS", "60"))
+LOCAL_SIZE = int(os.getenv("MASTER_DATA_LOCAL_SIZE", "20000"))
+CHANNEL = "md:invalidate"
+DIRTY_KEY = "master_data_dirty"
+ALL_ROWS = "*"
+
+
+@dataclass(frozen=True)
+class MasterKind:
+    model: type
+    unique: Tuple[str, ...]
+    # Fields many rows share; they cache the list of matching rows.
+    grouped: Tuple[str, ...] = ()
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return self.unique + self.grouped
+
+
+MASTER_KINDS: Dict[str, MasterKind] = {
+    "product": MasterKind(Product, ("code", "sku", "id")),
+    "customer": MasterKind(Customer, ("code", "id")),
+    "depot": MasterKind(Depot, ("code", "id")),
+    "route": MasterKind(Route, ("route_id", "id")),
+    "price_setup": MasterKind(PriceSetup, ("code", "id"), grouped=("product_id",)),
+}
+KIND_BY_MODEL = {spec.model: kind for kind, spec in MASTER_KINDS.items()}
+
+
+def _version(model: type) -> str:
+    columns = ",".join(f"{c.name}:{c.type!r}" for c in model.__table__.columns)
+    return hashlib.blake2b(f"{model.__tablename__}|{columns}".encode(), digest_size=4).hexdigest()
+
+
+VERSIONS = {kind: _version(spec.model) for kind, spec in MASTER_KINDS.items()}
+
+
+def _row(obj: Any) -> Dict[str, Any]:
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(type(obj)).column_attrs}
+
+
+class MasterDataCache:
+    def __init__(self, local_ttl: Optional[float] = None, local_size: Optional[int] = None) -> None:
+        self.local_ttl = LOCAL_TTL if local_ttl is None else local_ttl
+        self.local_size = local_size or LOCAL_SIZE
+        self.origin = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._local: "OrderedDict[Tuple[str, str, Any], Tuple[float, Any]]" = OrderedDict()
+        self._listener = None
+        self._listening = False
+        self._next_subscribe = 0.0
+        self._metrics = {"local_hits": 0, "redis_hits": 0, "loaded": 0, "bypassed": 0}
+
+    @staticmethod
+    def redis_key(kind: str, field: str, value: Any) -> str:
+        return f"md:{kind}:{VERSIONS[kind]}:{field}:{value}"
+
+    # --- lookups ---
+
+    def rows(self, db: Session, kind: str, values: Iterable[Any], field: Optional[str] = None) -> Dict[Any, Any]:
+        """Column dicts by ``field`` value (lists of them for grouped fields); unknown values are left out."""
+        spec = MASTER_KINDS[kind]
+        field = field or spec.unique[0]
+        wanted = {v for v in values if v is not None}
+        if not wanted:
+            return {}
+        dirty = db.info.get(DIRTY_KEY)
+        if dirty and any(entry[0] == kind for entry in dirty):
+            self._count("bypassed")
+            return self._load(db, spec, field, wanted)
+        self._check_listener()
+
+        found: Dict[Any, Any] = {}
+        now = time.monotonic()
+        with self._lock:
+            for value in wanted:
+                entry = self._local.get((kind, field, value))
+                if entry is None:
+                    continue
+                if now - entry[0] > self.local_ttl:
+                    del self._local[(kind, field, value)]
+                    continue
+                self._local.move_to_end((kind, field, value))
+                found[value] = entry[1]
+        self._count("local_hits", len(found))
+
+        missing = [v for v in wanted if v not in found]
+        if missing:
+            cached = cache.get_many([self.redis_key(kind, field, v) for v in missing])
+            from_redis = {v: payload for v, payload in zip(missing, cached) if payload is not None}
+            self._count("redis_hits", len(from_redis))
+            self._remember(kind, {(field, v): payload for v, payload in from_redis.items()})
+            found.update(from_redis)
+            missing = [v for v in missing if v not in from_redis]
+        if missing:
+            loaded = self._load(db, spec, field, set(missing))
+            self._count("loaded", len(loaded))
+            entries: Dict[Tuple[str, Any], Any] = {}
+            for value, payload in loaded.items():
+                if field in spec.grouped:
+                    entries[(field, value)] = payload
+                else:
+                    # A row loaded by one unique field is cached under all of them.
+                    entries.update(((key, payload[key]), payload) for key in spec.unique)
+            self._remember(kind, entries)
+            cache.set_many({self.redis_key(kind, *key): payload for key, payload in entries.items()}, REDIS_TTL)
+            found.update(loaded)
+        return found
+
+    def get_many(
+        self, db: Session, kind: str, values: Iterable[Any], fields: Optional[Tuple[str, ...]] = None
+    ) -> Dict[Any, Any]:
+        """Instances attached to ``db`` by value, trying each of ``fields`` in turn (e.g. code, then SKU)."""
+        spec = MASTER_KINDS[kind]
+        remaining = {v for v in values if v is not None}
+        result: Dict[Any, Any] = {}
+        for field in fields or spec.unique[:1]:
+            if not remaining:
+                break
+            for value, row in self.rows(db, kind, remaining, field).items():
+                result[value] = self._attach(db, spec.model, row)
+            remaining -= result.keys()
+        return result
+
+    def get(self, db: Session, kind: str, value: Any, field: Optional[str] = None):
+        """One instance attached to ``db``, or None."""
+        return self.get_many(db, kind, [value], (field,) if field else None).get(value)
+
+    @staticmethod
+    def _attach(db: Session, model: type, row: Dict[str, Any]):
+        copy = model(**row)
+        make_transient_to_detached(copy)
+        return db.merge(copy, load=False)
+
+    @staticmethod
+    def _load(db: Session, spec: MasterKind, field: str, values: Set[Any]) -> Dict[Any, Any]:
+        column = getattr(spec.model, field)
+        objects = db.query(spec.model).filter(column.in_(values)).order_by(spec.model.id).all()
+        if field in spec.grouped:
+            grouped: Dict[Any, List[Dict[str, Any]]] = {value: [] for value in values}
+            for obj in objects:
+                grouped[getattr(obj, field)].append(_row(obj))
+            return grouped
+        return {getattr(obj, field): _row(obj) for obj in objects}
+
+    def _remember(self, kind: str, payloads: Dict[Tuple[str, Any], Any]) -> None:
+        if not payloads:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for (field, value), payload in payloads.items():
+                self._local[(kind, field, value)] = (now, payload)
+                self._local.move_to_end((kind, field, value))
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def _count(self, event_name: str, n: int = 1) -> None:
+        with self._lock:
+            self._metrics[event_name] += n
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._metrics, "local_entries": len(self._local), "listening": self._listening}
+
+    # --- invalidation ---
+
+    def invalidate(self, entries: Iterable[Tuple[str, str, Any]], publish: bool = True) -> None:
+        """Drop ``(kind, field, value)`` entries everywhere; ``(kind, ALL_ROWS, None)`` drops the kind."""
+        entries = list(entries)
+        if not entries:
+            return
+        self._evict_local(entries)
+        whole = {kind for kind, field, _ in entries if field == ALL_ROWS}
+        for kind in whole:
+            cache.delete_matching(f"md:{kind}:*")
+        keys = [self.redis_key(*entry) for entry in entries if entry[1] != ALL_ROWS and entry[0] not in whole]
+        if keys:
+            cache.delete(*keys)
+        if publish:
+            cache.publish(CHANNEL, json.dumps({"origin": self.origin, "entries": entries}, default=str))
+
+    def _evict_local(self, entries: List[Tuple[str, str, Any]]) -> None:
+        whole = {kind for kind, field, _ in entries if field == ALL_ROWS}
+        with self._lock:
+            if whole:
+                for key in [key for key in self._local if key[0] in whole]:
+                    del self._local[key]
+            for kind, field, value in entries:
+                self._local.pop((kind, field, value), None)
+
+    def _on_message(self, data: str) -> None:
+        try:
+            message = json.loads(data)
+        except ValueError:
+            logger.warning("Ignoring malformed master data invalidation: %r", data[:200])
+            return
+        if message.get("origin") != self.origin:
+            self._evict_local([tuple(entry) for entry in message.get("entries", ())])
+
+    def start_listener(self) -> None:
+        """Subscribe to invalidations from other workers (Redis only)."""
+        self._listening = True
+        self._subscribe()
+
+    def stop_listener(self) -> None:
+        self._listening = False
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+
+    def _subscribe(self) -> None:
+        self._next_subscribe = time.monotonic() + 5
+        self._listener = cache.subscribe(CHANNEL, self._on_message)
+
+    def _check_listener(self) -> None:
+        # A dead subscription may have missed invalidations: start over locally.
+        if not self._listening or self._listener is None or self._listener.is_alive():
+            return
+        if time.monotonic() >= self._next_subscribe:
+            self.clear_local()
+            self._subscribe()
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+    def clear(self) -> None:
+        self.clear_local()
+        with self._lock:
+            self._metrics = dict.fromkeys(self._metrics, 0)
+
+
+master_data = MasterDataCache()
+
+
+def _key_values(obj: Any, spec: MasterKind) -> Optional[List[Tuple[str, Any]]]:
+    """Old and new values of every key field of ``obj``; None if one is not loaded."""
+    state = inspect(obj)
+    pairs = []
+    for field in spec.fields:
+        history = state.attrs[field].history
+        values = [*history.added, *history.deleted, *history.unchanged]
+        if not values and state.attrs[field].loaded_value is NO_VALUE:
+            return None
+        pairs.extend((field, value) for value in values if value is not None)
+    return pairs
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_master_writes(session: Session, flush_context) -> None:
+    entries: Set[Tuple[str, str, Any]] = set()
+    for obj in session.new | session.dirty | session.deleted:
+        kind = KIND_BY_MODEL.get(type(obj))
+        if kind is None:
+            continue
+        pairs = _key_values(obj, MASTER_KINDS[kind])
+        if pairs is None:
+            entries.add((kind, ALL_ROWS, None))
+        else:
+            entries.update((kind, field, value) for field, value in pairs)
+    if entries:
+        session.info.setdefault(DIRTY_KEY, set()).update(entries)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    entries = session.info.pop(DIRTY_KEY, None)
+    if entries:
+        master_data.invalidate(sorted(entries, key=repr))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_master_writes(session: Session) -> None:
+    session.info.pop(DIRTY_KEY, None)
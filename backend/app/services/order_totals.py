@@ -0,0 +1,136 @@
+"""Persisted order totals (gross, discount, net, selected-only, item count, trade value).
+
+Line value is unit price (falling back to trade price) x quantity (total
+quantity, falling back to quantity + free goods), less the line discount
+percent. The trade value, which the MIS report shows, is trade price x total
+quantity, undiscounted. Totals are recomputed before every flush that touches an order's
+items, so list endpoints can read them from ``orders`` without loading
+``order_items``. ``OrderTotalsService.backfill`` fills existing rows.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable
+
+from sqlalchemy import Numeric, case, event, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models import Order, OrderItem
+
+CENT = Decimal("0.01")
+
+
+def _line_price(item: OrderItem) -> Decimal:
+    return Decimal(str(item.unit_price or item.trade_price or 0))
+
+
+def _line_qty(item: OrderItem) -> Decimal:
+    return Decimal(str(item.total_quantity or ((item.quantity or 0) + (item.free_goods or 0))))
+
+
+# SQL equivalents of the per-line values, for aggregates and backfill
+LINE_PRICE = case(
+    (func.coalesce(OrderItem.unit_price, 0) != 0, OrderItem.unit_price),
+    else_=func.coalesce(OrderItem.trade_price, 0),
+)
+LINE_QTY = case(
+    (func.coalesce(OrderItem.total_quantity, 0) != 0, OrderItem.total_quantity),
+    else_=OrderItem.quantity + func.coalesce(OrderItem.free_goods, 0),
+)
+LINE_GROSS = LINE_PRICE * LINE_QTY
+LINE_DISCOUNT = LINE_GROSS * func.coalesce(OrderItem.discount_percent, 0) / 100
+LINE_TRADE = func.coalesce(OrderItem.trade_price, 0) * func.coalesce(OrderItem.total_quantity, 0)
+
+
+class OrderTotalsService:
+    @staticmethod
+    def compute(items: Iterable[OrderItem]) -> Dict[str, object]:
+        gross = discount = selected = trade = Decimal("0")
+        count = 0
+        for item in items:
+            line_gross = _line_price(item) * _line_qty(item)
+            line_discount = line_gross * Decimal(str(item.discount_percent or 0)) / 100
+            gross += line_gross
+            trade += Decimal(str(item.trade_price or 0)) * Decimal(str(item.total_quantity or 0))
+            discount += line_discount
+            if item.selected is not False:
+                selected += line_gross - line_discount
+            count += 1
+        gross = gross.quantize(CENT, ROUND_HALF_UP)
+        discount = discount.quantize(CENT, ROUND_HALF_UP)
+        return {
+            "gross_amount": gross,
+            "discount_amount": discount,
+            "net_amount": gross - discount,
+            "selected_amount": selected.quantize(CENT, ROUND_HALF_UP),
+            "item_count": count,
+            "trade_amount": trade.quantize(CENT, ROUND_HALF_UP),
+        }
+
+    @staticmethod
+    def refresh(order: Order, extra: Iterable[OrderItem] = (), exclude: Iterable[OrderItem] = ()) -> None:
+        """Recompute totals onto the order from its items.
+
+        ``extra`` covers items linked only by ``order_id`` that are not yet in
+        ``order.items``; ``exclude`` covers items pending deletion.
+        """
+        excluded = set(exclude)
+        items = [i for i in order.items if i not in excluded]
+        items += [i for i in extra if i not in excluded and i not in items]
+        for key, value in OrderTotalsService.compute(items).items():
+            setattr(order, key, value)
+
+    @staticmethod
+    def backfill(db: Session, batch_size: int = 1000, only_missing: bool = False) -> int:
+        """Recompute stored totals in SQL, ``batch_size`` order ids per UPDATE.
+
+        Returns the number of orders updated.
+        """
+        def total(expr, selected_only=False):
+            q = select(func.coalesce(func.sum(expr), 0)).where(OrderItem.order_id == Order.id)
+            if selected_only:
+                q = q.where(func.coalesce(OrderItem.selected, True) == True)  # noqa: E712
+            return func.round(q.scalar_subquery().cast(Numeric(18, 4)), 2)
+
+        values = {
+            "gross_amount": total(LINE_GROSS),
+            "discount_amount": total(LINE_DISCOUNT),
+            "net_amount": total(LINE_GROSS) - total(LINE_DISCOUNT),
+            "selected_amount": total(LINE_GROSS - LINE_DISCOUNT, selected_only=True),
+            "item_count": select(func.count(OrderItem.id)).where(OrderItem.order_id == Order.id).scalar_subquery(),
+            "trade_amount": total(LINE_TRADE),
+        }
+        missing = or_(Order.net_amount.is_(None), Order.trade_amount.is_(None))
+        bounds_query = db.query(func.min(Order.id), func.max(Order.id))
+        if only_missing:
+            bounds_query = bounds_query.filter(missing)
+        bounds = bounds_query.one()
+        if bounds[0] is None:
+            return 0
+        updated = 0
+        for low in range(bounds[0], bounds[1] + 1, batch_size):
+            stmt = update(Order).where(Order.id >= low, Order.id < low + batch_size)
+            if only_missing:
+                stmt = stmt.where(missing)
+            result = db.execute(stmt.values(**values).execution_options(synchronize_session=False))
+            updated += result.rowcount or 0
+            db.commit()
+        return updated
+
+
+@event.listens_for(Session, "before_flush")
+def _refresh_order_totals(session: Session, flush_context, instances) -> None:
+    deleted = [obj for obj in session.deleted if isinstance(obj, OrderItem)]
+    orders = {id(obj): (obj, []) for obj in session.new if isinstance(obj, Order)}
+    for item in list(session.new | session.dirty) + deleted:
+        if not isinstance(item, OrderItem):
+            continue
+        order = item.order
+        if order is None and item.order_id is not None:
+            order = session.get(Order, item.order_id)
+        if order is None:
+            continue
+        entry = orders.setdefault(id(order), (order, []))
+        if item not in deleted:
+            entry[1].append(item)
+    for order, items in orders.values():
+        if order not in session.deleted:
+            OrderTotalsService.refresh(order, extra=items, exclude=deleted)
@@ -1,10 +1,12 @@
 """Order validation rules engine with FEFO, credit, stock, and promotion checks."""
 from datetime import date, datetime
 from decimal import Decimal
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import asc
-from sqlalchemy.orm import Session, joinedload
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
 
 from app.models import (
     Customer,
@@ -12,7 +14,6 @@ from app.models import (
     OrderItem,
     OrderStatusEnum,
     Product,
-    ProductItemStock,
     ProductItemStockDetail,
 )
 from app.models_platform import (
@@ -25,7 +26,9 @@ from app.models_platform import (
     ValidationStatusEnum,
 )
 from app.services.audit_service import AuditService
-from app.services.promotion_service import PromotionService
+from app.services.fefo_index import fefo_index
+from app.services.master_data import master_data
+from app.services.promotion_service import PromotionService, PromotionSnapshot, promotion_catalog
 from app.services.status_service import StatusTransitionService
 from app.services.stock_reservation_service import StockReservationService
 
@@ -44,186 +47,198 @@ DEFAULT_RULES = [
     ("OVERDUE_CUSTOMER", "Overdue customer flag", "ERROR", True),
 ]
 
+# A batch locks the rows it releases and then its FEFO rounds; two batches
+# can take those in opposite order, so a deadlock victim is rerun.
+DEADLOCK_RETRIES = 3
+DEADLOCK_CODES = ("40P01", "40001")
+
+
+def _is_deadlock(exc: DBAPIError) -> bool:
+    orig = exc.orig
+    return (getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)) in DEADLOCK_CODES
+
+
+class ValidationBatchContext:
+    """Master data, rules and locked sellable stock for one validation batch."""
+
+    def __init__(self) -> None:
+        self.rules: Dict[str, ValidationRuleConfig] = {}
+        self.customers: Dict[str, Customer] = {}
+        self.outstanding: Dict[int, Decimal] = {}
+        self.depot_ids: Dict[str, int] = {}
+        self.products_by_code: Dict[str, Product] = {}
+        self.products_by_sku: Dict[str, Product] = {}
+        self.details: Dict[int, ProductItemStockDetail] = {}
+        self.promotions: Optional[PromotionSnapshot] = None
+        self.available: Dict[int, Decimal] = {}
+        # product_id -> [(depot_id, detail)] in FEFO order
+        self._fefo: Dict[int, List[Tuple[Optional[int], ProductItemStockDetail]]] = {}
+
+    @classmethod
+    def load(cls, db: Session, orders: List[Order]) -> "ValidationBatchContext":
+        ctx = cls()
+        ctx.rules = {
+            r.rule_code: r
+            for r in db.query(ValidationRuleConfig).filter(ValidationRuleConfig.enabled == True).all()
+        }
+
+        customer_codes = {OrderValidationService._customer_code(o) for o in orders} - {None}
+        ctx.customers = master_data.get_many(db, "customer", customer_codes)
+        if ctx.customers:
+            customer_ids = [c.id for c in ctx.customers.values()]
+            for bal in db.query(CustomerCreditBalance).filter(
+                CustomerCreditBalance.customer_id.in_(customer_ids)
+            ).all():
+                ctx.outstanding[bal.customer_id] = Decimal(str(bal.balance_amount or 0))
+
+        ctx.promotions = promotion_catalog.snapshot(db)
+
+        depot_codes = {o.depot_code for o in orders if o.depot_code}
+        ctx.depot_ids = {code: row["id"] for code, row in master_data.rows(db, "depot", depot_codes).items()}
+
+        product_codes = {i.product_code for o in orders for i in o.items if i.selected}
+        for product in master_data.get_many(db, "product", product_codes, ("code", "sku")).values():
+            ctx.products_by_code[product.code] = product
+            ctx.products_by_sku[product.sku] = product
+
+        demand: Dict[Tuple[int, Optional[int]], Decimal] = {}
+        for order in orders:
+            depot_id = ctx.depot_ids.get(order.depot_code) if order.depot_code else None
+            for item in order.items:
+                product = ctx.product_for(item.product_code) if item.selected else None
+                if not product:
+                    continue
+                qty = Decimal(str(item.total_quantity or (item.quantity + (item.free_goods or 0))))
+                key = (product.id, depot_id)
+                demand[key] = demand.get(key, Decimal("0")) + qty
+
+        if demand:
+            # Lock only the FEFO-first batches that can cover the demand.
+            for detail, product_id, depot_id in fefo_index.lock_for_demand(db, demand):
+                ctx.details[detail.id] = detail
+                ctx.available[detail.id] = Decimal(str(detail.available_quantity or 0))
+                ctx._fefo.setdefault(product_id, []).append((depot_id, detail))
+            for batches in ctx._fefo.values():
+                batches.sort(key=lambda row: (
+                    row[1].expiry_date is None,
+                    row[1].expiry_date or date.max,
+                    row[1].batch_no or "",
+                    row[1].id,
+                ))
+        return ctx
+
+    def product_for(self, code: str) -> Optional[Product]:
+        return self.products_by_code.get(code) or self.products_by_sku.get(code)
+
+    def fefo_candidates(self, product_id: int, depot_id: Optional[int]) -> List[ProductItemStockDetail]:
+        batches = self._fefo.get(product_id, [])
+        if depot_id:
+            return [detail for d_id, detail in batches if d_id == depot_id]
+        return [detail for _, detail in batches]
+
 
 class OrderValidationService:
     HIGH_VALUE_THRESHOLD = Decimal("500000")
 
     @staticmethod
     def ensure_default_rules(db: Session) -> None:
-        for code, name, severity, enabled in DEFAULT_RULES:
-            existing = db.query(ValidationRuleConfig).filter(ValidationRuleConfig.rule_code == code).first()
-            if not existing:
-                db.add(ValidationRuleConfig(
-                    rule_code=code, rule_name=name, severity=severity, enabled=enabled,
-                    config_json={"credit_order_days": list(range(1, 8))},
-                ))
+        existing = {code for (code,) in db.query(ValidationRuleConfig.rule_code).all()}
+        missing = [rule for rule in DEFAULT_RULES if rule[0] not in existing]
+        if not missing:
+            return
+        for code, name, severity, enabled in missing:
+            db.add(ValidationRuleConfig(
+                rule_code=code, rule_name=name, severity=severity, enabled=enabled,
+                config_json={"credit_order_days": list(range(1, 8))},
+            ))
         db.commit()
 
     @staticmethod
-    def _order_total(order: Order, items: List[OrderItem]) -> Decimal:
-        total = Decimal("0")
-        for item in items:
-            if not item.selected:
-                continue
-            unit_price = item.unit_price or item.trade_price or Decimal("0")
-            discount = item.discount_percent or Decimal("0")
-            price_after = unit_price * (1 - discount / 100)
-            qty = item.total_quantity or (item.quantity + (item.free_goods or 0))
-            total += price_after * qty
-        return total
-
-    @staticmethod
-    def _get_customer(db: Session, order: Order) -> Optional[Customer]:
-        if order.customer_code:
-            return db.query(Customer).filter(Customer.code == order.customer_code).first()
-        return db.query(Customer).filter(Customer.code == order.customer_id).first()
+    def _order_total(order: Order) -> Decimal:
+        """Net value of the selected items, as stored on the order."""
+        return Decimal(str(order.selected_amount or 0))
 
     @staticmethod
-    def _get_outstanding(db: Session, customer_id: int) -> Decimal:
-        bal = db.query(CustomerCreditBalance).filter(CustomerCreditBalance.customer_id == customer_id).first()
-        if bal:
-            return Decimal(str(bal.balance_amount or 0))
-        # Estimate from pending collection orders
-        pending = db.query(Order).filter(
-            Order.customer_code == db.query(Customer).filter(Customer.id == customer_id).first().code
-            if db.query(Customer).filter(Customer.id == customer_id).first() else None
-        ).all()
-        return Decimal("0")
+    def _customer_code(order: Order) -> Optional[str]:
+        return order.customer_code or order.customer_id
 
     @staticmethod
     def _allocate_fefo(
-        db: Session,
         product: Product,
         required_qty: Decimal,
-        depot_id: Optional[int],
+        candidates: List[ProductItemStockDetail],
+        available: Dict[int, Decimal],
     ) -> Tuple[List[dict], Decimal]:
-        """FEFO from product_item_stock_details (sellable/unrestricted only)."""
-        remaining = float(required_qty)
+        """Walk FEFO-sorted sellable batches, drawing from the shared ``available`` ledger."""
+        remaining = required_qty
         allocations: List[dict] = []
-        shortfall = Decimal("0")
 
-        stock_headers = db.query(ProductItemStock).filter(ProductItemStock.product_id == product.id)
-        if depot_id:
-            stock_headers = stock_headers.filter(ProductItemStock.depot_id == depot_id)
-        header_ids = [h.id for h in stock_headers.all()]
-        if not header_ids:
-            return [], required_qty
-
-        details = (
-            db.query(ProductItemStockDetail)
-            .filter(
-                ProductItemStockDetail.item_code.in_(header_ids),
-                ProductItemStockDetail.available_quantity > 0,
-            )
-            .filter(
-                (ProductItemStockDetail.status == "Unrestricted")
-                | (ProductItemStockDetail.status == "Sellable")
-                | (ProductItemStockDetail.status.is_(None))
-            )
-            .order_by(asc(ProductItemStockDetail.expiry_date).nullslast(), asc(ProductItemStockDetail.batch_no))
-            .all()
-        )
-
-        for detail in details:
+        for detail in candidates:
             if remaining <= 0:
                 break
-            available = float(detail.available_quantity or 0)
-            if available <= 0:
+            on_hand = available.get(detail.id, Decimal("0"))
+            if on_hand <= 0:
                 continue
-            allocated = min(available, remaining)
+            allocated = min(on_hand, remaining)
             allocations.append({
                 "product_id": product.id,
                 "batch_no": detail.batch_no,
                 "expiry_date": detail.expiry_date,
-                "allocated_qty": Decimal(str(allocated)),
+                "allocated_qty": allocated,
                 "stock_source_id": detail.id,
             })
+            available[detail.id] = on_hand - allocated
             remaining -= allocated
 
-        if remaining > 0:
-            shortfall = Decimal(str(remaining))
-        return allocations, shortfall
+        return allocations, max(remaining, Decimal("0"))
 
     @staticmethod
-    def validate_order(
+    def _evaluate(
         db: Session,
+        ctx: "ValidationBatchContext",
         order: Order,
-        user,
-        *,
-        auto_approve_low_risk: bool = True,
-    ) -> OrderValidationRun:
-        OrderValidationService.ensure_default_rules(db)
-
-        StockReservationService.release_for_order(db, order.id, user)
-
-        # Supersede previous current run
-        db.query(OrderValidationRun).filter(
-            OrderValidationRun.order_id == order.id,
-            OrderValidationRun.is_current == True,
-        ).update({"is_current": False})
-
-        selected_items = [i for i in order.items if i.selected]
-        if not selected_items:
-            run = OrderValidationRun(
-                order_id=order.id,
-                validation_status=ValidationStatusEnum.FAILED,
-                risk_level=RiskLevelEnum.HIGH,
-                requires_approval=False,
-            )
-            db.add(run)
-            db.flush()
-            db.add(OrderValidationMessage(
-                validation_run_id=run.id, order_id=order.id,
-                severity="ERROR", rule_code="ITEMS_SELECTED", message="No items selected",
-                blocking=True,
-            ))
-            db.commit()
-            return run
-
-        rules = {r.rule_code: r for r in db.query(ValidationRuleConfig).filter(ValidationRuleConfig.enabled == True).all()}
-        messages: List[OrderValidationMessage] = []
-        batch_rows: List[OrderBatchAllocation] = []
+        selected_items: List[OrderItem],
+        today: date,
+    ) -> dict:
+        """Run every rule for one order against preloaded master data. No writes."""
+        rules = ctx.rules
+        messages: List[dict] = []
+        batch_rows: List[dict] = []
         blocking = False
         requires_approval = False
         risk = RiskLevelEnum.LOW
         short_stock_total = Decimal("0")
-        order_total = OrderValidationService._order_total(order, selected_items)
-        customer = OrderValidationService._get_customer(db, order)
+        order_total = OrderValidationService._order_total(order)
+        customer = ctx.customers.get(OrderValidationService._customer_code(order))
         order_type = (order.order_type or "COD").upper()
-        today = date.today()
+
+        def add(rule_code: str, severity: str, message: str, blocks: bool, item_id: Optional[int] = None) -> None:
+            messages.append({
+                "order_id": order.id, "order_item_id": item_id, "severity": severity,
+                "rule_code": rule_code, "message": message, "blocking": blocks,
+            })
 
         # Customer active
         if rules.get("CUSTOMER_ACTIVE") and customer and not customer.is_active:
-            messages.append(OrderValidationMessage(
-                order_id=order.id, severity="ERROR", rule_code="CUSTOMER_ACTIVE",
-                message=f"Customer {customer.name} is inactive", blocking=True,
-            ))
+            add("CUSTOMER_ACTIVE", "ERROR", f"Customer {customer.name} is inactive", True)
             blocking = True
 
         if rules.get("CUSTOMER_ACTIVE") and not customer:
-            messages.append(OrderValidationMessage(
-                order_id=order.id, severity="ERROR", rule_code="CUSTOMER_ACTIVE",
-                message="Customer not found in master", blocking=True,
-            ))
+            add("CUSTOMER_ACTIVE", "ERROR", "Customer not found in master", True)
             blocking = True
 
         outstanding = Decimal("0")
         credit_limit = Decimal("0")
         if customer:
             credit_limit = Decimal(str(customer.credit_limit or 0))
-            cb = db.query(CustomerCreditBalance).filter(CustomerCreditBalance.customer_id == customer.id).first()
-            outstanding = Decimal(str(cb.balance_amount if cb else 0))
+            outstanding = ctx.outstanding.get(customer.id, Decimal("0"))
 
         exposure = outstanding + order_total
 
         # Credit rules
         if order_type in ("CREDIT", "INVOICE") and customer:
             if rules.get("CREDIT_LIMIT") and credit_limit > 0 and exposure > credit_limit:
-                messages.append(OrderValidationMessage(
-                    order_id=order.id, severity="ERROR", rule_code="CREDIT_LIMIT",
-                    message=f"Credit exposure {exposure} exceeds limit {credit_limit}",
-                    blocking=True,
-                ))
+                add("CREDIT_LIMIT", "ERROR", f"Credit exposure {exposure} exceeds limit {credit_limit}", True)
                 blocking = True
                 requires_approval = True
                 risk = RiskLevelEnum.HIGH
@@ -232,77 +247,60 @@ class OrderValidationService:
                 credit_days = rules["CREDIT_PERIOD"].config_json or {}
                 allowed_days = credit_days.get("credit_order_days", list(range(1, 8)))
                 if order_type == "CREDIT" and today.day not in allowed_days:
-                    messages.append(OrderValidationMessage(
-                        order_id=order.id, severity="ERROR", rule_code="CREDIT_PERIOD",
-                        message=f"Credit orders only allowed on days {allowed_days} unless approved",
-                        blocking=True,
-                    ))
+                    add(
+                        "CREDIT_PERIOD", "ERROR",
+                        f"Credit orders only allowed on days {allowed_days} unless approved", True,
+                    )
                     blocking = True
                     requires_approval = True
                     risk = RiskLevelEnum.HIGH
 
         if order_total >= OrderValidationService.HIGH_VALUE_THRESHOLD:
-            messages.append(OrderValidationMessage(
-                order_id=order.id, severity="WARNING", rule_code="HIGH_VALUE",
-                message=f"High value order: {order_total}", blocking=False,
-            ))
+            add("HIGH_VALUE", "WARNING", f"High value order: {order_total}", False)
             risk = RiskLevelEnum.MEDIUM
             requires_approval = True
 
-        depot_id = None
-        if order.depot_code:
-            from app.models import Depot
-            depot = db.query(Depot).filter(Depot.code == order.depot_code).first()
-            depot_id = depot.id if depot else None
+        depot_id = ctx.depot_ids.get(order.depot_code) if order.depot_code else None
 
-        # Per-item stock + FEFO
+        # Per-item stock + FEFO. Draw from a scratch copy so a failing order
+        # does not hold stock back from the orders after it in the batch.
+        scratch: Dict[int, Decimal] = {}
         for item in selected_items:
-            product = db.query(Product).filter(
-                (Product.code == item.product_code) | (Product.sku == item.product_code)
-            ).first()
+            product = ctx.product_for(item.product_code)
             if not product:
-                messages.append(OrderValidationMessage(
-                    order_id=order.id, order_item_id=item.id, severity="ERROR",
-                    rule_code="PRODUCT_ACTIVE", message=f"Product {item.product_code} not found", blocking=True,
-                ))
+                add("PRODUCT_ACTIVE", "ERROR", f"Product {item.product_code} not found", True, item.id)
                 blocking = True
                 continue
 
             if rules.get("PRODUCT_ACTIVE") and not product.is_active:
-                messages.append(OrderValidationMessage(
-                    order_id=order.id, order_item_id=item.id, severity="ERROR",
-                    rule_code="PRODUCT_ACTIVE", message=f"Product {product.name} inactive", blocking=True,
-                ))
+                add("PRODUCT_ACTIVE", "ERROR", f"Product {product.name} inactive", True, item.id)
                 blocking = True
 
             qty = item.total_quantity or (item.quantity + (item.free_goods or 0))
-            allocations, shortfall = OrderValidationService._allocate_fefo(db, product, Decimal(str(qty)), depot_id)
+            candidates = ctx.fefo_candidates(product.id, depot_id)
+            for detail in candidates:
+                scratch.setdefault(detail.id, ctx.available.get(detail.id, Decimal("0")))
+            allocations, shortfall = OrderValidationService._allocate_fefo(
+                product, Decimal(str(qty)), candidates, scratch,
+            )
             if shortfall > 0:
                 unit_price = item.unit_price or item.trade_price or Decimal("0")
                 short_stock_total += shortfall * unit_price
-                messages.append(OrderValidationMessage(
-                    order_id=order.id, order_item_id=item.id, severity="ERROR",
-                    rule_code="STOCK_AVAILABLE",
-                    message=f"Short stock {shortfall} for {product.name}", blocking=True,
-                ))
+                add("STOCK_AVAILABLE", "ERROR", f"Short stock {shortfall} for {product.name}", True, item.id)
                 blocking = True
 
             for alloc in allocations:
                 batch_rows.append({**alloc, "order_item_id": item.id})
 
             if item.discount_percent and Decimal(str(item.discount_percent)) > Decimal("50"):
-                messages.append(OrderValidationMessage(
-                    order_id=order.id, order_item_id=item.id, severity="WARNING",
-                    rule_code="DISCOUNT_VALID", message="Discount exceeds 50%", blocking=False,
-                ))
+                add("DISCOUNT_VALID", "WARNING", "Discount exceeds 50%", False, item.id)
 
         # Promotions
-        promo_msgs = PromotionService.simulate_for_order(db, order, selected_items, customer)
+        promo_msgs = PromotionService.simulate_for_order(
+            db, order, selected_items, customer, snapshot=ctx.promotions, products=ctx.products_by_code,
+        )
         for pm in promo_msgs:
-            messages.append(OrderValidationMessage(
-                order_id=order.id, severity=pm.get("severity", "INFO"),
-                rule_code="PROMOTION_APPLY", message=pm.get("message", ""), blocking=False,
-            ))
+            add("PROMOTION_APPLY", pm.get("severity", "INFO"), pm.get("message", ""), False)
 
         # Determine status
         if blocking:
@@ -312,47 +310,212 @@ class OrderValidationService:
         else:
             val_status = ValidationStatusEnum.VALIDATED
 
-        run = OrderValidationRun(
-            order_id=order.id,
-            validation_status=val_status,
-            risk_level=risk,
-            total_requested_value=order_total,
-            total_validated_value=order_total - short_stock_total if not blocking else Decimal("0"),
-            total_short_stock_value=short_stock_total,
-            credit_limit=credit_limit,
-            outstanding_amount=outstanding,
-            credit_exposure_after_order=exposure,
-            requires_approval=requires_approval,
-            approval_reason="; ".join(m.message for m in messages if m.blocking) if blocking else None,
-            validated_by=user.id if val_status == ValidationStatusEnum.VALIDATED else None,
-            validated_at=datetime.utcnow() if val_status == ValidationStatusEnum.VALIDATED else None,
-            is_current=True,
-        )
-        db.add(run)
+        if val_status == ValidationStatusEnum.VALIDATED:
+            ctx.available.update(scratch)
+
+        return {
+            "status": val_status,
+            "risk": risk,
+            "blocking": blocking,
+            "requires_approval": requires_approval,
+            "messages": messages,
+            "allocations": batch_rows,
+            "order_total": order_total,
+            "short_stock_total": short_stock_total,
+            "credit_limit": credit_limit,
+            "outstanding": outstanding,
+            "exposure": exposure,
+        }
+
+    @staticmethod
+    def validate_order(
+        db: Session,
+        order: Order,
+        user,
+        *,
+        auto_approve_low_risk: bool = True,
+    ) -> OrderValidationRun:
+        return OrderValidationService.validate_orders_batch(
+            db, [order], user, auto_approve_low_risk=auto_approve_low_risk,
+        )[0]
+
+    @staticmethod
+    def validate_orders_batch(
+        db: Session,
+        orders: List[Order],
+        user,
+        *,
+        auto_approve_low_risk: bool = True,
+    ) -> List[OrderValidationRun]:
+        """Validate many orders in one transaction.
+
+        Master data, rules and sellable stock for the whole batch are loaded up
+        front with a handful of set-based queries; FEFO allocation then runs in
+        memory across all orders (in the given order) and runs, messages and
+        batch allocations are written with bulk inserts before a single commit.
+        A transaction chosen as a deadlock victim is rolled back and rerun.
+        """
+        if not orders:
+            return []
+        OrderValidationService.ensure_default_rules(db)
+        for attempt in range(1, DEADLOCK_RETRIES + 1):
+            try:
+                return OrderValidationService._validate_batch(
+                    db, orders, user, auto_approve_low_risk=auto_approve_low_risk,
+                )
+            except DBAPIError as exc:
+                if attempt == DEADLOCK_RETRIES or not _is_deadlock(exc):
+                    raise
+                db.rollback()
+
+    @staticmethod
+    def _validate_batch(
+        db: Session,
+        orders: List[Order],
+        user,
+        *,
+        auto_approve_low_risk: bool,
+    ) -> List[OrderValidationRun]:
+        order_ids = [o.id for o in orders]
+        StockReservationService.release_for_orders(db, order_ids, user)
+
+        # Supersede previous current runs
+        db.query(OrderValidationRun).filter(
+            OrderValidationRun.order_id.in_(order_ids),
+            OrderValidationRun.is_current == True,
+        ).update({"is_current": False}, synchronize_session=False)
         db.flush()
 
-        for m in messages:
-            m.validation_run_id = run.id
-            db.add(m)
+        ctx = ValidationBatchContext.load(db, orders)
+        today = date.today()
+
+        plans = []
+        for order in orders:
+            selected_items = [i for i in order.items if i.selected]
+            if not selected_items:
+                plans.append({
+                    "status": ValidationStatusEnum.FAILED,
+                    "risk": RiskLevelEnum.HIGH,
+                    "messages": [{
+                        "order_id": order.id, "order_item_id": None, "severity": "ERROR",
+                        "rule_code": "ITEMS_SELECTED", "message": "No items selected", "blocking": True,
+                    }],
+                    "allocations": [],
+                    "empty": True,
+                })
+                continue
+            plans.append(OrderValidationService._evaluate(db, ctx, order, selected_items, today))
+
+        runs = [
+            OrderValidationService._build_run(order, plan, user)
+            for order, plan in zip(orders, plans)
+        ]
+        db.add_all(runs)
+        db.flush()
+
+        message_rows = []
+        allocation_rows = []
+        reserved: Dict[int, Decimal] = {}
+        for order, plan, run in zip(orders, plans, runs):
+            for m in plan["messages"]:
+                message_rows.append({**m, "validation_run_id": run.id})
+            is_valid = plan["status"] == ValidationStatusEnum.VALIDATED
+            for alloc in plan["allocations"]:
+                allocation_rows.append({
+                    **alloc,
+                    "validation_run_id": run.id,
+                    "order_id": order.id,
+                    "allocation_status": "RESERVED" if is_valid else "ALLOCATED",
+                })
+                if is_valid:
+                    source = alloc["stock_source_id"]
+                    reserved[source] = reserved.get(source, Decimal("0")) + alloc["allocated_qty"]
+        if message_rows:
+            db.execute(insert(OrderValidationMessage), message_rows)
+        if allocation_rows:
+            db.execute(insert(OrderBatchAllocation), allocation_rows)
+
+        # Reserve validated stock on the rows locked during preload
+        shortfalls = StockReservationService.reserve_quantities(db, reserved, details=ctx.details)
+        if shortfalls:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stock changed during validation for batches "
+                + ", ".join(str(s["batch_no"]) for s in shortfalls),
+            )
+
+        for order, plan in zip(orders, plans):
+            if plan.get("empty"):
+                continue
+            OrderValidationService._apply_result(db, order, plan, user)
+        validated = [
+            order for order, plan in zip(orders, plans)
+            if not plan.get("empty") and plan["status"] == ValidationStatusEnum.VALIDATED
+        ]
+        if validated:
+            result = StatusTransitionService.transition_many(db, validated, "VALIDATE", user, force=True)
+            # Orders already past ORDER_CREATED (re-validation) keep the legacy behaviour
+            rejected = {r["order_id"] for r in result["rejected"]}
+            for order in validated:
+                if order.id in rejected:
+                    order.delivery_status = "VALIDATED"
+
+        run_ids = [r.id for r in runs]
+        db.commit()
+        # One round trip to refresh every expired run instead of one per run
+        db.query(OrderValidationRun).filter(OrderValidationRun.id.in_(run_ids)).all()
+        return runs
 
-        created_allocations: List[OrderBatchAllocation] = []
-        for alloc in batch_rows:
-            row = OrderBatchAllocation(
-                validation_run_id=run.id,
+    @staticmethod
+    def _build_run(order: Order, plan: dict, user) -> OrderValidationRun:
+        if plan.get("empty"):
+            return OrderValidationRun(
                 order_id=order.id,
-                order_item_id=alloc["order_item_id"],
-                product_id=alloc["product_id"],
-                batch_no=alloc["batch_no"],
-                expiry_date=alloc["expiry_date"],
-                allocated_qty=alloc["allocated_qty"],
-                stock_source_id=alloc["stock_source_id"],
+                validation_status=plan["status"],
+                risk_level=plan["risk"],
+                requires_approval=False,
+                is_current=True,
             )
-            db.add(row)
-            created_allocations.append(row)
-        db.flush()
+        val_status = plan["status"]
+        blocking = plan["blocking"]
+        validated = val_status == ValidationStatusEnum.VALIDATED
+        return OrderValidationRun(
+            order_id=order.id,
+            validation_status=val_status,
+            risk_level=plan["risk"],
+            total_requested_value=plan["order_total"],
+            total_validated_value=plan["order_total"] - plan["short_stock_total"] if not blocking else Decimal("0"),
+            total_short_stock_value=plan["short_stock_total"],
+            credit_limit=plan["credit_limit"],
+            outstanding_amount=plan["outstanding"],
+            credit_exposure_after_order=plan["exposure"],
+            requires_approval=plan["requires_approval"],
+            approval_reason="; ".join(m["message"] for m in plan["messages"] if m["blocking"]) if blocking else None,
+            validated_by=user.id if validated else None,
+            validated_at=datetime.utcnow() if validated else None,
+            is_current=True,
+        )
 
-        if val_status == ValidationStatusEnum.VALIDATED and created_allocations:
-            StockReservationService.reserve_allocations(db, order.id, created_allocations, user)
+    @staticmethod
+    def _apply_result(db: Session, order: Order, plan: dict, user) -> None:
+        val_status = plan["status"]
+        risk = plan["risk"]
+
+        if val_status == ValidationStatusEnum.VALIDATED and plan["allocations"] and user:
+            AuditService.log_action(
+                db,
+                entity_type="order",
+                entity_id=str(order.id),
+                action="STOCK_RESERVE",
+                user=user,
+                new_value={
+                    "batches": [
+                        {"batch_no": a["batch_no"], "qty": float(a["allocated_qty"])}
+                        for a in plan["allocations"]
+                    ]
+                },
+            )
 
         # Apply validation to order if passed
         if val_status == ValidationStatusEnum.VALIDATED:
@@ -362,10 +525,6 @@ class OrderValidationService:
             order.risk_level = risk.value
             order.requires_approval = False
             order.status = OrderStatusEnum.APPROVED if all_selected else OrderStatusEnum.PARTIALLY_APPROVED
-            try:
-                StatusTransitionService.transition(db, order, "VALIDATE", user, force=True)
-            except Exception:
-                order.delivery_status = "VALIDATED"
         elif val_status == ValidationStatusEnum.PENDING_APPROVAL:
             order.validation_status = val_status.value
             order.risk_level = risk.value
@@ -374,19 +533,16 @@ class OrderValidationService:
         else:
             order.validation_status = val_status.value
             order.validated = False
-            order.requires_approval = requires_approval
+            order.requires_approval = plan["requires_approval"]
 
         AuditService.log_action(
             db, entity_type="order", entity_id=str(order.id), action="VALIDATE",
             user=user, new_value={
                 "validation_status": val_status.value,
                 "risk_level": risk.value,
-                "messages": [m.message for m in messages],
+                "messages": [m["message"] for m in plan["messages"]],
             },
         )
-        db.commit()
-        db.refresh(run)
-        return run
 
     @staticmethod
     def approve_exception(db: Session, order: Order, user, reason: str) -> OrderValidationRun:
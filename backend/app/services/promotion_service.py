@@ -1,11 +1,16 @@
 """Promotion engine: apply and simulate schemes during validation."""
+import os
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import date
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
-from app.models import Customer, Order, OrderItem, Product
+from app.models import Customer, Depot, Order, OrderItem, Product
 from app.models_platform import (
     Promotion,
     PromotionCustomer,
@@ -15,38 +20,151 @@ from app.models_platform import (
     PromotionStatusEnum,
 )
 
+DIRTY_KEY = "promotion_catalog_dirty"
 
-class PromotionService:
-    @staticmethod
-    def _active_promotions(db: Session, order: Order, customer: Optional[Customer]) -> List[Promotion]:
+
+@dataclass(frozen=True)
+class CompiledRule:
+    rule_type: str
+    benefit: Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class CompiledPromotion:
+    promotion_code: str
+    rules: Tuple[CompiledRule, ...]
+    # Empty scope means "all"
+    customer_ids: FrozenSet[int] = frozenset()
+    depot_codes: FrozenSet[str] = frozenset()
+    product_ids: FrozenSet[int] = frozenset()
+
+    def applies_to(self, customer: Optional[Customer], depot_code: Optional[str]) -> bool:
+        if customer and self.customer_ids and customer.id not in self.customer_ids:
+            return False
+        if depot_code and self.depot_codes and depot_code not in self.depot_codes:
+            return False
+        return True
+
+
+@dataclass(frozen=True)
+class PromotionSnapshot:
+    """Active promotions for one day, with rules and scopes as sets."""
+    as_of: date
+    promotions: Tuple[CompiledPromotion, ...] = field(default_factory=tuple)
+
+
+class PromotionCatalog:
+    """Process-wide compiled snapshot of active promotions.
+
+    Dropped on commit of any promotion write in this process (session hook
+    below); writes from other workers are picked up within
+    ``PROMOTION_CATALOG_TTL_SECONDS``.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None) -> None:
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("PROMOTION_CATALOG_TTL_SECONDS", "60"))
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._snapshot: Optional[PromotionSnapshot] = None
+        self._loaded_at = 0.0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+    def snapshot(self, db: Session) -> PromotionSnapshot:
         today = date.today()
-        q = db.query(Promotion).filter(
-            Promotion.status == PromotionStatusEnum.ACTIVE,
-            Promotion.start_date <= today,
-            Promotion.end_date >= today,
+        with self._lock:
+            snap = self._snapshot
+            if snap and snap.as_of == today and time.monotonic() - self._loaded_at <= self.ttl_seconds:
+                return snap
+        snap = self.compile(db, today)
+        with self._lock:
+            self._snapshot = snap
+            self._loaded_at = time.monotonic()
+        return snap
+
+    @staticmethod
+    def compile(db: Session, as_of: date) -> PromotionSnapshot:
+        promos = (
+            db.query(Promotion)
+            .filter(
+                Promotion.status == PromotionStatusEnum.ACTIVE,
+                Promotion.start_date <= as_of,
+                Promotion.end_date >= as_of,
+            )
+            .order_by(Promotion.id)
+            .all()
         )
-        promos = q.all()
-        result = []
+        if not promos:
+            return PromotionSnapshot(as_of=as_of)
+        ids = [p.id for p in promos]
+
+        rules: Dict[int, List[PromotionRule]] = {}
+        for rule in db.query(PromotionRule).filter(PromotionRule.promotion_id.in_(ids)).all():
+            rules.setdefault(rule.promotion_id, []).append(rule)
+        customers: Dict[int, set] = {}
+        for promo_id, customer_id in db.query(PromotionCustomer.promotion_id, PromotionCustomer.customer_id).filter(
+            PromotionCustomer.promotion_id.in_(ids)
+        ):
+            customers.setdefault(promo_id, set()).add(customer_id)
+        depots: Dict[int, set] = {}
+        for promo_id, depot_code in (
+            db.query(PromotionDepot.promotion_id, Depot.code)
+            .join(Depot, Depot.id == PromotionDepot.depot_id)
+            .filter(PromotionDepot.promotion_id.in_(ids))
+        ):
+            depots.setdefault(promo_id, set()).add(depot_code)
+        products: Dict[int, set] = {}
+        for promo_id, product_id in db.query(PromotionProduct.promotion_id, PromotionProduct.product_id).filter(
+            PromotionProduct.promotion_id.in_(ids)
+        ):
+            products.setdefault(promo_id, set()).add(product_id)
+
+        compiled = []
         for p in promos:
-            if customer:
-                cust_map = db.query(PromotionCustomer).filter(
-                    PromotionCustomer.promotion_id == p.id,
-                    PromotionCustomer.customer_id == customer.id,
-                ).first()
-                if db.query(PromotionCustomer).filter(PromotionCustomer.promotion_id == p.id).count() > 0 and not cust_map:
-                    continue
-            if order.depot_code:
-                from app.models import Depot
-                depot = db.query(Depot).filter(Depot.code == order.depot_code).first()
-                if depot:
-                    depot_map = db.query(PromotionDepot).filter(
-                        PromotionDepot.promotion_id == p.id,
-                        PromotionDepot.depot_id == depot.id,
-                    ).first()
-                    if db.query(PromotionDepot).filter(PromotionDepot.promotion_id == p.id).count() > 0 and not depot_map:
-                        continue
-            result.append(p)
-        return result
+            ordered = sorted(rules.get(p.id, []), key=lambda r: (-(r.priority or 0), r.id))
+            compiled.append(CompiledPromotion(
+                promotion_code=p.promotion_code,
+                rules=tuple(CompiledRule(r.rule_type, dict(r.benefit_json or {})) for r in ordered),
+                customer_ids=frozenset(customers.get(p.id, ())),
+                depot_codes=frozenset(depots.get(p.id, ())),
+                product_ids=frozenset(products.get(p.id, ())),
+            ))
+        return PromotionSnapshot(as_of=as_of, promotions=tuple(compiled))
+
+
+promotion_catalog = PromotionCatalog()
+
+_PROMOTION_MODELS = (Promotion, PromotionRule, PromotionCustomer, PromotionDepot, PromotionProduct)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_promotion_writes(session: Session, flush_context) -> None:
+    if any(isinstance(obj, _PROMOTION_MODELS) for obj in session.new | session.dirty | session.deleted):
+        session.info[DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop(DIRTY_KEY, False):
+        promotion_catalog.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_promotion_writes(session: Session) -> None:
+    session.info.pop(DIRTY_KEY, None)
+
+
+class PromotionService:
+    @staticmethod
+    def _active_promotions(
+        snapshot: PromotionSnapshot,
+        order: Order,
+        customer: Optional[Customer],
+    ) -> List[CompiledPromotion]:
+        return [p for p in snapshot.promotions if p.applies_to(customer, order.depot_code)]
 
     @staticmethod
     def simulate_for_order(
@@ -54,25 +172,33 @@ class PromotionService:
         order: Order,
         items: List[OrderItem],
         customer: Optional[Customer],
+        *,
+        snapshot: Optional[PromotionSnapshot] = None,
+        products: Optional[Dict[str, Product]] = None,
     ) -> List[Dict[str, Any]]:
+        """Promotion messages for an order's items.
+
+        Pass the same ``snapshot`` and a code -> Product map when simulating
+        many orders; the evaluation itself does not query the database.
+        """
         messages: List[Dict[str, Any]] = []
-        promos = PromotionService._active_promotions(db, order, customer)
+        if snapshot is None:
+            snapshot = promotion_catalog.snapshot(db)
+        promos = PromotionService._active_promotions(snapshot, order, customer)
         if not promos:
             return messages
+        if products is None:
+            codes = {i.product_code for i in items}
+            products = {p.code: p for p in db.query(Product).filter(Product.code.in_(codes)).all()} if codes else {}
 
         for promo in promos:
-            rules = db.query(PromotionRule).filter(PromotionRule.promotion_id == promo.id).order_by(PromotionRule.priority.desc()).all()
-            for rule in rules:
-                benefit = rule.benefit_json or {}
+            for rule in promo.rules:
+                benefit = rule.benefit
                 for item in items:
-                    product = db.query(Product).filter(Product.code == item.product_code).first()
+                    product = products.get(item.product_code)
                     if not product:
                         continue
-                    prod_map = db.query(PromotionProduct).filter(
-                        PromotionProduct.promotion_id == promo.id,
-                        PromotionProduct.product_id == product.id,
-                    ).first()
-                    if db.query(PromotionProduct).filter(PromotionProduct.promotion_id == promo.id).count() > 0 and not prod_map:
+                    if promo.product_ids and product.id not in promo.product_ids:
                         continue
 
                     if rule.rule_type == "BONUS" and benefit.get("free_qty"):
@@ -15,6 +15,7 @@ from app.models_platform import (
     ReconciliationVariance,
 )
 from app.services.audit_service import AuditService
+from app.services.sequence_service import SequenceService, max_suffix
 
 
 class ReconciliationService:
@@ -24,27 +25,14 @@ class ReconciliationService:
     def _generate_recon_no(db: Session) -> str:
         today = datetime.utcnow().strftime("%Y%m%d")
         prefix = f"REC-{today}-"
-        last = db.query(ReconciliationRun).filter(
-            ReconciliationRun.reconciliation_no.like(f"{prefix}%")
-        ).order_by(ReconciliationRun.reconciliation_no.desc()).first()
-        seq = 1
-        if last:
-            try:
-                seq = int(last.reconciliation_no.split("-")[-1]) + 1
-            except ValueError:
-                seq = 1
+        seq = SequenceService.next_value(
+            db, f"reconciliation:{today}", seed=max_suffix(ReconciliationRun.reconciliation_no, prefix),
+        )
         return f"{prefix}{seq:04d}"
 
     @staticmethod
     def _order_delivered_value(order: Order) -> Decimal:
-        total = Decimal("0")
-        for item in order.items:
-            unit_price = item.unit_price or item.trade_price or Decimal("0")
-            discount = item.discount_percent or Decimal("0")
-            price = unit_price * (1 - discount / 100)
-            qty = item.total_quantity or (item.quantity + (item.free_goods or 0))
-            total += price * qty
-        return total
+        return Decimal(str(order.net_amount or 0))
 
     @staticmethod
     def create_from_assignment(
@@ -149,6 +149,38 @@ def report_zero_discrepancy_day_end(db: Session, params: Dict[str, Any]) -> Dict
     ]}
 
 
+def report_cost_per_km(db: Session, params: Dict[str, Any]) -> Dict[str, Any]:
+    from app.models import Route, TransportExpense, Trip
+    from app.services.route_geometry import RouteGeometryService
+    filters = []
+    if params.get("date_from"):
+        filters.append(Trip.trip_date >= date.fromisoformat(params["date_from"]))
+    if params.get("date_to"):
+        filters.append(Trip.trip_date <= date.fromisoformat(params["date_to"]))
+    if params.get("depot_code"):
+        filters.append(Trip.route.has(Route.depot.has(Depot.code == params["depot_code"])))
+    trips = dict(db.query(Trip.route_id, func.count(Trip.id)).filter(*filters).group_by(Trip.route_id).all())
+    costs = dict(
+        db.query(Trip.route_id, func.sum(TransportExpense.amount))
+        .join(TransportExpense, TransportExpense.trip_id == Trip.id)
+        .filter(*filters)
+        .group_by(Trip.route_id)
+        .all()
+    )
+    names = dict(db.query(Route.id, Route.name).filter(Route.id.in_(list(trips))).all())
+    # Stored route distances; read-only here, so missing ones are computed but not saved
+    distances = RouteGeometryService.distances(db, list(trips), persist=False)
+    rows = []
+    for route_id, trip_count in trips.items():
+        km = distances.get(route_id, 0.0) * trip_count
+        cost = float(costs.get(route_id) or 0)
+        rows.append({
+            "route": names.get(route_id), "trips": trip_count, "route_km": distances.get(route_id, 0.0),
+            "total_km": round(km, 2), "cost": cost, "cost_per_km": round(cost / km, 2) if km else None,
+        })
+    return {"report": "cost_per_km", "rows": sorted(rows, key=lambda r: r["cost_per_km"] or 0, reverse=True)}
+
+
 def _placeholder(report_id: str, name: str) -> ReportHandler:
     def handler(db: Session, params: Dict[str, Any]) -> Dict[str, Any]:
         return {
@@ -218,7 +250,7 @@ REPORT_REGISTRY: Dict[str, Dict[str, Any]] = {
     "physician_sample_compliance": {"name": "Physician/Sample Compliance", "handler": _placeholder("physician_sample_compliance", "Physician/Sample Compliance"), "category": "compliance"},
     "price_protection_mrp": {"name": "Price Protection/MRP Change Report", "handler": _placeholder("price_protection_mrp", "Price Protection/MRP Change Report"), "category": "compliance"},
     "recall_readiness": {"name": "Recall Readiness Report", "handler": _placeholder("recall_readiness", "Recall Readiness Report"), "category": "compliance"},
-    "cost_per_km": {"name": "Cost Per Kilometre", "handler": _placeholder("cost_per_km", "Cost Per Kilometre"), "category": "cost"},
+    "cost_per_km": {"name": "Cost Per Kilometre", "handler": report_cost_per_km, "category": "cost"},
     "cost_per_order": {"name": "Cost Per Order", "handler": _placeholder("cost_per_order", "Cost Per Order"), "category": "cost"},
     "cost_per_stop": {"name": "Cost Per Stop/Chemist", "handler": _placeholder("cost_per_stop", "Cost Per Stop/Chemist"), "category": "cost"},
     "vehicle_monthly_expense": {"name": "Vehicle-wise Monthly Expense Summary", "handler": _placeholder("vehicle_monthly_expense", "Vehicle-wise Monthly Expense Summary"), "category": "cost"},
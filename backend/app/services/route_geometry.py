@@ -0,0 +1,174 @@
+"""Route geometry: stored stop-to-stop distances, so route distances are read, not recomputed.
+
+Each route stop keeps ``leg_km`` (from the previous stop) and ``cumulative_km``
+(from the first stop); the route keeps the total in ``routes.distance_km``.
+Legs follow the old ``calculate_route_distance`` rule: haversine between
+consecutive stops in ``stop_sequence`` order, 0 where either end has no
+coordinates.
+
+Adding or removing a stop recomputes the (at most two) legs that touch it and
+shifts the cumulative distance of the stops after it in one ``UPDATE``.
+``recompute`` rebuilds whole routes at once with a NumPy haversine; legs with
+the same end points, e.g. on routes that share stops, are computed once.
+Routes whose distance was never computed are recomputed when first read.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from app.database import update_rows
+from app.models import Route, RouteStop
+
+EARTH_RADIUS_KM = 6371.0088  # mean radius, as in the ``haversine`` package
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distances in kilometres between arrays of points in degrees."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=float)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _point(stop) -> Optional[tuple]:
+    if stop is None or not (stop.latitude and stop.longitude):
+        return None
+    return float(stop.latitude), float(stop.longitude)
+
+
+def _leg(start, end) -> float:
+    a, b = _point(start), _point(end)
+    if a is None or b is None:
+        return 0.0
+    return round(float(haversine_km(a[0], a[1], b[0], b[1])), 4)
+
+
+def _after(stop):
+    """Stops of ``stop``'s route that come after it."""
+    return and_(RouteStop.route_id == stop.route_id, or_(
+        RouteStop.stop_sequence > stop.stop_sequence,
+        and_(RouteStop.stop_sequence == stop.stop_sequence, RouteStop.id > stop.id),
+    ))
+
+
+def _neighbours(db: Session, stop: RouteStop):
+    before = and_(RouteStop.route_id == stop.route_id, or_(
+        RouteStop.stop_sequence < stop.stop_sequence,
+        and_(RouteStop.stop_sequence == stop.stop_sequence, RouteStop.id < stop.id),
+    ))
+    prev = db.query(RouteStop).filter(before).order_by(
+        RouteStop.stop_sequence.desc(), RouteStop.id.desc()
+    ).first()
+    nxt = db.query(RouteStop).filter(_after(stop)).order_by(RouteStop.stop_sequence, RouteStop.id).first()
+    return prev, nxt
+
+
+def _shift(db: Session, stop: RouteStop, route: Route, delta: float) -> None:
+    if delta:
+        db.execute(
+            update(RouteStop)
+            .where(_after(stop))
+            .values(cumulative_km=RouteStop.cumulative_km + round(delta, 4))
+            .execution_options(synchronize_session=False)
+        )
+    route.distance_km = round(float(route.distance_km) + delta, 4)
+
+
+class RouteGeometryService:
+    @staticmethod
+    def recompute(db: Session, route_ids: Optional[Sequence[int]] = None, persist: bool = True) -> Dict[int, float]:
+        """Rebuild legs and totals of ``route_ids`` (all routes if None). Returns route id -> km."""
+        query = db.query(RouteStop.id, RouteStop.route_id, RouteStop.latitude, RouteStop.longitude)
+        routes = db.query(Route.id)
+        if route_ids is not None:
+            query = query.filter(RouteStop.route_id.in_(route_ids))
+            routes = routes.filter(Route.id.in_(route_ids))
+        stops = query.order_by(RouteStop.route_id, RouteStop.stop_sequence, RouteStop.id).all()
+        totals = {route_id: 0.0 for (route_id,) in routes}
+
+        count = len(stops)
+        legs = np.zeros(count)
+        cumulative = np.zeros(count)
+        if count:
+            route = np.array([s.route_id for s in stops])
+            lat = np.array([float(s.latitude) if _point(s) else np.nan for s in stops])
+            lon = np.array([float(s.longitude) if _point(s) else np.nan for s in stops])
+            same_route = np.zeros(count, dtype=bool)
+            same_route[1:] = route[1:] == route[:-1]
+            prev_lat, prev_lon = np.roll(lat, 1), np.roll(lon, 1)
+            measured = same_route & ~np.isnan(lat) & ~np.isnan(prev_lat)
+            pairs, index = np.unique(
+                np.column_stack([prev_lat, prev_lon, lat, lon])[measured], axis=0, return_inverse=True,
+            )
+            legs[measured] = haversine_km(*pairs.T)[index.ravel()]
+            legs = np.round(legs, 4)
+            # Running total, restarted at the first stop of each route
+            running = np.cumsum(legs)
+            first = np.maximum.accumulate(np.where(same_route, 0, np.arange(count)))
+            cumulative = running - running[first]
+            last = np.append(route[1:] != route[:-1], True)
+            totals.update(zip(route[last].tolist(), np.round(cumulative[last], 4).tolist()))
+
+        if persist:
+            update_rows(db, RouteStop.__table__, [
+                {"id": s.id, "leg_km": float(leg), "cumulative_km": round(float(cum), 4)}
+                for s, leg, cum in zip(stops, legs, cumulative)
+            ])
+            update_rows(db, Route.__table__, [{"id": rid, "distance_km": km} for rid, km in totals.items()])
+        return totals
+
+    @staticmethod
+    def distances(db: Session, route_ids: Iterable[int], persist: bool = True) -> Dict[int, float]:
+        """Route id -> distance in km (2 decimals), from the stored totals."""
+        stored = dict(db.query(Route.id, Route.distance_km).filter(Route.id.in_(list(route_ids))).all())
+        missing = [rid for rid, km in stored.items() if km is None]
+        if missing:
+            stored.update(RouteGeometryService.recompute(db, missing, persist=persist))
+        return {rid: round(float(km), 2) for rid, km in stored.items()}
+
+    @staticmethod
+    def distance(db: Session, route_id: int) -> float:
+        return RouteGeometryService.distances(db, [route_id]).get(route_id, 0.0)
+
+    @staticmethod
+    def cumulative(db: Session, route_id: int) -> List[float]:
+        """Distance from the first stop to each stop, in stop order."""
+        RouteGeometryService.distances(db, [route_id])
+        rows = db.query(RouteStop.cumulative_km).filter(RouteStop.route_id == route_id).order_by(
+            RouteStop.stop_sequence, RouteStop.id
+        )
+        return [round(float(km or 0), 2) for (km,) in rows]
+
+    @staticmethod
+    def stop_added(db: Session, stop: RouteStop) -> None:
+        """Fit a new (flushed) stop into its route's legs."""
+        route = db.get(Route, stop.route_id)
+        if route.distance_km is None:
+            RouteGeometryService.recompute(db, [route.id])
+            return
+        prev, nxt = _neighbours(db, stop)
+        stop.leg_km = _leg(prev, stop)
+        stop.cumulative_km = round(float(prev.cumulative_km or 0) + stop.leg_km, 4) if prev else 0.0
+        delta = stop.leg_km
+        if nxt is not None:
+            next_leg = _leg(stop, nxt)
+            delta += next_leg - float(nxt.leg_km or 0)
+            nxt.leg_km = next_leg
+        db.flush()
+        _shift(db, stop, route, delta)
+
+    @staticmethod
+    def stop_removed(db: Session, stop: RouteStop) -> None:
+        """Close the gap a stop leaves; call before deleting it."""
+        route = db.get(Route, stop.route_id)
+        if route.distance_km is None:
+            return  # recomputed on the next read
+        prev, nxt = _neighbours(db, stop)
+        delta = -float(stop.leg_km or 0)
+        if nxt is not None:
+            bridge = _leg(prev, nxt)
+            delta += bridge - float(nxt.leg_km or 0)
+            nxt.leg_km = bridge
+            db.flush()
+        _shift(db, stop, route, delta)
@@ -0,0 +1,194 @@
+"""Route-wise memo dashboard: per-route stats in one grouped query, items on demand.
+
+Summary pages are cached in ``app.redis_cache`` per depot scope, tagged with
+the routes they cover. Committing an order or route write drops the tags of
+the routes it touched (session hooks below), so validate, print and assign
+show up immediately on every worker.
+"""
+import os
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import and_, event, func, inspect
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.models import Order, OrderItem, OrderStatusEnum, Route
+from app.redis_cache import cache
+
+DIRTY_KEY = "route_wise_dirty_routes"
+ALL_ROUTES = "*"
+
+ROUTE_WISE_STATUSES = (OrderStatusEnum.APPROVED, OrderStatusEnum.PARTIALLY_APPROVED)
+# Validated but not yet loaded: the orders listed on the route card
+PENDING_LOAD = and_(Order.validated.is_(True), func.coalesce(Order.loaded, False).is_(False))
+
+ROUTE_WISE_CACHE_TTL = int(os.getenv("ROUTE_WISE_CACHE_TTL_SECONDS", "30"))
+ROUTE_WISE_TAG = "route_wise"
+
+
+def route_wise_tags(route_codes: Iterable[str]) -> List[str]:
+    """Cache tags for pages covering ``route_codes``; ``*`` means every page."""
+    codes = set(route_codes)
+    if ALL_ROUTES in codes:
+        return [ROUTE_WISE_TAG]
+    return [f"{ROUTE_WISE_TAG}:{code}" for code in sorted(codes)]
+
+
+def _order_route_codes(order: Optional[Order]) -> Set[str]:
+    """Old and new route of a flushed order; every route if unknown."""
+    if order is None:
+        return {ALL_ROUTES}
+    history = inspect(order).attrs.route_code.history
+    codes = {c for c in (*history.added, *history.deleted, *history.unchanged) if c}
+    return codes or {ALL_ROUTES}
+
+
+def invalidate_on_commit(session: Session, route_codes: Iterable[Optional[str]]) -> None:
+    """Drop these routes' summaries when ``session`` commits, after writes the hooks cannot see."""
+    session.info.setdefault(DIRTY_KEY, set()).update({code for code in route_codes if code} or {ALL_ROUTES})
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_route_writes(session: Session, flush_context) -> None:
+    touched: Set[str] = set()
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, Order):
+            touched |= _order_route_codes(obj)
+        elif isinstance(obj, OrderItem):
+            order = inspect(obj).attrs.order.loaded_value
+            touched |= _order_route_codes(order if isinstance(order, Order) else None)
+        elif isinstance(obj, Route):
+            touched.add(ALL_ROUTES)
+    if touched:
+        session.info.setdefault(DIRTY_KEY, set()).update(touched)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    touched = session.info.pop(DIRTY_KEY, None)
+    if touched:
+        cache.invalidate_tags(*route_wise_tags(touched))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_route_writes(session: Session) -> None:
+    session.info.pop(DIRTY_KEY, None)
+
+
+def _count(condition) -> object:
+    return func.count(Order.id).filter(condition)
+
+
+class RouteWiseService:
+    @staticmethod
+    def stats_by_route(db: Session, route_codes: Sequence[str]) -> Dict[str, schemas.RouteWiseOrderStats]:
+        """``RouteWiseOrderStats`` for every route in one grouped query.
+
+        Card counts cover validated, unloaded orders; ``loaded`` counts every
+        validated order already loaded.
+        """
+        if not route_codes:
+            return {}
+        rows = (
+            db.query(
+                Order.route_code,
+                _count(PENDING_LOAD),
+                _count(and_(PENDING_LOAD, Order.printed.is_(True))),
+                _count(and_(Order.validated.is_(True), Order.loaded.is_(True))),
+                _count(and_(PENDING_LOAD, Order.postponed.is_(True))),
+            )
+            .filter(Order.route_code.in_(route_codes), Order.status.in_(ROUTE_WISE_STATUSES))
+            .group_by(Order.route_code)
+            .all()
+        )
+        stats = {}
+        for route_code, pending, printed, loaded, postponed in rows:
+            stats[route_code] = schemas.RouteWiseOrderStats(
+                total_order=pending,
+                validated=pending,
+                printed=printed,
+                pending_print=max(0, pending - printed),
+                loaded=loaded,
+                postponed=postponed,
+            )
+        return stats
+
+    @staticmethod
+    def items_by_route(db: Session, routes: Sequence[Route]) -> Dict[str, List[schemas.RouteWiseOrderItemResponse]]:
+        """Selected items of validated, unloaded orders for the given routes in one query."""
+        names = {route.route_id: route.name for route in routes}
+        if not names:
+            return {}
+        rows = (
+            db.query(OrderItem, Order)
+            .join(Order, OrderItem.order_id == Order.id)
+            .filter(
+                Order.route_code.in_(list(names)),
+                Order.status.in_(ROUTE_WISE_STATUSES),
+                PENDING_LOAD,
+                OrderItem.selected.is_(True),
+            )
+            .order_by(Order.created_at.desc(), Order.id.desc(), OrderItem.id)
+            .all()
+        )
+        items: Dict[str, List[schemas.RouteWiseOrderItemResponse]] = {code: [] for code in names}
+        for item, order in rows:
+            items[order.route_code].append(RouteWiseService.item_response(item, order, names[order.route_code]))
+        return items
+
+    @staticmethod
+    def item_response(item: OrderItem, order: Order, route_name: Optional[str]) -> schemas.RouteWiseOrderItemResponse:
+        unit_price = item.unit_price or item.trade_price
+        discount = item.discount_percent or Decimal("0")
+        total_quantity = item.total_quantity or (item.quantity + (item.free_goods or 0))
+        return schemas.RouteWiseOrderItemResponse(
+            id=item.id,
+            order_id=order.id,
+            order_number=order.order_number,
+            memo_number=order.memo_number,
+            product_code=item.product_code,
+            size=item.pack_size,
+            free_goods=item.free_goods or 0,
+            total_quantity=total_quantity,
+            unit_price=unit_price,
+            discount_percent=item.discount_percent or 0,
+            total_price=unit_price * (1 - discount / 100) * total_quantity,
+            customer_name=order.customer_name,
+            customer_code=order.customer_code,
+            route_code=order.route_code,
+            route_name=route_name,
+            validated=order.validated,
+            printed=order.printed,
+            printed_at=order.printed_at.isoformat() if order.printed_at else None,
+            postponed=order.postponed or False,
+            assigned_to=order.assigned_to,
+            assigned_vehicle=order.assigned_vehicle,
+            loaded=order.loaded,
+            loaded_at=order.loaded_at.isoformat() if order.loaded_at else None,
+            pso_name=order.pso_name,
+            pso_code=order.pso_code,
+        )
+
+    @staticmethod
+    def summaries(
+        db: Session,
+        routes: Sequence[Route],
+        include_items: bool = True,
+    ) -> List[schemas.RouteWiseOrderResponse]:
+        """Route cards for ``routes``: two queries however many routes there are."""
+        codes = [route.route_id for route in routes]
+        stats = RouteWiseService.stats_by_route(db, codes)
+        items = RouteWiseService.items_by_route(db, routes) if include_items else {}
+        empty = schemas.RouteWiseOrderStats(
+            total_order=0, validated=0, printed=0, pending_print=0, loaded=0, postponed=0,
+        )
+        return [
+            schemas.RouteWiseOrderResponse(
+                route_code=route.route_id,
+                route_name=route.name,
+                items=items.get(route.route_id, []),
+                stats=stats.get(route.route_id, empty),
+            )
+            for route in routes
+        ]
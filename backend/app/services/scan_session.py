@@ -0,0 +1,245 @@
+"""Barcode scan sessions (``/api/orders/assigned/scan-sessions``).
+
+A handheld scanner opens a session for one employee and vehicle, then streams
+memo barcodes into it. Each scan is checked against a memo -> order map of the
+assignable orders and answered right away: accepted, duplicate, not found or
+already assigned. The map is built once per session and worker. A memo it
+does not know is looked up on its own, which catches orders approved after
+the session opened. Scans are stored in ``scan_session_memos``, so any worker
+can take the next scan or the commit.
+
+Committing assigns all scanned orders in the caller's transaction with one
+guarded ``UPDATE``. The map can be stale: if another loading took some of the
+orders meanwhile, nothing is assigned. Those memos are dropped from the
+session and reported with a 409, and the clerk commits again.
+"""
+import os
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, update
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.core.depot_scope import apply_depot_code_filter
+from app.models import Employee, Order
+from app.models_platform import ScanSession, ScanSessionMemo
+from app.services.audit_service import AuditService
+from app.services.dashboard_kpis import recount_on_commit
+from app.services.route_wise_service import invalidate_on_commit
+from app.services.stock_reservation_service import StockReservationService
+
+SCAN_SESSION_TTL_MINUTES = int(os.getenv("SCAN_SESSION_TTL_MINUTES", "240"))
+
+OPEN, COMMITTED, CANCELLED = "OPEN", "COMMITTED", "CANCELLED"
+
+# Orders no loading has taken yet
+ASSIGNABLE = and_(func.coalesce(Order.loaded, False).is_(False), Order.assigned_to.is_(None))
+
+_lock = threading.Lock()
+_maps: Dict[str, Tuple[datetime, Dict[str, int]]] = {}  # session id -> (expires_at, memo -> order id)
+
+
+def _memo_map(db: Session, session: ScanSession, user: Employee) -> Dict[str, int]:
+    with _lock:
+        entry = _maps.get(session.id)
+    if entry is not None:
+        return entry[1]
+    query = db.query(Order.memo_number, Order.id).filter(Order.memo_number.isnot(None), ASSIGNABLE)
+    memo_map = dict(apply_depot_code_filter(query, user, Order.depot_code, db).all())
+    now = datetime.utcnow()
+    with _lock:
+        for key in [key for key, (expires_at, _) in _maps.items() if expires_at <= now]:
+            del _maps[key]
+        _maps[session.id] = (session.expires_at, memo_map)
+    return memo_map
+
+
+def _forget(session_id: Optional[str] = None, memo_numbers: Iterable[str] = ()) -> None:
+    """Drop a session's map, and memos that a loading took from every map."""
+    with _lock:
+        if session_id is not None:
+            _maps.pop(session_id, None)
+        for _, memo_map in _maps.values():
+            for memo in memo_numbers:
+                memo_map.pop(memo, None)
+
+
+def session_state(session: ScanSession, results: Iterable[Dict[str, Any]] = ()) -> Dict[str, Any]:
+    memo_numbers = [scan.memo_number for scan in session.memos]
+    return {
+        "session_id": session.id,
+        "status": session.status,
+        "employee_id": session.employee_id,
+        "vehicle_id": session.vehicle_id,
+        "memo_numbers": memo_numbers,
+        "scanned_count": len(memo_numbers),
+        "expires_at": session.expires_at,
+        "loading_number": session.loading_number,
+        "results": list(results),
+    }
+
+
+class ScanSessionService:
+    @staticmethod
+    def get(db: Session, session_id: str, *, open_only: bool = True, lock: bool = False) -> ScanSession:
+        query = db.query(ScanSession).filter(ScanSession.id == session_id)
+        session = (query.with_for_update() if lock else query).first()
+        if not session:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scan session not found")
+        if open_only and session.status != OPEN:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail=f"Scan session is {session.status.lower()}"
+            )
+        if open_only and session.expires_at <= datetime.utcnow():
+            raise HTTPException(status_code=status.HTTP_410_GONE, detail="Scan session expired")
+        return session
+
+    @staticmethod
+    def open(db: Session, payload: schemas.ScanSessionCreate, user: Employee) -> ScanSession:
+        session = ScanSession(
+            id=str(uuid.uuid4()),
+            employee_id=payload.employee_id,
+            vehicle_id=payload.vehicle_id,
+            status=OPEN,
+            created_by=user.id if user else None,
+            expires_at=datetime.utcnow() + timedelta(minutes=SCAN_SESSION_TTL_MINUTES),
+        )
+        db.add(session)
+        db.commit()
+        _memo_map(db, session, user)
+        return session
+
+    @staticmethod
+    def scan(db: Session, session_id: str, memo_numbers: List[str], user: Employee) -> Dict[str, Any]:
+        # Locked so concurrent scans of one session see each other's memos
+        session = ScanSessionService.get(db, session_id, lock=True)
+        scanned = {scan.memo_number for scan in session.memos}
+        memo_map = _memo_map(db, session, user)
+        results = []
+        for memo in (raw.strip() for raw in memo_numbers):
+            if memo in scanned:
+                results.append({"memo_number": memo, "result": "duplicate", "order_id": memo_map.get(memo),
+                                "detail": "Already scanned in this session"})
+                continue
+            order_id = memo_map.get(memo)
+            if order_id is None and memo:
+                # Not assignable when the map was built; ask the database
+                query = db.query(Order.id, Order.loading_number, Order.loaded, Order.assigned_to)
+                order = apply_depot_code_filter(
+                    query.filter(Order.memo_number == memo), user, Order.depot_code, db
+                ).first()
+                if order is not None and (order.loaded or order.assigned_to):
+                    results.append({"memo_number": memo, "result": "assigned", "order_id": order.id,
+                                    "detail": f"Already assigned to loading {order.loading_number or '-'}"})
+                    continue
+                if order is not None:
+                    order_id = memo_map[memo] = order.id
+            if order_id is None:
+                results.append({"memo_number": memo, "result": "not_found", "order_id": None,
+                                "detail": "No order with this memo number"})
+                continue
+            session.memos.append(ScanSessionMemo(memo_number=memo, order_id=order_id))
+            scanned.add(memo)
+            results.append({"memo_number": memo, "result": "accepted", "order_id": order_id, "detail": None})
+        db.commit()
+        return session_state(session, results)
+
+    @staticmethod
+    def remove(db: Session, session_id: str, memo_number: str) -> Dict[str, Any]:
+        session = ScanSessionService.get(db, session_id, lock=True)
+        scan = next((scan for scan in session.memos if scan.memo_number == memo_number), None)
+        if scan is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Memo was not scanned in this session")
+        session.memos.remove(scan)
+        db.commit()
+        return session_state(session, [{"memo_number": memo_number, "result": "removed", "order_id": scan.order_id}])
+
+    @staticmethod
+    def cancel(db: Session, session_id: str) -> Dict[str, Any]:
+        session = ScanSessionService.get(db, session_id)
+        session.status = CANCELLED
+        db.commit()
+        _forget(session.id)
+        return session_state(session)
+
+    @staticmethod
+    def assign(
+        db: Session, session: ScanSession, loading_number: str, loading_date: date, user: Employee,
+    ) -> List[Dict[str, Any]]:
+        """Assign the scanned orders of a locked ``session`` to ``loading_number``, without committing.
+
+        Returns the assigned orders' id, memo and route in scan order.
+        """
+        scans = list(session.memos)
+        if not scans:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No memos scanned")
+        order_ids = [scan.order_id for scan in scans]
+        orders = {
+            row.id: row for row in db.query(
+                Order.id, Order.memo_number, Order.route_code, Order.route_name, Order.depot_code,
+            ).filter(Order.id.in_(order_ids))
+        }
+        first = orders.get(order_ids[0])
+        now = datetime.utcnow()
+        assigned = set(db.scalars(
+            update(Order)
+            .where(Order.id.in_(order_ids), ASSIGNABLE)
+            .values(
+                assigned_to=session.employee_id,
+                assigned_vehicle=session.vehicle_id,
+                loaded=True,
+                loaded_at=now,
+                assignment_date=now,
+                loading_number=loading_number,
+                loading_date=loading_date,
+                area=(first and (first.route_name or first.route_code)) or "N/A",
+            )
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        ))
+        taken = [scan.memo_number for scan in scans if scan.order_id not in assigned]
+        if taken:
+            session_id = session.id
+            db.rollback()
+            db.query(ScanSessionMemo).filter(
+                ScanSessionMemo.session_id == session_id, ScanSessionMemo.memo_number.in_(taken)
+            ).delete(synchronize_session=False)
+            db.commit()
+            _forget(memo_numbers=taken)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={
+                    "message": f"{len(taken)} memo(s) were assigned elsewhere and have been removed from the session",
+                    "memo_numbers": taken,
+                },
+            )
+
+        StockReservationService.commit_for_orders(db, order_ids, user)
+        AuditService.log_action(
+            db,
+            entity_type="order",
+            entity_id=loading_number,
+            action="ASSIGN",
+            user=user,
+            new_value={
+                "order_ids": order_ids,
+                "employee_id": session.employee_id,
+                "vehicle_id": session.vehicle_id,
+                "loading_number": loading_number,
+                "scan_session": session.id,
+            },
+        )
+        recount_on_commit(db, {row.depot_code for row in orders.values()})
+        invalidate_on_commit(db, {row.route_code for row in orders.values()})
+        session.status = COMMITTED
+        session.loading_number = loading_number
+        session.committed_at = now
+        _forget(session.id, [scan.memo_number for scan in scans])
+        return [
+            {"id": order_id, "memo_number": orders[order_id].memo_number, "route_code": orders[order_id].route_code}
+            for order_id in order_ids
+        ]
@@ -0,0 +1,106 @@
+"""Document number sequences backed by the ``document_sequences`` counters table.
+
+Each scope (``customer_code``, ``loading:20260101``, ...) is one counter row,
+advanced with a single ``UPDATE ... RETURNING``. A missing row is created on
+first use, seeded from the highest number already issued, so existing
+databases continue where their documents left off.
+
+By default numbers are taken inside the caller's transaction: the counter
+row stays locked until it commits, and a rollback gives the number back, so
+sequences have no gaps. With ``SEQUENCE_BLOCK_SIZE`` above 1 each worker
+instead reserves blocks in a short transaction of its own and hands them out
+from memory; that removes the lock wait at the cost of gaps on restart.
+``detached=True`` does the same for one scope, for numbers that may have
+gaps but are drawn inside long transactions.
+"""
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.database import dialect_insert
+from app.models_platform import DocumentSequence
+
+SEQUENCE_BLOCK_SIZE = int(os.getenv("SEQUENCE_BLOCK_SIZE", "1"))
+
+# A seed returns the highest number already used in a scope; it gets the
+# caller's session or, for block reservations, a connection.
+Seed = Callable[[object], int]
+
+_lock = threading.Lock()
+_reserved: Dict[str, List[int]] = {}  # scope -> [next, last]
+
+
+def _advance(conn, scope: str, count: int, seed: Optional[Seed]) -> int:
+    """Move ``scope`` on by ``count`` and return its new last value."""
+    stmt = (
+        update(DocumentSequence)
+        .where(DocumentSequence.scope == scope)
+        .values(last_value=DocumentSequence.last_value + count)
+        .returning(DocumentSequence.last_value)
+    )
+    last = conn.execute(stmt).scalar()
+    if last is None:
+        start = seed(conn) if seed else 0
+        insert = dialect_insert(conn.get_bind().dialect.name if isinstance(conn, Session) else conn.dialect.name)
+        conn.execute(
+            insert(DocumentSequence).values(scope=scope, last_value=start).on_conflict_do_nothing(index_elements=["scope"])
+        )
+        last = conn.execute(stmt).scalar()
+    return last
+
+
+def max_suffix(column, prefix: str) -> Seed:
+    """Seed from values like ``<prefix><number>[-anything]`` in ``column``."""
+    def seed(conn) -> int:
+        highest = 0
+        for (value,) in conn.execute(select(column).where(column.like(f"{prefix}%"))):
+            head = (value or "")[len(prefix):].split("-")[0]
+            if head.isdigit():
+                highest = max(highest, int(head))
+        return highest
+
+    return seed
+
+
+class SequenceService:
+    @staticmethod
+    def next_values(
+        db: Session, scope: str, count: int = 1, seed: Optional[Seed] = None, detached: bool = False,
+    ) -> List[int]:
+        """``count`` consecutive-per-worker numbers for ``scope``.
+
+        ``detached`` takes them in a short transaction of its own even when
+        ``SEQUENCE_BLOCK_SIZE`` is 1, so the counter row is not held until
+        the caller commits; a rollback then leaves a gap.
+        """
+        if count < 1:
+            return []
+        if SEQUENCE_BLOCK_SIZE <= 1 and not detached:
+            last = _advance(db, scope, count, seed)
+            return list(range(last - count + 1, last + 1))
+        values: List[int] = []
+        with _lock:
+            while len(values) < count:
+                block = _reserved.get(scope)
+                if not block or block[0] > block[1]:
+                    size = max(SEQUENCE_BLOCK_SIZE, count - len(values))
+                    with db.get_bind().engine.begin() as conn:
+                        last = _advance(conn, scope, size, seed)
+                    block = _reserved[scope] = [last - size + 1, last]
+                take = min(block[1] - block[0] + 1, count - len(values))
+                values.extend(range(block[0], block[0] + take))
+                block[0] += take
+        return values
+
+    @staticmethod
+    def next_value(db: Session, scope: str, seed: Optional[Seed] = None) -> int:
+        return SequenceService.next_values(db, scope, 1, seed)[0]
+
+    @staticmethod
+    def reset_reservations() -> None:
+        """Forget blocks reserved by this worker (tests, or after restoring a database)."""
+        with _lock:
+            _reserved.clear()
@@ -1,12 +1,16 @@
 """Order delivery and collection status transition engine."""
-from typing import Optional, Tuple
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from fastapi import HTTPException, status
+from sqlalchemy import insert, or_, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.models import Employee, Order
-from app.models_platform import CollectionStatusEnum, DeliveryStatusEnum, OrderStatusHistory
-from app.services.audit_service import AuditService
+from app.models_platform import AuditLog, CollectionStatusEnum, DeliveryStatusEnum, OrderStatusHistory
+from app.services.audit_service import AuditService, actor_fields
+from app.services.dashboard_kpis import recount_on_commit
 
 # Allowed transitions: (from_delivery, event) -> (to_delivery, to_collection or None)
 DELIVERY_TRANSITIONS: dict[tuple[str, str], tuple[str, Optional[str]]] = {
@@ -74,17 +78,20 @@ def get_order_collection_status(order: Order) -> str:
     return CollectionStatusEnum.NOT_YET_DELIVERED.value
 
 
+# New collection enum values back to the legacy strings the existing UI reads
+LEGACY_COLLECTION_STATUS = {
+    CollectionStatusEnum.NOT_YET_DELIVERED.value: None,
+    CollectionStatusEnum.DELIVERED_NOT_COLLECTED.value: "Pending",
+    CollectionStatusEnum.COLLECTION_IN_PROGRESS.value: "Pending",
+    CollectionStatusEnum.COLLECTED.value: "Fully Collected",
+    CollectionStatusEnum.DUE_COLLECTION.value: "Partially Collected",
+    CollectionStatusEnum.CANCELLED.value: "Postponed",
+}
+
+
 def sync_legacy_collection_status(order: Order, new_status: str) -> None:
     """Keep legacy string field in sync for existing UI."""
-    reverse = {
-        CollectionStatusEnum.NOT_YET_DELIVERED.value: None,
-        CollectionStatusEnum.DELIVERED_NOT_COLLECTED.value: "Pending",
-        CollectionStatusEnum.COLLECTION_IN_PROGRESS.value: "Pending",
-        CollectionStatusEnum.COLLECTED.value: "Fully Collected",
-        CollectionStatusEnum.DUE_COLLECTION.value: "Partially Collected",
-        CollectionStatusEnum.CANCELLED.value: "Postponed",
-    }
-    order.collection_status = reverse.get(new_status)
+    order.collection_status = LEGACY_COLLECTION_STATUS.get(new_status)
 
 
 class StatusTransitionService:
@@ -156,6 +163,109 @@ class StatusTransitionService:
         )
         return order
 
+    @staticmethod
+    def transition_many(
+        db: Session,
+        orders: Iterable[Order],
+        event_code: str,
+        user: Optional[Employee],
+        *,
+        reason: Optional[str] = None,
+        remarks: Optional[str] = None,
+        source_system: str = "DMS_WEB",
+        geo_latitude: Optional[float] = None,
+        geo_longitude: Optional[float] = None,
+        force: bool = False,
+    ) -> Dict[str, List[Any]]:
+        """Apply one event to many orders with set-based writes.
+
+        The transition table is checked once per distinct current status and
+        each status group moves with one ``UPDATE``. History and audit rows
+        (the same rows ``transition`` writes) are bulk-inserted. Orders with
+        no transition for ``event_code``, or whose status changed since they
+        were loaded, are left alone and listed in ``rejected``. Loaded orders
+        are updated in place; the caller commits. ``user`` may be None only
+        with ``force`` (system transitions).
+        """
+        if not force and (user is None or not StatusTransitionService.can_transition(user, event_code)):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Not allowed to perform: {event_code}")
+
+        by_status: Dict[str, List[Order]] = defaultdict(list)
+        for order in orders:
+            by_status[get_order_delivery_status(order)].append(order)
+
+        rejected: List[Dict[str, Any]] = []
+        moved: List[Tuple[Order, Optional[str], str, str, Optional[str]]] = []
+        for current, group in by_status.items():
+            target = DELIVERY_TRANSITIONS.get((current, event_code))
+            if target is None:
+                rejected += [
+                    {"order_id": o.id, "delivery_status": current, "detail": f"Invalid transition: {current} + {event_code}"}
+                    for o in group
+                ]
+                continue
+            new_delivery, new_collection = target
+            values = {"delivery_status": new_delivery}
+            if new_collection:
+                values["collection_status"] = LEGACY_COLLECTION_STATUS.get(new_collection)
+            unchanged = Order.delivery_status == current
+            if current == DeliveryStatusEnum.ORDER_CREATED.value:
+                unchanged = or_(unchanged, Order.delivery_status.is_(None))
+            updated = set(db.scalars(
+                update(Order)
+                .where(Order.id.in_([o.id for o in group]), unchanged)
+                .values(**values)
+                .returning(Order.id)
+                .execution_options(synchronize_session=False)
+            ))
+            for order in group:
+                if order.id not in updated:
+                    rejected.append({"order_id": order.id, "delivery_status": current, "detail": "Status changed meanwhile"})
+                    continue
+                moved.append((order, order.delivery_status, get_order_collection_status(order), new_delivery, new_collection))
+                for key, value in values.items():
+                    set_committed_value(order, key, value)
+
+        if moved:
+            changed_by = user.id if user else None
+            db.execute(insert(OrderStatusHistory), [
+                {
+                    "order_id": order.id,
+                    "from_delivery_status": old_delivery,
+                    "to_delivery_status": new_delivery,
+                    "from_collection_status": old_collection,
+                    "to_collection_status": new_collection or old_collection,
+                    "event_code": event_code,
+                    "changed_by": changed_by,
+                    "reason": reason,
+                    "remarks": remarks,
+                    "geo_latitude": geo_latitude,
+                    "geo_longitude": geo_longitude,
+                    "source_system": source_system,
+                }
+                for order, old_delivery, old_collection, new_delivery, new_collection in moved
+            ])
+            actor = actor_fields(user)
+            audit_rows = []
+            for order, old_delivery, _, new_delivery, new_collection in moved:
+                audit_rows.append(AuditService.entry_values(
+                    entity_type="order", entity_id=str(order.id), action="STATUS_CHANGE", actor=actor,
+                    old_value={"status": old_delivery}, new_value={"status": new_delivery},
+                    reason=reason, remarks=remarks,
+                ))
+                audit_rows.append(AuditService.entry_values(
+                    entity_type="order", entity_id=str(order.id), action="COLLECTION_STATUS_CHANGE", actor=actor,
+                    new_value={"delivery_status": new_delivery, "collection_status": new_collection},
+                    reason=None, remarks=None,
+                ))
+            db.execute(insert(AuditLog), audit_rows)
+            # The UPDATEs bypass the KPI hooks; recount the depots whose collection status moved
+            recount = {order.depot_code for order, *_, new_collection in moved if new_collection}
+            if recount:
+                recount_on_commit(db, recount)
+
+        return {"transitioned": [order.id for order, *_ in moved], "rejected": rejected}
+
     @staticmethod
     def get_allowed_events(order: Order) -> list[str]:
         current = get_order_delivery_status(order)
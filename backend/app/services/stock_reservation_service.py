@@ -1,58 +1,117 @@
 """Stock reservation against product_item_stock_details during order validation."""
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from fastapi import HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.database import update_rows
 from app.models import ProductItemStockDetail
 from app.models_platform import OrderBatchAllocation
 from app.services.audit_service import AuditService
+from app.services.fefo_index import stage_detail_change
 
 
 class StockReservationService:
     @staticmethod
-    def release_for_order(db: Session, order_id: int, user=None) -> int:
-        """Release RESERVED allocations for an order. Returns count released."""
-        allocations = (
-            db.query(OrderBatchAllocation)
-            .filter(
-                OrderBatchAllocation.order_id == order_id,
-                OrderBatchAllocation.allocation_status == "RESERVED",
-            )
+    def lock_details(db: Session, detail_ids: Iterable[int]) -> Dict[int, ProductItemStockDetail]:
+        """Lock stock detail rows in one query, in primary-key order so concurrent callers cannot deadlock."""
+        ids = sorted(set(detail_ids) - {None})
+        if not ids:
+            return {}
+        return {
+            d.id: d
+            for d in db.query(ProductItemStockDetail)
+            .filter(ProductItemStockDetail.id.in_(ids))
+            .order_by(ProductItemStockDetail.id)
+            .with_for_update()
             .all()
+        }
+
+    @staticmethod
+    def apply_deltas(
+        db: Session,
+        details: Dict[int, ProductItemStockDetail],
+        deltas: Dict[int, Tuple[Decimal, Decimal]],
+    ) -> None:
+        """Add (available, reserved) deltas to locked detail rows with one UPDATE.
+
+        Reserved quantity never drops below zero. The loaded rows are updated in
+        place so the session does not flush them again.
+        """
+        deltas = {k: v for k, v in deltas.items() if k in details and (v[0] or v[1])}
+        if not deltas:
+            return
+        greatest = func.greatest if db.get_bind().dialect.name == "postgresql" else func.max
+        update_rows(
+            db,
+            ProductItemStockDetail.__table__,
+            [{"id": k, "available_quantity": a, "reserved_quantity": r} for k, (a, r) in deltas.items()],
+            combine={
+                "available_quantity": lambda col, delta: col + delta,
+                "reserved_quantity": lambda col, delta: greatest(col + delta, 0),
+            },
         )
-        count = 0
-        for alloc in allocations:
-            if StockReservationService._release_one(db, alloc):
-                count += 1
-        if count and user:
-            AuditService.log_action(
-                db,
-                entity_type="order",
-                entity_id=str(order_id),
-                action="STOCK_RELEASE",
-                user=user,
-                new_value={"released_allocations": count},
+        for detail_id, (d_available, d_reserved) in deltas.items():
+            detail = details[detail_id]
+            available = Decimal(str(detail.available_quantity or 0)) + d_available
+            reserved = max(Decimal("0"), Decimal(str(detail.reserved_quantity or 0)) + d_reserved)
+            set_committed_value(detail, "available_quantity", available)
+            set_committed_value(detail, "reserved_quantity", reserved)
+            stage_detail_change(
+                db, detail.id, detail.item_code, detail.batch_no, detail.expiry_date, available, detail.status,
             )
-        return count
 
     @staticmethod
-    def _release_one(db: Session, alloc: OrderBatchAllocation) -> bool:
-        if alloc.allocation_status != "RESERVED":
-            return False
-        detail = db.query(ProductItemStockDetail).filter(
-            ProductItemStockDetail.id == alloc.stock_source_id
-        ).first()
-        if detail:
-            qty = Decimal(str(alloc.allocated_qty or 0))
-            detail.available_quantity = Decimal(str(detail.available_quantity or 0)) + qty
-            detail.reserved_quantity = max(
-                Decimal("0"),
-                Decimal(str(detail.reserved_quantity or 0)) - qty,
-            )
-        alloc.allocation_status = "RELEASED"
-        return True
+    def reserve_quantities(
+        db: Session,
+        requested: Dict[int, Decimal],
+        *,
+        details: Optional[Dict[int, ProductItemStockDetail]] = None,
+        batch_nos: Optional[Dict[int, str]] = None,
+    ) -> List[dict]:
+        """Move stock from available to reserved for many batches at once.
+
+        ``requested`` maps stock detail id to quantity. Rows are locked in one
+        query unless ``details`` already holds them locked. Nothing is written
+        if any batch is short; the per-batch shortfall report is returned
+        instead (empty on success).
+        """
+        requested = {k: Decimal(str(v)) for k, v in requested.items() if v and Decimal(str(v)) > 0}
+        if not requested:
+            return []
+        if details is None or not requested.keys() <= details.keys():
+            details = StockReservationService.lock_details(db, requested)
+        shortfalls = []
+        for detail_id in sorted(requested):
+            qty = requested[detail_id]
+            detail = details.get(detail_id)
+            available = Decimal(str(detail.available_quantity or 0)) if detail else Decimal("0")
+            if available < qty:
+                shortfalls.append({
+                    "stock_source_id": detail_id,
+                    "batch_no": detail.batch_no if detail else (batch_nos or {}).get(detail_id),
+                    "requested_qty": qty,
+                    "available_qty": available,
+                    "short_qty": qty - available,
+                    "found": detail is not None,
+                })
+        if shortfalls:
+            return shortfalls
+        StockReservationService.apply_deltas(db, details, {k: (-q, q) for k, q in requested.items()})
+        return []
+
+    @staticmethod
+    def release_for_order(db: Session, order_id: int, user=None) -> int:
+        """Release RESERVED allocations for an order. Returns count released."""
+        return StockReservationService.release_for_orders(db, [order_id], user).get(order_id, 0)
+
+    @staticmethod
+    def release_for_orders(db: Session, order_ids: List[int], user=None) -> Dict[int, int]:
+        """Release RESERVED allocations for many orders. Returns released count per order."""
+        return StockReservationService._settle(db, order_ids, "RELEASED", "STOCK_RELEASE", "released_allocations", user)
 
     @staticmethod
     def reserve_allocations(
@@ -62,33 +121,29 @@ class StockReservationService:
         user=None,
     ) -> None:
         """Move stock from available to reserved for validated order batches."""
+        requested: Dict[int, Decimal] = {}
+        batch_nos: Dict[int, str] = {}
         for alloc in allocations:
             qty = Decimal(str(alloc.allocated_qty or 0))
             if qty <= 0:
                 continue
-            detail = (
-                db.query(ProductItemStockDetail)
-                .filter(ProductItemStockDetail.id == alloc.stock_source_id)
-                .with_for_update()
-                .first()
-            )
-            if not detail:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Stock detail {alloc.stock_source_id} not found for reservation",
+            requested[alloc.stock_source_id] = requested.get(alloc.stock_source_id, Decimal("0")) + qty
+            batch_nos[alloc.stock_source_id] = alloc.batch_no
+        shortfalls = StockReservationService.reserve_quantities(db, requested, batch_nos=batch_nos)
+        if shortfalls:
+            missing = [s for s in shortfalls if not s["found"]]
+            if missing:
+                detail = f"Stock detail {missing[0]['stock_source_id']} not found for reservation"
+            else:
+                detail = "; ".join(
+                    f"Insufficient sellable stock for batch {s['batch_no']}. "
+                    f"Available {s['available_qty']}, required {s['requested_qty']}"
+                    for s in shortfalls
                 )
-            available = Decimal(str(detail.available_quantity or 0))
-            if available < qty:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=(
-                        f"Insufficient sellable stock for batch {alloc.batch_no}. "
-                        f"Available {available}, required {qty}"
-                    ),
-                )
-            detail.available_quantity = available - qty
-            detail.reserved_quantity = Decimal(str(detail.reserved_quantity or 0)) + qty
-            alloc.allocation_status = "RESERVED"
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+        for alloc in allocations:
+            if Decimal(str(alloc.allocated_qty or 0)) > 0:
+                alloc.allocation_status = "RESERVED"
 
         if user:
             AuditService.log_action(
@@ -108,32 +163,57 @@ class StockReservationService:
     @staticmethod
     def commit_for_order(db: Session, order_id: int, user=None) -> int:
         """Mark reservations as ISSUED when order is loaded/dispatched."""
+        return StockReservationService.commit_for_orders(db, [order_id], user).get(order_id, 0)
+
+    @staticmethod
+    def commit_for_orders(db: Session, order_ids: List[int], user=None) -> Dict[int, int]:
+        """Mark reservations of many orders as ISSUED. Returns issued count per order."""
+        return StockReservationService._settle(db, order_ids, "ISSUED", "STOCK_ISSUE", "issued_count", user)
+
+    @staticmethod
+    def _settle(
+        db: Session,
+        order_ids: List[int],
+        new_status: str,
+        action: str,
+        count_key: str,
+        user=None,
+    ) -> Dict[int, int]:
+        """Release (back to available) or issue RESERVED allocations of many orders."""
+        if not order_ids:
+            return {}
         allocations = (
             db.query(OrderBatchAllocation)
             .filter(
-                OrderBatchAllocation.order_id == order_id,
+                OrderBatchAllocation.order_id.in_(order_ids),
                 OrderBatchAllocation.allocation_status == "RESERVED",
             )
             .all()
         )
+        if not allocations:
+            return {}
+        details = StockReservationService.lock_details(db, (a.stock_source_id for a in allocations))
+        deltas: Dict[int, Tuple[Decimal, Decimal]] = {}
+        counts: Dict[int, int] = {}
         for alloc in allocations:
-            detail = db.query(ProductItemStockDetail).filter(
-                ProductItemStockDetail.id == alloc.stock_source_id
-            ).first()
-            if detail:
-                qty = Decimal(str(alloc.allocated_qty or 0))
-                detail.reserved_quantity = max(
-                    Decimal("0"),
-                    Decimal(str(detail.reserved_quantity or 0)) - qty,
+            qty = Decimal(str(alloc.allocated_qty or 0))
+            d_available, d_reserved = deltas.get(alloc.stock_source_id, (Decimal("0"), Decimal("0")))
+            if new_status == "RELEASED":
+                d_available += qty
+            deltas[alloc.stock_source_id] = (d_available, d_reserved - qty)
+            counts[alloc.order_id] = counts.get(alloc.order_id, 0) + 1
+        StockReservationService.apply_deltas(db, details, deltas)
+        db.query(OrderBatchAllocation).filter(
+            OrderBatchAllocation.id.in_([a.id for a in allocations])
+        ).update({"allocation_status": new_status})
+        if user:
+            for order_id, count in counts.items():
+                AuditService.log_action(
+                    db,
+                    entity_type="order",
+                    entity_id=str(order_id),
+                    action=action,
+                    user=user,
+                    new_value={count_key: count},
                 )
-            alloc.allocation_status = "ISSUED"
-        if allocations and user:
-            AuditService.log_action(
-                db,
-                entity_type="order",
-                entity_id=str(order_id),
-                action="STOCK_ISSUE",
-                user=user,
-                new_value={"issued_count": len(allocations)},
-            )
-        return len(allocations)
+        return counts
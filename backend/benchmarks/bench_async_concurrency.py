@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Load test: latency under concurrency, sync session vs async session.
+
+Serves the assigned-memo query of ``/api/mobile`` twice, once from a sync
+handler on ``get_db`` (run in the worker threadpool) and once from an async
+handler on ``get_async_db``, and fires ``--clients`` concurrent requests at
+each. Prints p50/p95/p99 latency and throughput.
+
+    python benchmarks/bench_async_concurrency.py --clients 200 --rounds 5
+    DATABASE_URL=postgresql://... python benchmarks/bench_async_concurrency.py
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-async-'), 'bench.db')}")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("CACHE_BACKEND", "memory")
+os.environ["REQUIRE_AUTH"] = "false"
+
+import httpx
+from anyio import to_thread
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import Base, SessionLocal, engine, get_async_db, get_db
+from app.db_pool import WORKER_THREADS
+from app.models import Employee, Order, OrderStatusEnum, Vehicle
+from app.routers.mobile import MEMO_RELATIONS
+import app.models_platform  # noqa: F401
+from main import app
+
+STATEMENT = (
+    select(Order)
+    .options(*MEMO_RELATIONS)
+    .filter(Order.loading_number.isnot(None), Order.loaded == True)  # noqa: E712
+    .order_by(Order.loading_number.asc())
+    .limit(50)
+)
+
+
+@app.get("/bench/sync")
+def bench_sync(db: Session = Depends(get_db)):
+    return {"count": len(db.scalars(STATEMENT).all())}
+
+
+@app.get("/bench/async")
+async def bench_async(db: AsyncSession = Depends(get_async_db)):
+    return {"count": len((await db.scalars(STATEMENT)).all())}
+
+
+def seed(orders: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if db.query(Order).count():
+            return
+        employee = Employee(employee_id="BENCH-1", first_name="Bench", email="bench@test.com")
+        vehicle = Vehicle(vehicle_id="BV-1", vehicle_type="Van", registration_number="BENCH-1")
+        db.add_all([employee, vehicle])
+        db.flush()
+        db.add_all([
+            Order(
+                order_number=f"B-{n}", memo_number=f"BM-{n}", customer_id="C1", customer_name="Chemist",
+                pso_id="P1", pso_name="PSO", delivery_date=date(2026, 1, 1), status=OrderStatusEnum.APPROVED,
+                loading_number=f"LD-{n // 20}", assigned_to=employee.id, assigned_vehicle=vehicle.id, loaded=True,
+            )
+            for n in range(orders)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def burst(client: httpx.AsyncClient, path: str, clients: int):
+    async def one():
+        started = time.perf_counter()
+        resp = await client.get(path)
+        resp.raise_for_status()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(clients)))
+    return list(latencies), time.perf_counter() - started
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run(args) -> None:
+    to_thread.current_default_thread_limiter().total_tokens = WORKER_THREADS
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'session':<10}{'clients':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}")
+        for label, path in (("sync", "/bench/sync"), ("async", "/bench/async")):
+            await burst(client, path, args.clients)  # warm-up
+            latencies, elapsed = [], 0.0
+            for _ in range(args.rounds):
+                round_latencies, round_elapsed = await burst(client, path, args.clients)
+                latencies += round_latencies
+                elapsed += round_elapsed
+            print(f"{label:<10}{args.clients:>8}{statistics.median(latencies) * 1000:>9.1f}"
+                  f"{percentile(latencies, 95) * 1000:>9.1f}{percentile(latencies, 99) * 1000:>9.1f}"
+                  f"{len(latencies) / elapsed:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--orders", type=int, default=500)
+    args = parser.parse_args()
+    seed(args.orders)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Load test: SQL statements and latency per authenticated GET.
+
+Logs a depot user in and issues GETs against an auth-only endpoint and a
+depot-scoped list, first with the principal cache disabled (TTL 0, i.e. a
+user and depot lookup on every request) and then enabled.
+
+    python benchmarks/bench_auth_principal.py --requests 500
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.auth import get_password_hash
+from app.core.principal import principal_cache
+from app.database import Base, get_db
+from app.models import Depot, Employee
+import app.models_platform  # noqa: F401
+from main import app
+
+ENDPOINTS = ("/api/auth/permissions", "/api/orders")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    queries = [0]
+    event.listen(engine, "before_cursor_execute", lambda *a: queries.__setitem__(0, queries[0] + 1))
+
+    db = Session()
+    depot = Depot(name="Bench Depot", code="BENCH", city="Dhaka")
+    db.add(depot)
+    db.flush()
+    db.add(Employee(
+        employee_id="BENCH-1", email="bench@test.com", first_name="Bench", hashed_password=get_password_hash("bench"),
+        role="manager", depot_id=depot.id, is_active=True, is_blocked=False,
+    ))
+    db.commit()
+    db.close()
+
+    def override_get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    token = client.post("/api/auth/login", json={"email": "bench@test.com", "password": "bench", "remember_me": False})
+    headers = {"Authorization": f"Bearer {token.json()['access_token']}"}
+
+    print(f"{'cache':<10}{'endpoint':<24}{'requests':>10}{'queries/req':>13}{'ms/req':>9}")
+    for label, ttl in (("off", 0.0), ("on", 30.0)):
+        principal_cache.ttl_seconds = ttl
+        principal_cache.invalidate()
+        for path in ENDPOINTS:
+            client.get(path, headers=headers)  # warm-up
+            queries[0] = 0
+            started = time.perf_counter()
+            for _ in range(args.requests):
+                client.get(path, headers=headers)
+            elapsed = time.perf_counter() - started
+            print(f"{label:<10}{path:<24}{args.requests:>10}{queries[0] / args.requests:>13.2f}"
+                  f"{elapsed * 1000 / args.requests:>9.2f}")
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-document render time of the PDF reports.
+
+Renders each document N times with a fixed number of memos and prints the
+mean milliseconds per document. Loading report and money receipt go through
+their endpoint functions, so the numbers include the orders query.
+
+    python benchmarks/bench_report_render.py --runs 200 --memos 20
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import selectinload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Order, OrderItem, OrderStatusEnum
+import app.models_platform  # noqa: F401
+from app.reports.invoice_report import build_invoice_payload, render_invoices
+from app.reports.packing_report import generate_packing_report
+from app.routers.orders import get_loading_report, get_money_receipt_report
+
+ITEMS_PER_MEMO = 8
+
+
+def _seed(db, memo_count):
+    for n in range(memo_count):
+        order = Order(
+            order_number=f"BENCH-{n}", memo_number=f"{10000000 + n}", customer_id="C1", customer_code="C1",
+            customer_name="Chemist", pso_id="P1", pso_code="P1", pso_name="PSO", delivery_date=date.today(),
+            status=OrderStatusEnum.APPROVED, validated=True, loading_number="BENCH-L", depot_name="Central Store",
+            collection_approved=True, collected_amount=100, pending_amount=0,
+        )
+        order.items = [
+            OrderItem(product_code=f"BENCH-P{i}", product_name=f"Bench {i}", pack_size="10'S", quantity=5,
+                      free_goods=1 if i == 0 else 0, trade_price=10, delivery_date=date.today(), selected=True)
+            for i in range(ITEMS_PER_MEMO)
+        ]
+        db.add(order)
+    db.commit()
+    return db.query(Order).options(selectinload(Order.items)).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--memos", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine(
+        os.environ["DATABASE_URL"], connect_args={"check_same_thread": False}, poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    orders = _seed(db, args.memos)
+    payload = build_invoice_payload(orders[0], {"customers": {}, "products": {}, "trade_prices": {}})
+
+    documents = [
+        ("packing report", lambda: generate_packing_report(orders=orders, depot_name="Central Store")),
+        ("invoice", lambda: render_invoices([payload])),
+        ("loading report", lambda: get_loading_report("BENCH-L", db)),
+        ("money receipt", lambda: get_money_receipt_report("BENCH-L", db)),
+    ]
+    print(f"{'document':<18}{'runs':>8}{'ms/doc':>10}")
+    for name, render in documents:
+        render()  # warm-up: imports, font metrics
+        started = time.perf_counter()
+        for _ in range(args.runs):
+            render()
+        elapsed = time.perf_counter() - started
+        print(f"{name:<18}{args.runs:>8}{elapsed * 1000 / args.runs:>10.2f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
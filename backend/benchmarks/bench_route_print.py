@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark: route-wise print (packing report + one invoice per memo).
+
+Compares the old request-thread loop (generate_invoice_report per order with
+its own lookups, then PdfReader on every invoice to merge) against the print
+pipeline rendering in-process and on the process pool.
+
+    python benchmarks/bench_route_print.py --memos 50 200 1000 --workers 4
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from PyPDF2 import PdfReader, PdfWriter
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import selectinload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Customer, Order, OrderItem, OrderStatusEnum, PriceSetup, Product
+import app.models_platform  # noqa: F401
+from app.reports import print_pipeline
+from app.reports.invoice_report import generate_invoice_report
+from app.reports.packing_report import generate_packing_report
+
+ITEMS_PER_MEMO = 8
+COMPANY = {"name": "RENATA LIMITED", "address": "BLOCK-C, ROAD-6, HOUSE-39, DHOUR, TURAG, DHAKA-1230", "phone": "8981868"}
+
+
+def _seed(db, memo_count):
+    for n in range(ITEMS_PER_MEMO):
+        product = Product(name=f"Bench {n}", code=f"BENCH-P{n}", sku=f"BENCH-S{n}", is_active=True, base_price=10, mc_result=10)
+        db.add(product)
+        db.flush()
+        db.add(PriceSetup(code=f"BENCH-PS{n}", product_id=product.id, trade_price=12, is_active=True))
+    for n in range(memo_count):
+        code = f"BENCH-C{n % 50}"
+        if n < 50:
+            db.add(Customer(name=f"Chemist {n}", code=code, phone="017", address="Dhaka", is_active=True))
+        order = Order(
+            order_number=f"BENCH-{n}", memo_number=f"{10000000 + n}", customer_id=code, customer_code=code,
+            customer_name="Chemist", pso_id="P1", pso_code="P1", pso_name="PSO", delivery_date=date.today(),
+            status=OrderStatusEnum.APPROVED, validated=True,
+        )
+        order.items = [
+            OrderItem(product_code=f"BENCH-P{i}", product_name=f"Bench {i}", pack_size="10'S", quantity=5,
+                      free_goods=1 if i == 0 else 0, trade_price=10, delivery_date=date.today(), selected=True)
+            for i in range(ITEMS_PER_MEMO)
+        ]
+        db.add(order)
+    db.commit()
+    return db.query(Order).options(selectinload(Order.items)).all()
+
+
+def _legacy(db, orders):
+    writer = PdfWriter()
+    for page in PdfReader(io.BytesIO(generate_packing_report(orders=orders))).pages:
+        writer.add_page(page)
+    for order in orders:
+        pdf = generate_invoice_report(order=order, db=db, company_name=COMPANY["name"])
+        for page in PdfReader(io.BytesIO(pdf)).pages:
+            writer.add_page(page)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def _pipeline(db, orders, workers):
+    batch = print_pipeline.PrintBatch(db, orders, COMPANY, "CENTRAL STORE", "Bench route")
+    out = io.BytesIO()
+    batch.render(out, workers=workers)
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--memos", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--workers", type=int, default=print_pipeline.RENDER_WORKERS)
+    parser.add_argument("--skip-legacy-above", type=int, default=1000, help="skip the slow loop for larger runs")
+    args = parser.parse_args()
+
+    url = os.environ["DATABASE_URL"]
+    kwargs = {"connect_args": {"check_same_thread": False}, "poolclass": StaticPool} if url.startswith("sqlite") else {}
+    engine = create_engine(url, **kwargs)
+    queries = [0]
+    event.listen(engine, "before_cursor_execute", lambda *a: queries.__setitem__(0, queries[0] + 1))
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    print_pipeline.PARALLEL_MIN_MEMOS = 1
+
+    print(f"{'mode':<16}{'memos':>8}{'queries':>10}{'pages':>8}{'seconds':>10}")
+    for n in args.memos:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        db = Session()
+        try:
+            orders = _seed(db, n)
+            modes = [("pipeline x1", lambda: _pipeline(db, orders, 1)),
+                     (f"pipeline x{args.workers}", lambda: _pipeline(db, orders, args.workers))]
+            if n <= args.skip_legacy_above:
+                modes.insert(0, ("legacy", lambda: _legacy(db, orders)))
+            for mode, run in modes:
+                queries[0] = 0
+                started = time.perf_counter()
+                pdf = run()
+                elapsed = time.perf_counter() - started
+                pages = len(PdfReader(io.BytesIO(pdf)).pages)
+                print(f"{mode:<16}{n:>8}{queries[0]:>10}{pages:>8}{elapsed:>10.2f}")
+        finally:
+            db.close()
+    print_pipeline.shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
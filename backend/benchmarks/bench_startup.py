@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: worker startup time with and without schema/seed work.
+
+Starts N app processes at once, as a multi-worker server does, and measures
+how long each takes from interpreter start to a completed lifespan startup.
+The first mode runs migrations on every startup (the old behaviour and
+the development default). The second is the production profile, where
+``manage.py migrate`` ran once and workers only check the revision.
+
+    python benchmarks/bench_startup.py --workers 4 --runs 3
+    DATABASE_URL=postgresql://... python benchmarks/bench_startup.py
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import time
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+import main
+imported = time.perf_counter()
+with TestClient(main.app):
+    ready = time.perf_counter()
+print(f"{imported - started:.4f} {ready - imported:.4f}")
+"""
+
+
+def start_workers(count, env):
+    """Start ``count`` processes together; (import, lifespan) seconds per process and failures."""
+    procs = [
+        subprocess.Popen([sys.executable, "-c", CHILD], cwd=BACKEND, env=env,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        for _ in range(count)
+    ]
+    timings, failures = [], 0
+    for proc in procs:
+        out, _ = proc.communicate()
+        if proc.returncode != 0:
+            failures += 1
+            continue
+        imported, lifespan = out.strip().splitlines()[-1].split()
+        timings.append((float(imported), float(lifespan)))
+    return timings, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-startup-")
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'startup.db')}")
+    env.setdefault("SECRET_KEY", "bench-secret")
+    env.setdefault("CACHE_BACKEND", "memory")
+    env["DASHBOARD_KPI_RECONCILE_SECONDS"] = "0"
+    subprocess.run([sys.executable, "manage.py", "migrate"], cwd=BACKEND, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+
+    print(f"{'mode':<22}{'workers':>8}{'import ms':>11}{'lifespan ms':>13}{'slowest ms':>12}{'failed':>8}")
+    for label, migrations in (("migrate on startup", "true"), ("read-only startup", "false")):
+        imports, lifespans, slowest, failed = [], [], [], 0
+        for _ in range(args.runs):
+            timings, failures = start_workers(args.workers, {**env, "STARTUP_MIGRATIONS": migrations})
+            failed += failures
+            imports += [t[0] for t in timings]
+            lifespans += [t[1] for t in timings]
+            if timings:
+                slowest.append(max(a + b for a, b in timings))
+        print(f"{label:<22}{args.workers:>8}{statistics.median(imports) * 1000:>11.0f}"
+              f"{statistics.median(lifespans) * 1000:>13.1f}{statistics.median(slowest) * 1000:>12.0f}{failed:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SQL statements per order for order validation.
+
+Compares validating N orders one at a time (validate_order in a loop, the
+old POST /api/orders/validate behaviour) against a single
+validate_orders_batch call.
+
+    python benchmarks/bench_validation_queries.py --orders 50 300
+    DATABASE_URL=postgresql://... python benchmarks/bench_validation_queries.py
+"""
+import argparse
+import collections
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import selectinload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Customer, Employee, Order, OrderItem, OrderStatusEnum, Product, ProductItemStock, ProductItemStockDetail
+import app.models_platform  # noqa: F401
+from app.services.order_validation_service import OrderValidationService
+
+ITEMS_PER_ORDER = 20
+
+
+def _engine():
+    url = os.environ["DATABASE_URL"]
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    return create_engine(url)
+
+
+def _seed(db, tag, order_count):
+    user = db.query(Employee).filter(Employee.employee_id == "BENCH").first()
+    if not user:
+        user = Employee(employee_id="BENCH", first_name="Bench", email="bench@local", role="admin", is_active=True)
+        db.add(user)
+        db.add(Customer(name="Bench Chemist", code="BENCH-C", is_active=True, credit_limit=10 ** 12))
+        for n in range(ITEMS_PER_ORDER):
+            product = Product(name=f"Bench {n}", code=f"BENCH-P{n}", sku=f"BENCH-S{n}", is_active=True, base_price=10)
+            db.add(product)
+            db.flush()
+            stock = ProductItemStock(product_id=product.id, product_code=product.code, sku_code=product.sku)
+            db.add(stock)
+            db.flush()
+            for b in range(3):
+                db.add(ProductItemStockDetail(
+                    item_code=stock.id, batch_no=f"B{b}", expiry_date=date(2030, 1 + b, 1),
+                    available_quantity=10 ** 7, reserved_quantity=0, status="Unrestricted",
+                ))
+    orders = []
+    for n in range(order_count):
+        order = Order(
+            order_number=f"BENCH-{tag}-{n}", customer_id="BENCH-C", customer_name="Bench Chemist",
+            customer_code="BENCH-C", pso_id="P1", pso_name="PSO", delivery_date=date.today(),
+            status=OrderStatusEnum.DRAFT, order_type="COD",
+        )
+        db.add(order)
+        db.flush()
+        for i in range(ITEMS_PER_ORDER):
+            db.add(OrderItem(
+                order_id=order.id, product_code=f"BENCH-P{i}", product_name=f"Bench {i}",
+                quantity=5, trade_price=10, delivery_date=date.today(), selected=True,
+            ))
+        orders.append(order.id)
+    db.commit()
+    OrderValidationService.ensure_default_rules(db)
+    loaded = db.query(Order).options(selectinload(Order.items)).filter(Order.id.in_(orders)).all()
+    return user, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, nargs="+", default=[50, 300])
+    args = parser.parse_args()
+
+    engine = _engine()
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    counts = collections.Counter()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counts["select" if statement.lstrip().upper().startswith("SELECT") else "write"] += 1
+
+    print(f"{'mode':<10}{'orders':>8}{'selects':>10}{'writes':>10}{'stmts/order':>14}{'seconds':>10}")
+    for n in args.orders:
+        for mode in ("per-order", "batch"):
+            db = Session()
+            try:
+                user, orders = _seed(db, f"{mode}-{n}", n)
+                counts.clear()
+                started = time.perf_counter()
+                if mode == "batch":
+                    OrderValidationService.validate_orders_batch(db, orders, user)
+                else:
+                    for order in orders:
+                        OrderValidationService.validate_order(db, order, user)
+                elapsed = time.perf_counter() - started
+                total = counts["select"] + counts["write"]
+                print(f"{mode:<10}{n:>8}{counts['select']:>10}{counts['write']:>10}{total / n:>14.1f}{elapsed:>10.2f}")
+            finally:
+                db.close()
+
+
+if __name__ == "__main__":
+    main()
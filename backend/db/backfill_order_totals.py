@@ -0,0 +1,31 @@
+"""Backfill persisted order totals (gross/discount/net/selected/item count/trade value) on orders.
+
+Usage:
+    python db/backfill_order_totals.py            # only orders with no totals yet
+    python db/backfill_order_totals.py --all      # recompute every order
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.order_totals import OrderTotalsService
+
+
+def backfill_order_totals(recompute_all: bool = False, batch_size: int = 1000) -> int:
+    db = SessionLocal()
+    try:
+        return OrderTotalsService.backfill(db, batch_size=batch_size, only_missing=not recompute_all)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill order totals")
+    parser.add_argument("--all", action="store_true", help="recompute every order, not just missing ones")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    count = backfill_order_totals(args.all, args.batch_size)
+    print(f"✓ Updated totals on {count} orders")
@@ -0,0 +1,42 @@
+"""Production server: Gunicorn managing Uvicorn workers.
+
+    python manage.py migrate                     # once per deploy
+    gunicorn -c gunicorn.conf.py main:app
+
+Workers default to one per CPU (``WEB_CONCURRENCY`` overrides). Each worker
+runs ``THREADPOOL_SIZE`` threads for sync handlers. The worker count is
+exported before the app is imported, so each worker's DB pools take their
+share of ``DB_MAX_CONNECTIONS`` (see app/db_pool.py); raise that with the
+database's ``max_connections``, or put PgBouncer in front. The app is
+imported once in the master and forked, and workers start without schema
+work (``STARTUP_MIGRATIONS=false``).
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(max(2, multiprocessing.cpu_count()))))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+# Recycle workers now and then so slow leaks cannot build up.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+accesslog = "-"
+errorlog = "-"
+
+os.environ.setdefault("STARTUP_MIGRATIONS", "false")
+os.environ["WEB_CONCURRENCY"] = str(workers)  # read by app.db_pool when the app is preloaded
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with the workers.
+    from app.database import async_engine, engine
+    from app.read_replica import read_router
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    if read_router.replica is not None:
+        read_router.replica.dispose(close=False)
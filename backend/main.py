@@ -3,16 +3,23 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
-import redis.asyncio as redis
 import traceback
 
-from app.database import engine, Base
+from app.database import async_engine, engine
 from app.core.deps import require_auth
 from app.core.config import get_settings
 from app.core.audit_middleware import AuditWriteMiddleware
 
 # Import platform models so create_all registers them
 import app.models_platform  # noqa: F401
+# Session hooks that keep persisted order totals current
+import app.services.order_totals  # noqa: F401
+# Session hooks that keep dashboard KPI counters current
+import app.services.dashboard_kpis  # noqa: F401
+# Session hooks that drop cached catalogue lists on write
+import app.services.catalog_cache  # noqa: F401
+# Session hooks that drop written master rows from the two-tier lookup cache
+import app.services.master_data  # noqa: F401
 
 from app.routers import (
     auth, companies, depots, employees, customers, vendors,
@@ -28,49 +35,34 @@ from app.routers import (
 
 PROTECTED = [Depends(require_auth)]
 
-redis_client = None
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global redis_client
     settings = get_settings()
     settings.validate_production()
-    try:
-        redis_client = redis.from_url("redis://redis:6379/0", encoding="utf-8", decode_responses=True)
-    except Exception:
-        redis_client = None
-    Base.metadata.create_all(bind=engine)
-    # Apply legacy column alters on existing PostgreSQL volumes (safe IF NOT EXISTS)
-    try:
-        from sqlalchemy import text
-        from app.database import SessionLocal
-        db = SessionLocal()
-        try:
-            db.execute(text(
-                "ALTER TABLE employees ADD COLUMN IF NOT EXISTS is_blocked BOOLEAN DEFAULT FALSE"
-            ))
-            db.commit()
-        finally:
-            db.close()
-    except Exception as exc:
-        print(f"Startup schema patch skipped: {exc}")
-    # Seed permissions and validation rules
-    from app.database import SessionLocal
-    from app.core.permissions import PERMISSIONS
-    from app.models_platform import Permission
-    from app.services.order_validation_service import OrderValidationService
-    db = SessionLocal()
-    try:
-        for code, name, module in PERMISSIONS:
-            if not db.query(Permission).filter(Permission.code == code).first():
-                db.add(Permission(code=code, name=name, module=module))
-        OrderValidationService.ensure_default_rules(db)
-        db.commit()
-    finally:
-        db.close()
+    # Sync handlers run on this many threads; DB pools are sized to match.
+    from anyio import to_thread
+    from app.db_pool import WORKER_THREADS
+    to_thread.current_default_thread_limiter().total_tokens = WORKER_THREADS
+    from app.bootstrap import check_schema, migrate
+    if settings.startup_migrations:
+        migrate(engine)
+    else:
+        check_schema(engine)
+    from app.services.audit_writer import audit_writer
+    audit_writer.start()
+    from app.services.dashboard_kpis import kpi_reconciler
+    kpi_reconciler.start()
+    from app.services.master_data import master_data
+    master_data.start_listener()
     yield
-    if redis_client:
-        await redis_client.close()
+    master_data.stop_listener()
+    await kpi_reconciler.stop()
+    await audit_writer.stop()
+    from app.reports.print_pipeline import shutdown_pool
+    shutdown_pool()
+    from app.redis_cache import cache
+    cache.close()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Swift Distribution Hub API",
@@ -169,3 +161,15 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/health/cache", dependencies=PROTECTED)
+async def cache_health():
+    from app.redis_cache import cache
+    from app.services.master_data import master_data
+    return {"available": cache.available, "metrics": cache.metrics(), "master_data": master_data.metrics()}
+
+@app.get("/health/db", dependencies=PROTECTED)
+async def db_health():
+    from app.db_pool import pool_metrics
+    from app.read_replica import read_router
+    return {"pools": pool_metrics.snapshot(), "replica": read_router.status()}
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+"""
+Operational commands.
+
+    python manage.py migrate      # schema (Alembic head) + seed data, once per deploy
+    python manage.py check        # exit 1 when the database is behind the code
+"""
+import argparse
+import logging
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("migrate", "check"))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+
+    from app.bootstrap import check_schema, migrate
+    from app.database import engine
+
+    if args.command == "migrate":
+        migrate(engine)
+        print("Database is up to date.")
+        return 0
+    return 0 if check_schema(engine) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
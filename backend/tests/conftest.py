@@ -6,13 +6,17 @@ os.environ.setdefault("ENVIRONMENT", "development")
 os.environ.setdefault("REQUIRE_AUTH", "true")
 os.environ.setdefault("SECRET_KEY", "test-secret-key-for-pytest-only")
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ.setdefault("CACHE_BACKEND", "memory")
 
+import aiosqlite
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from app.database import Base, get_db
+from app.database import Base, get_async_db, get_db
+from app.read_replica import get_read_db
 from app.auth import get_password_hash
 from app.models import Employee
 import app.models_platform  # noqa: F401
@@ -26,8 +30,36 @@ engine = create_engine(
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+async def _shared_sqlite():
+    # The async engine drives the same in-memory database as ``engine``.
+    conn = aiosqlite.Connection(lambda: engine.raw_connection().driver_connection, 64)
+    conn.daemon = True
+    return await conn
+
+async_engine = create_async_engine(
+    "sqlite+aiosqlite://",
+    async_creator=_shared_sqlite,
+    poolclass=StaticPool,
+    pool_reset_on_return=None,
+)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
 @pytest.fixture(scope="function")
 def db_session():
+    from app.core.principal import principal_cache
+    from app.redis_cache import cache
+    from app.services.fefo_index import fefo_index
+    from app.services.master_data import master_data
+    from app.services.promotion_service import promotion_catalog
+
+    # Row ids are reused between tests once tables are dropped.
+    fefo_index.clear()
+    principal_cache.invalidate()
+    promotion_catalog.invalidate()
+    master_data.clear()
+    cache.clear()
+    cache.reset_metrics()
     Base.metadata.create_all(bind=engine)
     session = TestingSessionLocal()
     try:
@@ -46,6 +78,13 @@ def client(db_session):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
@@ -100,3 +139,35 @@ def user_auth_headers(client, regular_user):
     resp = client.post("/api/auth/login", json={"email": "user@test.com", "password": "user123", "remember_me": False})
     token = resp.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
+
+
+class QueryCounter:
+    """Counts SQL statements issued on the test engine (executemany counts once)."""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+    def statements_matching(self, fragment):
+        return sum(1 for s in self.statements if fragment in s)
+
+
+@pytest.fixture
+def query_counter():
+    from contextlib import contextmanager
+    from sqlalchemy import event
+
+    @contextmanager
+    def _count():
+        counter = QueryCounter()
+        event.listen(engine, "before_cursor_execute", counter)
+        try:
+            yield counter
+        finally:
+            event.remove(engine, "before_cursor_execute", counter)
+
+    return _count
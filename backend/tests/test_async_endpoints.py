@@ -0,0 +1,47 @@
+"""Mobile, sync and tracking endpoints served from the async session."""
+from datetime import date
+
+from app.models import Order, OrderStatusEnum, Vehicle
+
+
+def _memo(n, employee_id, vehicle_id, **extra):
+    return Order(
+        order_number=f"M-{n}", memo_number=f"MEMO-{n}", customer_id="C1", customer_name="Chemist",
+        pso_id="P1", pso_name="PSO", delivery_date=date(2026, 1, 1), status=OrderStatusEnum.APPROVED,
+        loading_number="LD-1", assigned_to=employee_id, assigned_vehicle=vehicle_id, loaded=True, **extra,
+    )
+
+
+def test_mobile_memos_accept_and_status(client, db_session, admin_user, auth_headers):
+    vehicle = Vehicle(vehicle_id="V1", vehicle_type="Van", registration_number="DHA-1")
+    db_session.add(vehicle)
+    db_session.commit()
+    db_session.add_all([_memo(1, admin_user.id, vehicle.id), _memo(2, admin_user.id, vehicle.id)])
+    db_session.commit()
+
+    memos = client.get("/api/mobile/assigned-memos", headers=auth_headers).json()
+    assert sorted(m["memo_number"] for m in memos) == ["MEMO-1", "MEMO-2"]
+    assert memos[0]["assigned_vehicle_registration"] == "DHA-1"
+
+    resp = client.post("/api/mobile/accept-memo", headers=auth_headers, json={"memo_number": "MEMO-1", "user_id": "u1"})
+    assert resp.json()["success"] is True
+    db_session.expire_all()
+    assert db_session.query(Order).filter(Order.memo_number == "MEMO-1").one().mobile_accepted is True
+
+    status = client.get("/api/mobile/loading-number/LD-1/status", headers=auth_headers).json()
+    assert (status["accepted_memos"], status["pending_memos"]) == (1, 1)
+    mine = client.get("/api/mobile/my-accepted-memos", params={"user_id": "u1"}, headers=auth_headers).json()
+    assert [m["memo_number"] for m in mine] == ["MEMO-1"]
+
+
+def test_tracking_and_sync_pull(client, db_session, auth_headers):
+    db_session.add(_memo(3, None, None))
+    db_session.commit()
+
+    tracking = client.get("/api/order-deliveries/tracking/MEMO-3", headers=auth_headers).json()
+    assert tracking["order_number"] == "M-3"
+    assert client.get("/api/order-deliveries/tracking/NOPE", headers=auth_headers).status_code == 404
+
+    resp = client.get("/api/sync/pull", params={"source_system": "DEX"}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.json() == {"items": []}
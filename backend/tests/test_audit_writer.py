@@ -0,0 +1,69 @@
+"""Batched audit writer and the audit middleware."""
+import asyncio
+from datetime import date
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Order, OrderStatusEnum
+from app.models_platform import AuditLog
+from app.services.audit_service import AuditService
+from app.services.audit_writer import USER_EMAIL_KEY, AuditWriter, audit_writer
+
+
+def _sessions(db_session):
+    return sessionmaker(autoflush=False, bind=db_session.get_bind())
+
+
+def _row(n, **extra):
+    return {**AuditService.entry_values(entity_type="test", entity_id=str(n), action="HTTP_POST"), **extra}
+
+
+def test_rows_are_inserted_in_batches(db_session, query_counter):
+    writer = AuditWriter(session_factory=_sessions(db_session), batch_size=50, flush_interval=0.05, max_queue=10)
+
+    async def run():
+        writer.start()
+        for n in range(120):
+            await writer.submit(_row(n))
+        await writer.stop()
+
+    with query_counter() as counter:
+        asyncio.run(run())
+    assert db_session.query(AuditLog).count() == 120
+    assert writer.written == 120
+    # one statement per batch; the small queue caps a batch at about its size
+    assert counter.statements_matching("INSERT INTO audit_logs") <= 120 // 10 + 1
+
+
+def test_token_subject_is_resolved_once_per_batch(db_session, admin_user, query_counter):
+    writer = AuditWriter(session_factory=_sessions(db_session))
+    with query_counter() as counter:
+        writer.write_batch([_row(n, **{USER_EMAIL_KEY: "admin@test.com"}) for n in range(5)] + [_row(5)])
+    assert counter.statements_matching("FROM employees") == 1
+    rows = db_session.query(AuditLog).order_by(AuditLog.id).all()
+    assert [r.user_id for r in rows] == [admin_user.id] * 5 + [None]
+    assert rows[0].user_name == "Admin User"
+
+
+def test_failing_row_does_not_drop_its_batch(db_session):
+    writer = AuditWriter(session_factory=_sessions(db_session))
+    writer.write_batch([_row(0), _row(1, action=None), _row(2)])  # action is NOT NULL
+    assert [r.entity_id for r in db_session.query(AuditLog).order_by(AuditLog.id)] == ["0", "2"]
+    assert writer.written == 2
+
+
+def test_middleware_reuses_authenticated_user(client, db_session, auth_headers, monkeypatch, query_counter):
+    monkeypatch.setattr(audit_writer, "session_factory", _sessions(db_session))
+    db_session.add(Order(
+        order_number="AU-1", customer_id="C1", customer_name="Chemist", pso_id="P1", pso_name="PSO",
+        delivery_date=date(2026, 1, 1), status=OrderStatusEnum.APPROVED, route_code="R0",
+    ))
+    db_session.commit()
+    with query_counter() as counter:
+        resp = client.post("/api/orders/route-wise/validate", json={"route_code": "R0"}, headers=auth_headers)
+        client.portal.call(audit_writer.stop)
+    assert resp.status_code < 300
+    assert counter.statements_matching("FROM employees") == 1  # require_auth only
+    entry = db_session.query(AuditLog).filter(AuditLog.action == "HTTP_POST").one()
+    assert entry.entity_type == "orders"
+    assert entry.user_name == "Admin User"
@@ -0,0 +1,148 @@
+"""Batched multi-order validation."""
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import selectinload
+
+from app.models import Customer, Order, OrderItem, OrderStatusEnum, Product, ProductItemStock, ProductItemStockDetail
+from app.models_platform import OrderBatchAllocation, OrderValidationMessage
+from app.services.fefo_index import fefo_index
+from app.services.order_validation_service import OrderValidationService
+
+
+def _seed_stock(db_session, batches):
+    customer = Customer(name="Chemist", code="C100", is_active=True, credit_limit=10000000)
+    product = Product(name="Med Batch", code="PRD100", sku="SKU100", is_active=True, base_price=10)
+    db_session.add_all([customer, product])
+    db_session.flush()
+    stock = ProductItemStock(product_id=product.id, product_code=product.code, sku_code=product.sku)
+    db_session.add(stock)
+    db_session.flush()
+    details = []
+    for batch_no, expiry, qty in batches:
+        detail = ProductItemStockDetail(
+            item_code=stock.id, batch_no=batch_no, expiry_date=expiry,
+            available_quantity=qty, reserved_quantity=0, status="Unrestricted",
+        )
+        db_session.add(detail)
+        details.append(detail)
+    db_session.flush()
+    return details
+
+
+def _seed_orders(db_session, count, qty, order_type="COD"):
+    orders = []
+    for n in range(count):
+        order = Order(
+            order_number=f"T-BATCH-{n}",
+            customer_id="C100",
+            customer_name="Chemist",
+            customer_code="C100",
+            pso_id="P1",
+            pso_name="PSO",
+            delivery_date=date.today(),
+            status=OrderStatusEnum.DRAFT,
+            order_type=order_type,
+        )
+        db_session.add(order)
+        db_session.flush()
+        db_session.add(OrderItem(
+            order_id=order.id, product_code="PRD100", product_name="Med Batch",
+            quantity=qty, trade_price=10, delivery_date=date.today(), selected=True,
+        ))
+        orders.append(order)
+    db_session.commit()
+    return orders
+
+
+def _load(db_session, orders):
+    return (
+        db_session.query(Order)
+        .options(selectinload(Order.items))
+        .filter(Order.id.in_([o.id for o in orders]))
+        .order_by(Order.id)
+        .all()
+    )
+
+
+def test_batch_allocates_fefo_across_orders(db_session, admin_user):
+    late, early = _seed_stock(db_session, [
+        ("B-LATE", date(2027, 6, 30), 100),
+        ("B-EARLY", date(2026, 12, 31), 15),
+    ])
+    orders = _seed_orders(db_session, 2, 10)
+
+    runs = OrderValidationService.validate_orders_batch(db_session, _load(db_session, orders), admin_user)
+    assert [r.validation_status.value for r in runs] == ["VALIDATED", "VALIDATED"]
+
+    db_session.refresh(early)
+    db_session.refresh(late)
+    assert Decimal(str(early.available_quantity)) == Decimal("0")
+    assert Decimal(str(late.available_quantity)) == Decimal("95")
+
+    second = db_session.query(OrderBatchAllocation).filter(
+        OrderBatchAllocation.order_id == orders[1].id
+    ).order_by(OrderBatchAllocation.expiry_date).all()
+    assert [(a.batch_no, Decimal(str(a.allocated_qty))) for a in second] == [
+        ("B-EARLY", Decimal("5")), ("B-LATE", Decimal("5")),
+    ]
+    assert all(a.allocation_status == "RESERVED" for a in second)
+
+
+def test_batch_short_order_does_not_consume_stock(db_session, admin_user):
+    (detail,) = _seed_stock(db_session, [("B1", date(2026, 12, 31), 25)])
+    big = _seed_orders(db_session, 1, 40)
+    small = _seed_orders(db_session, 1, 20)
+
+    runs = OrderValidationService.validate_orders_batch(
+        db_session, _load(db_session, big) + _load(db_session, small), admin_user,
+    )
+    assert runs[0].validation_status.value == "FAILED"
+    assert runs[1].validation_status.value == "VALIDATED"
+
+    db_session.refresh(detail)
+    assert Decimal(str(detail.available_quantity)) == Decimal("5")
+    assert Decimal(str(detail.reserved_quantity)) == Decimal("20")
+    assert db_session.query(OrderValidationMessage).filter(
+        OrderValidationMessage.order_id == big[0].id,
+        OrderValidationMessage.rule_code == "STOCK_AVAILABLE",
+    ).count() == 1
+
+
+def test_batch_issues_fewer_queries_than_per_order_loop(db_session, admin_user, query_counter):
+    _seed_stock(db_session, [("B1", date(2026, 12, 31), 100000)])
+    OrderValidationService.ensure_default_rules(db_session)
+    looped = _load(db_session, _seed_orders(db_session, 20, 1))
+    batched = _load(db_session, _seed_orders(db_session, 20, 1))
+
+    with query_counter() as loop_count:
+        for order in looped:
+            OrderValidationService.validate_order(db_session, order, admin_user)
+    with query_counter() as batch_count:
+        OrderValidationService.validate_orders_batch(db_session, batched, admin_user)
+
+    assert batch_count.count * 2 < loop_count.count
+
+
+def test_batch_reruns_a_deadlock_victim(db_session, admin_user, monkeypatch):
+    (detail,) = _seed_stock(db_session, [("B-ONLY", date(2027, 6, 30), 50)])
+    orders = _seed_orders(db_session, 2, 10)
+    lock_for_demand = fefo_index.lock_for_demand
+    calls = []
+
+    class Deadlock(Exception):
+        pgcode = "40P01"
+
+    def deadlock_once(db, demand):
+        calls.append(demand)
+        if len(calls) == 1:
+            raise OperationalError("SELECT ... FOR UPDATE", {}, Deadlock("deadlock detected"))
+        return lock_for_demand(db, demand)
+
+    monkeypatch.setattr(fefo_index, "lock_for_demand", deadlock_once)
+    runs = OrderValidationService.validate_orders_batch(db_session, _load(db_session, orders), admin_user)
+    assert len(calls) == 2
+    assert [r.validation_status.value for r in runs] == ["VALIDATED", "VALIDATED"]
+    db_session.refresh(detail)
+    assert Decimal(str(detail.available_quantity)) == Decimal("30")
@@ -0,0 +1,45 @@
+"""One-shot migrate command and read-only worker startup."""
+import logging
+
+from alembic import command
+from sqlalchemy import create_engine, func
+
+from app.bootstrap import alembic_config, check_schema, head_revision, migrate
+from app.core.config import Settings
+from app.database import SessionLocal
+from app.models_platform import Permission, ValidationRuleConfig
+
+
+def test_migrate_is_idempotent(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    try:
+        migrate(engine)
+        migrate(engine)
+        with SessionLocal(bind=engine) as db:
+            permissions = db.query(func.count(Permission.id)).scalar()
+            assert permissions > 0
+            assert db.query(func.count(Permission.code.distinct())).scalar() == permissions
+            assert db.query(ValidationRuleConfig).count() > 0
+        assert check_schema(engine)
+        assert head_revision(engine).startswith("009")
+    finally:
+        engine.dispose()
+
+
+def test_in_process_alembic_keeps_server_loggers(tmp_path, monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    server_logger = logging.getLogger("uvicorn.error")
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    try:
+        command.current(alembic_config(engine))  # runs alembic/env.py as upgrade does
+    finally:
+        engine.dispose()
+    assert not server_logger.disabled
+
+
+def test_production_workers_skip_schema_work(monkeypatch):
+    monkeypatch.delenv("STARTUP_MIGRATIONS", raising=False)
+    monkeypatch.setenv("ENVIRONMENT", "production")
+    assert Settings().startup_migrations is False
+    monkeypatch.setenv("ENVIRONMENT", "development")
+    assert Settings().startup_migrations is True
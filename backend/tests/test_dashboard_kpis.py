@@ -0,0 +1,104 @@
+"""Dashboard KPI counters: rebuild, incremental updates and reconciliation."""
+from datetime import date
+
+from sqlalchemy import update
+
+from app.models import Order, OrderStatusEnum, StockLedger
+from app.services.dashboard_kpis import DashboardKpiService
+
+
+def _order(n, depot_code="D1", **extra):
+    return Order(
+        order_number=f"K-{n}", customer_id="C1", customer_name="Chemist", pso_id="P1", pso_name="PSO",
+        delivery_date=date(2026, 1, 1), status=OrderStatusEnum.APPROVED, depot_code=depot_code,
+        route_code="R1", **extra,
+    )
+
+
+def _seed(db_session):
+    db_session.add_all([
+        _order(1, validated=False),
+        _order(2, validated=True, loaded=False),
+        _order(3, validated=True, loaded=True, loading_number="20260101-0001"),
+        _order(4, depot_code="D2", collection_status="Pending", collection_approved=False),
+        StockLedger(quantity=40),
+    ])
+    db_session.commit()
+
+
+def test_first_read_builds_then_reads_counters(client, db_session, auth_headers, query_counter):
+    _seed(db_session)
+    first = client.get("/api/dashboard/kpis", headers=auth_headers).json()
+    assert first["total_stock"] == 40
+    assert first["orders_today"] == 4
+    assert first["order_management"]["pending_validation"] == 2
+    assert first["order_management"]["validated"] == 1
+    assert first["order_management"]["assigned"] == 1
+    assert first["order_management"]["pending_collection"] == 1
+
+    with query_counter() as counter:
+        assert client.get("/api/dashboard/kpis", headers=auth_headers).json() == first
+    assert counter.statements_matching("FROM orders") == 0
+    assert counter.statements_matching("FROM stock_ledger") == 0
+
+
+def test_writes_move_counters_with_their_transaction(db_session, query_counter):
+    _seed(db_session)
+    DashboardKpiService.kpis(db_session)
+    order = db_session.query(Order).filter(Order.order_number == "K-2").one()
+
+    order.loaded, order.loading_number = True, "20260101-0002"
+    db_session.add(_order(5, depot_code="D2", validated=False))
+    db_session.add(StockLedger(quantity=-15))
+    with query_counter() as counter:
+        db_session.commit()
+    assert counter.statements_matching("FROM orders") == 0
+
+    order.collection_status = "Fully Collected"
+    db_session.flush()
+    db_session.rollback()
+
+    depot = DashboardKpiService.kpis(db_session, "D1")
+    assert depot["order_management"]["validated"] == 0
+    assert depot["order_management"]["assigned"] == 2
+    assert depot["order_management"]["fully_delivered"] == 0
+    overall = DashboardKpiService.kpis(db_session)
+    assert overall["orders_today"] == 5
+    assert overall["order_management"]["pending_validation"] == 3
+    assert overall["total_stock"] == 25
+    assert DashboardKpiService.reconcile(db_session) == {}
+
+
+def test_reconcile_corrects_drift_from_bulk_updates(db_session):
+    _seed(db_session)
+    DashboardKpiService.kpis(db_session)
+    db_session.execute(update(Order).where(Order.depot_code == "D1").values(validated=True, loaded=False))
+    db_session.commit()
+
+    drift = DashboardKpiService.reconcile(db_session)
+    db_session.commit()
+    assert drift["D1"]["validated"] == (1, 3)
+    assert drift["D1"]["assigned"] == (1, 0)
+    assert DashboardKpiService.kpis(db_session, "D1")["order_management"]["validated"] == 3
+
+
+def test_counters_are_written_after_the_business_commit(db_session, query_counter, monkeypatch):
+    _seed(db_session)
+    DashboardKpiService.kpis(db_session)
+    order = db_session.query(Order).filter(Order.order_number == "K-1").one()
+
+    order.customer_name = "Renamed chemist"  # no counter moves
+    with query_counter() as counter:
+        db_session.commit()
+    assert counter.statements_matching("dashboard_kpis") == 0
+
+    def fail(db, deltas):
+        raise RuntimeError("counter row busy")
+
+    monkeypatch.setattr(DashboardKpiService, "apply", staticmethod(fail))
+    db_session.refresh(order)  # known before values: a delta, not a recount
+    order.validated = True
+    db_session.commit()  # the order commits even though its counters could not be moved
+    db_session.expire_all()
+    assert db_session.get(Order, order.id).validated is True
+    assert DashboardKpiService.reconcile(db_session)["D1"]["validated"] == (1, 2)
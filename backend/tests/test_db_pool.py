@@ -0,0 +1,61 @@
+"""Pool sizing options and pool metrics."""
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from app import db_pool
+from app.db_pool import MeteredQueuePool, engine_options, pool_metrics
+
+
+def test_postgres_options_follow_the_environment(monkeypatch):
+    options = engine_options("postgresql://u:p@db/app", {"connect_timeout": 2})
+    assert options["poolclass"] is MeteredQueuePool
+    budget = db_pool.pool_budget(db_pool.MAX_CONNECTIONS, db_pool.WEB_WORKERS, db_pool.WORKER_THREADS)
+    assert (options["pool_size"], options["max_overflow"]) == (budget["pool_size"], budget["max_overflow"])
+    assert "statement_timeout=" in options["connect_args"]["options"]
+    assert options["connect_args"]["connect_timeout"] == 2
+
+    monkeypatch.setattr(db_pool, "PGBOUNCER", True)
+    options = engine_options("postgresql://u:p@pgbouncer/app")
+    assert options["poolclass"].__name__ == "NullPool"
+    assert "options" not in options["connect_args"]
+
+
+@pytest.mark.parametrize("workers", [1, 2, 4, 8, 16])
+def test_pools_fit_the_connection_budget(workers):
+    budget = db_pool.pool_budget(100, workers, threads=40)
+    per_worker = sum(budget.values())
+    assert workers * per_worker <= 100
+    assert budget["async_pool_size"] >= 1 and budget["pool_size"] >= 1
+    assert budget["pool_size"] + budget["max_overflow"] <= 40
+
+
+def test_waits_and_timeouts_are_counted(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=MeteredQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.3,
+    )
+    pool_metrics.register("test", engine)
+    try:
+        held = engine.connect()
+        with pytest.raises(PoolTimeout):
+            engine.connect()
+
+        threading.Timer(0.1, held.close).start()
+        with engine.connect():
+            stats = pool_metrics.snapshot()["test"]
+        assert stats["checked_out"] == 1
+        assert stats["checkouts"] == 2
+        assert stats["timeouts"] == 1
+        assert stats["waits"] == 2
+        assert stats["wait_seconds_max"] >= 0.25
+    finally:
+        pool_metrics.unregister("test")
+        engine.dispose()
+
+
+def test_health_endpoint_reports_pools(client, auth_headers):
+    body = client.get("/health/db", headers=auth_headers).json()
+    assert "primary" in body["pools"]
+    assert body["replica"]["configured"] is False
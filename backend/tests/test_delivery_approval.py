@@ -0,0 +1,68 @@
+"""Loading-group delivery approval: one bulk write and idempotent retries."""
+from datetime import date
+from decimal import Decimal
+
+from app.models import Order, OrderItem, OrderStatusEnum
+
+URL = "/api/orders/assigned/approve-delivery"
+
+
+def _seed(db_session, count=3):
+    orders = [
+        Order(
+            order_number=f"DA-{n}", memo_number=f"{n:08d}", customer_id="C1", customer_name="Chemist",
+            pso_id="P1", pso_name="PSO", delivery_date=date(2026, 1, 1), status=OrderStatusEnum.APPROVED,
+            loading_number="LD-9", loaded=True,
+            items=[OrderItem(
+                product_code="P1", product_name="Product", quantity=3, trade_price=100, delivery_date=date(2026, 1, 1),
+            )],
+        )
+        for n in range(1, count + 1)
+    ]
+    db_session.add_all(orders)
+    db_session.commit()
+    return orders
+
+
+def test_memos_settle_in_one_update(client, db_session, auth_headers, query_counter):
+    orders = _seed(db_session, count=4)
+    memos = [
+        {"memo_number": "00000001", "delivered_quantity": 10, "returned_quantity": 0},
+        {"memo_number": "00000002", "delivered_quantity": 0, "returned_quantity": 10},
+        {"memo_number": "00000003", "delivered_quantity": 1, "returned_quantity": 2},
+    ]
+    with query_counter() as counter:
+        body = client.post(URL, headers=auth_headers, json={"loading_number": "LD-9", "memos": memos}).json()
+    assert body["approved_count"] == 3
+    assert counter.statements_matching("UPDATE orders") == 1
+    assert counter.statements_matching("FROM order_items") == 0
+
+    db_session.expire_all()
+    settled = {
+        o.memo_number: (o.collection_status, o.collected_amount, o.pending_amount, o.collection_source)
+        for o in db_session.query(Order).filter(Order.id.in_([o.id for o in orders]))
+    }
+    assert settled == {
+        "00000001": ("Pending", Decimal("300.00"), Decimal("0.00"), "Web"),
+        "00000002": ("Postponed", Decimal("0.00"), Decimal("300.00"), "Web"),
+        "00000003": ("Partially Collected", Decimal("100.00"), Decimal("200.00"), "Web"),
+        "00000004": (None, Decimal("0.00"), None, None),
+    }
+
+
+def test_retry_with_the_same_key_is_not_reprocessed(client, db_session, auth_headers, query_counter):
+    _seed(db_session, count=1)
+    payload = {
+        "loading_number": "LD-9", "idempotency_key": "approve-LD-9-1",
+        "memos": [{"memo_number": "00000001", "delivered_quantity": 5, "returned_quantity": 0}],
+    }
+    first = client.post(URL, headers=auth_headers, json=payload).json()
+    assert first["replayed"] is False
+
+    with query_counter() as counter:
+        retry = client.post(URL, headers=auth_headers, json=payload).json()
+    assert retry == {**first, "replayed": True}
+    assert counter.statements_matching("UPDATE orders") == 0
+
+    other = client.post(URL, headers=auth_headers, json={**payload, "loading_number": "LD-10"})
+    assert other.status_code == 409
@@ -0,0 +1,108 @@
+"""In-memory FEFO allocation index."""
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+from app.models import Product, ProductItemStock, ProductItemStockDetail
+from app.services.fefo_index import fefo_index
+
+
+def _seed(db_session):
+    product = Product(name="Med FEFO", code="PRD200", sku="SKU200", is_active=True, base_price=10)
+    db_session.add(product)
+    db_session.flush()
+    stock = ProductItemStock(product_id=product.id, product_code=product.code, sku_code=product.sku)
+    db_session.add(stock)
+    db_session.flush()
+    late = ProductItemStockDetail(
+        item_code=stock.id, batch_no="LATE", expiry_date=date(2031, 1, 1),
+        available_quantity=50, reserved_quantity=0, status="Unrestricted",
+    )
+    early = ProductItemStockDetail(
+        item_code=stock.id, batch_no="EARLY", expiry_date=date(2030, 1, 1),
+        available_quantity=20, reserved_quantity=0, status="Unrestricted",
+    )
+    db_session.add_all([late, early])
+    db_session.commit()
+    return product, stock, late, early
+
+
+def test_rebuild_orders_batches_by_expiry(db_session):
+    product, _, late, early = _seed(db_session)
+    assert fefo_index.rebuild(db_session) == 2
+    assert fefo_index.candidate_ids(product.id, None) == [early.id, late.id]
+    assert fefo_index.check_consistency(db_session) == []
+
+
+def test_committed_writes_update_index(db_session):
+    product, stock, late, early = _seed(db_session)
+    fefo_index.ensure_loaded(db_session, [product.id])
+
+    early.available_quantity = 0
+    late.available_quantity = 45
+    receipt = ProductItemStockDetail(
+        item_code=stock.id, batch_no="MID", expiry_date=date(2030, 6, 1),
+        available_quantity=10, reserved_quantity=0, status="Unrestricted",
+    )
+    db_session.add(receipt)
+    db_session.commit()
+
+    assert fefo_index.candidate_ids(product.id, None) == [receipt.id, late.id]
+    assert fefo_index.available(late.id) == Decimal("45")
+    assert fefo_index.check_consistency(db_session) == []
+
+
+def test_rolled_back_writes_are_discarded(db_session):
+    product, _, late, early = _seed(db_session)
+    fefo_index.ensure_loaded(db_session, [product.id])
+
+    early.available_quantity = 0
+    db_session.flush()
+    db_session.rollback()
+
+    assert fefo_index.candidate_ids(product.id, None) == [early.id, late.id]
+    assert fefo_index.available(early.id) == Decimal("20")
+
+
+def test_lock_for_demand_stops_at_covering_batches(db_session):
+    product, _, late, early = _seed(db_session)
+
+    rows = fefo_index.lock_for_demand(db_session, {(product.id, None): Decimal("15")})
+    assert [detail.id for detail, _, _ in rows] == [early.id]
+
+    rows = fefo_index.lock_for_demand(db_session, {(product.id, None): Decimal("30")})
+    assert sorted(detail.id for detail, _, _ in rows) == sorted([early.id, late.id])
+
+
+def test_lock_for_demand_sees_batches_received_on_another_worker(db_session):
+    product, stock, late, early = _seed(db_session)
+    fefo_index.ensure_loaded(db_session, [product.id])
+
+    # Written without the ORM, so this worker's session hooks never see it
+    db_session.execute(insert(ProductItemStockDetail).values(
+        item_code=stock.id, batch_no="EARLIEST", expiry_date=date(2029, 1, 1),
+        available_quantity=30, reserved_quantity=0, status="Unrestricted",
+    ))
+    db_session.commit()
+    earliest = db_session.query(ProductItemStockDetail).filter_by(batch_no="EARLIEST").one()
+
+    rows = fefo_index.lock_for_demand(db_session, {(product.id, None): Decimal("15")})
+    assert [detail.id for detail, _, _ in rows] == [earliest.id]
+    rows = fefo_index.lock_for_demand(db_session, {(product.id, None): Decimal("100")})
+    assert sorted(detail.id for detail, _, _ in rows) == sorted([earliest.id, early.id, late.id])
+
+
+def test_consistency_check_reports_out_of_band_writes(db_session):
+    product, _, late, early = _seed(db_session)
+    fefo_index.ensure_loaded(db_session, [product.id])
+
+    db_session.query(ProductItemStockDetail).filter(ProductItemStockDetail.id == late.id).update(
+        {"available_quantity": 5}, synchronize_session=False
+    )
+    db_session.commit()
+
+    mismatches = fefo_index.check_consistency(db_session)
+    assert mismatches == [{"detail_id": late.id, "issue": "stale", "index_available": 50.0, "db_available": 5.0}]
+    fefo_index.rebuild(db_session)
+    assert fefo_index.check_consistency(db_session) == []
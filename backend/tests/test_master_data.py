@@ -0,0 +1,71 @@
+"""Master data cache: local and Redis tiers, bulk lookups and invalidation."""
+import json
+
+from app.models import PriceSetup, Product
+from app.redis_cache import cache
+from app.services.master_data import CHANNEL, master_data
+
+
+def _seed(db_session):
+    db_session.add_all([
+        Product(name="Napa", code="P1", sku="S1", is_active=True),
+        Product(name="Ace", code="P2", sku="S2", is_active=True),
+    ])
+    db_session.commit()
+
+
+def test_bulk_lookups_fill_both_tiers(db_session, query_counter):
+    _seed(db_session)
+    with query_counter() as counter:
+        products = master_data.get_many(db_session, "product", ["P1", "S2", "missing"], ("code", "sku"))
+    assert {code: p.name for code, p in products.items()} == {"P1": "Napa", "S2": "Ace"}
+    assert counter.statements_matching("FROM products") == 2  # by code, then the rest by SKU
+
+    with query_counter() as counter:
+        assert master_data.get(db_session, "product", "P1").name == "Napa"
+    assert counter.count == 0
+
+    master_data.clear_local()  # another worker: only Redis holds the row
+    with query_counter() as counter:
+        assert master_data.rows(db_session, "product", ["P2"])["P2"]["sku"] == "S2"
+    assert counter.count == 0
+    assert master_data.metrics()["redis_hits"] == 1
+
+
+def test_commit_drops_written_rows(db_session):
+    _seed(db_session)
+    product = master_data.get(db_session, "product", "P1")
+    db_session.add(PriceSetup(code="PR1", product_id=product.id, trade_price=10, is_active=True))
+    product.name = "Napa Extra"
+    db_session.flush()
+    # Uncommitted writes are read from the database and never cached.
+    assert master_data.rows(db_session, "product", ["P1"])["P1"]["name"] == "Napa Extra"
+    db_session.rollback()
+    assert master_data.rows(db_session, "product", ["P1"])["P1"]["name"] == "Napa"
+    assert master_data.rows(db_session, "price_setup", [product.id], field="product_id") == {product.id: []}
+
+    db_session.add(PriceSetup(code="PR1", product_id=product.id, trade_price=10, is_active=True))
+    db_session.get(Product, product.id).name = "Napa Extra"
+    db_session.commit()
+    assert master_data.rows(db_session, "product", ["P1"])["P1"]["name"] == "Napa Extra"
+    prices = master_data.rows(db_session, "price_setup", [product.id], field="product_id")[product.id]
+    assert [price["code"] for price in prices] == ["PR1"]
+
+
+def test_messages_from_other_workers_evict_local_rows(db_session, query_counter):
+    _seed(db_session)
+    master_data.rows(db_session, "product", ["P1"])
+    cache.delete(master_data.redis_key("product", "code", "P1"))
+
+    own = json.dumps({"origin": master_data.origin, "entries": [["product", "code", "P1"]]})
+    master_data._on_message(own)
+    with query_counter() as counter:
+        master_data.rows(db_session, "product", ["P1"])
+    assert counter.count == 0
+
+    other = json.dumps({"origin": "another-worker", "entries": [["product", "code", "P1"]]})
+    master_data._on_message(other)
+    with query_counter() as counter:
+        master_data.rows(db_session, "product", ["P1"])
+    assert counter.statements_matching("FROM products") == 1
+    assert CHANNEL == "md:invalidate"
@@ -0,0 +1,90 @@
+"""Persisted order totals."""
+from datetime import date
+from decimal import Decimal
+
+from app.models import Employee, Order, OrderItem, OrderStatusEnum, Vehicle
+from app.services.order_totals import OrderTotalsService
+
+
+def _order(db_session, **extra):
+    order = Order(
+        order_number="T-TOT-1", customer_id="C1", customer_name="Chemist", pso_id="P1", pso_name="PSO",
+        delivery_date=date.today(), status=OrderStatusEnum.APPROVED, **extra,
+    )
+    order.items.append(OrderItem(
+        product_code="P1", product_name="Med 1", quantity=10, free_goods=2, trade_price=100,
+        discount_percent=10, delivery_date=date.today(), selected=True,
+    ))
+    order.items.append(OrderItem(
+        product_code="P2", product_name="Med 2", quantity=5, total_quantity=5, trade_price=20,
+        unit_price=30, delivery_date=date.today(), selected=False,
+    ))
+    db_session.add(order)
+    db_session.commit()
+    return order
+
+
+def _totals(order):
+    return (
+        order.gross_amount, order.discount_amount, order.net_amount, order.selected_amount, order.item_count,
+        order.trade_amount,
+    )
+
+
+def test_totals_follow_item_writes(db_session):
+    order = _order(db_session)
+    # 12 x 100 less 10% + 5 x 30; trade value counts total quantity only (5 x 20)
+    assert _totals(order) == (Decimal("1350"), Decimal("120"), Decimal("1230"), Decimal("1080"), 2, Decimal("100"))
+
+    order.items[1].selected = True
+    db_session.add(OrderItem(
+        order_id=order.id, product_code="P3", product_name="Med 3", quantity=1,
+        trade_price=50, delivery_date=date.today(), selected=True,
+    ))
+    db_session.commit()
+    assert _totals(order) == (Decimal("1400"), Decimal("120"), Decimal("1280"), Decimal("1280"), 3, Decimal("100"))
+
+    item = order.items[0]
+    order.items.remove(item)
+    db_session.delete(item)
+    db_session.commit()
+    assert _totals(order) == (Decimal("200"), Decimal("0"), Decimal("200"), Decimal("200"), 2, Decimal("100"))
+
+
+def test_backfill_matches_incremental_totals(db_session):
+    order = _order(db_session)
+    expected = _totals(order)
+    db_session.query(Order).update({
+        "gross_amount": None, "discount_amount": None, "net_amount": None,
+        "selected_amount": None, "item_count": None, "trade_amount": None,
+    })
+    db_session.commit()
+
+    assert OrderTotalsService.backfill(db_session, only_missing=True) == 1
+    db_session.refresh(order)
+    assert _totals(order) == expected
+    assert OrderTotalsService.backfill(db_session, only_missing=True) == 0
+
+
+def test_assigned_list_reads_stored_totals(client, db_session, admin_user, auth_headers, query_counter):
+    vehicle = Vehicle(vehicle_id="V1", registration_number="DHA-1", vehicle_type="Truck")
+    db_session.add(vehicle)
+    db_session.flush()
+    _order(db_session, assigned_to=admin_user.id, assigned_vehicle=vehicle.id, loaded=True)
+
+    with query_counter() as counter:
+        resp = client.get("/api/orders/assigned", headers=auth_headers)
+    assert resp.status_code == 200
+    (row,) = resp.json()
+    assert (row["total_value"], row["items_count"]) == (1230.0, 2)
+    assert counter.statements_matching("order_items") == 0
+
+
+def test_mis_memo_total_is_the_trade_value(client, db_session, auth_headers, query_counter):
+    order = _order(db_session)
+    with query_counter() as counter:
+        (row,) = client.get("/api/orders/mis-report", headers=auth_headers).json()
+    assert float(row["total_amount"]) == 100.0  # trade price x total quantity, as the memo detail shows
+    assert counter.statements_matching("order_items") == 0
+    detail = client.get(f"/api/orders/mis-report/{order.id}", headers=auth_headers).json()
+    assert float(detail["total_amount"]) == float(row["total_amount"])
@@ -0,0 +1,61 @@
+"""Keyset pagination and NDJSON streaming on order lists."""
+import json
+from datetime import date, datetime, timedelta
+
+from app.models import Order, OrderStatusEnum, Vehicle
+
+
+def _seed(db_session, admin_user, count=7):
+    vehicle = Vehicle(vehicle_id="V1", registration_number="DHA-1", vehicle_type="Truck")
+    db_session.add(vehicle)
+    db_session.flush()
+    base = datetime(2026, 1, 1, 8, 0)
+    for n in range(count):
+        db_session.add(Order(
+            order_number=f"T-PAGE-{n}", customer_id="C1", customer_name="Chemist", pso_id="P1", pso_name="PSO",
+            delivery_date=date(2026, 1, 1) + timedelta(days=n % 3), status=OrderStatusEnum.APPROVED,
+            # Ties on created_at and missing assignment dates exercise the tie-breaker and NULL handling
+            created_at=base + timedelta(minutes=n // 2),
+            assignment_date=None if n % 3 == 0 else base + timedelta(hours=n % 2),
+            assigned_to=admin_user.id, assigned_vehicle=vehicle.id, loaded=True,
+        ))
+    db_session.commit()
+
+
+def _walk(client, url, headers, limit):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get(url, params=params, headers=headers)
+        assert resp.status_code == 200
+        assert len(resp.json()) <= limit
+        ids += [row["id"] for row in resp.json()]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+
+
+def test_keyset_pages_match_unpaginated_order(client, db_session, admin_user, auth_headers):
+    _seed(db_session, admin_user)
+    for url in ("/api/orders/mis-report", "/api/orders/assigned"):
+        full = [row["id"] for row in client.get(url, headers=auth_headers).json()]
+        assert len(full) == 7
+        for limit in (1, 2, 3):
+            assert _walk(client, url, auth_headers, limit) == full
+
+
+def test_stream_returns_ndjson_rows(client, db_session, admin_user, auth_headers):
+    _seed(db_session, admin_user)
+    full = client.get("/api/orders/assigned", headers=auth_headers).json()
+
+    resp = client.get("/api/orders/assigned", params={"stream": True}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in resp.text.splitlines()] == full
+
+
+def test_invalid_cursor_is_rejected(client, auth_headers):
+    resp = client.get("/api/orders/mis-report", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert resp.status_code == 400
@@ -0,0 +1,45 @@
+"""Principal resolution and the process principal cache."""
+from app.auth import get_password_hash
+from app.core.principal import principal_cache
+from app.models import Depot, Employee
+
+
+def _login(client, db_session):
+    depot = Depot(name="Depot A", code="DEP-A", city="Dhaka")
+    db_session.add(depot)
+    db_session.flush()
+    user = Employee(
+        employee_id="EMP-A", email="depot_a@test.com", first_name="Depot", last_name="User",
+        hashed_password=get_password_hash("secret123"), role="manager", depot_id=depot.id,
+        is_active=True, is_blocked=False,
+    )
+    db_session.add(user)
+    db_session.commit()
+    resp = client.post("/api/auth/login", json={"email": "depot_a@test.com", "password": "secret123", "remember_me": False})
+    return user, {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def test_repeat_requests_skip_user_and_depot_lookups(client, db_session, query_counter):
+    _, headers = _login(client, db_session)
+    assert client.get("/api/orders", headers=headers).status_code == 200
+    with query_counter() as counter:
+        assert client.get("/api/orders", headers=headers).status_code == 200
+    assert counter.statements_matching("FROM employees") == 0
+    assert counter.statements_matching("FROM depots") == 0
+
+
+def test_blocking_an_employee_invalidates_the_cache(client, db_session):
+    user, headers = _login(client, db_session)
+    assert client.get("/api/auth/permissions", headers=headers).status_code == 200
+    user.is_blocked = True
+    db_session.commit()
+    assert client.get("/api/auth/permissions", headers=headers).status_code == 403
+
+
+def test_cache_is_bounded(db_session, admin_user):
+    cache = type(principal_cache)(ttl_seconds=60, max_entries=1)
+    db_session.add(Employee(employee_id="E2", email="second@test.com", first_name="Second", is_active=True))
+    db_session.commit()
+    cache.user(db_session, "admin@test.com")
+    cache.user(db_session, "second@test.com")
+    assert list(cache._users) == ["second@test.com"]
@@ -0,0 +1,72 @@
+"""Compiled promotion catalogue."""
+from datetime import date, timedelta
+
+from app.models import Customer, Depot, Order, OrderItem, OrderStatusEnum, Product
+from app.models_platform import Promotion, PromotionCustomer, PromotionDepot, PromotionRule, PromotionStatusEnum
+from app.services.promotion_service import PromotionService, promotion_catalog
+
+
+def _seed(db_session):
+    customer = Customer(name="Chemist", code="C300", is_active=True, credit_limit=100000)
+    other = Customer(name="Other", code="C301", is_active=True, credit_limit=100000)
+    product = Product(name="Med P", code="PRD300", sku="SKU300", is_active=True, base_price=10)
+    depot = Depot(code="D300", name="Depot 300")
+    db_session.add_all([customer, other, product, depot])
+    db_session.flush()
+    promo = Promotion(
+        promotion_code="PROMO-300", promotion_name="Ten off", promotion_type="DISCOUNT",
+        start_date=date.today() - timedelta(days=1), end_date=date.today() + timedelta(days=1),
+        status=PromotionStatusEnum.ACTIVE,
+    )
+    db_session.add(promo)
+    db_session.flush()
+    db_session.add_all([
+        PromotionRule(promotion_id=promo.id, rule_type="DISCOUNT", benefit_json={"discount_percent": 10}),
+        PromotionCustomer(promotion_id=promo.id, customer_id=customer.id),
+        PromotionDepot(promotion_id=promo.id, depot_id=depot.id),
+    ])
+    order = Order(
+        order_number="T-PROMO-1", customer_id="C300", customer_name="Chemist", customer_code="C300",
+        depot_code="D300", pso_id="P1", pso_name="PSO", delivery_date=date.today(),
+        status=OrderStatusEnum.DRAFT, order_type="COD",
+    )
+    db_session.add(order)
+    db_session.flush()
+    item = OrderItem(
+        order_id=order.id, product_code="PRD300", product_name="Med P",
+        quantity=5, trade_price=10, delivery_date=date.today(), selected=True,
+    )
+    db_session.add(item)
+    db_session.commit()
+    return customer, other, product, promo, order, item
+
+
+def test_evaluation_is_in_memory_and_respects_scopes(db_session, query_counter):
+    customer, other, product, _, order, item = _seed(db_session)
+    for obj in (customer, other, product, order, item):
+        db_session.refresh(obj)
+    snapshot = promotion_catalog.snapshot(db_session)
+    products = {product.code: product}
+
+    with query_counter() as counter:
+        messages = PromotionService.simulate_for_order(
+            db_session, order, [item], customer, snapshot=snapshot, products=products,
+        )
+        excluded = PromotionService.simulate_for_order(
+            db_session, order, [item], other, snapshot=snapshot, products=products,
+        )
+    assert counter.count == 0
+    assert [m["message"] for m in messages] == ["Promotion PROMO-300: 10% discount on Med P"]
+    assert excluded == []
+
+
+def test_promotion_write_invalidates_snapshot(db_session):
+    customer, _, _, promo, order, item = _seed(db_session)
+    first = promotion_catalog.snapshot(db_session)
+    assert promotion_catalog.snapshot(db_session) is first
+
+    promo.status = PromotionStatusEnum.INACTIVE
+    db_session.commit()
+
+    assert promotion_catalog.snapshot(db_session).promotions == ()
+    assert PromotionService.simulate_for_order(db_session, order, [item], customer) == []
@@ -0,0 +1,68 @@
+"""EXPLAIN checks: hot lifecycle queries must be served by an index, not a table scan."""
+from datetime import date
+
+import pytest
+from sqlalchemy import or_, select
+
+from app.models import (
+    CollectionTransaction, Order, OrderItem, OrderStatusEnum, ProductItemStock, ProductItemStockDetail,
+)
+from app.models_platform import OrderBatchAllocation, SyncQueue
+from app.services.fefo_index import SELLABLE_STATUSES
+
+# Same filters as the routers and services they are named after
+HOT_QUERIES = {
+    "mobile assigned memos": select(Order.id).filter(
+        Order.loading_number.isnot(None), Order.assigned_to.isnot(None), Order.loaded == True,  # noqa: E712
+    ).order_by(Order.loading_number.asc()),
+    "loading number memos": select(Order.id).filter(Order.loading_number == "20260101-0001"),
+    "route-wise unloaded": select(Order.id).filter(
+        Order.route_code == "R1",
+        Order.status.in_([OrderStatusEnum.APPROVED, OrderStatusEnum.PARTIALLY_APPROVED]),
+        Order.loaded == False,  # noqa: E712
+    ),
+    "depot order list": select(Order.id).filter(Order.depot_code == "D1").order_by(Order.created_at.desc()).limit(50),
+    "pending validation": select(Order.id).filter(Order.validated == False)  # noqa: E712
+    .order_by(Order.created_at.desc()).limit(200),
+    "pending print": select(Order.id).filter(Order.printed == False, Order.validated == True),  # noqa: E712
+    "collection approvals": select(Order.id).filter(
+        or_(Order.collection_status == "Partially Collected", Order.collection_status == "Postponed"),
+        Order.collection_source == "Mobile App",
+        Order.collection_approved == False,  # noqa: E712
+    ),
+    "delivery date range": select(Order.id).filter(
+        Order.delivery_date >= date(2026, 1, 1), Order.delivery_date <= date(2026, 1, 31),
+    ),
+    "assigned to employee": select(Order.id).filter(Order.assigned_to == 7),
+    "order items": select(OrderItem.id).filter(OrderItem.order_id.in_([1, 2, 3])),
+    "fefo batches": select(ProductItemStockDetail.id, ProductItemStock.depot_id)
+    .join(ProductItemStock, ProductItemStock.id == ProductItemStockDetail.item_code)
+    .filter(
+        ProductItemStockDetail.available_quantity > 0,
+        or_(ProductItemStockDetail.status.in_(SELLABLE_STATUSES), ProductItemStockDetail.status.is_(None)),
+        ProductItemStock.product_id.in_([1, 2]),
+    ),
+    "near expiry": select(ProductItemStockDetail.id).filter(
+        ProductItemStockDetail.expiry_date <= date(2026, 4, 1), ProductItemStockDetail.available_quantity > 0,
+    ).limit(500),
+    "reserved allocations": select(OrderBatchAllocation.id).filter(
+        OrderBatchAllocation.order_id.in_([1, 2]), OrderBatchAllocation.allocation_status == "RESERVED",
+    ),
+    "sync failures": select(SyncQueue.id).filter(SyncQueue.status == "FAILED")
+    .order_by(SyncQueue.created_at.desc()).limit(200),
+    "order collections": select(CollectionTransaction.id).filter(CollectionTransaction.order_id == 1),
+}
+
+
+def explain(db, statement):
+    compiled = statement.compile(dialect=db.bind.dialect, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_an_index(db_session, name):
+    plan = explain(db_session, HOT_QUERIES[name])
+    scans = [step for step in plan if step.startswith("SCAN ") and " INDEX " not in step]
+    assert not scans, f"{name} scans a table: {plan}"
@@ -0,0 +1,64 @@
+"""Read/write routing with an SQLite file standing in for the replica."""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.database import REQUEST_STATE_KEY, Base
+from app.models import Depot
+from app.read_replica import ReplicaRouter, RoutingSession, read_router
+
+
+@pytest.fixture
+def engines(tmp_path):
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for bind, name in ((primary, "Primary depot"), (replica, "Replica depot")):
+        Base.metadata.create_all(bind=bind, tables=[Depot.__table__])
+        with RoutingSession(bind, None) as db:
+            db.add(Depot(code="D1", name=name))
+            db.commit()
+    yield primary, replica
+    primary.dispose()
+    replica.dispose()
+
+
+def test_reads_use_the_replica_until_the_session_writes(engines):
+    primary, replica = engines
+    with RoutingSession(primary, replica, autoflush=False) as db:
+        assert db.query(Depot.name).scalar() == "Replica depot"
+        db.add(Depot(code="D2", name="New depot"))
+        db.flush()
+        assert db.query(Depot.name).order_by(Depot.id).all() == [("Primary depot",), ("New depot",)]
+        db.rollback()
+
+
+def test_core_writes_pin_the_writer(engines, monkeypatch):
+    primary, replica = engines
+    monkeypatch.setattr(read_router, "replica", replica)
+    monkeypatch.setattr(read_router, "_pins", {})
+    with Session(primary) as db:
+        db.info[REQUEST_STATE_KEY] = SimpleNamespace(principal=SimpleNamespace(user_id=7))
+        db.execute(insert(Depot.__table__).values(code="D3", name="Bulk depot"))  # no flush
+        db.commit()
+    assert read_router.replica_for(7) is None
+    assert read_router.replica_for(8) is replica
+
+
+def test_router_falls_back_to_the_primary(engines, tmp_path):
+    _, replica = engines
+    router = ReplicaRouter(replica, max_lag=5, check_seconds=0, retry_seconds=60, pin_seconds=60)
+    assert router.replica_for(1) is replica
+
+    router.pin(1)  # user 1 just wrote
+    assert router.replica_for(1) is None
+    assert router.replica_for(2) is replica
+
+    router.lag = lambda: 12.0  # behind the staleness bound
+    assert router.replica_for(2) is None
+    assert router.status()["lag_seconds"] == 12.0
+
+    down = ReplicaRouter(create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"), retry_seconds=60)
+    assert down.replica_for(2) is None
+    assert down.status()["healthy"] is False
@@ -0,0 +1,92 @@
+"""Cache layer: tags, single flight, stale-while-revalidate and catalogue handlers."""
+import threading
+import time
+
+from app.redis_cache import Cache, MemoryBackend, RedisBackend, cache, cached
+
+
+def test_tags_drop_dependent_entries_and_metrics_count():
+    local = Cache(MemoryBackend())
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value, ()
+
+    assert local.get_or_compute("prices", "a", lambda: compute(1), 60, 0, tags=("products",)) == 1
+    assert local.get_or_compute("prices", "a", lambda: compute(2), 60, 0, tags=("products",)) == 1
+    assert local.invalidate_tags("products") == 1
+    assert local.get_or_compute("prices", "a", lambda: compute(3), 60, 0, tags=("products",)) == 3
+    assert calls == [1, 3]
+    assert local.metrics()["prices"]["hits"] == 1
+    assert local.metrics()["prices"]["misses"] == 2
+
+
+def test_concurrent_misses_compute_once():
+    local = Cache(MemoryBackend())
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value", ()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(local.get_or_compute("slow", "k", compute, 60, 0)))
+        for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 6
+    assert len(calls) == 1
+    assert local.metrics()["slow"]["coalesced"] == 5
+
+
+def test_stale_entries_are_served_while_one_caller_revalidates():
+    backend = MemoryBackend()
+    local = Cache(backend)
+    local.get_or_compute("kpis", "k", lambda: ("old", ()), 0, 60)
+
+    token = backend.acquire("cache:kpis:k:lock", 10)  # another worker is recomputing
+    assert local.get_or_compute("kpis", "k", lambda: ("new", ()), 0, 60) == "old"
+    backend.release("cache:kpis:k:lock", token)
+    assert local.get_or_compute("kpis", "k", lambda: ("new", ()), 0, 60) == "new"
+    assert local.metrics()["kpis"]["stale_hits"] == 1
+    assert local.metrics()["kpis"]["revalidations"] == 1
+
+
+def test_unreachable_redis_falls_through():
+    local = Cache(RedisBackend("redis://127.0.0.1:1/0"))
+    assert local.get_or_compute("down", "k", lambda: ("computed", ()), 60, 0) == "computed"
+    assert local.get_or_compute("down", "k", lambda: ("again", ()), 60, 0) == "again"
+    assert local.metrics()["down"]["errors"] == 1  # later calls skip Redis until the retry window ends
+
+
+def test_decorated_functions_key_by_argument():
+    cache.clear()
+    calls = []
+
+    @cached("square", ttl=60)
+    def square(n):
+        calls.append(n)
+        return n * n
+
+    assert [square(2), square(2), square(3)] == [4, 4, 9]
+    assert calls == [2, 3]
+
+
+def test_catalogue_list_is_cached_until_a_product_changes(client, db_session, auth_headers, query_counter):
+    client.post("/api/products/", json={"name": "Napa", "code": "P1", "is_active": True}, headers=auth_headers)
+    first = client.get("/api/products/", headers=auth_headers)
+    assert [p["name"] for p in first.json()] == ["Napa"]
+
+    with query_counter() as counter:
+        again = client.get("/api/products/", headers=auth_headers)
+    assert again.content == first.content
+    assert counter.statements_matching("FROM products") == 0
+
+    client.post("/api/products/", json={"name": "Ace", "code": "P2", "is_active": True}, headers=auth_headers)
+    assert [p["name"] for p in client.get("/api/products/", headers=auth_headers).json()] == ["Ace", "Napa"]
@@ -0,0 +1,52 @@
+"""Loading report, money receipt and the shared report kit."""
+import io
+from datetime import date
+
+from PyPDF2 import PdfReader
+
+from app.models import Order, OrderStatusEnum
+from app.reports import kit
+from app.reports.packing_report import COLUMN_HEADER
+
+
+def _seed(db_session, count=3):
+    for n in range(count):
+        db_session.add(Order(
+            order_number=f"LD-{n}", memo_number=f"M{n}", customer_id="C1", customer_code="C1", customer_name="Chemist",
+            pso_id="P1", pso_name="PSO", delivery_date=date(2026, 1, 1), status=OrderStatusEnum.APPROVED,
+            loading_number="L-1", depot_name="Central Store",
+            collection_approved=n < 2, collected_amount=100, pending_amount=n,
+        ))
+    db_session.commit()
+
+
+def _text(content: bytes) -> str:
+    return "".join(page.extract_text() for page in PdfReader(io.BytesIO(content)).pages)
+
+
+def test_loading_report_lists_every_memo(client, db_session, auth_headers):
+    _seed(db_session)
+    resp = client.get("/api/orders/loading-report/L-1", headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/pdf"
+    text = _text(resp.content)
+    assert "LOADING REPORT" in text
+    assert all(memo in text for memo in ("M0", "M1", "M2"))
+    assert "Grand Total:" in text
+
+
+def test_money_receipt_covers_approved_orders_only(client, db_session, auth_headers):
+    _seed(db_session)
+    resp = client.get("/api/orders/money-receipt/L-1", headers=auth_headers)
+    assert resp.status_code == 200
+    text = _text(resp.content)
+    assert "MONEY RECEIPT" in text
+    assert "M1" in text and "M2" not in text
+    assert client.get("/api/orders/money-receipt/NOPE", headers=auth_headers).status_code == 404
+
+
+def test_static_paragraph_parses_once():
+    first = kit.static_paragraph("Memo<br/>No", COLUMN_HEADER)
+    second = kit.static_paragraph("Memo<br/>No", COLUMN_HEADER)
+    assert first is not second
+    assert first.frags is second.frags
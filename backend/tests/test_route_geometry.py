@@ -0,0 +1,93 @@
+"""Route geometry: stored legs kept current per stop, vectorized recompute, O(1) reads."""
+from datetime import date
+
+import pytest
+from haversine import Unit, haversine
+
+from app.models import Depot, Driver, Route, RouteStop, TransportExpense, Trip, Vehicle
+from app.services.report_registry import run_report
+from app.services.route_geometry import RouteGeometryService, haversine_km
+
+POINTS = [(23.8103, 90.4125), (23.7465, 90.3760), (23.7104, 90.4074), (22.3569, 91.7832), (24.8949, 91.8687)]
+
+
+def _stored(db_session, route_id):
+    db_session.expire_all()
+    stops = db_session.query(RouteStop).filter(RouteStop.route_id == route_id).order_by(RouteStop.stop_sequence)
+    return [(s.id, float(s.leg_km), float(s.cumulative_km)) for s in stops]
+
+
+def test_vectorized_haversine_matches_the_package():
+    starts, ends = POINTS[:-1], POINTS[1:]
+    lat1, lon1 = zip(*starts)
+    lat2, lon2 = zip(*ends)
+    expected = [haversine(a, b, unit=Unit.KILOMETERS) for a, b in zip(starts, ends)]
+    assert haversine_km(lat1, lon1, lat2, lon2).tolist() == pytest.approx(expected, abs=1e-9)
+
+
+def test_stop_edits_update_only_their_legs(client, db_session, auth_headers, query_counter):
+    route = Route(route_id="R1", name="Route 1")
+    db_session.add(route)
+    db_session.commit()
+    stops_url = f"/api/transport/routes/{route.id}/stops"
+
+    # Appended in order, then one stop inserted in the middle and one without coordinates
+    for sequence, (lat, lon) in zip((1, 2, 4, 5), (POINTS[0], POINTS[1], POINTS[3], POINTS[4])):
+        client.post(stops_url, headers=auth_headers, json={
+            "route_id": route.id, "stop_sequence": sequence, "latitude": lat, "longitude": lon,
+        })
+    client.post(stops_url, headers=auth_headers, json={
+        "route_id": route.id, "stop_sequence": 3, "latitude": POINTS[2][0], "longitude": POINTS[2][1],
+    })
+    blank = client.post(stops_url, headers=auth_headers, json={"route_id": route.id, "stop_sequence": 6}).json()
+    removed = db_session.query(RouteStop).filter(RouteStop.stop_sequence == 4).one().id
+    client.delete(f"/api/transport/routes/stops/{removed}", headers=auth_headers)
+
+    kept = [POINTS[0], POINTS[1], POINTS[2], POINTS[4]]
+    legs = [haversine(a, b, unit=Unit.KILOMETERS) for a, b in zip(kept, kept[1:])]
+    with query_counter() as counter:
+        body = client.get(f"/api/transport/routes/{route.id}/distance", headers=auth_headers).json()
+    assert counter.statements_matching("FROM route_stops") == 1  # the cumulative array; no legs recomputed
+    assert body["distance_km"] == round(sum(legs), 2)
+    assert body["cumulative_km"] == [round(sum(legs[:n]), 2) for n in range(4)] + [round(sum(legs), 2)]
+
+    stored = _stored(db_session, route.id)
+    assert stored[-1] == (blank["id"], 0.0, pytest.approx(sum(legs), abs=1e-3))
+    RouteGeometryService.recompute(db_session, [route.id])
+    assert _stored(db_session, route.id) == [pytest.approx(row, abs=1e-3) for row in stored]
+
+
+def test_recompute_covers_all_routes_and_feeds_cost_per_km(db_session):
+    depot = Depot(name="Main", code="MAIN", city="Dhaka")
+    vehicle = Vehicle(vehicle_id="V1", vehicle_type="Van", registration_number="DHA-1", depot=depot)
+    driver = Driver(driver_id="D1", first_name="Karim", license_number="L-1")
+    # Two routes over the same first leg, and one without stops
+    routes = [Route(route_id=f"R{n}", name=f"Route {n}", depot=depot) for n in (1, 2, 3)]
+    db_session.add_all([vehicle, driver, *routes])
+    db_session.flush()
+    for route, points in zip(routes, ([POINTS[0], POINTS[1]], [POINTS[0], POINTS[1], POINTS[2]], [])):
+        db_session.add_all([
+            RouteStop(route_id=route.id, stop_sequence=n, latitude=lat, longitude=lon)
+            for n, (lat, lon) in enumerate(points, start=1)
+        ])
+    db_session.add(Trip(
+        trip_number="TRP-1", vehicle=vehicle, driver=driver, route=routes[1], trip_date=date(2026, 1, 5),
+        expenses=[TransportExpense(expense_type="fuel", amount=200, expense_date=date(2026, 1, 5))],
+    ))
+    db_session.commit()
+
+    totals = RouteGeometryService.recompute(db_session)
+    first_leg = haversine(POINTS[0], POINTS[1], unit=Unit.KILOMETERS)
+    second_leg = haversine(POINTS[1], POINTS[2], unit=Unit.KILOMETERS)
+    assert totals == {
+        routes[0].id: pytest.approx(first_leg, abs=1e-3),
+        routes[1].id: pytest.approx(first_leg + second_leg, abs=1e-3),
+        routes[2].id: 0.0,
+    }
+
+    rows = run_report(db_session, "cost_per_km", {"date_from": "2026-01-01", "depot_code": "MAIN"})["rows"]
+    km = round(first_leg + second_leg, 2)
+    assert rows == [{
+        "route": "Route 2", "trips": 1, "route_km": km, "total_km": km, "cost": 200.0,
+        "cost_per_km": round(200 / km, 2),
+    }]
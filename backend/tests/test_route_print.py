@@ -0,0 +1,85 @@
+"""Route-wise print pipeline."""
+import os
+from datetime import date
+
+from PyPDF2 import PdfReader
+import io
+
+from app.models import Customer, Order, OrderItem, OrderStatusEnum, PriceSetup, Product
+from app.reports import print_pipeline
+
+
+def _seed(db_session, count=3):
+    db_session.add(Customer(name="Chemist One", code="C1", phone="017", address="Dhaka", is_active=True))
+    product = Product(name="Med", code="P1", sku="S1", is_active=True, base_price=10, mc_result=4)
+    db_session.add(product)
+    db_session.flush()
+    db_session.add(PriceSetup(code="PS1", product_id=product.id, trade_price=12, is_active=True))
+    orders = []
+    for n in range(count):
+        order = Order(
+            order_number=f"PR-{n}", customer_id="C1", customer_code="C1", customer_name="Chemist", pso_id="P1",
+            pso_name="PSO", delivery_date=date(2026, 1, 1), status=OrderStatusEnum.APPROVED, route_code="R1",
+            validated=True, printed=False,
+        )
+        order.items = [OrderItem(product_code="P1", product_name="Med", quantity=2, unit_price=10, selected=True,
+                                 delivery_date=date(2026, 1, 1))]
+        db_session.add(order)
+        orders.append(order)
+    db_session.commit()
+    return orders
+
+
+def test_print_prefetches_references_and_merges_one_pdf(client, db_session, auth_headers, query_counter):
+    orders = _seed(db_session)
+    with query_counter() as counter:
+        resp = client.post("/api/orders/route-wise/print", json={"order_ids": [o.id for o in orders]}, headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/pdf"
+    # packing report + one page per invoice
+    assert len(PdfReader(io.BytesIO(resp.content)).pages) == 4
+    assert counter.statements_matching("FROM customers") == 1
+    assert counter.statements_matching("FROM products") == 1
+    assert counter.statements_matching("FROM price_setups") == 1
+    db_session.expire_all()
+    assert all(o.printed and o.memo_number for o in db_session.query(Order).all())
+
+
+def test_invoice_payload_uses_prefetched_trade_price(db_session):
+    orders = _seed(db_session, count=1)
+    db_session.refresh(orders[0])
+    from app.reports.invoice_report import build_invoice_payload, prefetch_invoice_refs
+
+    payload = build_invoice_payload(orders[0], prefetch_invoice_refs(db_session, orders))
+    assert payload["customer_phone"] == "017"
+    assert payload["trade_items"][0]["trade_price"] == 12
+    assert payload["trade_items"][0]["unit"] == "1*4 = 4S"
+
+
+def test_background_job_reports_status_and_serves_pdf(
+    client, db_session, auth_headers, user_auth_headers, tmp_path, monkeypatch,
+):
+    monkeypatch.setattr(print_pipeline, "JOB_DIR", str(tmp_path))
+    expired = tmp_path / f"{'0' * 32}.pdf"
+    expired.write_bytes(b"%PDF")
+    os.utime(expired, (0, 0))
+    orders = _seed(db_session)
+    resp = client.post(
+        "/api/orders/route-wise/print", json={"order_ids": [o.id for o in orders], "background": True},
+        headers=auth_headers,
+    )
+    assert resp.status_code == 202
+    job_id = resp.json()["job_id"]
+
+    # TestClient runs background tasks before returning
+    job = client.get(f"/api/orders/route-wise/print/jobs/{job_id}", headers=auth_headers).json()
+    assert job["status"] == "completed"
+    pdf = client.get(f"/api/orders/route-wise/print/jobs/{job_id}/download", headers=auth_headers)
+    assert pdf.status_code == 200
+    assert len(PdfReader(io.BytesIO(pdf.content)).pages) == 4
+    assert client.get("/api/orders/route-wise/print/jobs/../etc", headers=auth_headers).status_code == 404
+
+    # Only the user who started the job sees it; old job files are swept on the next job
+    for url in (f"/api/orders/route-wise/print/jobs/{job_id}", f"/api/orders/route-wise/print/jobs/{job_id}/download"):
+        assert client.get(url, headers=user_auth_headers).status_code == 404
+    assert not expired.exists()
@@ -0,0 +1,78 @@
+"""Route-wise dashboard: grouped stats, lazy items and the depot-scoped cache."""
+from datetime import date
+
+from app.models import Order, OrderItem, OrderStatusEnum, Route
+
+
+def _seed(db_session, routes=3):
+    for r in range(routes):
+        db_session.add(Route(route_id=f"R{r}", name=f"Route {r}", status="Active"))
+        flags = [
+            dict(validated=True, loaded=False, printed=True, memo_number=f"1000000{r}"),
+            dict(validated=True, loaded=False, printed=False),  # memo assigned on first listing
+            dict(validated=True, loaded=True, printed=True, memo_number=f"2000000{r}"),
+            dict(validated=False, loaded=False),
+        ]
+        for n, extra in enumerate(flags):
+            order = Order(
+                order_number=f"RW-{r}-{n}", customer_id="C1", customer_name="Chemist", pso_id="P1", pso_name="PSO",
+                delivery_date=date(2026, 1, 1), status=OrderStatusEnum.APPROVED, route_code=f"R{r}", **extra,
+            )
+            order.items = [
+                OrderItem(product_code="P1", product_name="Med", quantity=2, unit_price=10, selected=True,
+                          delivery_date=date(2026, 1, 1)),
+                OrderItem(product_code="P2", product_name="Med", quantity=1, unit_price=5, selected=False,
+                          delivery_date=date(2026, 1, 1)),
+            ]
+            db_session.add(order)
+    db_session.commit()
+
+
+def test_route_cards_use_constant_queries(client, db_session, auth_headers, query_counter):
+    _seed(db_session, routes=2)
+    client.get("/api/orders/route-wise/all", headers=auth_headers)  # assigns missing memo numbers
+    client.post("/api/orders/route-wise/validate", json={"route_code": "R0"}, headers=auth_headers)
+    _seed_more = [Route(route_id=f"X{i}", name=f"Extra {i}", status="Active") for i in range(20)]
+    db_session.add_all(_seed_more)
+    db_session.commit()
+
+    with query_counter() as counter:
+        resp = client.get("/api/orders/route-wise/all", headers=auth_headers)
+    assert resp.status_code == 200
+    # missing memos, the new memo's clash check and stats (items come FROM order_items): not one query per route
+    assert counter.statements_matching("FROM orders") == 3
+    assert counter.statements_matching("FROM order_items") == 1
+    cards = {card["route_code"]: card for card in resp.json()}
+    assert len(cards) == 22
+    assert cards["R1"]["stats"] == {
+        "total_order": 2, "validated": 2, "printed": 1, "pending_print": 1, "loaded": 1, "postponed": 0,
+    }
+    assert len(cards["R1"]["items"]) == 2
+    assert all(item["memo_number"] for item in cards["R1"]["items"])
+    assert cards["R0"]["stats"]["total_order"] == 3  # the unvalidated order was validated above
+    assert cards["X0"]["items"] == []
+
+
+def test_cache_is_dropped_when_a_route_changes(client, db_session, auth_headers, query_counter):
+    _seed(db_session, routes=2)
+    first = client.get("/api/orders/route-wise/all", params={"include_items": False}, headers=auth_headers).json()
+    assert all(card["items"] == [] for card in first)
+
+    with query_counter() as counter:
+        again = client.get("/api/orders/route-wise/all", params={"include_items": False}, headers=auth_headers)
+    assert again.json() == first
+    assert counter.statements_matching("FROM orders") == 0
+
+    client.post("/api/orders/route-wise/validate", json={"route_code": "R1"}, headers=auth_headers)
+    cards = {c["route_code"]: c for c in client.get(
+        "/api/orders/route-wise/all", params={"include_items": False}, headers=auth_headers,
+    ).json()}
+    assert cards["R1"]["stats"]["total_order"] == 3
+
+
+def test_items_load_per_route(client, db_session, auth_headers):
+    _seed(db_session, routes=2)
+    resp = client.get("/api/orders/route-wise/R0/items", headers=auth_headers)
+    assert resp.status_code == 200
+    assert {item["order_number"] for item in resp.json()} == {"RW-0-0", "RW-0-1"}
+    assert client.get("/api/orders/route-wise/NOPE/items", headers=auth_headers).status_code == 404
@@ -0,0 +1,103 @@
+"""Barcode scan sessions: per-scan feedback, one-transaction commit, stale scans."""
+from datetime import date
+
+from app.models import Driver, Order, OrderStatusEnum, Route, Trip, Vehicle
+
+URL = "/api/orders/assigned/scan-sessions"
+
+
+def _seed(db_session, admin_user):
+    vehicle = Vehicle(vehicle_id="V1", vehicle_type="Van", registration_number="DHA-1")
+    db_session.add(vehicle)
+    db_session.add_all([
+        Order(
+            order_number=f"SC-{n}", memo_number=f"{n:08d}", customer_id="C1", customer_name="Chemist",
+            pso_id="P1", pso_name="PSO", delivery_date=date(2026, 1, 1), status=OrderStatusEnum.APPROVED,
+            route_code="R1", **({"loaded": True, "loading_number": "20260101-0001"} if n == 4 else {}),
+        )
+        for n in range(1, 5)
+    ])
+    db_session.commit()
+    return {"employee_id": admin_user.id, "vehicle_id": vehicle.id}
+
+
+def test_scans_get_feedback_and_commit_in_one_update(client, db_session, admin_user, auth_headers, query_counter):
+    session = client.post(URL, headers=auth_headers, json=_seed(db_session, admin_user)).json()
+    scans_url = f"{URL}/{session['session_id']}/scans"
+
+    with query_counter() as counter:
+        body = client.post(scans_url, headers=auth_headers, json={"memo_numbers": ["00000001", "00000002"]}).json()
+    assert [r["result"] for r in body["results"]] == ["accepted", "accepted"]
+    assert counter.statements_matching("FROM orders") == 0  # answered from the memo map
+
+    body = client.post(
+        scans_url, headers=auth_headers, json={"memo_numbers": ["00000002", "00000004", "99999999", "00000003"]},
+    ).json()
+    assert [r["result"] for r in body["results"]] == ["duplicate", "assigned", "not_found", "accepted"]
+    assert body["memo_numbers"] == ["00000001", "00000002", "00000003"]
+
+    body = client.delete(f"{scans_url}/00000003", headers=auth_headers).json()
+    assert body["scanned_count"] == 2
+
+    with query_counter() as counter:
+        body = client.post(f"{URL}/{session['session_id']}/commit", headers=auth_headers).json()
+    assert counter.statements_matching("UPDATE orders") == 1
+    assert body["status"] == "COMMITTED"
+    assert body["loading_number"] == f"{date.today():%Y%m%d}-0001"
+
+    db_session.expire_all()
+    loaded = {o.memo_number: (o.loaded, o.loading_number) for o in db_session.query(Order).filter(Order.id <= 3)}
+    assert loaded == {
+        "00000001": (True, body["loading_number"]),
+        "00000002": (True, body["loading_number"]),
+        "00000003": (False, None),
+    }
+    assert client.post(scans_url, headers=auth_headers, json={"memo_numbers": ["00000003"]}).status_code == 409
+
+
+def test_commit_drops_memos_another_loading_took(client, db_session, admin_user, auth_headers):
+    session = client.post(URL, headers=auth_headers, json=_seed(db_session, admin_user)).json()
+    session_url = f"{URL}/{session['session_id']}"
+    client.post(f"{session_url}/scans", headers=auth_headers, json={"memo_numbers": ["00000001", "00000002"]})
+
+    # Another clerk loads memo 2 after it was scanned here
+    taken = db_session.query(Order).filter(Order.memo_number == "00000002").one()
+    taken.loaded, taken.loading_number = True, "OTHER"
+    db_session.commit()
+
+    resp = client.post(f"{session_url}/commit", headers=auth_headers)
+    assert resp.status_code == 409
+    assert resp.json()["detail"]["memo_numbers"] == ["00000002"]
+    db_session.expire_all()
+    assert db_session.query(Order).filter(Order.memo_number == "00000001").one().loaded is False
+
+    body = client.post(f"{session_url}/commit", headers=auth_headers).json()
+    assert body["memo_numbers"] == ["00000001"]
+    assert body["loading_number"] == f"{date.today():%Y%m%d}-0001"
+
+
+def test_commit_creates_the_trip_after_transport_trips(client, db_session, admin_user, auth_headers):
+    payload = _seed(db_session, admin_user)
+    route = Route(route_id="R1", name="Route 1")
+    driver = Driver(driver_id="D1", first_name="Karim", license_number="L-1")
+    db_session.add_all([route, driver])
+    db_session.commit()
+    assignment = {
+        "vehicle_id": payload["vehicle_id"], "driver_id": driver.id, "route_id": route.id,
+        "trip_date": str(date.today()),
+    }
+    assign_url = "/api/transport/trips/assign"
+
+    # Loading and transport trips share the TRP-YYYYMM- series
+    assert client.post(assign_url, headers=auth_headers, json=assignment).status_code == 200
+    session = client.post(URL, headers=auth_headers, json=payload).json()
+    session_url = f"{URL}/{session['session_id']}"
+    client.post(f"{session_url}/scans", headers=auth_headers, json={"memo_numbers": ["00000001"]})
+    body = client.post(f"{session_url}/commit", headers=auth_headers).json()
+    assert client.post(assign_url, headers=auth_headers, json=assignment).status_code == 200
+
+    db_session.expire_all()
+    trips = db_session.query(Trip).order_by(Trip.id).all()
+    month = f"{date.today():%Y%m}"
+    assert [trip.trip_number for trip in trips] == [f"TRP-{month}-{n:04d}" for n in (1, 2, 3)]
+    assert body["loading_number"] in trips[1].notes
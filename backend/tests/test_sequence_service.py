@@ -0,0 +1,80 @@
+"""Document number sequences."""
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import Customer, Order, OrderStatusEnum
+from app.models_platform import DocumentSequence
+from app.routers.customers import generate_customer_code
+from app.routers.orders import generate_memo_numbers, next_loading_number
+from app.services import sequence_service
+from app.services.sequence_service import SequenceService
+
+
+def test_counter_continues_from_existing_codes(db_session, query_counter):
+    db_session.add_all([
+        Customer(name="A", code="CUST-0041", is_active=True),
+        Customer(name="B", code="CUST-0007", is_active=True),
+    ])
+    db_session.commit()
+    assert generate_customer_code(db_session) == "CUST-0042"
+    with query_counter() as counter:
+        assert generate_customer_code(db_session) == "CUST-0043"
+    assert counter.count == 1  # one UPDATE ... RETURNING, no scan
+
+
+def test_rollback_returns_the_number(db_session):
+    SequenceService.next_value(db_session, "test")
+    db_session.commit()
+    assert SequenceService.next_value(db_session, "test") == 2
+    db_session.rollback()
+    assert SequenceService.next_value(db_session, "test") == 2
+
+
+def test_loading_numbers_are_per_day_and_skip_route_suffixes(db_session):
+    db_session.add(Order(
+        order_number="O1", customer_id="C1", customer_name="C", pso_id="P1", pso_name="PSO",
+        delivery_date=date(2026, 1, 1), status=OrderStatusEnum.APPROVED, loading_number="20260101-0007-R1-R2",
+    ))
+    db_session.commit()
+    assert next_loading_number(db_session, date(2026, 1, 1)) == "20260101-0008"
+    assert next_loading_number(db_session, date(2026, 1, 2)) == "20260102-0001"
+
+
+def _order_with_memo(memo):
+    return Order(
+        order_number=f"O-{memo}", customer_id="C1", customer_name="C", pso_id="P1", pso_name="PSO",
+        delivery_date=date(2026, 1, 1), status=OrderStatusEnum.APPROVED, memo_number=memo,
+    )
+
+
+def test_memo_numbers_skip_old_random_memos_and_stay_eight_digits(db_session, query_counter):
+    # Older memos were random 8-digit values, some near the top of the range
+    db_session.add_all([_order_with_memo("10000002"), _order_with_memo("99999998")])
+    db_session.commit()
+    assert generate_memo_numbers(db_session, 1) == ["10000000"]
+    assert generate_memo_numbers(db_session, 3) == ["10000001", "10000003", "10000004"]
+    with query_counter() as counter:
+        memos = generate_memo_numbers(db_session, 3)
+    assert memos == ["10000005", "10000006", "10000007"]
+    assert counter.count == 2  # one allocation, one check against existing memos
+
+
+def test_blocks_are_reserved_per_worker(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'seq.db'}")
+    Base.metadata.create_all(bind=engine, tables=[DocumentSequence.__table__])
+    monkeypatch.setattr(sequence_service, "SEQUENCE_BLOCK_SIZE", 10)
+    SequenceService.reset_reservations()
+    try:
+        with Session(bind=engine) as db:
+            assert SequenceService.next_values(db, "block", 3) == [1, 2, 3]
+            db.rollback()  # reserved blocks do not depend on the caller's transaction
+            assert SequenceService.next_value(db, "block") == 4
+            assert db.get(DocumentSequence, "block").last_value == 10
+            assert SequenceService.next_values(db, "block", 8)[-1] == 12
+            assert db.get(DocumentSequence, "block").last_value == 20
+    finally:
+        SequenceService.reset_reservations()
+        engine.dispose()
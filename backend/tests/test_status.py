@@ -5,6 +5,7 @@ import pytest
 from fastapi import HTTPException
 
 from app.models import Order, OrderStatusEnum
+from app.models_platform import AuditLog, OrderStatusHistory
 from app.services.status_service import StatusTransitionService
 
 
@@ -44,3 +45,52 @@ def test_validate_transition(db_session, admin_user):
     StatusTransitionService.transition(db_session, order, "VALIDATE", admin_user, force=True)
     db_session.commit()
     assert order.delivery_status == "VALIDATED"
+
+
+def test_transition_many_moves_valid_orders_and_lists_the_rest(db_session, admin_user, query_counter):
+    def _order(n, delivery_status):
+        return Order(
+            order_number=f"S-M{n}", customer_id="C1", customer_name="Test", pso_id="P1", pso_name="PSO",
+            delivery_date=date.today(), status=OrderStatusEnum.APPROVED, delivery_status=delivery_status,
+        )
+
+    orders = [_order(n, "DELIVERY_IN_PROGRESS") for n in range(5)] + [_order(5, "VALIDATED"), _order(6, None)]
+    db_session.add_all(orders)
+    db_session.commit()
+
+    with query_counter() as counter:
+        result = StatusTransitionService.transition_many(db_session, orders, "DELIVER_FULL", admin_user)
+    db_session.commit()
+    assert counter.statements_matching("UPDATE orders") == 1
+    assert counter.statements_matching("INSERT INTO order_status_history") == 1
+
+    assert sorted(result["transitioned"]) == [o.id for o in orders[:5]]
+    assert {r["order_id"]: r["delivery_status"] for r in result["rejected"]} == {
+        orders[5].id: "VALIDATED", orders[6].id: "ORDER_CREATED",
+    }
+    db_session.expire_all()
+    moved = db_session.query(Order).filter(Order.id.in_(result["transitioned"])).all()
+    assert {(o.delivery_status, o.collection_status) for o in moved} == {("DELIVERED", "Pending")}
+    assert db_session.query(OrderStatusHistory).count() == 5
+    assert db_session.query(AuditLog).filter(AuditLog.entity_type == "order").count() == 10
+
+
+    with pytest.raises(HTTPException) as exc:
+        StatusTransitionService.transition_many(db_session, orders, "DELIVER_FULL", None)
+    assert exc.value.status_code == 403
+
+
+def test_bulk_transition_endpoint(client, db_session, auth_headers):
+    order = Order(
+        order_number="S-B1", customer_id="C1", customer_name="Test", pso_id="P1", pso_name="PSO",
+        delivery_date=date.today(), status=OrderStatusEnum.APPROVED, delivery_status="READY_TO_DISPATCH",
+    )
+    db_session.add(order)
+    db_session.commit()
+
+    body = client.post(
+        "/api/orders/transition-status", headers=auth_headers,
+        json={"event_code": "DISPATCH", "order_ids": [order.id, 999]},
+    ).json()
+    assert body["transitioned"] == [order.id]
+    assert body["rejected"] == [{"order_id": 999, "delivery_status": None, "detail": "Order not found"}]
@@ -5,6 +5,7 @@ from decimal import Decimal
 from app.models import Customer, Order, OrderItem, OrderStatusEnum, Product, ProductItemStock, ProductItemStockDetail
 from app.models_platform import OrderBatchAllocation
 from app.services.order_validation_service import OrderValidationService
+from app.services.stock_reservation_service import StockReservationService
 
 
 def _seed_order_with_stock(db_session, admin_user):
@@ -79,3 +80,30 @@ def test_revalidation_releases_then_re_reserves(db_session, admin_user):
     db_session.refresh(detail)
     assert Decimal(str(detail.reserved_quantity)) == Decimal("10")
     assert Decimal(str(detail.available_quantity)) == Decimal("90")
+
+
+def test_reserve_quantities_reports_shortfall_without_writing(db_session, admin_user):
+    _, detail = _seed_order_with_stock(db_session, admin_user)
+
+    shortfalls = StockReservationService.reserve_quantities(db_session, {detail.id: 150, 999999: 1})
+    assert [(s["stock_source_id"], s["short_qty"], s["found"]) for s in shortfalls] == [
+        (detail.id, Decimal("50"), True), (999999, Decimal("1"), False),
+    ]
+    db_session.commit()
+    db_session.refresh(detail)
+    assert Decimal(str(detail.available_quantity)) == Decimal("100")
+    assert Decimal(str(detail.reserved_quantity)) == Decimal("0")
+
+
+def test_release_and_issue_for_many_orders(db_session, admin_user):
+    order, detail = _seed_order_with_stock(db_session, admin_user)
+    OrderValidationService.validate_order(db_session, order, admin_user)
+
+    assert StockReservationService.commit_for_orders(db_session, [order.id], admin_user) == {order.id: 1}
+    db_session.commit()
+    db_session.refresh(detail)
+    assert Decimal(str(detail.available_quantity)) == Decimal("90")
+    assert Decimal(str(detail.reserved_quantity)) == Decimal("0")
+    alloc = db_session.query(OrderBatchAllocation).filter(OrderBatchAllocation.order_id == order.id).one()
+    assert alloc.allocation_status == "ISSUED"
+    assert StockReservationService.release_for_orders(db_session, [order.id], admin_user) == {}
@@ -0,0 +1,63 @@
+"""Trip listing: eager-loaded details at a constant query count, fields= projection."""
+from datetime import date
+
+from app.models import Depot, Driver, Order, OrderStatusEnum, Route, TransportExpense, Trip, Vehicle
+
+URL = "/api/transport/trips"
+
+
+def _seed(db_session, count):
+    depot = Depot(name="Main", code="MAIN", city="Dhaka")
+    vehicle = Vehicle(vehicle_id="V1", vehicle_type="Van", registration_number="DHA-1", depot=depot)
+    driver = Driver(driver_id="D1", first_name="Karim", license_number="L-1")
+    route = Route(route_id="R1", name="Route 1")
+    db_session.add_all([vehicle, driver, route])
+    db_session.flush()
+    for n in range(count):
+        order = Order(
+            order_number=f"TR-{n}", memo_number=f"{n:08d}", customer_id="C1", customer_name="Chemist",
+            pso_id="P1", pso_name="PSO", delivery_date=date(2026, 1, 1), status=OrderStatusEnum.APPROVED,
+            loading_number=f"LD-{n}",
+        )
+        trip = Trip(
+            trip_number=f"TRP-{n}", vehicle=vehicle, driver=driver, route=route, order=order,
+            trip_date=date(2026, 1, 1 + n % 28),
+        )
+        trip.expenses = [
+            TransportExpense(expense_type="fuel", amount=100, expense_date=date(2026, 1, 1)),
+            TransportExpense(expense_type="toll", amount=25, expense_date=date(2026, 1, 1)),
+        ]
+        db_session.add(trip)
+    db_session.commit()
+
+
+def test_trip_page_costs_the_same_queries_at_any_size(client, db_session, auth_headers, query_counter):
+    _seed(db_session, 12)
+    client.get(URL, headers=auth_headers, params={"limit": 1})  # warms the auth user cache
+    counts = {}
+    for limit in (2, 12):
+        with query_counter() as counter:
+            trips = client.get(URL, headers=auth_headers, params={"limit": limit}).json()
+        assert len(trips) == limit
+        counts[limit] = counter.count
+    assert counts[2] == counts[12] == 2  # trips with their details, expense totals
+
+    trip = trips[0]
+    assert trip["vehicle"]["registration_number"] == "DHA-1"
+    assert trip["driver"]["first_name"] == "Karim"
+    assert (trip["route"]["route_id"], trip["route_name"]) == ("R1", "Route 1")
+    assert trip["order"]["loading_number"].startswith("LD-")
+    assert trip["total_expenses"] == 125.0
+
+
+def test_fields_projection_skips_nested_objects(client, db_session, auth_headers, query_counter):
+    _seed(db_session, 3)
+    with query_counter() as counter:
+        trips = client.get(URL, headers=auth_headers, params={"fields": "route"}).json()
+    assert counter.statements_matching("transport_expenses") == 0
+    assert {"vehicle", "driver", "order", "total_expenses"}.isdisjoint(trips[0])
+    assert trips[0]["route_name"] == "Route 1" and trips[0]["trip_number"].startswith("TRP-")
+
+    assert client.get(URL, headers=auth_headers, params={"fields": "customer"}).status_code == 400
+    detail = client.get(f"{URL}/{trips[0]['id']}", headers=auth_headers, params={"fields": "total_expenses"}).json()
+    assert detail["total_expenses"] == 125.0 and "vehicle" not in detail
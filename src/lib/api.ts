@@ -236,6 +236,7 @@ export const apiEndpoints = {
     delete: (id: number | string) => api.delete(`/orders/${id}`),
     getRouteWise: (routeCode: string) => api.get(`/orders/route-wise/${routeCode}`),
     getAllRouteWise: () => api.get('/orders/route-wise/all'),
+    getRouteWiseItems: (routeCode: string) => api.get(`/orders/route-wise/${routeCode}/items`),
     printRouteWise: (data: any) => api.post('/orders/route-wise/print', data),
     getCollectionApprovalList: (params?: Record<string, any>) => api.get(`/orders/collection-approval${buildQuery(params)}`),
     approveCollection: (id: number) => api.post(`/orders/${id}/approve-collection`, {}),
@@ -247,7 +248,15 @@ export const apiEndpoints = {
     updateAssignedStatus: (id: number, data: any) => api.put(`/orders/assigned/${id}/status`, data),
     createAssignedFromBarcodes: (data: { memo_numbers: string[]; employee_id: number; vehicle_id: number }) => 
       api.post('/orders/assigned/from-barcodes', data),
-    approveDelivery: (data: { loading_number: string; memos: Array<{ memo_number: string; delivered_quantity: number; returned_quantity: number }> }) => 
+    openScanSession: (data: { employee_id: number; vehicle_id: number }) => api.post('/orders/assigned/scan-sessions', data),
+    getScanSession: (sessionId: string) => api.get(`/orders/assigned/scan-sessions/${sessionId}`),
+    scanMemos: (sessionId: string, memoNumbers: string[]) =>
+      api.post(`/orders/assigned/scan-sessions/${sessionId}/scans`, { memo_numbers: memoNumbers }),
+    unscanMemo: (sessionId: string, memoNumber: string) =>
+      api.delete(`/orders/assigned/scan-sessions/${sessionId}/scans/${memoNumber}`),
+    commitScanSession: (sessionId: string) => api.post(`/orders/assigned/scan-sessions/${sessionId}/commit`, {}),
+    cancelScanSession: (sessionId: string) => api.delete(`/orders/assigned/scan-sessions/${sessionId}`),
+    approveDelivery: (data: { loading_number: string; memos: Array<{ memo_number: string; delivered_quantity: number; returned_quantity: number }>; idempotency_key?: string }) => 
       api.post('/orders/assigned/approve-delivery', data),
     getMISReport: (params?: Record<string, any>) => api.get(`/orders/mis-report${buildQuery(params)}`),
     getMISReportDetail: (memoId: number | string) => api.get(`/orders/mis-report/${memoId}`),
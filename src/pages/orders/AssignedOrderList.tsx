@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback, useMemo } from "react";
+import { useState, useEffect, useCallback, useMemo, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
@@ -124,6 +124,16 @@ export default function AssignedOrderList() {
     returned_quantity: number;
   }>>([]);
   const [isApproving, setIsApproving] = useState(false);
+  // One key per loading until its approval succeeds, so a retry after a timeout is not applied twice
+  const approvalKeys = useRef<Record<string, string>>({});
+  const approvalKey = (loadingNumber: string) => {
+    if (!approvalKeys.current[loadingNumber]) {
+      // randomUUID is missing outside secure contexts (plain http on the LAN)
+      approvalKeys.current[loadingNumber] =
+        crypto.randomUUID?.() ?? `${loadingNumber}-${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    }
+    return approvalKeys.current[loadingNumber];
+  };
 
   // Load routes for filter
   const { data: routesData } = useQuery({
@@ -414,7 +424,9 @@ export default function AssignedOrderList() {
       await apiEndpoints.orders.approveDelivery({
         loading_number: group.loading_number,
         memos: memoList,
+        idempotency_key: approvalKey(group.loading_number),
       });
+      delete approvalKeys.current[group.loading_number];
       
       toast({
         title: "Delivery approved",
@@ -457,7 +469,9 @@ export default function AssignedOrderList() {
       await apiEndpoints.orders.approveDelivery({
         loading_number: selectedLoadingGroup.loading_number,
         memos: memoList,
+        idempotency_key: approvalKey(selectedLoadingGroup.loading_number),
       });
+      delete approvalKeys.current[selectedLoadingGroup.loading_number];
       
       toast({
         title: "Partial delivery approved",